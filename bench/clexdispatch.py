@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# clexdispatch.py
+#
+# Token throughput of the ANSI C lexer in example/ansic/clex.py with and
+# without the first character dispatch tables that pick which master regexs
+# to try for the next input character.
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+
+sys.path.insert(0, '..')
+sys.path.insert(0, '../example/ansic')
+import ply.lex as lex
+import clex
+
+SOURCE = '''
+/* Compute a checksum over a block of data */
+static unsigned long checksum_%d(const unsigned char *buf, int len)
+{
+    unsigned long sum = 0x%xUL;
+    int i;
+    for (i = 0; i < len; i++) {
+        sum = (sum << 5) + (sum >> 2) + buf[i] * %d;
+        if (sum >= 4294967291UL && buf[i] != '\\n')
+            sum -= 3.25e2;
+    }
+    printf("checksum %%lu\\n", sum);
+    return sum ^ ~len;
+}
+'''
+
+def make_input(nfuncs):
+    return ''.join(SOURCE % (i, i, i % 97) for i in range(nfuncs))
+
+def disable_dispatch(lexer):
+    lexer.lexstatedispatch = dict((state, lex._Dispatch(lre))
+                                  for state, lre in lexer.lexstatere.items())
+    lexer.begin(lexer.lexstate)
+
+def measure(lexer, data, repeat=3):
+    best = None
+    for i in range(repeat):
+        lexer.input(data)
+        lexer.lineno = 1
+        start = time.time()
+        ntoks = 0
+        for tok in lexer:
+            ntoks += 1
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return ntoks, best
+
+def main(nfuncs=2000):
+    data = make_input(nfuncs)
+    nchunks = len(clex.lexer.lexre)
+    nomaster = clex.lexer.clone()
+    disable_dispatch(nomaster)
+
+    print('%d characters of input, %d master regex(s) in INITIAL' % (len(data), nchunks))
+    results = []
+    for name, lexer in (('no dispatch', nomaster), ('dispatch', clex.lexer)):
+        ntoks, elapsed = measure(lexer, data)
+        results.append(elapsed)
+        print('%-12s %8d tokens %6.2fs %10.0f tokens/s' % (name, ntoks, elapsed, ntoks / elapsed))
+    print('speedup      %.2fx' % (results[0] / results[1]))
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,106 @@
+# -----------------------------------------------------------------------------
+# dfaengine.py
+#
+# Compares lex(engine='re') with lex(engine='dfa') on three lexers:
+#
+#     clex       - The ANSI C lexer in example/ansic/clex.py
+#     keywords   - A lexer with one string rule for each of 120 keywords
+#     backtrack  - A rule that makes the re module backtrack on every failed
+#                  match.  The time taken by re grows exponentially with the
+#                  length of the words involved while the DFA stays linear.
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+import types
+
+sys.path.insert(0, '..')
+sys.path.insert(0, '../example/ansic')
+import ply.lex as lex
+import clex
+import clexdispatch
+
+def skip_error(t):
+    t.lexer.skip(1)
+
+# -----------------------------------------------------------------------------
+# Lexer with many keyword rules
+# -----------------------------------------------------------------------------
+
+KEYWORDS = '''
+    ABORT ACTION ADD AFTER ALL ALTER ANALYZE AND AS ASC ATTACH AUTOINCREMENT
+    BEFORE BEGIN BETWEEN BY CASCADE CASE CAST CHECK COLLATE COLUMN COMMIT
+    CONFLICT CONSTRAINT CREATE CROSS CURRENT CURRENT_DATE CURRENT_TIME
+    CURRENT_TIMESTAMP DATABASE DEFAULT DEFERRABLE DEFERRED DELETE DESC DETACH
+    DISTINCT DO DROP EACH ELSE END ESCAPE EXCEPT EXCLUDE EXCLUSIVE EXISTS
+    EXPLAIN FAIL FILTER FIRST FOLLOWING FOR FOREIGN FROM FULL GLOB GROUP GROUPS
+    HAVING IF IGNORE IMMEDIATE IN INDEX INDEXED INITIALLY INNER INSERT INSTEAD
+    INTERSECT INTO IS ISNULL JOIN KEY LAST LEFT LIKE LIMIT MATCH NATURAL NO NOT
+    NOTHING NOTNULL NULL NULLS OF OFFSET ON OR ORDER OTHERS OUTER OVER
+    PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY RAISE RANGE RECURSIVE
+    REFERENCES REGEXP REINDEX RELEASE RENAME REPLACE RESTRICT RIGHT ROLLBACK
+    ROW ROWS SAVEPOINT SELECT SET TABLE TEMP TEMPORARY THEN TIES TO TRANSACTION
+    TRIGGER UNBOUNDED UNION UNIQUE UPDATE USING VACUUM VALUES VIEW VIRTUAL WHEN
+    WHERE WINDOW WITH WITHOUT
+'''.split()[:120]
+
+def keyword_module():
+    m = types.ModuleType('keywords')
+    m.__file__ = __file__
+    m.tokens = tuple('K_' + k for k in KEYWORDS) + ('NAME', 'NUMBER', 'OP')
+    for k in KEYWORDS:
+        setattr(m, 't_K_' + k, k)
+    m.t_NAME = r'[a-z_][a-z0-9_]*'
+    m.t_NUMBER = r'\d+'
+    m.t_OP = r'[-+*/=<>(),;.]'
+    m.t_ignore = ' \t\n'
+    m.t_error = skip_error
+    return m
+
+def keyword_input(nlines):
+    line = 'SELECT name, total FROM orders%d WHERE total > %d AND NOT EXISTS (SELECT id FROM refunds) ORDER BY total DESC LIMIT 10;\n'
+    return ''.join(line % (i, i) for i in range(nlines))
+
+# -----------------------------------------------------------------------------
+# Lexer with a backtracking rule
+# -----------------------------------------------------------------------------
+
+def backtrack_module():
+    m = types.ModuleType('backtrack')
+    m.__file__ = __file__
+    m.tokens = ('CLAUSE', 'WORD')
+    m.t_CLAUSE = r'([a-z]+\ ?)+;'
+    m.t_WORD = r'[a-z]+'
+    m.t_ignore = ' \n'
+    m.t_error = skip_error
+    return m
+
+def backtrack_input(nlines, wordlen=16):
+    # No semicolons, so every attempt to match CLAUSE fails
+    line = 'x' * wordlen + ' end\n'
+    return ''.join(line for i in range(nlines))
+
+def measure(lexer, data):
+    lexer.input(data)
+    lexer.lineno = 1
+    start = time.time()
+    ntoks = 0
+    for tok in lexer:
+        ntoks += 1
+    return ntoks, time.time() - start
+
+def main(scale=1):
+    inputs = [
+        ('clex', clex, clexdispatch.make_input(1000 * scale)),
+        ('keywords', keyword_module(), keyword_input(5000 * scale)),
+        ('backtrack', backtrack_module(), backtrack_input(20 * scale)),
+    ]
+    for name, module, data in inputs:
+        print('%s: %d characters of input' % (name, len(data)))
+        for engine in ('re', 'dfa'):
+            lexer = lex.lex(module=module, engine=engine, errorlog=lex.NullLogger())
+            ntoks, elapsed = measure(lexer, data)
+            print('    %-4s %8d tokens %7.2fs %10.0f tokens/s' % (engine, ntoks, elapsed, ntoks / elapsed))
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,113 @@
+# -----------------------------------------------------------------------------
+# parsecode.py
+#
+# Parsing speed of the generic parsing engine and of generated parser code
+# (yacc(codegen=True)) for two grammars:
+#
+#     cparse     - The ANSI C parser in example/ansic/cparse.py
+#     calc       - An expression grammar with precedence rules
+#
+# Tokens are lexed ahead of time, so only the parser is measured.
+# -----------------------------------------------------------------------------
+
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, '..')
+import ply.lex as lex
+import ply.yacc as yacc
+import parsetables
+from parsetables import cparse, clex
+
+class Calc(object):
+    tokens = ('NAME', 'NUMBER', 'PLUS', 'MINUS', 'TIMES', 'DIVIDE', 'EQUALS', 'LPAREN', 'RPAREN')
+
+    t_PLUS    = r'\+'
+    t_MINUS   = r'-'
+    t_TIMES   = r'\*'
+    t_DIVIDE  = r'/'
+    t_EQUALS  = r'='
+    t_LPAREN  = r'\('
+    t_RPAREN  = r'\)'
+    t_NAME    = r'[a-zA-Z_][a-zA-Z0-9_]*'
+    t_ignore  = ' \t\n'
+
+    def t_NUMBER(self, t):
+        r'\d+'
+        t.value = int(t.value)
+        return t
+
+    def t_error(self, t):
+        t.lexer.skip(1)
+
+    precedence = (
+        ('left', 'PLUS', 'MINUS'),
+        ('left', 'TIMES', 'DIVIDE'),
+        ('right', 'UMINUS'),
+    )
+
+    def p_statements(self, p):
+        '''statements : statements statement
+                      | statement'''
+        p[0] = p[1] + 1 if len(p) == 3 else 1
+
+    def p_statement(self, p):
+        'statement : NAME EQUALS expression'
+        p[0] = p[3]
+
+    def p_expression_binop(self, p):
+        '''expression : expression PLUS expression
+                      | expression MINUS expression
+                      | expression TIMES expression
+                      | expression DIVIDE expression'''
+        p[0] = p[1]
+
+    def p_expression_uminus(self, p):
+        'expression : MINUS expression %prec UMINUS'
+        p[0] = p[2]
+
+    def p_expression_group(self, p):
+        'expression : LPAREN expression RPAREN'
+        p[0] = p[2]
+
+    def p_expression_term(self, p):
+        '''expression : NUMBER
+                      | NAME'''
+        p[0] = p[1]
+
+    def p_error(self, p):
+        raise SyntaxError(p)
+
+CALC = 'x%d = (a + 12) * -b / (c - 3 * (d + e)) + f * 7 - g / (h + 1)\n'
+
+def calc_input(n):
+    return ''.join(CALC % i for i in range(n))
+
+def main(scale=1):
+    outputdir = tempfile.mkdtemp()
+    try:
+        log = yacc.NullLogger()
+        calc = Calc()
+        cases = [
+            ('cparse', cparse, clex.lexer, parsetables.make_input(500 * scale)),
+            ('calc', calc, lex.lex(module=calc), calc_input(5000 * scale)),
+        ]
+        for name, module, lexer, data in cases:
+            lexer.input(data)
+            toks = list(iter(lexer.token, None))
+            generic = yacc.yacc(module=module, debug=False, errorlog=log, write_tables=False)
+            generated = yacc.yacc(module=module, debug=False, errorlog=log, outputdir=outputdir,
+                                  tabmodule=name + 'tab', codegen=name + 'code')
+            results = []
+            for label, parser in (('generic', generic), ('codegen', generated)):
+                elapsed = parsetables.measure_parse(parser, toks, 10)
+                results.append(elapsed)
+                print('%-7s %-8s %8d tokens %6.3fs %6.2fus/token' % (
+                    name, label, len(toks), elapsed, elapsed * 1e6 / len(toks)))
+            print('%-7s speedup %.2fx' % (name, results[0] / results[1]))
+    finally:
+        shutil.rmtree(outputdir)
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,136 @@
+# -----------------------------------------------------------------------------
+# parsemany.py
+#
+# Time per input for many short inputs (filter expressions), parsed with
+# parse() in a loop and with parse_many(), and tokenized with input() and
+# token() in a loop and with lex_many().  The inputs are lexed as they are
+# parsed.
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+
+sys.path.insert(0, '..')
+import ply.lex as lex
+import ply.yacc as yacc
+
+class Filter(object):
+    tokens = ('NAME', 'NUMBER', 'STRING', 'EQ', 'NE', 'LT', 'GT', 'AND', 'OR', 'NOT',
+              'LPAREN', 'RPAREN')
+
+    reserved = {'and': 'AND', 'or': 'OR', 'not': 'NOT'}
+
+    t_NUMBER = r'\d+'
+    t_STRING = r'"[^"]*"'
+    t_EQ = r'=='
+    t_NE = r'!='
+    t_LT = r'<'
+    t_GT = r'>'
+    t_LPAREN = r'\('
+    t_RPAREN = r'\)'
+    t_ignore = ' '
+
+    def t_NAME(self, t):
+        r'[a-z_][a-z_0-9.]*'
+        t.type = self.reserved.get(t.value, 'NAME')
+        return t
+
+    def t_error(self, t):
+        t.lexer.skip(1)
+
+    precedence = (
+        ('left', 'OR'),
+        ('left', 'AND'),
+        ('right', 'NOT'),
+    )
+
+    def p_expr_binop(self, p):
+        '''expr : expr AND expr
+                | expr OR expr'''
+        p[0] = (p[2], p[1], p[3])
+
+    def p_expr_not(self, p):
+        'expr : NOT expr'
+        p[0] = ('not', p[2])
+
+    def p_expr_group(self, p):
+        'expr : LPAREN expr RPAREN'
+        p[0] = p[2]
+
+    def p_expr_compare(self, p):
+        '''expr : NAME EQ value
+                | NAME NE value
+                | NAME LT value
+                | NAME GT value'''
+        p[0] = (p[2], p[1], p[3])
+
+    def p_value(self, p):
+        '''value : NUMBER
+                 | STRING
+                 | NAME'''
+        p[0] = p[1]
+
+    def p_error(self, p):
+        raise SyntaxError(p)
+
+FILTERS = [
+    'status == 200',
+    'method == "GET" and path != "/health"',
+    'not (size > 1000 or user.id == 42)',
+    'latency > 250 and (region == "eu" or region == "us")',
+]
+
+clock = getattr(time, 'perf_counter', time.time)
+
+def make_inputs(n):
+    return [FILTERS[i % len(FILTERS)] for i in range(n)]
+
+def best(func, repeat=5):
+    result = None
+    for i in range(repeat):
+        start = clock()
+        func()
+        elapsed = clock() - start
+        if result is None or elapsed < result:
+            result = elapsed
+    return result
+
+def parse_loop(parser, lexer, inputs):
+    for s in inputs:
+        parser.parse(s, lexer=lexer)
+
+def parse_many(parser, lexer, inputs):
+    for result in parser.parse_many(inputs, lexer=lexer):
+        pass
+
+def lex_loop(lexer, inputs):
+    for s in inputs:
+        lexer.input(s)
+        list(iter(lexer.token, None))
+
+def lex_many(lexer, inputs):
+    for result in lexer.lex_many(inputs):
+        pass
+
+def main(scale=1):
+    module = Filter()
+    lexer = lex.lex(module=module)
+    parser = yacc.yacc(module=module, debug=False, write_tables=False, errorlog=yacc.NullLogger())
+    inputs = make_inputs(20000 * scale)
+    assert list(parser.parse_many(inputs[:4], lexer=lexer)) == [parser.parse(s, lexer=lexer) for s in inputs[:4]]
+
+    cases = [
+        ('parse', lambda: parse_loop(parser, lexer, inputs), lambda: parse_many(parser, lexer, inputs)),
+        ('lex', lambda: lex_loop(lexer, inputs), lambda: lex_many(lexer, inputs)),
+    ]
+    for name, loop, many in cases:
+        results = []
+        for label, func in (('loop', loop), ('many', many)):
+            elapsed = best(func)
+            results.append(elapsed)
+            print('%-6s %-5s %6d inputs %6.3fs %6.2fus/input' % (
+                name, label, len(inputs), elapsed, elapsed * 1e6 / len(inputs)))
+        print('%-6s speedup %.2fx' % (name, results[0] / results[1]))
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,120 @@
+# -----------------------------------------------------------------------------
+# parsetables.py
+#
+# Memory, load time and parsing speed of the ANSI C parser in
+# example/ansic/cparse.py with the action and goto tables as dicts and
+# packed into arrays (yacc(compact=True)).
+#
+# Memory and load time are measured by running the code of a table file
+# written each way and making a parser from it.  Parsing speed is measured
+# on tokens lexed ahead of time.
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+import types
+import tempfile
+import shutil
+import os
+import tracemalloc
+
+sys.path.insert(0, '..')
+sys.path.insert(0, '../example/ansic')
+import ply.yacc as yacc
+
+# cparse.py builds its parser when imported.  Skip that here.
+_yacc = yacc.yacc
+yacc.yacc = lambda *args, **kwargs: None
+import cparse
+yacc.yacc = _yacc
+import clex
+
+SOURCE = '''
+struct point%d { int x; int y; };
+
+static unsigned long checksum%d(unsigned char *buf, int len)
+{
+    unsigned long sum = %d;
+    int i;
+    struct point%d pt;
+    for (i = 0; i < len; i++) {
+        sum = (sum << 5) + (sum >> 2) + buf[i] * 7;
+        if (sum >= 4294967291 && buf[i] != 'a')
+            sum -= 3.25e2;
+        else
+            pt.x = pt.y + 1;
+    }
+    while (len > 0 && !(sum & 1)) { len--; sum = sum / 2; }
+    switch (len) { case 1: sum++; break; default: sum = -sum; }
+    printf("checksum", sum, &pt, sizeof(int));
+    return sum ^ ~len;
+}
+'''
+
+clock = getattr(time, 'perf_counter', time.time)
+
+def make_input(n):
+    return ''.join(SOURCE % (i, i, i, i) for i in range(n))
+
+def load(code, compact):
+    module = types.ModuleType('parsetab')
+    exec(code, module.__dict__)
+    lr = yacc.LRTable()
+    lr.read_table(module)
+    lr.bind_callables(cparse.__dict__)
+    return yacc.LRParser(lr, cparse.p_error, compact)
+
+def measure_load(filename, compact):
+    with open(filename) as f:
+        code = compile(f.read(), filename, 'exec')
+    best = None
+    for i in range(5):
+        start = clock()
+        load(code, compact)
+        elapsed = clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    tracemalloc.start()
+    parser = load(code, compact)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return parser, size, best
+
+def measure_parse(parser, toks, repeat=5):
+    best = None
+    for i in range(repeat):
+        it = iter(toks)
+        start = clock()
+        parser.parse(tokenfunc=lambda: next(it, None))
+        elapsed = clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(scale=1):
+    outputdir = tempfile.mkdtemp()
+    try:
+        log = yacc.NullLogger()
+        yacc.yacc(module=cparse, debug=False, errorlog=log, outputdir=outputdir, tabmodule='dicttab')
+        yacc.yacc(module=cparse, debug=False, errorlog=log, outputdir=outputdir, tabmodule='compacttab',
+                  compact=True)
+        cases = [('dicts', os.path.join(outputdir, 'dicttab.py'), False),
+                 ('compact', os.path.join(outputdir, 'compacttab.py'), True)]
+        clex.lexer.input(make_input(500 * scale))
+        toks = list(iter(clex.lexer.token, None))
+        results = []
+        for name, filename, compact in cases:
+            parser, size, loadtime = measure_load(filename, compact)
+            parsetime = measure_parse(parser, toks)
+            results.append((size, loadtime, parsetime))
+            print('%-8s file %7d bytes  memory %8d bytes  load %6.2fms  parse %6.3fs %6.2fus/token' % (
+                name, os.path.getsize(filename), size, loadtime * 1000, parsetime,
+                parsetime * 1e6 / len(toks)))
+        (dsize, dload, dparse), (csize, cload, cparse_) = results
+        print('compact: %.1fx less memory, %.1fx faster load, %.2fx parse time' % (
+            float(dsize) / csize, dload / cload, cparse_ / dparse))
+    finally:
+        shutil.rmtree(outputdir)
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
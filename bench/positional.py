@@ -0,0 +1,144 @@
+# -----------------------------------------------------------------------------
+# positional.py
+#
+# Parsing speed of an expression grammar whose rules take a YaccProduction
+# and of the same grammar with its rules marked with @positional, using the
+# generic parsing engine and generated parser code (yacc(codegen=True)).
+#
+# Tokens are lexed ahead of time, so only the parser is measured.
+# -----------------------------------------------------------------------------
+
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, '..')
+import ply.lex as lex
+import ply.yacc as yacc
+from ply.yacc import positional
+import parsecode
+import parsetables
+
+class Slices(object):
+    tokens = parsecode.Calc.tokens
+    precedence = parsecode.Calc.precedence
+
+    def p_statements(self, p):
+        '''statements : statements statement
+                      | statement'''
+        p[0] = p[1] + p[2] if len(p) == 3 else p[1]
+
+    def p_statement(self, p):
+        'statement : NAME EQUALS expression'
+        p[0] = p[3]
+
+    def p_expression_binop(self, p):
+        '''expression : expression PLUS expression
+                      | expression MINUS expression
+                      | expression TIMES expression
+                      | expression DIVIDE expression'''
+        if p[2] == '+':
+            p[0] = p[1] + p[3]
+        elif p[2] == '-':
+            p[0] = p[1] - p[3]
+        elif p[2] == '*':
+            p[0] = p[1] * p[3]
+        else:
+            p[0] = p[1] / p[3]
+
+    def p_expression_uminus(self, p):
+        'expression : MINUS expression %prec UMINUS'
+        p[0] = -p[2]
+
+    def p_expression_group(self, p):
+        'expression : LPAREN expression RPAREN'
+        p[0] = p[2]
+
+    def p_expression_number(self, p):
+        'expression : NUMBER'
+        p[0] = p[1]
+
+    def p_expression_name(self, p):
+        'expression : NAME'
+        p[0] = 1.5
+
+    def p_error(self, p):
+        raise SyntaxError(p)
+
+class Values(object):
+    tokens = parsecode.Calc.tokens
+    precedence = parsecode.Calc.precedence
+
+    @positional
+    def p_statements(self, statements, statement=0):
+        '''statements : statements statement
+                      | statement'''
+        return statements + statement
+
+    @positional
+    def p_statement(self, name, equals, value):
+        'statement : NAME EQUALS expression'
+        return value
+
+    @positional
+    def p_expression_binop(self, left, op, right):
+        '''expression : expression PLUS expression
+                      | expression MINUS expression
+                      | expression TIMES expression
+                      | expression DIVIDE expression'''
+        if op == '+':
+            return left + right
+        elif op == '-':
+            return left - right
+        elif op == '*':
+            return left * right
+        else:
+            return left / right
+
+    @positional
+    def p_expression_uminus(self, minus, value):
+        'expression : MINUS expression %prec UMINUS'
+        return -value
+
+    @positional
+    def p_expression_group(self, lparen, value, rparen):
+        'expression : LPAREN expression RPAREN'
+        return value
+
+    @positional
+    def p_expression_number(self, value):
+        'expression : NUMBER'
+        return value
+
+    @positional
+    def p_expression_name(self, name):
+        'expression : NAME'
+        return 1.5
+
+    def p_error(self, p):
+        raise SyntaxError(p)
+
+def main(scale=1):
+    outputdir = tempfile.mkdtemp()
+    try:
+        log = yacc.NullLogger()
+        calc = parsecode.Calc()
+        lexer = lex.lex(module=calc)
+        lexer.input(parsecode.calc_input(5000 * scale))
+        toks = list(iter(lexer.token, None))
+        for codegen in (False, True):
+            engine = 'codegen' if codegen else 'generic'
+            results = []
+            for label, cls in (('slices', Slices), ('values', Values)):
+                parser = yacc.yacc(module=cls(), debug=False, errorlog=log, outputdir=outputdir,
+                                   tabmodule=label + 'tab', codegen=codegen and label + 'code')
+                elapsed = parsetables.measure_parse(parser, toks, 10)
+                results.append(elapsed)
+                print('%-8s %-7s %8d tokens %6.3fs %6.2fus/token' % (
+                    engine, label, len(toks), elapsed, elapsed * 1e6 / len(toks)))
+            print('%-8s speedup %.2fx' % (engine, results[0] / results[1]))
+    finally:
+        shutil.rmtree(outputdir)
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# regexopt.py
+#
+# Build time and token throughput of the example lexers with and without the
+# build-time master regex optimizations: rules for fixed strings combined
+# into prefix trees and the check for rules that can never match.
+#
+#     clex       - The ANSI C lexer in example/ansic/clex.py
+#     basic      - The BASIC lexer in example/BASIC/basiclex.py
+#     keywords   - A lexer with one string rule for each of 120 keywords
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+
+sys.path.insert(0, '..')
+sys.path.insert(0, '../example/ansic')
+sys.path.insert(0, '../example/BASIC')
+import ply.lex as lex
+import clex
+import basiclex
+import clexdispatch
+import dfaengine
+
+BASIC = '''10 REM Compute a table of values
+20 LET X%d = 3.5E2 + 12 * (Y - 4) / 2
+30 IF X%d <= 100 THEN 60
+40 PRINT "VALUE", X%d, Y <> Z, A >= B
+50 FOR I = 1 TO 10 STEP 2
+60 NEXT I
+'''
+
+def basic_input(n):
+    return ''.join(BASIC % (i, i, i) for i in range(n))
+
+def build(module, optimize):
+    factor, shadowed = lex._factor_literals, lex._shadowed_rules
+    if not optimize:
+        lex._factor_literals = lambda relist, flags: relist
+        lex._shadowed_rules = lambda rules, flags: []
+    try:
+        best = None
+        for i in range(5):
+            start = time.time()
+            lexer = lex.lex(module=module)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        lex._factor_literals, lex._shadowed_rules = factor, shadowed
+    return lexer, best
+
+def main(scale=1):
+    cases = [
+        ('clex', clex, clexdispatch.make_input(1000 * scale)),
+        ('basic', basiclex, basic_input(5000 * scale)),
+        ('keywords', dfaengine.keyword_module(), dfaengine.keyword_input(5000 * scale)),
+    ]
+    for name, module, data in cases:
+        results = []
+        for label, optimize in (('before', False), ('after', True)):
+            lexer, buildtime = build(module, optimize)
+            ntoks, elapsed = clexdispatch.measure(lexer, data)
+            results.append(elapsed)
+            print('%-9s %-7s build %6.1fms %8d tokens %6.2fs %10.0f tokens/s' % (
+                name, label, buildtime * 1000, ntoks, elapsed, ntoks / elapsed))
+        print('%-9s speedup %.2fx' % (name, results[0] / results[1]))
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,358 @@
+# -----------------------------------------------------------------------------
+# tokenfilter.py
+#
+# Speed of the GardenSnake INDENT/DEDENT filters written three ways:
+#
+#     generators  - Generators chained by hand around lexer.token, with a
+#                   wrapper class for yacc, as in example/GardenSnake
+#     per-token   - The same generators as stages of a lex.TokenPipeline
+#     batched     - A lex.TokenFilter stage working on lists of tokens
+#
+# The batched filter does the work of all three generators in one stage.
+# Times are given for lexing and filtering together and for the filters by
+# themselves, on tokens lexed ahead of time.
+#
+# The lexer is the one from example/GardenSnake, except that t_WS looks at
+# the text before the whitespace to see if it is at the start of a line.  In
+# GardenSnake, the first filter sets an attribute on the lexer for this,
+# which only works when the lexer never runs ahead of the filters.
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+import functools
+
+sys.path.insert(0, '..')
+import ply.lex as lex
+
+tokens = (
+    'DEF', 'IF', 'NAME', 'NUMBER', 'STRING', 'LPAR', 'RPAR', 'COLON', 'EQ',
+    'ASSIGN', 'LT', 'GT', 'PLUS', 'MINUS', 'MULT', 'DIV', 'RETURN', 'WS',
+    'NEWLINE', 'COMMA', 'SEMICOLON', 'INDENT', 'DEDENT', 'ENDMARKER',
+)
+
+t_NUMBER = r'(\d+(\.\d*)?|\.\d+)([eE][-+]? \d+)?'
+t_STRING = r"'([^\\']+|\\'|\\\\)*'"
+t_COLON = r':'
+t_EQ = r'=='
+t_ASSIGN = r'='
+t_LT = r'<'
+t_GT = r'>'
+t_PLUS = r'\+'
+t_MINUS = r'-'
+t_MULT = r'\*'
+t_DIV = r'/'
+t_COMMA = r','
+t_SEMICOLON = r';'
+
+RESERVED = {
+    'def': 'DEF',
+    'if': 'IF',
+    'return': 'RETURN',
+}
+
+def t_NAME(t):
+    r'[a-zA-Z_][a-zA-Z0-9_]*'
+    t.type = RESERVED.get(t.value, 'NAME')
+    return t
+
+def t_comment(t):
+    r'[ ]*\043[^\n]*'
+    pass
+
+def t_WS(t):
+    r' [ ]+ '
+    if t.lexer.paren_count == 0 and (t.lexpos == 0 or t.lexer.lexdata[t.lexpos-1] == '\n'):
+        return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+    t.type = 'NEWLINE'
+    if t.lexer.paren_count == 0:
+        return t
+
+def t_LPAR(t):
+    r'\('
+    t.lexer.paren_count += 1
+    return t
+
+def t_RPAR(t):
+    r'\)'
+    t.lexer.paren_count -= 1
+    return t
+
+def t_error(t):
+    raise SyntaxError('Unknown symbol %r' % (t.value[0],))
+
+NO_INDENT = 0
+MAY_INDENT = 1
+MUST_INDENT = 2
+
+def _new_token(type, lineno):
+    tok = lex.LexToken()
+    tok.type = type
+    tok.value = None
+    tok.lineno = lineno
+    tok.lexpos = 0
+    return tok
+
+# -----------------------------------------------------------------------------
+# Per-token filters, as generators
+# -----------------------------------------------------------------------------
+
+def track_tokens_filter(tokens):
+    at_line_start = True
+    indent = NO_INDENT
+    for token in tokens:
+        token.at_line_start = at_line_start
+        if token.type == 'COLON':
+            at_line_start = False
+            indent = MAY_INDENT
+            token.must_indent = False
+        elif token.type == 'NEWLINE':
+            at_line_start = True
+            if indent == MAY_INDENT:
+                indent = MUST_INDENT
+            token.must_indent = False
+        elif token.type == 'WS':
+            at_line_start = True
+            token.must_indent = False
+        else:
+            if indent == MUST_INDENT:
+                token.must_indent = True
+            else:
+                token.must_indent = False
+            at_line_start = False
+            indent = NO_INDENT
+        yield token
+
+def indentation_filter(tokens):
+    levels = [0]
+    token = None
+    depth = 0
+    prev_was_ws = False
+    for token in tokens:
+        if token.type == 'WS':
+            depth = len(token.value)
+            prev_was_ws = True
+            continue
+        if token.type == 'NEWLINE':
+            depth = 0
+            if prev_was_ws or token.at_line_start:
+                continue
+            yield token
+            continue
+        prev_was_ws = False
+        if token.must_indent:
+            if not (depth > levels[-1]):
+                raise IndentationError('expected an indented block')
+            levels.append(depth)
+            yield _new_token('INDENT', token.lineno)
+        elif token.at_line_start:
+            if depth == levels[-1]:
+                pass
+            elif depth > levels[-1]:
+                raise IndentationError('indentation increase but not in new block')
+            else:
+                try:
+                    i = levels.index(depth)
+                except ValueError:
+                    raise IndentationError('inconsistent indentation')
+                for _ in range(i + 1, len(levels)):
+                    yield _new_token('DEDENT', token.lineno)
+                    levels.pop()
+        yield token
+    lineno = token.lineno if token is not None else 1
+    for _ in range(1, len(levels)):
+        yield _new_token('DEDENT', lineno)
+
+def endmarker_filter(tokens):
+    lineno = 1
+    for token in tokens:
+        lineno = token.lineno
+        yield token
+    yield _new_token('ENDMARKER', lineno)
+
+class IndentLexer(object):
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.token_stream = None
+
+    def input(self, s):
+        self.lexer.paren_count = 0
+        self.lexer.input(s)
+        tokens = iter(self.lexer.token, None)
+        self.token_stream = endmarker_filter(indentation_filter(track_tokens_filter(tokens)))
+
+    def token(self):
+        try:
+            return next(self.token_stream)
+        except StopIteration:
+            return None
+
+# -----------------------------------------------------------------------------
+# Batch filter
+#
+# Does the work of all three generators.  Only the tokens at the start and
+# end of each line need looking at.  The tokens in between are copied over
+# with one slice, found by searching a list of token types for NEWLINE.
+# -----------------------------------------------------------------------------
+
+class Indentation(lex.TokenFilter):
+    def reset(self, lexer):
+        lexer.paren_count = 0
+        self.levels = [0]
+        self.depth = 0
+        self.at_line_start = True
+        self.colon = False
+        self.lineno = 1
+
+    def filter(self, tokens):
+        levels = self.levels
+        depth = self.depth
+        at_line_start = self.at_line_start
+        colon = self.colon
+        types = [tok.type for tok in tokens]
+        result = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            if at_line_start:
+                type = types[i]
+                if type == 'WS':
+                    depth = len(tokens[i].value)
+                    i += 1
+                    continue
+                if type == 'NEWLINE':
+                    depth = 0
+                    i += 1
+                    continue
+                lineno = tokens[i].lineno
+                if colon:
+                    if not (depth > levels[-1]):
+                        raise IndentationError('expected an indented block')
+                    levels.append(depth)
+                    result.append(_new_token('INDENT', lineno))
+                elif depth != levels[-1]:
+                    if depth > levels[-1]:
+                        raise IndentationError('indentation increase but not in new block')
+                    try:
+                        k = levels.index(depth)
+                    except ValueError:
+                        raise IndentationError('inconsistent indentation')
+                    for _ in range(k + 1, len(levels)):
+                        result.append(_new_token('DEDENT', lineno))
+                        levels.pop()
+                at_line_start = False
+            try:
+                j = types.index('NEWLINE', i)
+            except ValueError:
+                j = n
+            if j > i:
+                result.extend(tokens[i:j])
+                colon = types[j-1] == 'COLON'
+            if j < n:
+                result.append(tokens[j])
+                at_line_start = True
+                depth = 0
+            i = j + 1
+        if tokens:
+            self.lineno = tokens[-1].lineno
+        self.depth = depth
+        self.at_line_start = at_line_start
+        self.colon = colon
+        return result
+
+    def finish(self):
+        result = [_new_token('DEDENT', self.lineno) for _ in range(1, len(self.levels))]
+        result.append(_new_token('ENDMARKER', self.lineno))
+        return result
+
+clock = getattr(time, 'perf_counter', time.time)
+
+PROGRAM = '''
+# A function with a nested block
+def f%d(a, b):
+    x = a + b * 2
+    if x > 10:
+        return (x,
+                a - b)
+    return x / 3
+
+y = f%d(1, 2) == 'done'
+'''
+
+def make_input(n):
+    return ''.join(PROGRAM % (i, i) for i in range(n))
+
+def count(tokenfunc):
+    n = 0
+    while tokenfunc() is not None:
+        n += 1
+    return n
+
+def run(make, data):
+    source = make()
+    start = clock()
+    source.input(data)
+    ntoks = count(source.token)
+    return ntoks, clock() - start
+
+def tokens_of(make, data):
+    source = make()
+    source.input(data)
+    return [(tok.type, tok.lineno) for tok in iter(source.token, None)]
+
+# Hands out tokens lexed ahead of time, to time the filters by themselves
+class TokenList(object):
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.lineno = 1
+
+    def input(self, data):
+        if not hasattr(self, 'tokens'):
+            self.lexer.lineno = 1
+            self.lexer.paren_count = 0
+            self.lexer.input(data)
+            self.tokens = list(iter(self.lexer.token, None))
+        self.token = functools.partial(next, iter(self.tokens), None)
+
+def compare(lexer, data):
+    def generators():
+        lexer.lineno = 1
+        return IndentLexer(lexer)
+
+    def pipeline(stages):
+        def make():
+            lexer.lineno = 1
+            lexer.paren_count = 0
+            return lex.TokenPipeline(lexer, stages)
+        return make
+
+    cases = [
+        ('generators', generators),
+        ('per-token', pipeline([track_tokens_filter, indentation_filter, endmarker_filter])),
+        ('batched', pipeline([Indentation()])),
+    ]
+    expected = tokens_of(generators, data)
+    best = {}
+    for i in range(10):
+        for name, make in cases:
+            ntoks, elapsed = run(make, data)
+            best[name] = min(best.get(name, elapsed), elapsed)
+    for name, make in cases:
+        assert tokens_of(make, data) == expected
+        print('%-12s %8d tokens %6.3fs %10.0f tokens/s' % (name, ntoks, best[name], ntoks / best[name]))
+    print('batched vs generators: %.2fx' % (best['generators'] / best['batched']))
+
+def main(scale=1):
+    lexer = lex.lex()
+    data = make_input(2000 * scale)
+    print('Lexer and filters')
+    compare(lexer, data)
+    print('\nFilters only')
+    compare(TokenList(lexer), data)
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
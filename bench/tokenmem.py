@@ -0,0 +1,62 @@
+# -----------------------------------------------------------------------------
+# tokenmem.py
+#
+# Compares the memory needed to hold a large token stream using the default
+# LexToken class and the compact (slotted, interned) token representation
+# selected with lex(compact=True).
+# -----------------------------------------------------------------------------
+
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '..')
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'STRING', 'EQUALS', 'LBRACKET', 'RBRACKET')
+
+t_EQUALS   = r'='
+t_LBRACKET = r'\['
+t_RBRACKET = r'\]'
+t_NAME     = r'[A-Za-z_][A-Za-z0-9_.]*'
+t_NUMBER   = r'\d+'
+t_STRING   = r'"[^"\n]*"'
+t_ignore   = ' \t'
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+# A log-like input with a limited vocabulary of names and values
+LINE = 'ts=%d level=info host=web%d [request] path="/api/v1/items" status=200 bytes=%d\n'
+
+def make_input(nlines):
+    return ''.join(LINE % (i, i % 8, i % 1000) for i in range(nlines))
+
+def measure(lexer, data):
+    tracemalloc.start()
+    start = time.time()
+    lexer.input(data)
+    lexer.lineno = 1
+    toks = list(lexer)
+    elapsed = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(toks), current, elapsed
+
+def main(nlines=20000):
+    data = make_input(nlines)
+    default = lex.lex(errorlog=lex.NullLogger())
+    compact = lex.lex(compact=True, errorlog=lex.NullLogger())
+
+    print('%d lines, %d characters of input' % (nlines, len(data)))
+    for name, lexer in (('LexToken', default), ('CompactLexToken', compact)):
+        ntoks, size, elapsed = measure(lexer, data)
+        print('%-16s %8d tokens %10.1f MB %6.1f bytes/token %6.2fs' % (
+              name, ntoks, size / 1e6, float(size) / ntoks, elapsed))
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -314,41 +314,37 @@ def indentation_filter(tokens):
             yield DEDENT(token.lineno)
 
 
-# The top-level filter adds an ENDMARKER, if requested.
+# The last filter adds an ENDMARKER, if requested.
 # Python's grammar uses it.
-def filter(lexer, add_endmarker=True):
+def endmarker_filter(tokens):
     token = None
-    tokens = iter(lexer.token, None)
-    tokens = track_tokens_filter(lexer, tokens)
-    for token in indentation_filter(tokens):
+    for token in tokens:
         yield token
 
-    if add_endmarker:
-        lineno = 1
-        if token is not None:
-            lineno = token.lineno
-        yield _new_token("ENDMARKER", lineno)
+    lineno = 1
+    if token is not None:
+        lineno = token.lineno
+    yield _new_token("ENDMARKER", lineno)
 
-# Combine Ply and my filters into a new lexer
+# Combine Ply and my filters into a new lexer.  The filters are generators,
+# so the lexer only makes a token when track_tokens_filter asks for it and
+# t_WS sees the at_line_start it set.
 
 
-class IndentLexer(object):
+class IndentLexer(lex.TokenPipeline):
 
     def __init__(self, debug=0, optimize=0, lextab='lextab', reflags=0):
-        self.lexer = lex.lex(debug=debug, optimize=optimize,
-                             lextab=lextab, reflags=reflags)
-        self.token_stream = None
+        lex.TokenPipeline.__init__(self, lex.lex(debug=debug, optimize=optimize,
+                                                 lextab=lextab, reflags=reflags))
 
     def input(self, s, add_endmarker=True):
-        self.lexer.paren_count = 0
-        self.lexer.input(s)
-        self.token_stream = filter(self.lexer, add_endmarker)
-
-    def token(self):
-        try:
-            return self.token_stream.next()
-        except StopIteration:
-            return None
+        lexer = self.lexer
+        self.stages = [lambda tokens: track_tokens_filter(lexer, tokens),
+                       indentation_filter]
+        if add_endmarker:
+            self.stages.append(endmarker_filter)
+        lexer.paren_count = 0
+        lex.TokenPipeline.input(self, s)
 
 ##########   Parser (tokens -> AST) ######
 
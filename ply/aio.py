@@ -0,0 +1,137 @@
+# -----------------------------------------------------------------------------
+# ply: aio.py
+#
+# Copyright (C) 2001-2017
+# David M. Beazley (Dabeaz LLC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the David Beazley or Dabeaz LLC may be used to
+#   endorse or promote products derived from this software without
+#  specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+#
+# asyncio support.  Input that arrives a piece at a time (for example, over a
+# socket) is fed to a lexer as it comes in and tokens are returned as soon as
+# they are complete, without buffering whole messages or using threads:
+#
+#     alexer = ply.aio.AsyncLexer(lexer.clone())
+#     asyncio.ensure_future(alexer.pump(reader))
+#     async for tok in alexer:
+#         ...
+#
+# Each stream needs its own lexer, made with lexer.clone().  Tokens can be
+# parsed as they arrive with parse(), which uses a push parser:
+#
+#     result = await ply.aio.parse(parser, alexer)
+#
+# This module needs Python 3.5 or newer.  It is built on Lexer.input_feed()
+# and LRParser.push_parser().
+# -----------------------------------------------------------------------------
+
+import asyncio
+
+from .lex import NeedInput
+
+# -----------------------------------------------------------------------------
+# AsyncLexer
+#
+# Wraps a lexer so that input is given with await feed() and tokens are read
+# with await token() or async for.  feed() waits while more than high_water
+# characters of fed input haven't been tokenized yet, unless the lexer is
+# waiting for input itself.  limit is passed on to Lexer.input_feed().  An
+# AsyncLexer should be created in the event loop that uses it.
+# -----------------------------------------------------------------------------
+class AsyncLexer(object):
+    def __init__(self, lexer, limit=None, high_water=65536):
+        self.lexer = lexer
+        self.high_water = high_water
+        self.fed = 0                     # Number of characters fed so far
+        self.starved = False             # Set while token() waits for input
+        self.input = asyncio.Event()     # Set when there is new input
+        self.space = asyncio.Event()     # Set when feed() may go on
+        self.space.set()
+        lexer.input_feed(limit)
+
+    # Characters fed but not yet tokenized
+    def pending(self):
+        return self.fed - self.lexer.lexpos
+
+    async def feed(self, data):
+        self.lexer.feed(data)
+        self.fed += len(data)
+        self.input.set()
+        while self.pending() > self.high_water and not self.starved:
+            self.space.clear()
+            await self.space.wait()
+
+    def feed_eof(self):
+        self.lexer.feed_eof()
+        self.input.set()
+
+    # Feeds everything read from an asyncio.StreamReader (or anything else
+    # with a read() coroutine) followed by the end of input
+    async def pump(self, reader, chunksize=65536):
+        while True:
+            data = await reader.read(chunksize)
+            if not data:
+                break
+            await self.feed(data)
+        self.feed_eof()
+
+    # Returns the next token, or None at the end of the input
+    async def token(self):
+        while True:
+            try:
+                tok = self.lexer.token()
+            except NeedInput:
+                self.starved = True
+                self.space.set()
+                self.input.clear()
+                await self.input.wait()
+                self.starved = False
+                continue
+            if self.pending() <= self.high_water:
+                self.space.set()
+            return tok
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        tok = await self.token()
+        if tok is None:
+            raise StopAsyncIteration
+        return tok
+
+# -----------------------------------------------------------------------------
+# parse()
+#
+# Parses the tokens of an AsyncLexer as they arrive and returns the result.
+# Grammar rules are called as soon as the tokens they need have been read.
+# -----------------------------------------------------------------------------
+async def parse(parser, alexer, tracking=False):
+    p = parser.push_parser(alexer.lexer, tracking)
+    async for tok in alexer:
+        p.feed(tok)
+    return p.finish()
@@ -40,6 +40,26 @@ import types
 import copy
 import os
 import inspect
+import bisect
+import ast
+import time
+import contextlib
+import collections
+import itertools
+import functools
+import hashlib
+import tempfile
+from array import array
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
 
 # This tuple contains known string types
 try:
@@ -49,6 +69,29 @@ except AttributeError:
     # Python 3.0
     StringTypes = (str, bytes)
 
+# Binary input types.  These are lexed using bytes versions of the master
+# regular expressions.  Python 2 strings are already bytes.
+if bytes is str:
+    BinaryTypes = ()
+else:
+    BinaryTypes = (bytes, bytearray)
+
+# intern() moved into the sys module in Python 3
+try:
+    from sys import intern
+except ImportError:
+    pass
+
+# Timer used for reporting how long validation takes
+_clock = getattr(time, 'perf_counter', time.time)
+
+# Array type code used for positions in columnar token streams
+try:
+    array('q')
+    _offset_typecode = 'q'
+except ValueError:
+    _offset_typecode = 'l'
+
 # This regular expression is used to match valid token names
 _is_identifier = re.compile(r'^[a-zA-Z0-9_]+$')
 
@@ -59,6 +102,12 @@ class LexError(Exception):
         self.args = (message,)
         self.text = s
 
+# Exception thrown by token() when input is given with feed() and more input
+# is needed before the next token is known.  Nothing is consumed, so token()
+# can be called again once more input has been fed.
+class NeedInput(Exception):
+    pass
+
 
 # Token class.  This class is used to represent the tokens produced.
 class LexToken(object):
@@ -69,6 +118,114 @@ class LexToken(object):
         return str(self)
 
 
+# Compact token class.  Instances have no per-token __dict__, which greatly
+# reduces memory use when many tokens are kept alive at once.  Rules that need
+# to attach extra attributes to tokens can subclass it and either list the
+# extra names in __slots__ or leave __slots__ out to get a normal __dict__.
+# The subclass is then passed to lex() using the tokenclass argument.
+class CompactLexToken(object):
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer', 'column', 'kind')
+
+    def __str__(self):
+        return 'LexToken(%s,%r,%d,%d)' % (self.type, self.value, self.lineno, self.lexpos)
+
+    def __repr__(self):
+        return str(self)
+
+
+# -----------------------------------------------------------------------------
+# TokenColumns
+#
+# Token stream produced by Lexer.tokenize_all().  Tokens are stored as four
+# parallel arrays (kind id, start offset, end offset, line number).  Kind ids
+# index the names list.  Token values are only created when asked for, by
+# slicing the input text.  Values changed by a rule function are kept in the
+# overrides dictionary.
+# -----------------------------------------------------------------------------
+
+class TokenColumns(object):
+    def __init__(self, names, data):
+        self.names     = names              # Token type names indexed by kind id
+        self.kinds     = array('i')         # Token kind ids
+        self.starts    = array(_offset_typecode)  # Starting offsets
+        self.ends      = array(_offset_typecode)  # Ending offsets
+        self.linenos   = array(_offset_typecode)  # Line numbers
+        self.overrides = {}                 # Token values set by rule functions
+        self.segments  = [0]                # First token index of each input text
+        self.data      = [data]             # Input text for each segment
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, n):
+        return self.names[self.kinds[n]]
+
+    def value(self, n):
+        if n < 0:
+            n += len(self.kinds)
+        if n in self.overrides:
+            return self.overrides[n]
+        data = self.data[bisect.bisect_right(self.segments, n) - 1]
+        return data[self.starts[n]:self.ends[n]]
+
+    def token(self, n):
+        if n < 0:
+            n += len(self.kinds)
+        tok = LexToken()
+        tok.type = self.names[self.kinds[n]]
+        tok.value = self.value(n)
+        tok.lineno = self.linenos[n]
+        tok.lexpos = self.starts[n]
+        return tok
+
+    def __iter__(self):
+        for n in range(len(self.kinds)):
+            yield self.token(n)
+
+# -----------------------------------------------------------------------------
+# LineIndex
+#
+# Offsets of the start of each line, built up by the lexer as it scans when
+# line tracking is turned on with lex(lineindex=True).  Newlines are found with
+# find() on the text between tokens, so no t_newline() rule is needed.  Line
+# numbers and columns are looked up with a binary search.
+# -----------------------------------------------------------------------------
+
+class LineIndex(object):
+    def __init__(self, firstline=1, newline='\n'):
+        self.firstline = firstline                      # Line number of the first line
+        self.newline   = newline                        # Newline character
+        self.starts    = array(_offset_typecode, [0])   # Offset of the start of each line
+        self.scanned   = 0                              # Text before this offset is indexed
+
+    def copy(self):
+        c = LineIndex(self.firstline, self.newline)
+        c.starts = array(_offset_typecode, self.starts)
+        c.scanned = self.scanned
+        return c
+
+    # Index the newlines in data up to offset end.  base is the offset of data[0].
+    def scan(self, data, end, base=0):
+        pos = self.scanned - base
+        stop = end - base
+        if stop <= pos:
+            return
+        find = data.find
+        append = self.starts.append
+        newline = self.newline
+        n = find(newline, pos, stop)
+        while n >= 0:
+            append(base + n + 1)
+            n = find(newline, n + 1, stop)
+        self.scanned = end
+
+    def lineno(self, pos):
+        return self.firstline + bisect.bisect_right(self.starts, pos) - 1
+
+    def column(self, pos):
+        return pos - self.starts[bisect.bisect_right(self.starts, pos) - 1] + 1
+
+
 # This object is a stand-in for a logging object created by the
 # logging module.
 
@@ -98,6 +255,96 @@ class NullLogger(object):
         return self
 
 
+# -----------------------------------------------------------------------------
+# TokenAction
+#
+# Built-in actions for a rule defined by a string.  These are attached to rules
+# with the token_actions dictionary in the lexer specification and are carried
+# out by the lexer itself, so no Python function has to be called:
+#
+#     newlines   Add the number of newlines in the token to lexer.lineno
+#     keywords   Dictionary mapping token values to token types (reserved words)
+#     convert    Function applied to the token value (e.g., int)
+#     discard    Don't return a token at all
+#
+# The actions are carried out in the order listed above.
+# -----------------------------------------------------------------------------
+class TokenAction(object):
+    def __init__(self, convert=None, keywords=None, newlines=False, discard=False):
+        self.convert  = convert
+        self.keywords = keywords
+        self.newlines = newlines
+        self.discard  = discard
+
+    def __repr__(self):
+        return 'TokenAction(%r,%r,%r,%r)' % (self.convert, self.keywords, self.newlines, self.discard)
+
+# -----------------------------------------------------------------------------
+# LexerStats
+#
+# Statistics collected by a lexer while profiling is turned on with
+# Lexer.profile().  Every attribute is a dictionary keyed by lexer state:
+#
+#     matches    {state: {rule name: number of matches}}
+#     times      {state: {rule name: seconds spent in the rule function}}
+#     failures   {state: {tuple of rule names: failed master regex matches}}
+#     literals   {state: {literal character: number of tokens}}
+#     errors     {state: number of t_error() calls}
+#
+# A master regex is identified by the names of the rules it contains.
+# -----------------------------------------------------------------------------
+class LexerStats(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.matches  = {}
+        self.times    = {}
+        self.failures = {}
+        self.literals = {}
+        self.errors   = {}
+        self._scanners = {}
+
+    # Returns (rule names, {group index: rule name}) for a master regex or DFA
+    def _scanner(self, lexre, findex):
+        info = self._scanners.get(lexre)
+        if info is None:
+            if isinstance(lexre, _DFA):
+                names = dict((n + 1, rule[0]) for n, rule in enumerate(lexre.rules))
+            else:
+                names = dict((i, name) for name, i in lexre.groupindex.items()
+                             if i < len(findex) and findex[i])
+            info = self._scanners[lexre] = (tuple(names[i] for i in sorted(names)), names)
+        return info
+
+    def report(self):
+        lines = []
+        states = set(self.matches) | set(self.failures) | set(self.literals) | set(self.errors)
+        for state in sorted(states):
+            lines.append("State '%s'" % state)
+            lines.append('    %-32s %10s %12s' % ('Rule', 'Matches', 'Time (ms)'))
+            matches = self.matches.get(state, {})
+            times = self.times.get(state, {})
+            for name in sorted(matches, key=lambda name: (-matches[name], name)):
+                if name in times:
+                    lines.append('    %-32s %10d %12.3f' % (name, matches[name], times[name] * 1000.0))
+                else:
+                    lines.append('    %-32s %10d' % (name, matches[name]))
+            literals = self.literals.get(state, {})
+            for c in sorted(literals, key=lambda c: (-literals[c], c)):
+                lines.append('    %-32s %10d' % ('literal %r' % c, literals[c]))
+            if state in self.errors:
+                lines.append('    %-32s %10d' % ('t_error', self.errors[state]))
+            failures = self.failures.get(state, {})
+            if failures:
+                lines.append('    %-32s %10s' % ('Failed master regex', 'Attempts'))
+                for rules in sorted(failures, key=lambda rules: (-failures[rules], rules)):
+                    label = ' '.join(rules)
+                    if len(label) > 32:
+                        label = label[:29] + '...'
+                    lines.append('    %-32s %10d' % (label, failures[rules]))
+        return '\n'.join(lines) + '\n' if lines else ''
+
 # -----------------------------------------------------------------------------
 #                        === Lexing Engine ===
 #
@@ -140,9 +387,41 @@ class Lexer:
         self.lexmodule = None         # Module
         self.lineno = 1               # Current line number
         self.lexoptimize = False      # Optimized mode
+        self.lextokenclass = LexToken # Class used to create tokens
+        self.lexintern = False        # Intern values of string rules
+        self.lexkindnames = []        # Token type names indexed by kind id
+        self.lexkinds = {}            # Mapping of token type names to kind ids
+        self.lexstream = None         # Iterator of input chunks (streaming mode)
+        self.lexstreameof = True      # Set when the input stream is exhausted
+        self.lexchunksize = 0         # Chunk size used when reading the stream
+        self.lexstreamlimit = 0       # Maximum lookahead buffered for a failed match
+        self.lexbase = 0              # Absolute position of lexdata[0]
+        self.lexbinary = False        # Input is bytes, bytearray or mmap
+        self.lexlitmap = None         # Literal characters mapped to (value, type)
+        self.lexstatebytesre = None   # Master regexs compiled for binary input
+        self.lexstatebytesignore = None  # Ignored characters for binary input
+        self.lexdispatch = None       # Master regexs to try, indexed by next character
+        self.lexstatedispatch = {}    # Dictionary mapping lexer states to dispatch tables
+        self.lexstatebytesdispatch = None  # Dispatch tables for binary input
+        self.lexengine = 're'         # Matching engine ('re', 'dfa' or 'numpy')
+        self.lexlineindex = None      # LineIndex if the lexer tracks lines itself
+        self.lexkindmode = False      # Set the kind id of each token in tok.kind
+        self.lexstateskip = {}        # Dictionary mapping lexer states to (first chars, skip scanner)
+        self.lexstatebytesskip = None # Skip scanners for binary input
+        self.lexskipfirst = ''        # Characters that can start a run of ignored text
+        self.lexskip = None           # Match function of the skip scanner
+        self.lexstats = None          # LexerStats while profiling
+        self.lexstatevector = {}      # Dictionary mapping lexer states to NumPy engine plans
+        self.lexstreamdfa = {}        # DFAs used to check matches near the end of a stream window
 
     def clone(self, object=None):
         c = copy.copy(self)
+        if self.lexlineindex is not None:
+            c.lexlineindex = self.lexlineindex.copy()
+
+        # If a different token() implementation is selected, rebind it to the clone
+        if 'token' in self.__dict__:
+            c.token = getattr(c, self.token.__name__)
 
         # If the object parameter has been supplied, it means we are attaching the
         # lexer to a new object.  In this case, we have to rebind all methods in
@@ -155,7 +434,7 @@ class Lexer:
                 for cre, findex in ritem:
                     newfindex = []
                     for f in findex:
-                        if not f or not f[0]:
+                        if not f or not f[0] or isinstance(f[0], TokenAction):
                             newfindex.append(f)
                             continue
                         newfindex.append((getattr(object, f[0].__name__), f[1]))
@@ -166,6 +445,9 @@ class Lexer:
             for key, ef in self.lexstateerrorf.items():
                 c.lexstateerrorf[key] = getattr(object, ef.__name__)
             c.lexmodule = object
+            c.build_dispatch()
+            if c.lexstatebytesre is not None:
+                c.compile_bytes()
         return c
 
     # ------------------------------------------------------------
@@ -177,33 +459,52 @@ class Lexer:
         basetabmodule = lextab.split('.')[-1]
         filename = os.path.join(outputdir, basetabmodule) + '.py'
         with open(filename, 'w') as tf:
-            tf.write('# %s.py. This file automatically created by PLY (version %s). Don\'t edit!\n' % (basetabmodule, __version__))
-            tf.write('_tabversion   = %s\n' % repr(__tabversion__))
-            tf.write('_lextokens    = set(%s)\n' % repr(tuple(self.lextokens)))
-            tf.write('_lexreflags   = %s\n' % repr(self.lexreflags))
-            tf.write('_lexliterals  = %s\n' % repr(self.lexliterals))
-            tf.write('_lexstateinfo = %s\n' % repr(self.lexstateinfo))
-
-            # Rewrite the lexstatere table, replacing function objects with function names 
-            tabre = {}
-            for statename, lre in self.lexstatere.items():
-                titem = []
-                for (pat, func), retext, renames in zip(lre, self.lexstateretext[statename], self.lexstaterenames[statename]):
-                    titem.append((retext, _funcs_to_names(func, renames)))
-                tabre[statename] = titem
-
-            tf.write('_lexstatere   = %s\n' % repr(tabre))
-            tf.write('_lexstateignore = %s\n' % repr(self.lexstateignore))
-
-            taberr = {}
-            for statename, ef in self.lexstateerrorf.items():
-                taberr[statename] = ef.__name__ if ef else None
-            tf.write('_lexstateerrorf = %s\n' % repr(taberr))
-
-            tabeof = {}
-            for statename, ef in self.lexstateeoff.items():
-                tabeof[statename] = ef.__name__ if ef else None
-            tf.write('_lexstateeoff = %s\n' % repr(tabeof))
+            tf.write(self._tabtext(basetabmodule))
+
+    # ------------------------------------------------------------
+    # _tabtext() - Return the source text of a table module
+    # ------------------------------------------------------------
+    def _tabtext(self, basetabmodule='lextab'):
+        lines = []
+        lines.append('# %s.py. This file automatically created by PLY (version %s). Don\'t edit!\n' % (basetabmodule, __version__))
+        lines.append('_tabversion   = %s\n' % repr(__tabversion__))
+        lines.append('_lextokens    = set(%s)\n' % repr(tuple(sorted(self.lextokens))))
+        lines.append('_lexreflags   = %s\n' % repr(self.lexreflags))
+        lines.append('_lexliterals  = %s\n' % repr(self.lexliterals))
+        lines.append('_lexstateinfo = %s\n' % repr(self.lexstateinfo))
+
+        # Rewrite the lexstatere table, replacing function objects with function names 
+        tabre = {}
+        for statename, lre in self.lexstatere.items():
+            titem = []
+            for (pat, func), retext, renames in zip(lre, self.lexstateretext[statename], self.lexstaterenames[statename]):
+                if pat.pattern != retext:
+                    func, renames = _plain_index(pat, retext, func, renames)
+                titem.append((retext, _funcs_to_names(func, renames)))
+            tabre[statename] = titem
+
+        lines.append('_lexstatere   = %s\n' % repr(tabre))
+        lines.append('_lexstateignore = %s\n' % repr(self.lexstateignore))
+
+        taberr = {}
+        for statename, ef in self.lexstateerrorf.items():
+            taberr[statename] = ef.__name__ if ef else None
+        lines.append('_lexstateerrorf = %s\n' % repr(taberr))
+
+        tabeof = {}
+        for statename, ef in self.lexstateeoff.items():
+            tabeof[statename] = ef.__name__ if ef else None
+        lines.append('_lexstateeoff = %s\n' % repr(tabeof))
+
+        # First character sets used to build the dispatch tables
+        tabfirsts = {}
+        for statename, dispatch in self.lexstatedispatch.items():
+            firsts = getattr(dispatch, 'firsts', None)
+            if firsts is not None:
+                tabfirsts[statename] = [(''.join(sorted(first)) if first is not None else None, other)
+                                        for first, other in firsts]
+        lines.append('_lexstatefirsts = %s\n' % repr(tabfirsts))
+        return ''.join(lines)
 
     # ------------------------------------------------------------
     # readtab() - Read lexer information from a tab file
@@ -222,18 +523,29 @@ class Lexer:
         self.lexreflags     = lextab._lexreflags
         self.lexliterals    = lextab._lexliterals
         self.lextokens_all  = self.lextokens | set(self.lexliterals)
+        self.set_kinds()
         self.lexstateinfo   = lextab._lexstateinfo
         self.lexstateignore = lextab._lexstateignore
         self.lexstatere     = {}
         self.lexstateretext = {}
+        self.lexstaterenames = {}
         for statename, lre in lextab._lexstatere.items():
             titem = []
             txtitem = []
+            nameitem = []
             for pat, func_name in lre:
-                titem.append((re.compile(pat, lextab._lexreflags), _names_to_funcs(func_name, fdict)))
+                # Use the same factored regex as a lexer built by lex()
+                lexre, funcs, names = _factored_index(re.compile(pat, lextab._lexreflags),
+                                                      pat, _names_to_funcs(func_name, fdict),
+                                                      [n[0] if n and isinstance(n[0], str) else None for n in func_name])
+                titem.append((lexre, funcs))
+                txtitem.append(pat)
+                nameitem.append(names)
 
             self.lexstatere[statename] = titem
             self.lexstateretext[statename] = txtitem
+            self.lexstaterenames[statename] = nameitem
+        self.build_dispatch(getattr(lextab, '_lexstatefirsts', None))
 
         self.lexstateerrorf = {}
         for statename, ef in lextab._lexstateerrorf.items():
@@ -244,6 +556,18 @@ class Lexer:
             self.lexstateeoff[statename] = fdict[ef]
 
         self.begin('INITIAL')
+        self.set_binary(False)
+
+    # ------------------------------------------------------------
+    # set_kinds() - Assign integer kind ids to token types
+    #
+    # Ids are dense and only depend on the token names and literals, so
+    # they are the same no matter how the lexer was built.  Id 0 is
+    # reserved for the end of input and id 1 for error tokens.
+    # ------------------------------------------------------------
+    def set_kinds(self):
+        self.lexkindnames = ['$end', 'error'] + sorted(self.lextokens) + sorted(set(self.lexliterals))
+        self.lexkinds = dict((name, n) for n, name in enumerate(self.lexkindnames))
 
     # ------------------------------------------------------------
     # input() - Push a new string into the lexer
@@ -251,11 +575,295 @@ class Lexer:
     def input(self, s):
         # Pull off the first character to see if s looks like a string
         c = s[:1]
-        if not isinstance(c, StringTypes):
+        if not isinstance(c, StringTypes) and not isinstance(c, BinaryTypes):
             raise ValueError('Expected a string')
+        self.set_binary(isinstance(c, BinaryTypes))
         self.lexdata = s
         self.lexpos = 0
         self.lexlen = len(s)
+        self.lexbase = 0
+        self.lexstream = None
+        self.lexstreameof = True
+        if self.lexlineindex is not None:
+            self.lexlineindex = LineIndex(self.lineno, b'\n' if self.lexbinary else '\n')
+            self.token = self.linetoken
+        elif self.lexstats is not None:
+            self.token = self.profiletoken
+        elif 'token' in self.__dict__:
+            del self.token
+
+    # ------------------------------------------------------------
+    # restart() - Push a new string that is lexed on its own
+    #
+    # Like input(), but the lexer also goes to the given state with an
+    # empty state stack and lineno is set, so nothing left over from the
+    # previous input changes how s is lexed.
+    # ------------------------------------------------------------
+    def restart(self, s, state='INITIAL', lineno=1):
+        if self.lexstatestack:
+            del self.lexstatestack[:]
+        if self.lexstate != state:
+            self.begin(state)
+        self.lineno = lineno
+        self.input(s)
+
+    # ------------------------------------------------------------
+    # lex_many() - Tokenize many separate inputs
+    #
+    # Yields a list of the tokens of each string in inputs, or the
+    # exception raised while tokenizing it (a LexError, for instance).
+    # Each string is lexed on its own with restart(), starting in the
+    # state and on the line the lexer was in when lex_many() was called.
+    # ------------------------------------------------------------
+    def lex_many(self, inputs):
+        return _lex_many(self, inputs)
+
+    # ------------------------------------------------------------
+    # input_stream() - Read input incrementally from a stream
+    #
+    # source is a file-like object with a read() method or an iterable
+    # producing strings.  Only a sliding window of the input is kept in
+    # lexdata.  lexbase holds the absolute position of lexdata[0] so that
+    # lexpos and token positions are still relative to the whole input.
+    # ------------------------------------------------------------
+    def input_stream(self, source, chunksize=65536, limit=None):
+        if hasattr(source, 'read'):
+            source = _read_chunks(source, chunksize)
+        self.lexstream = iter(source)
+        self.lexstreameof = False
+        self.lexchunksize = chunksize
+        self.lexstreamlimit = limit if limit is not None else 16 * chunksize
+        self.lexdata = None
+        self.lexpos = 0
+        self.lexlen = 0
+        self.lexbase = 0
+        self.token = self.streamtoken if self.lexstats is None else self.profiletoken
+        self._fill(0)
+        self.set_binary(isinstance(self.lexdata, BinaryTypes))
+        if self.lexlineindex is not None:
+            self.lexlineindex = LineIndex(self.lineno, b'\n' if self.lexbinary else '\n')
+            self.token = self.linetoken
+
+    # ------------------------------------------------------------
+    # input_feed() - Take input as it arrives with feed()
+    #
+    # This is a streaming mode for input that is pushed to the lexer
+    # (for example, from a network connection) instead of read from it.
+    # token() returns tokens as soon as they are known not to continue
+    # in input that hasn't arrived yet.  When it needs more input, it
+    # raises NeedInput and can be called again after feed().  Once
+    # feed_eof() is called, the rest of the input is tokenized and
+    # t_eof() is called as usual.  t_eof() may ask for more input by
+    # calling feed() or by raising NeedInput.
+    #
+    # limit is the longest text that is buffered while no rule or
+    # literal matches it, as for input_stream().
+    # ------------------------------------------------------------
+    def input_feed(self, limit=None):
+        self.lexstream = _FeedQueue()
+        self.lexstreameof = False
+        self.lexchunksize = 1
+        self.lexstreamlimit = limit if limit is not None else 1 << 20
+        self.lexdata = None
+        self.lexpos = 0
+        self.lexlen = 0
+        self.lexbase = 0
+        self.token = self.streamtoken if self.lexstats is None else self.profiletoken
+        if self.lexlineindex is not None:
+            self.lexlineindex = LineIndex(self.lineno)
+            self.token = self.linetoken
+
+    # ------------------------------------------------------------
+    # feed() - Add input given to input_feed()
+    # feed_eof() - Mark the end of the input
+    # ------------------------------------------------------------
+    def feed(self, data):
+        if not isinstance(self.lexstream, _FeedQueue):
+            raise RuntimeError('feed() requires input_feed() to be called first')
+        if self.lexdata is None and not self.lexstream.chunks:
+            c = data[:1]
+            if not isinstance(c, StringTypes) and not isinstance(c, BinaryTypes):
+                raise ValueError('Expected a string')
+            self.set_binary(isinstance(c, BinaryTypes))
+            if self.lexlineindex is not None:
+                self.lexlineindex.newline = b'\n' if self.lexbinary else '\n'
+        self.lexstream.chunks.append(data)
+        self.lexstream.eof = False
+        self.lexstreameof = False
+
+    def feed_eof(self):
+        if not isinstance(self.lexstream, _FeedQueue):
+            raise RuntimeError('feed_eof() requires input_feed() to be called first')
+        self.lexstream.eof = True
+
+    # ------------------------------------------------------------
+    # _fill() - Read more data into the stream window
+    #
+    # Text before position pos (relative to the window) is discarded.
+    # Reads at least one more chunk and keeps reading until the window
+    # holds chunksize characters beyond pos.  Returns the new window
+    # relative position.
+    # ------------------------------------------------------------
+    def _fill(self, pos):
+        if self.lexlineindex is not None and self.lexdata is not None:
+            self.lexlineindex.scan(self.lexdata, self.lexbase + pos, self.lexbase)
+        pieces = [] if self.lexdata is None else [self.lexdata[pos:]]
+        ahead = self.lexlen - pos if self.lexdata is not None else 0
+        needed = max(self.lexchunksize, 1)
+        added = False
+        for chunk in self.lexstream:
+            if not chunk:
+                continue
+            pieces.append(chunk)
+            ahead += len(chunk)
+            added = True
+            if ahead >= needed:
+                break
+        else:
+            self.lexstreameof = True
+
+        if added or pos:
+            self.lexdata = pieces[0][:0].join(pieces) if pieces else ''
+            self.lexbase += pos
+            self.lexlen = len(self.lexdata)
+            # Only ignored text can lie between lexpos and the new start
+            # of the window, so lexpos can be moved up to it.  Scanning
+            # starts again from lexpos if the lexer has to wait for input.
+            self.lexpos = self.lexbase
+        elif self.lexdata is None:
+            self.lexdata = ''
+        return 0 if (added or pos) else pos
+
+    # ------------------------------------------------------------
+    # set_binary() - Select text or binary (bytes) input
+    #
+    # In binary mode, the master regular expressions are bytes patterns
+    # compiled from the text patterns.  Token values are bytes, but the
+    # types of literal tokens remain strings.
+    # ------------------------------------------------------------
+    def set_binary(self, binary):
+        if binary == self.lexbinary and self.lexlitmap is not None:
+            return
+        if binary:
+            if self.lexstatebytesre is None:
+                self.compile_bytes()
+            self.lexlitmap = dict((ord(c), (c.encode('latin-1'), c)) for c in self.lexliterals)
+        else:
+            self.lexlitmap = dict((c, (c, c)) for c in self.lexliterals)
+        self.lexbinary = binary
+        self.begin(self.lexstate)
+
+    # ------------------------------------------------------------
+    # compile_bytes() - Compile the master regexs for binary input
+    # ------------------------------------------------------------
+    def compile_bytes(self):
+        compiled = {}
+        def to_bytes(lre):
+            result = []
+            for cre, findex in lre:
+                if isinstance(cre, _DFA):
+                    if id(cre) not in compiled:
+                        compiled[id(cre)] = cre.binary_version()
+                elif id(cre) not in compiled:
+                    try:
+                        pattern = cre.pattern.encode('latin-1')
+                        compiled[id(cre)] = re.compile(pattern, cre.flags & ~re.UNICODE)
+                    except (UnicodeError, re.error) as e:
+                        raise ValueError("Can't compile rules for binary input in state '%s'. %s" % (state, e))
+                result.append((compiled[id(cre)], findex))
+            return result
+
+        bytesre = {}
+        bytesdispatch = {}
+        for state, lre in self.lexstatere.items():
+            bytesre[state] = to_bytes(lre)
+            dispatch = self.lexstatedispatch[state]
+            bytesdispatch[state] = _Dispatch(to_bytes(dispatch.default))
+            for c, clist in dispatch.items():
+                if ord(c) < 256:
+                    bytesdispatch[state][ord(c)] = to_bytes(clist)
+        self.lexstatebytesre = bytesre
+        self.lexstatebytesdispatch = bytesdispatch
+        self.lexstatebytesignore = dict((state, ignore.encode('latin-1'))
+                                        for state, ignore in self.lexstateignore.items())
+
+        bytesskip = {}
+        for state, (first, skip) in self.lexstateskip.items():
+            try:
+                if skip:
+                    skip = re.compile(skip.pattern.encode('latin-1'), skip.flags & ~re.UNICODE)
+                bytesskip[state] = (first.encode('latin-1'), skip)
+            except (UnicodeError, re.error) as e:
+                raise ValueError("Can't compile rules for binary input in state '%s'. %s" % (state, e))
+        self.lexstatebytesskip = bytesskip
+
+    # ------------------------------------------------------------
+    # build_dispatch() - Build the first character dispatch tables
+    #
+    # For each state, this works out which rules can match starting
+    # with each character and forms master regexs containing only
+    # those rules, in their original order.  token() picks the list of
+    # master regexs to try from the next input character.  Characters
+    # that no rule can start with go straight to the literal check.
+    #
+    # firsts optionally gives the first character sets of the rules
+    # of each state, as saved in a table file by _tabtext(), so that
+    # the regexs don't have to be analyzed again.
+    #
+    # With the DFA engine, rules are grouped into DFAs instead and a
+    # DFA is skipped for characters its start state has no transition
+    # for.
+    # ------------------------------------------------------------
+    def build_dispatch(self, firsts=None):
+        self.lexstatedispatch = {}
+        for state, lre in self.lexstatere.items():
+            if self.lexengine == 'dfa':
+                scanners = _build_dfa(lre, self.lexstateretext.get(state))
+                dispatch = _Dispatch(scanners)
+                for c in map(chr, range(128)):
+                    dispatch[c] = [(sc, findex) for sc, findex in scanners
+                                   if not isinstance(sc, _DFA) or sc.start[c] is not None]
+                self.lexstatedispatch[state] = dispatch
+            else:
+                tabfirsts = firsts.get(state) if firsts else None
+                if tabfirsts is not None:
+                    tabfirsts = [(set(first) if first is not None else None, other) for first, other in tabfirsts]
+                self.lexstatedispatch[state] = _build_dispatch(lre, self.lexstateretext.get(state), tabfirsts)
+        self.build_skip()
+        if self.lexengine == 'numpy':
+            self.build_vector()
+
+    # ------------------------------------------------------------
+    # build_skip() - Build the skip scanners
+    #
+    # For each state, this forms one regex that matches a whole run of
+    # ignored characters and text matched by t_ignore_* string rules.
+    # token() tries it before the rules after an ignored character and
+    # when the next character can start a t_ignore_* rule, so a single
+    # ignored character still only costs a membership test.
+    #
+    # A t_ignore_* rule is only included if its first characters are
+    # known, and it is guarded by a negative lookahead for the rules
+    # before it that can start with the same characters, so the result
+    # is the same as going through the master regexs.
+    # ------------------------------------------------------------
+    def build_skip(self):
+        self.lexstateskip = {}
+        self.lexstatebytesskip = None
+        for state, lre in self.lexstatere.items():
+            firsts = getattr(self.lexstatedispatch.get(state), 'firsts', None)
+            self.lexstateskip[state] = _build_skip(self.lexstateignore.get(state, ''), lre,
+                                                   self.lexstateretext.get(state), firsts)
+
+    # ------------------------------------------------------------
+    # build_vector() - Work out which states the NumPy engine can scan
+    # ------------------------------------------------------------
+    def build_vector(self):
+        self.lexstatevector = {}
+        for state, lre in self.lexstatere.items():
+            self.lexstatevector[state] = _build_vector(lre, self.lexstateretext.get(state),
+                                                       self.lexstateignore.get(state, ''),
+                                                       self.lexliterals)
 
     # ------------------------------------------------------------
     # begin() - Changes the lexing state
@@ -263,9 +871,18 @@ class Lexer:
     def begin(self, state):
         if state not in self.lexstatere:
             raise ValueError('Undefined state')
-        self.lexre = self.lexstatere[state]
+        if self.lexbinary:
+            self.lexre = self.lexstatebytesre[state]
+            self.lexdispatch = self.lexstatebytesdispatch[state]
+            self.lexignore = self.lexstatebytesignore.get(state, b'')
+            self.lexskipfirst, skip = self.lexstatebytesskip.get(state, (b'', None))
+        else:
+            self.lexre = self.lexstatere[state]
+            self.lexdispatch = self.lexstatedispatch[state]
+            self.lexignore = self.lexstateignore.get(state, '')
+            self.lexskipfirst, skip = self.lexstateskip.get(state, ('', None))
+        self.lexskip = skip.match if skip else None
         self.lexretext = self.lexstateretext[state]
-        self.lexignore = self.lexstateignore.get(state, '')
         self.lexerrorf = self.lexstateerrorf.get(state, None)
         self.lexeoff = self.lexstateeoff.get(state, None)
         self.lexstate = state
@@ -296,44 +913,68 @@ class Lexer:
         self.lexpos += n
 
     # ------------------------------------------------------------
-    # opttoken() - Return the next token from the Lexer
+    # token() - Return the next token from the Lexer
     #
     # Note: This function has been carefully implemented to be as fast
-    # as possible.  Don't make changes unless you really know what
-    # you are doing
+    # as possible.  DO NOT EDIT THIS CODE DIRECTLY!  It is generated from
+    # profiletoken() by the ply/lgen.py script.
     # ------------------------------------------------------------
     def token(self):
+        #--! token-start
         # Make local copies of frequently referenced attributes
-        lexpos    = self.lexpos
-        lexlen    = self.lexlen
         lexignore = self.lexignore
+        lexskipfirst = self.lexskipfirst
+        lexskip   = self.lexskip
         lexdata   = self.lexdata
+        lexlen    = self.lexlen
+        lexpos    = self.lexpos
+        tokclass  = self.lextokenclass
+        lexintern = self.lexintern and not self.lexbinary
+        kinds     = self.lexkinds if self.lexkindmode else None
 
-        while lexpos < lexlen:
-            # This code provides some short-circuit code for whitespace, tabs, and other ignored characters
+        while True:
+            if lexpos >= lexlen:
+                break
+
+            # This code provides some short-circuit code for whitespace, tabs, and other ignored
+            # characters.  Longer runs of ignored text are skipped by a single regex match
             if lexdata[lexpos] in lexignore:
                 lexpos += 1
+                if lexpos < lexlen and lexdata[lexpos] in lexskipfirst:
+                    m = lexskip(lexdata, lexpos)
+                    if m:
+                        lexpos = m.end()
                 continue
+            if lexdata[lexpos] in lexskipfirst:
+                m = lexskip(lexdata, lexpos)
+                if m:
+                    lexpos = m.end()
+                    continue
 
             # Look for a regular expression match
-            for lexre, lexindexfunc in self.lexre:
+            for lexre, lexindexfunc in self.lexdispatch[lexdata[lexpos]]:
                 m = lexre.match(lexdata, lexpos)
                 if not m:
                     continue
 
+                i = m.lastindex
+
                 # Create a token for return
-                tok = LexToken()
+                tok = tokclass()
                 tok.value = m.group()
                 tok.lineno = self.lineno
                 tok.lexpos = lexpos
 
-                i = m.lastindex
                 func, tok.type = lexindexfunc[i]
 
                 if not func:
                     # If no token type was set, it's an ignored token
                     if tok.type:
+                        if lexintern:
+                            tok.value = intern(tok.value)
                         self.lexpos = m.end()
+                        if kinds:
+                            tok.kind = kinds.get(tok.type, len(kinds))
                         return tok
                     else:
                         lexpos = m.end()
@@ -341,6 +982,23 @@ class Lexer:
 
                 lexpos = m.end()
 
+                # Built-in actions attached with token_actions
+                if func.__class__ is TokenAction:
+                    if func.newlines:
+                        self.lineno += tok.value.count(b'\n' if self.lexbinary else '\n')
+                    if func.discard:
+                        break
+                    if func.keywords:
+                        tok.type = func.keywords.get(tok.value, tok.type)
+                    if func.convert:
+                        tok.value = func.convert(tok.value)
+                    elif lexintern:
+                        tok.value = intern(tok.value)
+                    self.lexpos = lexpos
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
+                    return tok
+
                 # If token is processed by a function, call it
 
                 tok.lexer = self      # Set additional attributes useful in token rules
@@ -351,59 +1009,50 @@ class Lexer:
 
                 # Every function must return a token, if nothing, we just move to next token
                 if not newtok:
-                    lexpos    = self.lexpos         # This is here in case user has updated lexpos.
+                    lexpos    = self.lexpos   # This is here in case user has updated lexpos.
                     lexignore = self.lexignore      # This is here in case there was a state change
+                    lexskipfirst = self.lexskipfirst
+                    lexskip   = self.lexskip
                     break
 
                 # Verify type of the token.  If not in the token map, raise an error
                 if not self.lexoptimize:
                     if newtok.type not in self.lextokens_all:
-                        raise LexError("%s:%d: Rule '%s' returned an unknown token type '%s'" % (
-                            func.__code__.co_filename, func.__code__.co_firstlineno,
-                            func.__name__, newtok.type), lexdata[lexpos:])
+                        raise self._type_error(func, newtok.type, lexdata[lexpos:])
 
+                if kinds:
+                    newtok.kind = kinds.get(newtok.type, len(kinds))
                 return newtok
             else:
                 # No match, see if in literals
-                if lexdata[lexpos] in self.lexliterals:
-                    tok = LexToken()
-                    tok.value = lexdata[lexpos]
+                lit = self.lexlitmap.get(lexdata[lexpos])
+                if lit:
+                    tok = tokclass()
+                    tok.value, tok.type = lit
                     tok.lineno = self.lineno
-                    tok.type = tok.value
                     tok.lexpos = lexpos
                     self.lexpos = lexpos + 1
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
                     return tok
 
                 # No match. Call t_error() if defined.
                 if self.lexerrorf:
-                    tok = LexToken()
-                    tok.value = self.lexdata[lexpos:]
-                    tok.lineno = self.lineno
-                    tok.type = 'error'
-                    tok.lexer = self
-                    tok.lexpos = lexpos
-                    self.lexpos = lexpos
-                    newtok = self.lexerrorf(tok)
-                    if lexpos == self.lexpos:
-                        # Error method didn't change text position at all. This is an error.
-                        raise LexError("Scanning error. Illegal character '%s'" % (lexdata[lexpos]), lexdata[lexpos:])
+                    newtok = self._error_token(lexpos)
                     lexpos = self.lexpos
                     if not newtok:
                         continue
+                    if kinds:
+                        newtok.kind = kinds.get(newtok.type, len(kinds))
                     return newtok
 
                 self.lexpos = lexpos
-                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos], lexpos), lexdata[lexpos:])
+                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos:lexpos+1], lexpos), lexdata[lexpos:])
 
         if self.lexeoff:
-            tok = LexToken()
-            tok.type = 'eof'
-            tok.value = ''
-            tok.lineno = self.lineno
-            tok.lexpos = lexpos
-            tok.lexer = self
-            self.lexpos = lexpos
-            newtok = self.lexeoff(tok)
+            newtok = self._eof_token(lexpos)
+            if kinds and newtok:
+                newtok.kind = kinds.get(newtok.type, len(kinds))
             return newtok
 
         self.lexpos = lexpos + 1
@@ -411,47 +1060,1654 @@ class Lexer:
             raise RuntimeError('No input string given with input()')
         return None
 
-    # Iterator interface
-    def __iter__(self):
-        return self
+        #--! token-end
 
-    def next(self):
-        t = self.token()
-        if t is None:
-            raise StopIteration
-        return t
+    # ------------------------------------------------------------
+    # profile() - Turn the collection of profiling statistics on or off
+    #
+    # While profiling is on, tokens come from profiletoken() and the
+    # counts are added to the LexerStats object in lexstats, which is
+    # returned.
+    # ------------------------------------------------------------
+    def profile(self, enable=True):
+        stats = self.lexstats
+        if enable:
+            if stats is None:
+                self.lexstats = LexerStats()
+        else:
+            self.lexstats = None
+        if self.lexlineindex is not None:
+            self.token = self.linetoken
+        elif enable:
+            self.token = self.profiletoken
+        elif self.lexstream is not None:
+            self.token = self.streamtoken
+        elif 'token' in self.__dict__:
+            del self.token
+        return self.lexstats if enable else stats
 
-    __next__ = next
+    # ------------------------------------------------------------
+    # profiletoken() - Return the next token and collect statistics
+    #
+    # This is the source of the other scanning loops.  ply/lgen.py makes
+    # token() and streamtoken() from it, leaving out the PROFILE sections
+    # and keeping the clause for plain or streaming input of each STREAM
+    # section.  Make changes here and run lgen.py.
+    # ------------------------------------------------------------
+    def profiletoken(self):
+        #--! profiletoken-start
+        #--! ANYSTREAM
+        stream    = self.lexstream is not None
+        #--! ANYSTREAM
+        # Make local copies of frequently referenced attributes
+        lexignore = self.lexignore
+        lexskipfirst = self.lexskipfirst
+        lexskip   = self.lexskip
+        lexdata   = self.lexdata
+        lexlen    = self.lexlen
+        lexbase   = self.lexbase
+        lexpos    = self.lexpos - lexbase
+        tokclass  = self.lextokenclass
+        lexintern = self.lexintern and not self.lexbinary
+        kinds     = self.lexkinds if self.lexkindmode else None
+        #--! STREAM
+        if stream:
+            chunksize = self.lexchunksize
+            feeding   = self.lexstream.__class__ is _FeedQueue
+        #--! STREAM
+        #--! PROFILE
+        stats     = self.lexstats
+        state     = self.lexstate
+        #--! PROFILE
+
+        while True:
+            #--! STREAM
+            if stream:
+                # Keep at least chunksize characters ahead in the window
+                if lexlen - lexpos < chunksize and not self.lexstreameof:
+                    lexpos  = self._fill(lexpos)
+                    lexdata = self.lexdata
+                    lexlen  = self.lexlen
+                    lexbase = self.lexbase
+                    continue
+            #--! STREAM
+            if lexpos >= lexlen:
+                break
 
-# -----------------------------------------------------------------------------
-#                           ==== Lex Builder ===
-#
-# The functions and classes below are used to collect lexing information
-# and build a Lexer object from it.
-# -----------------------------------------------------------------------------
+            # This code provides some short-circuit code for whitespace, tabs, and other ignored
+            # characters.  Longer runs of ignored text are skipped by a single regex match
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                if lexpos < lexlen and lexdata[lexpos] in lexskipfirst:
+                    m = lexskip(lexdata, lexpos)
+                    #--! STREAM
+                    if stream:
+                        if m and (m.end() < lexlen or self.lexstreameof):
+                            lexpos = m.end()
+                    else:
+                        if m:
+                            lexpos = m.end()
+                    #--! STREAM
+                continue
+            if lexdata[lexpos] in lexskipfirst:
+                m = lexskip(lexdata, lexpos)
+                if m:
+                    #--! STREAM
+                    if stream:
+                        # An ignored run that reaches the end of the window might continue
+                        if m.end() == lexlen and not self.lexstreameof:
+                            lexpos  = self._fill(lexpos)
+                            lexdata = self.lexdata
+                            lexlen  = self.lexlen
+                            lexbase = self.lexbase
+                        else:
+                            lexpos = m.end()
+                    else:
+                        lexpos = m.end()
+                    #--! STREAM
+                    continue
 
-# -----------------------------------------------------------------------------
-# _get_regex(func)
-#
-# Returns the regular expression assigned to a function either as a doc string
-# or as a .regex attribute attached by the @TOKEN decorator.
-# -----------------------------------------------------------------------------
-def _get_regex(func):
-    return getattr(func, 'regex', func.__doc__)
+            # Look for a regular expression match
+            for lexre, lexindexfunc in self.lexdispatch[lexdata[lexpos]]:
+                m = lexre.match(lexdata, lexpos)
+                #--! PROFILE
+                rules, names = stats._scanner(lexre, lexindexfunc)
+                #--! PROFILE
+                if not m:
+                    #--! PROFILE
+                    failures = stats.failures.setdefault(state, {})
+                    failures[rules] = failures.get(rules, 0) + 1
+                    #--! PROFILE
+                    continue
+
+                #--! STREAM
+                if stream:
+                    # The match ran into the end of the window, or more fed text
+                    # could still change which rule matches.  Get more text and
+                    # try again
+                    if not self.lexstreameof and (m.end() == lexlen or
+                                                  (feeding and self._stream_open(lexdata, lexpos, lexlen))):
+                        lexpos  = self._fill(lexpos)
+                        lexdata = self.lexdata
+                        lexlen  = self.lexlen
+                        lexbase = self.lexbase
+                        break
+                #--! STREAM
+
+                i = m.lastindex
+                #--! PROFILE
+                matches = stats.matches.setdefault(state, {})
+                matches[names[i]] = matches.get(names[i], 0) + 1
+                #--! PROFILE
+
+                # Create a token for return
+                tok = tokclass()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexbase + lexpos
+
+                func, tok.type = lexindexfunc[i]
+
+                if not func:
+                    # If no token type was set, it's an ignored token
+                    if tok.type:
+                        if lexintern:
+                            tok.value = intern(tok.value)
+                        self.lexpos = lexbase + m.end()
+                        if kinds:
+                            tok.kind = kinds.get(tok.type, len(kinds))
+                        return tok
+                    else:
+                        lexpos = m.end()
+                        break
+
+                lexpos = m.end()
+
+                # Built-in actions attached with token_actions
+                if func.__class__ is TokenAction:
+                    if func.newlines:
+                        self.lineno += tok.value.count(b'\n' if self.lexbinary else '\n')
+                    if func.discard:
+                        break
+                    if func.keywords:
+                        tok.type = func.keywords.get(tok.value, tok.type)
+                    if func.convert:
+                        tok.value = func.convert(tok.value)
+                    elif lexintern:
+                        tok.value = intern(tok.value)
+                    self.lexpos = lexbase + lexpos
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
+                    return tok
+
+                # If token is processed by a function, call it
+
+                tok.lexer = self      # Set additional attributes useful in token rules
+                self.lexmatch = m
+                self.lexpos = lexbase + lexpos
+
+                #--! PROFILE
+                start = _clock()
+                #--! PROFILE
+                newtok = func(tok)
+                #--! PROFILE
+                times = stats.times.setdefault(state, {})
+                times[names[i]] = times.get(names[i], 0.0) + (_clock() - start)
+                #--! PROFILE
+
+                # Every function must return a token, if nothing, we just move to next token
+                if not newtok:
+                    lexpos    = self.lexpos - lexbase   # This is here in case user has updated lexpos.
+                    lexignore = self.lexignore      # This is here in case there was a state change
+                    lexskipfirst = self.lexskipfirst
+                    lexskip   = self.lexskip
+                    #--! PROFILE
+                    state     = self.lexstate
+                    #--! PROFILE
+                    break
+
+                # Verify type of the token.  If not in the token map, raise an error
+                if not self.lexoptimize:
+                    if newtok.type not in self.lextokens_all:
+                        raise self._type_error(func, newtok.type, lexdata[lexpos:])
+
+                if kinds:
+                    newtok.kind = kinds.get(newtok.type, len(kinds))
+                return newtok
+            else:
+                #--! STREAM
+                if stream:
+                    # Nothing matched. More input might still produce a match
+                    if not self.lexstreameof and lexlen - lexpos <= self.lexstreamlimit:
+                        lexpos  = self._fill(lexpos)
+                        lexdata = self.lexdata
+                        lexlen  = self.lexlen
+                        lexbase = self.lexbase
+                        continue
+                #--! STREAM
+
+                # No match, see if in literals
+                lit = self.lexlitmap.get(lexdata[lexpos])
+                if lit:
+                    #--! PROFILE
+                    literals = stats.literals.setdefault(state, {})
+                    literals[lit[1]] = literals.get(lit[1], 0) + 1
+                    #--! PROFILE
+                    tok = tokclass()
+                    tok.value, tok.type = lit
+                    tok.lineno = self.lineno
+                    tok.lexpos = lexbase + lexpos
+                    self.lexpos = lexbase + lexpos + 1
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
+                    return tok
+
+                # No match. Call t_error() if defined.
+                if self.lexerrorf:
+                    #--! PROFILE
+                    stats.errors[state] = stats.errors.get(state, 0) + 1
+                    #--! PROFILE
+                    newtok = self._error_token(lexbase + lexpos)
+                    lexpos = self.lexpos - lexbase
+                    #--! PROFILE
+                    state  = self.lexstate
+                    #--! PROFILE
+                    if not newtok:
+                        continue
+                    if kinds:
+                        newtok.kind = kinds.get(newtok.type, len(kinds))
+                    return newtok
+
+                self.lexpos = lexbase + lexpos
+                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos:lexpos+1], lexbase + lexpos), lexdata[lexpos:])
+
+        if self.lexeoff:
+            #--! STREAM
+            if stream:
+                try:
+                    newtok = self._eof_token(lexbase + lexpos)
+                except NeedInput:
+                    # t_eof() wants more input given with feed()
+                    if isinstance(self.lexstream, _FeedQueue):
+                        self.lexstream.eof = False
+                        self.lexstreameof = False
+                    raise
+            else:
+                newtok = self._eof_token(lexbase + lexpos)
+            #--! STREAM
+            if kinds and newtok:
+                newtok.kind = kinds.get(newtok.type, len(kinds))
+            return newtok
+
+        self.lexpos = lexbase + lexpos + 1
+        #--! STREAM
+        if not stream:
+            if self.lexdata is None:
+                raise RuntimeError('No input string given with input()')
+        #--! STREAM
+        return None
+
+        #--! profiletoken-end
+
+    # ------------------------------------------------------------
+    # streamtoken() - Return the next token when reading from a stream
+    #
+    # This is the same as token(), but the text is a window that gets
+    # refilled as needed.  A refill happens when fewer than chunksize
+    # characters remain in the window, when a match extends to the end
+    # of the window (the token might continue), and when nothing matches
+    # at all (up to the lookahead limit).  Positions stored in lexpos and
+    # in tokens are absolute.  DO NOT EDIT THIS CODE DIRECTLY!  It is
+    # generated from profiletoken() by the ply/lgen.py script.
+    # ------------------------------------------------------------
+    def streamtoken(self):
+        #--! streamtoken-start
+        # Make local copies of frequently referenced attributes
+        lexignore = self.lexignore
+        lexskipfirst = self.lexskipfirst
+        lexskip   = self.lexskip
+        lexdata   = self.lexdata
+        lexlen    = self.lexlen
+        lexbase   = self.lexbase
+        lexpos    = self.lexpos - lexbase
+        tokclass  = self.lextokenclass
+        lexintern = self.lexintern and not self.lexbinary
+        kinds     = self.lexkinds if self.lexkindmode else None
+        chunksize = self.lexchunksize
+        feeding   = self.lexstream.__class__ is _FeedQueue
+
+        while True:
+            # Keep at least chunksize characters ahead in the window
+            if lexlen - lexpos < chunksize and not self.lexstreameof:
+                lexpos  = self._fill(lexpos)
+                lexdata = self.lexdata
+                lexlen  = self.lexlen
+                lexbase = self.lexbase
+                continue
+            if lexpos >= lexlen:
+                break
+
+            # This code provides some short-circuit code for whitespace, tabs, and other ignored
+            # characters.  Longer runs of ignored text are skipped by a single regex match
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                if lexpos < lexlen and lexdata[lexpos] in lexskipfirst:
+                    m = lexskip(lexdata, lexpos)
+                    if m and (m.end() < lexlen or self.lexstreameof):
+                        lexpos = m.end()
+                continue
+            if lexdata[lexpos] in lexskipfirst:
+                m = lexskip(lexdata, lexpos)
+                if m:
+                    # An ignored run that reaches the end of the window might continue
+                    if m.end() == lexlen and not self.lexstreameof:
+                        lexpos  = self._fill(lexpos)
+                        lexdata = self.lexdata
+                        lexlen  = self.lexlen
+                        lexbase = self.lexbase
+                    else:
+                        lexpos = m.end()
+                    continue
+
+            # Look for a regular expression match
+            for lexre, lexindexfunc in self.lexdispatch[lexdata[lexpos]]:
+                m = lexre.match(lexdata, lexpos)
+                if not m:
+                    continue
+
+                # The match ran into the end of the window, or more fed text
+                # could still change which rule matches.  Get more text and
+                # try again
+                if not self.lexstreameof and (m.end() == lexlen or
+                                              (feeding and self._stream_open(lexdata, lexpos, lexlen))):
+                    lexpos  = self._fill(lexpos)
+                    lexdata = self.lexdata
+                    lexlen  = self.lexlen
+                    lexbase = self.lexbase
+                    break
+
+                i = m.lastindex
+
+                # Create a token for return
+                tok = tokclass()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexbase + lexpos
+
+                func, tok.type = lexindexfunc[i]
+
+                if not func:
+                    # If no token type was set, it's an ignored token
+                    if tok.type:
+                        if lexintern:
+                            tok.value = intern(tok.value)
+                        self.lexpos = lexbase + m.end()
+                        if kinds:
+                            tok.kind = kinds.get(tok.type, len(kinds))
+                        return tok
+                    else:
+                        lexpos = m.end()
+                        break
+
+                lexpos = m.end()
+
+                # Built-in actions attached with token_actions
+                if func.__class__ is TokenAction:
+                    if func.newlines:
+                        self.lineno += tok.value.count(b'\n' if self.lexbinary else '\n')
+                    if func.discard:
+                        break
+                    if func.keywords:
+                        tok.type = func.keywords.get(tok.value, tok.type)
+                    if func.convert:
+                        tok.value = func.convert(tok.value)
+                    elif lexintern:
+                        tok.value = intern(tok.value)
+                    self.lexpos = lexbase + lexpos
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
+                    return tok
+
+                # If token is processed by a function, call it
+
+                tok.lexer = self      # Set additional attributes useful in token rules
+                self.lexmatch = m
+                self.lexpos = lexbase + lexpos
+
+                newtok = func(tok)
+
+                # Every function must return a token, if nothing, we just move to next token
+                if not newtok:
+                    lexpos    = self.lexpos - lexbase   # This is here in case user has updated lexpos.
+                    lexignore = self.lexignore      # This is here in case there was a state change
+                    lexskipfirst = self.lexskipfirst
+                    lexskip   = self.lexskip
+                    break
+
+                # Verify type of the token.  If not in the token map, raise an error
+                if not self.lexoptimize:
+                    if newtok.type not in self.lextokens_all:
+                        raise self._type_error(func, newtok.type, lexdata[lexpos:])
+
+                if kinds:
+                    newtok.kind = kinds.get(newtok.type, len(kinds))
+                return newtok
+            else:
+                # Nothing matched. More input might still produce a match
+                if not self.lexstreameof and lexlen - lexpos <= self.lexstreamlimit:
+                    lexpos  = self._fill(lexpos)
+                    lexdata = self.lexdata
+                    lexlen  = self.lexlen
+                    lexbase = self.lexbase
+                    continue
+
+                # No match, see if in literals
+                lit = self.lexlitmap.get(lexdata[lexpos])
+                if lit:
+                    tok = tokclass()
+                    tok.value, tok.type = lit
+                    tok.lineno = self.lineno
+                    tok.lexpos = lexbase + lexpos
+                    self.lexpos = lexbase + lexpos + 1
+                    if kinds:
+                        tok.kind = kinds.get(tok.type, len(kinds))
+                    return tok
+
+                # No match. Call t_error() if defined.
+                if self.lexerrorf:
+                    newtok = self._error_token(lexbase + lexpos)
+                    lexpos = self.lexpos - lexbase
+                    if not newtok:
+                        continue
+                    if kinds:
+                        newtok.kind = kinds.get(newtok.type, len(kinds))
+                    return newtok
+
+                self.lexpos = lexbase + lexpos
+                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos:lexpos+1], lexbase + lexpos), lexdata[lexpos:])
+
+        if self.lexeoff:
+            try:
+                newtok = self._eof_token(lexbase + lexpos)
+            except NeedInput:
+                # t_eof() wants more input given with feed()
+                if isinstance(self.lexstream, _FeedQueue):
+                    self.lexstream.eof = False
+                    self.lexstreameof = False
+                raise
+            if kinds and newtok:
+                newtok.kind = kinds.get(newtok.type, len(kinds))
+            return newtok
+
+        self.lexpos = lexbase + lexpos + 1
+        return None
+
+        #--! streamtoken-end
+
+    # ------------------------------------------------------------
+    # _error_token() - Call t_error() for the text at position pos
+    # _eof_token()   - Call t_eof() at position pos
+    # _type_error()  - Error for a rule returning an unknown token type
+    #
+    # These are shared by the scanning loops.  pos is an absolute
+    # position, as in lexpos.
+    # ------------------------------------------------------------
+    def _error_token(self, pos):
+        text = self.lexdata[pos - self.lexbase:]
+        tok = self.lextokenclass()
+        tok.value = text
+        tok.lineno = self.lineno
+        tok.type = 'error'
+        tok.lexer = self
+        tok.lexpos = pos
+        self.lexpos = pos
+        newtok = self.lexerrorf(tok)
+        if pos == self.lexpos:
+            # Error method didn't change text position at all. This is an error.
+            raise LexError("Scanning error. Illegal character '%s'" % (text[:1]), text)
+        return newtok
+
+    def _eof_token(self, pos):
+        tok = self.lextokenclass()
+        tok.type = 'eof'
+        tok.value = ''
+        tok.lineno = self.lineno
+        tok.lexpos = pos
+        tok.lexer = self
+        self.lexpos = pos
+        return self.lexeoff(tok)
+
+    def _type_error(self, func, toktype, text):
+        return LexError("%s:%d: Rule '%s' returned an unknown token type '%s'" % (
+            func.__code__.co_filename, func.__code__.co_firstlineno,
+            func.__name__, toktype), text)
+
+    # ------------------------------------------------------------
+    # _stream_open() - Check if a match might change with more input
+    #
+    # A match that stops short of the end of the stream window can
+    # still be wrong if a rule tried before it failed only because the
+    # window ended, such as a comment that isn't closed yet.  All the
+    # rules of the state are run as a DFA from pos.  If it reaches end
+    # and could still go on, more input is needed.  If the rules can't
+    # be turned into a DFA, the match is taken as it is.
+    #
+    # This is only done for input given with feed(), where the window
+    # often ends right after the token.  input_stream() keeps at least
+    # chunksize characters ahead instead.
+    # ------------------------------------------------------------
+    def _stream_open(self, data, pos, end):
+        key = (self.lexstate, self.lexbinary)
+        dfa = self.lexstreamdfa.get(key)
+        if dfa is None:
+            rules = _split_master(self.lexstatere[self.lexstate], self.lexstateretext.get(self.lexstate))
+            try:
+                dfa = _DFA(rules, self.lexbinary) if rules else False
+            except _Unsupported:
+                dfa = False
+            self.lexstreamdfa[key] = dfa
+        return dfa and dfa.open(data, pos, end)
+
+    # ------------------------------------------------------------
+    # linetoken() - Return the next token, with line tracking
+    #
+    # Used in place of token() when the lexer has a LineIndex.  The
+    # lineno and column of each token come from the index and
+    # lexer.lineno is kept up to date.
+    # ------------------------------------------------------------
+    def linetoken(self):
+        if self.lexstats is not None:
+            tok = self.profiletoken()
+        elif self.lexstream is not None:
+            tok = self.streamtoken()
+        else:
+            tok = Lexer.token(self)
+        if tok is not None:
+            pos = tok.lexpos
+            index = self.lexlineindex
+            if pos >= index.scanned:
+                index.scan(self.lexdata, min(pos, self.lexbase + self.lexlen), self.lexbase)
+            tok.lineno = self.lineno = index.lineno(pos)
+            tok.column = index.column(pos)
+        return tok
+
+    # ------------------------------------------------------------
+    # find_lineno() - Line number of a position in the input
+    # find_column() - Column number (starting at 1) of a position
+    #
+    # These use the line index if there is one.  Otherwise the input
+    # text is searched, which only works for text still in lexdata.
+    # ------------------------------------------------------------
+    def find_lineno(self, pos):
+        index = self.lexlineindex
+        if index is None:
+            newline = b'\n' if self.lexbinary else '\n'
+            return self.lexdata[:pos - self.lexbase].count(newline) + 1
+        if pos >= index.scanned:
+            index.scan(self.lexdata, min(pos, self.lexbase + self.lexlen), self.lexbase)
+        return index.lineno(pos)
+
+    def find_column(self, pos):
+        index = self.lexlineindex
+        if index is None:
+            newline = b'\n' if self.lexbinary else '\n'
+            return pos - self.lexbase - self.lexdata.rfind(newline, 0, pos - self.lexbase)
+        if pos >= index.scanned:
+            index.scan(self.lexdata, min(pos, self.lexbase + self.lexlen), self.lexbase)
+        return index.column(pos)
+
+    # ------------------------------------------------------------
+    # tokenize_all() - Tokenize all remaining input at once
+    #
+    # Returns a TokenColumns object.  The scanning loop is the same
+    # as token(), but tokens produced by string rules and literals are
+    # recorded directly into the columns without creating token objects.
+    # Rule functions, t_error(), and t_eof() are called as usual.
+    #
+    # With lex(engine='numpy'), states the NumPy engine can handle are
+    # scanned with array operations instead (see _VectorPlan).
+    # ------------------------------------------------------------
+    def tokenize_all(self, s=None):
+        if s is not None:
+            self.input(s)
+        if self.lexdata is None:
+            raise RuntimeError('No input string given with input()')
+        if self.lexstream is not None:
+            raise RuntimeError('tokenize_all() does not support streaming input')
+
+        if self.lexengine == 'numpy' and not self.lexeoff:
+            plan = self.lexstatevector.get(self.lexstate)
+            if plan is not None:
+                columns = self._tokenize_vector(plan)
+                if columns is not None:
+                    return columns
+
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexskipfirst = self.lexskipfirst
+        lexskip   = self.lexskip
+        lexdata   = self.lexdata
+        tokclass  = self.lextokenclass
+
+        columns   = TokenColumns(list(self.lexkindnames), lexdata)
+        names     = columns.names
+        overrides = columns.overrides
+        kinds     = dict(self.lexkinds)
+        add_kind  = columns.kinds.append
+        add_start = columns.starts.append
+        add_end   = columns.ends.append
+        add_line  = columns.linenos.append
+
+        while True:
+            while lexpos < lexlen:
+                if lexdata[lexpos] in lexignore:
+                    lexpos += 1
+                    if lexpos < lexlen and lexdata[lexpos] in lexskipfirst:
+                        m = lexskip(lexdata, lexpos)
+                        if m:
+                            lexpos = m.end()
+                    continue
+                if lexdata[lexpos] in lexskipfirst:
+                    m = lexskip(lexdata, lexpos)
+                    if m:
+                        lexpos = m.end()
+                        continue
+
+                for lexre, lexindexfunc in self.lexdispatch[lexdata[lexpos]]:
+                    m = lexre.match(lexdata, lexpos)
+                    if not m:
+                        continue
+
+                    func, toktype = lexindexfunc[m.lastindex]
+                    if not func:
+                        if toktype:
+                            add_kind(kinds[toktype])
+                            add_start(lexpos)
+                            add_end(m.end())
+                            add_line(self.lineno)
+                        lexpos = m.end()
+                        break
+
+                    if func.__class__ is TokenAction:
+                        end = m.end()
+                        if not func.discard:
+                            if func.keywords:
+                                toktype = func.keywords.get(m.group(), toktype)
+                            if func.convert:
+                                overrides[len(columns.kinds)] = func.convert(m.group())
+                            add_kind(kinds[toktype])
+                            add_start(lexpos)
+                            add_end(end)
+                            add_line(self.lineno)
+                        if func.newlines:
+                            self.lineno += m.group().count(b'\n' if self.lexbinary else '\n')
+                        lexpos = end
+                        break
+
+                    tok = tokclass()
+                    tok.value = value = m.group()
+                    tok.lineno = self.lineno
+                    tok.lexpos = lexpos
+                    tok.type = toktype
+                    tok.lexer = self
+                    end = m.end()
+                    self.lexmatch = m
+                    self.lexpos = end
+
+                    newtok = func(tok)
+
+                    lexpos    = self.lexpos
+                    lexignore = self.lexignore
+                    lexskipfirst = self.lexskipfirst
+                    lexskip   = self.lexskip
+                    if not newtok:
+                        break
+
+                    if not self.lexoptimize:
+                        if newtok.type not in self.lextokens_all:
+                            raise self._type_error(func, newtok.type, lexdata[end:])
+
+                    kind = kinds.get(newtok.type)
+                    if kind is None:
+                        kind = kinds[newtok.type] = len(names)
+                        names.append(newtok.type)
+                    if newtok.value is not value:
+                        overrides[len(columns.kinds)] = newtok.value
+                    add_kind(kind)
+                    add_start(newtok.lexpos)
+                    add_end(end)
+                    add_line(newtok.lineno)
+                    break
+                else:
+                    # No match, see if in literals
+                    lit = self.lexlitmap.get(lexdata[lexpos])
+                    if lit:
+                        add_kind(kinds[lit[1]])
+                        add_start(lexpos)
+                        add_end(lexpos + 1)
+                        add_line(self.lineno)
+                        lexpos += 1
+                        continue
+
+                    # No match. Call t_error() if defined.
+                    if self.lexerrorf:
+                        newtok = self._error_token(lexpos)
+                        if newtok:
+                            kind = kinds.get(newtok.type)
+                            if kind is None:
+                                kind = kinds[newtok.type] = len(names)
+                                names.append(newtok.type)
+                            overrides[len(columns.kinds)] = newtok.value
+                            add_kind(kind)
+                            add_start(newtok.lexpos)
+                            add_end(self.lexpos)
+                            add_line(newtok.lineno)
+                        lexpos = self.lexpos
+                        lexignore = self.lexignore
+                        lexskipfirst = self.lexskipfirst
+                        lexskip   = self.lexskip
+                        continue
+
+                    self.lexpos = lexpos
+                    raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos:lexpos+1], lexpos), lexdata[lexpos:])
+
+            if self.lexlineindex is not None:
+                self._index_columns(columns, columns.segments[-1])
+
+            if not self.lexeoff:
+                break
+
+            newtok = self._eof_token(lexpos)
+
+            if self.lexdata is not lexdata:
+                # The eof rule supplied more input.  Tokens from here on
+                # are positioned relative to the new text.
+                lexdata = self.lexdata
+                columns.segments.append(len(columns.kinds))
+                columns.data.append(lexdata)
+            lexpos    = self.lexpos
+            lexlen    = self.lexlen
+            lexignore = self.lexignore
+            lexskipfirst = self.lexskipfirst
+            lexskip   = self.lexskip
+
+            if not newtok:
+                break
+            kind = kinds.get(newtok.type)
+            if kind is None:
+                kind = kinds[newtok.type] = len(names)
+                names.append(newtok.type)
+            overrides[len(columns.kinds)] = newtok.value
+            add_kind(kind)
+            add_start(newtok.lexpos)
+            add_end(lexpos)
+            add_line(newtok.lineno)
+
+        self.lexpos = lexpos + 1
+        return columns
+
+    # ------------------------------------------------------------
+    # _tokenize_vector() - tokenize_all() with the NumPy engine
+    #
+    # Returns None, without changing anything, if the input has an
+    # error in it, so that the normal loop can report it and call
+    # t_error().
+    # ------------------------------------------------------------
+    def _tokenize_vector(self, plan):
+        import numpy as np
+
+        lexdata = self.lexdata
+        if self.lexbinary:
+            codes = np.frombuffer(lexdata, dtype=np.uint8)
+        else:
+            try:
+                codes = np.frombuffer(lexdata.encode('latin-1'), dtype=np.uint8)
+            except UnicodeError:
+                codes = np.frombuffer(lexdata.encode('utf-32-le'), dtype=np.uint32)
+        if codes.dtype == np.uint8:
+            tables = plan.bytetable(self.lexbinary)
+        blocks = []
+        a = self.lexpos
+        size = _VECTOR_BLOCK
+        while a < self.lexlen:
+            b = min(self.lexlen, a + size)
+            if codes.dtype == np.uint8:
+                tcodes = codes[a:b]
+            else:
+                alphabet, tcodes = np.unique(codes[a:b], return_inverse=True)
+                tables = plan.tables([int(cp) for cp in alphabet], self.lexbinary)
+            result = _vector_block(np, plan, tables, codes, tcodes, a, b)
+            if result is None:
+                return None
+            found, resume = result
+            if resume == a:
+                # One token is longer than the block
+                size *= 2
+                continue
+            for starts, rules, ends in found:
+                blocks.append((starts + a, rules, ends + a))
+            a = resume
+            size = _VECTOR_BLOCK
+
+        if blocks:
+            starts = np.concatenate([block[0] for block in blocks])
+            rules = np.concatenate([block[1] for block in blocks])
+            ends = np.concatenate([block[2] for block in blocks])
+            order = np.argsort(starts, kind='mergesort')
+            starts, rules, ends = starts[order], rules[order], ends[order]
+        else:
+            starts = ends = np.zeros(0, dtype=np.intp)
+            rules = np.zeros(0, dtype=np.int16)
+
+        # Line numbers, counting the newlines in tokens of TokenActions
+        # with newlines=True
+        linenos = np.full(starts.size, self.lineno, dtype=np.int64)
+        newlines = np.array([rule[6] for rule in plan.rules] + [False], dtype=bool)[rules]
+        if newlines.any():
+            positions = np.flatnonzero(codes == 10)
+            sel = np.flatnonzero(newlines)
+            counts = np.zeros(starts.size, dtype=np.int64)
+            counts[sel] = np.searchsorted(positions, ends[sel]) - np.searchsorted(positions, starts[sel])
+            counted = np.cumsum(counts)
+            linenos[1:] += counted[:-1]
+            lineno = self.lineno + int(counted[-1])
+        else:
+            lineno = self.lineno
+
+        kinds = dict(self.lexkinds)
+        kindmap = np.array([kinds[rule[5]] if rule[5] is not None else -1 for rule in plan.rules] + [-1])[rules]
+        keep = kindmap >= 0
+
+        columns = TokenColumns(list(self.lexkindnames), lexdata)
+        _extend_array(columns.kinds, kindmap[keep])
+        _extend_array(columns.starts, starts[keep])
+        _extend_array(columns.ends, ends[keep])
+        _extend_array(columns.linenos, linenos[keep])
+        self.lineno = lineno
+        if self.lexlineindex is not None:
+            self._index_columns(columns, 0)
+        self.lexpos = self.lexlen + 1
+        return columns
+
+    # Replace the line numbers of the tokens starting at first with ones from the line index
+    def _index_columns(self, columns, first):
+        index = self.lexlineindex
+        index.scan(self.lexdata, self.lexbase + self.lexlen, self.lexbase)
+        linenos = columns.linenos
+        starts = columns.starts
+        for n in range(first, len(starts)):
+            linenos[n] = index.lineno(starts[n])
+        self.lineno = index.lineno(self.lexbase + self.lexlen)
+
+    # ------------------------------------------------------------
+    # tokenize_parallel() - Tokenize the input in a pool of processes
+    #
+    # The input is cut into chunks of about chunksize characters at
+    # the end of matches of the sync pattern.  The sync pattern must
+    # only match at places where the lexer is in the INITIAL state and
+    # no token spans it, such as the newline between two records.
+    # Each chunk is tokenized with tokenize_all() in a worker process
+    # and the results are merged into one TokenColumns object with the
+    # same positions and line numbers that tokenize_all() would give.
+    #
+    # Workers rebuild the lexer from the text of its table module and
+    # look up rule functions by name, so rules must be module level
+    # functions or methods of a picklable object.  Rule functions see
+    # positions and line numbers relative to their chunk.  t_eof() is
+    # only called at the end of the last chunk.
+    # ------------------------------------------------------------
+    def tokenize_parallel(self, s, sync, chunksize=None, processes=None, pool=None):
+        if s is not None:
+            self.input(s)
+        if self.lexdata is None:
+            raise RuntimeError('No input string given with input()')
+        if self.lexstream is not None:
+            raise RuntimeError('tokenize_parallel() does not support streaming input')
+
+        import multiprocessing
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if chunksize is None:
+            chunksize = max(65536, (self.lexlen - self.lexpos) // (4 * processes))
+        if isinstance(sync, StringTypes):
+            if self.lexbinary and not isinstance(sync, BinaryTypes):
+                sync = sync.encode('latin-1')
+            sync = re.compile(sync)
+
+        lexdata = self.lexdata
+        bounds = _sync_points(lexdata, self.lexpos, self.lexlen, sync, chunksize)
+        if len(bounds) == 2:
+            return self.tokenize_all()
+
+        spec = (id(self), self._tabtext(), self._rule_owner(), self.lexoptimize,
+                self.lextokenclass, self.lexintern, self.lexengine, self.lexlineindex is not None)
+        tasks = []
+        for n in range(len(bounds) - 1):
+            tasks.append((spec, lexdata[bounds[n]:bounds[n+1]], bounds[n], n == len(bounds) - 2))
+
+        if pool is None:
+            workers = multiprocessing.Pool(processes)
+            try:
+                results = workers.map(_parallel_lex, tasks)
+            finally:
+                workers.close()
+                workers.join()
+        else:
+            results = pool.map(_parallel_lex, tasks)
+
+        columns = TokenColumns(list(self.lexkindnames), lexdata)
+        names   = columns.names
+        kinds   = dict(self.lexkinds)
+        nbase   = len(names)
+        for task, result in zip(tasks, results):
+            base = task[2]
+            if result[0] is None:
+                self.lexpos = base
+                raise LexError('%s (in the chunk at index %d)' % (result[1], base), result[2])
+            newnames, rkinds, starts, ends, linenos, overrides, segments, delta = result
+
+            first = len(columns.kinds)
+            if newnames:
+                remap = list(range(nbase))
+                for name in newnames:
+                    kind = kinds.get(name)
+                    if kind is None:
+                        kind = kinds[name] = len(names)
+                        names.append(name)
+                    remap.append(kind)
+                rkinds = array('i', [remap[k] for k in rkinds])
+            if self.lineno != 1:
+                linenos = array(_offset_typecode, [n + self.lineno - 1 for n in linenos])
+            columns.kinds.extend(rkinds)
+            columns.starts.extend(starts)
+            columns.ends.extend(ends)
+            columns.linenos.extend(linenos)
+            for n, value in overrides.items():
+                columns.overrides[first + n] = value
+            for n, data in segments:
+                columns.segments.append(first + n)
+                columns.data.append(data)
+            self.lineno += delta
+
+        self.lexpos = self.lexlen + 1
+        return columns
+
+    # Return what a worker process needs to find the rule functions: the
+    # name of the module they are defined in, or the object they are bound to
+    def _rule_owner(self):
+        funcs = list(self.lexstateerrorf.values()) + list(self.lexstateeoff.values())
+        for lre in self.lexstatere.values():
+            for cre, findex in lre:
+                for f in findex:
+                    if f and isinstance(f[0], TokenAction):
+                        if f[0].convert and getattr(builtins, f[0].convert.__name__, None) is not f[0].convert:
+                            funcs.append(f[0].convert)
+                    elif f and f[0]:
+                        funcs.append(f[0])
+
+        owner = None
+        for f in funcs:
+            if not f:
+                continue
+            obj = getattr(f, '__self__', None)
+            if obj is None or isinstance(obj, types.ModuleType):
+                obj = sys.modules.get(f.__module__)
+            if owner is None:
+                owner = obj
+            if obj is not owner or getattr(owner, f.__name__, None) != f:
+                raise ValueError("Rule function '%s' can't be found by name in a worker process" % f.__name__)
+        if isinstance(owner, types.ModuleType):
+            return owner.__name__
+        return owner
+
+    # Iterator interface
+    def __iter__(self):
+        return self
+
+    def next(self):
+        t = self.token()
+        if t is None:
+            raise StopIteration
+        return t
+
+    __next__ = next
+
+# -----------------------------------------------------------------------------
+# IncrementalLexer
+#
+# Keeps the tokens of a document up to date as it is edited.  While lexing,
+# a checkpoint (position, lineno, lexstate, lexstatestack, token index) is
+# recorded about every interval characters.  After an edit, lexing restarts
+# from the last checkpoint a token before the edit and stops at the first old
+# checkpoint past the edit where the position and lexer state line up again.
+# Tokens after that point are reused, with lexpos and lineno shifted.
+#
+# Whether a rule fails to match can depend on any of the text after it (an
+# unterminated comment, for instance).  So once an error rule has been
+# called, relexing always restarts before the first error.
+#
+# Only the state listed above is restored at a checkpoint.  Rules that keep
+# other state on the lexer object may need to relex the whole document.
+# -----------------------------------------------------------------------------
+
+class IncrementalLexer(object):
+    def __init__(self, lexer, data, interval=1024):
+        self.lexer       = lexer.clone()
+        self.interval    = interval
+        self.data        = data
+        self.tokens      = []           # Current tokens
+        self.checkpoints = []           # (lexpos, lineno, state, statestack, token index)
+        self.errors      = []           # Positions where an error rule was called
+
+        # Error rules are wrapped to record where they are called
+        self.lexer.lexstateerrorf = dict((state, self._wrap_error(ef) if ef else ef)
+                                         for state, ef in lexer.lexstateerrorf.items())
+        self.lexer.lineno = lexer.lineno
+        first = (0, lexer.lineno, lexer.lexstate, tuple(lexer.lexstatestack), 0)
+        self.tokens, self.checkpoints, self.errors = self._relex(data, first, None, 0, 0)[:3]
+
+    def _wrap_error(self, errorf):
+        def error(t):
+            self._errors.append(t.lexpos)
+            return errorf(t)
+        return error
+
+    # ------------------------------------------------------------
+    # edit() - Apply an edit to the document
+    #
+    # Replaces deleted characters at offset with inserted.  Returns
+    # (start, end, tokens) where tokens replaced self.tokens[start:end]
+    # of the token list from before the edit.
+    # ------------------------------------------------------------
+    def edit(self, offset, deleted, inserted):
+        data = self.data
+        if offset < 0 or deleted < 0 or offset + deleted > len(data):
+            raise ValueError('Edit is outside of the document')
+        data = data[:offset] + inserted + data[offset+deleted:]
+        delta = len(inserted) - deleted
+
+        # Restart a token early, in case the rule of the token before the edit looked past its end
+        tokens = self.tokens
+        checkpoints = self.checkpoints
+        k = checkpoints[max(bisect.bisect_left(checkpoints, (offset,)) - 1, 0)][4]
+        while k < len(tokens) and tokens[k].lexpos < offset:
+            k += 1
+        restart = tokens[k-2].lexpos if k > 1 else 0
+        if self.errors and self.errors[0] < restart:
+            restart = self.errors[0]
+        ci = bisect.bisect_left(checkpoints, (restart + 1,)) - 1
+        old = bisect.bisect_left(checkpoints, (offset + deleted,))
+
+        new, newcheckpoints, newerrors, j, linedelta = self._relex(data, checkpoints[ci], checkpoints[old:],
+                                                                   offset + len(inserted), delta)
+        start = checkpoints[ci][4]
+        errors = self.errors[:bisect.bisect_left(self.errors, checkpoints[ci][0])] + newerrors
+        if j is None:
+            end = len(tokens)
+            later = []
+        else:
+            cp = checkpoints[old + j]
+            end = cp[4]
+            later = [(pos + delta, lineno + linedelta, state, stack, ntok + len(new) - (end - start))
+                     for pos, lineno, state, stack, ntok in checkpoints[old + j:]]
+            errors.extend(pos + delta for pos in self.errors[bisect.bisect_left(self.errors, cp[0]):])
+            for tok in tokens[end:]:
+                tok.lexpos += delta
+                tok.lineno += linedelta
+
+            # Columns change for the rest of the line the edit ended on
+            if self.lexer.lexlineindex is not None:
+                for tok in tokens[end:]:
+                    if tok.lineno != cp[1] + linedelta:
+                        break
+                    tok.column = self.lexer.find_column(tok.lexpos)
+
+        tokens[start:end] = new
+        self.data = data
+        self.checkpoints = checkpoints[:ci] + newcheckpoints + later
+        self.errors = errors
+        return start, end, new
+
+    # Lex data from checkpoint cp until the position and state match one of the
+    # old checkpoints at or after limit.  Returns the new tokens, checkpoints
+    # and error positions, the index of the matching old checkpoint (None if
+    # lexing reached the end), and the change in line numbers at that point.
+    def _relex(self, data, cp, old, limit, delta):
+        lexer = self.lexer
+        pos, lineno, state, stack, ntok = cp
+        lexer.lineno = lineno
+        lexer.input(data)
+        lexer.lexpos = pos
+        lexer.begin(state)
+        lexer.lexstatestack = list(stack)
+        index = lexer.lexlineindex
+        if index is not None:
+            index.starts = array(_offset_typecode, [data.rfind(index.newline, 0, pos) + 1])
+            index.scanned = pos
+
+        new = []
+        checkpoints = [cp]
+        errors = self._errors = []
+        last = pos
+        j = 0
+        while True:
+            pos = lexer.lexpos
+            lineno = lexer.lineno if index is None else lexer.find_lineno(pos)
+            if old is not None and pos >= limit:
+                while j < len(old) and old[j][0] + delta < pos:
+                    j += 1
+                if j < len(old) and old[j][0] + delta == pos and old[j][2] == lexer.lexstate \
+                   and old[j][3] == tuple(lexer.lexstatestack):
+                    return new, checkpoints, errors, j, lineno - old[j][1]
+            if pos - last >= self.interval:
+                checkpoints.append((pos, lineno, lexer.lexstate, tuple(lexer.lexstatestack), ntok + len(new)))
+                last = pos
+            tok = lexer.token()
+            if tok is None:
+                return new, checkpoints, errors, None, 0
+            new.append(tok)
+
+# -----------------------------------------------------------------------------
+# LexerSpec
+#
+# The compiled, read-only part of a lexer (rule tables, ignored characters,
+# error and eof rules, token names) that can be shared between threads.
+# Lexers are made from a prototype by copying its attribute dictionary, so
+# creating one takes the same time no matter how large the tables are.  The
+# spec itself can't be changed, and the lexers made from it must not change
+# its tables either.
+#
+# Rules that are methods are bound once with bind(), which returns a new
+# spec, instead of on every clone(object).
+# -----------------------------------------------------------------------------
+
+class LexerSpec(object):
+    def __init__(self, lexer):
+        proto = lexer.clone()
+        proto.__dict__.pop('token', None)
+        proto.__dict__.pop('lexmatch', None)
+        proto.lexdata = None
+        proto.lexpos = 0
+        proto.lexlen = 0
+        proto.lexbase = 0
+        proto.lineno = 1
+        proto.lexstream = None
+        proto.lexstreameof = True
+        proto.lexstatestack = []
+        proto.lexstats = None
+        proto.set_binary(False)
+        proto.begin('INITIAL')
+        if BinaryTypes and proto.lexstatebytesre is None:
+            # Compile the tables for binary input now rather than once per lexer
+            try:
+                proto.compile_bytes()
+            except ValueError:
+                pass
+        object.__setattr__(self, '_proto', proto)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('LexerSpec objects are immutable')
+
+    @property
+    def tokens(self):
+        return frozenset(self._proto.lextokens)
+
+    @property
+    def states(self):
+        return tuple(self._proto.lexstatere)
+
+    # Return a new lexer in the INITIAL state with no input
+    def lexer(self):
+        lexobj = copy.copy(self._proto)
+        lexobj.lexstatestack = []
+        return lexobj
+
+    # Put a lexer made from this spec back into the state lexer() returns it in
+    def reset(self, lexobj):
+        lexobj.__dict__.clear()
+        lexobj.__dict__.update(self._proto.__dict__)
+        lexobj.lexstatestack = []
+
+    # Return a spec with the rule methods bound to object
+    def bind(self, object):
+        return LexerSpec(self._proto.clone(object))
+
+# -----------------------------------------------------------------------------
+# LexerPool
+#
+# A pool of lexers made from a LexerSpec, for handing out lexers to threads
+# without building one for every request.  Lexers are reset when they are
+# released.  At most size lexers are kept.
+#
+#     with pool.lexer() as lexer:
+#         lexer.input(data)
+#         ...
+# -----------------------------------------------------------------------------
+
+class LexerPool(object):
+    def __init__(self, spec, size=16):
+        self.spec = spec
+        self.size = size
+        self.free = []
+
+    def acquire(self):
+        try:
+            return self.free.pop()
+        except IndexError:
+            return self.spec.lexer()
+
+    def release(self, lexobj):
+        if len(self.free) < self.size:
+            self.spec.reset(lexobj)
+            self.free.append(lexobj)
+
+    @contextlib.contextmanager
+    def lexer(self):
+        lexobj = self.acquire()
+        try:
+            yield lexobj
+        finally:
+            self.release(lexobj)
+
+# -----------------------------------------------------------------------------
+# TokenFilter
+#
+# Base class for the batch stages of a TokenPipeline.  filter() is given a
+# list of tokens and returns a list of tokens.  It may hold tokens back
+# (for example, until it knows whether a token is the last on its line);
+# finish() returns them at the end of the input.  reset() is called with
+# the lexer whenever the pipeline gets new input.
+# -----------------------------------------------------------------------------
+
+class TokenFilter(object):
+    def reset(self, lexer):
+        pass
+
+    def filter(self, tokens):
+        return tokens
+
+    def finish(self):
+        return []
+
+# -----------------------------------------------------------------------------
+# TokenPipeline
+#
+# Runs the tokens of a lexer through a series of stages before they are
+# returned by token().  A stage is either a TokenFilter, which works on
+# lists of up to batchsize tokens, or a function that takes an iterator of
+# tokens and returns an iterable of tokens (usually a generator):
+#
+#     def drop_comments(tokens):
+#         for tok in tokens:
+#             if tok.type != 'COMMENT':
+#                 yield tok
+#
+#     pipeline = lex.TokenPipeline(lexer, [drop_comments, IndentFilter()])
+#     result = parser.parse(data, lexer=pipeline)
+#
+# The pipeline has input() and token() like a lexer, so it can be passed to
+# yacc as the lexer, or called and given as the tokenfunc.  Other attributes
+# (lineno, lexpos, find_lineno() and so on) are those of the lexer.
+#
+# A batch stage at the start of the pipeline makes the lexer run up to
+# batchsize tokens ahead of the stages.  Stages that change state used by the
+# lexer rules must come first and be functions, so the lexer only produces
+# the next token when the stage asks for it.
+# -----------------------------------------------------------------------------
+
+class TokenPipeline(object):
+    lexkindmode = False        # Filters may make tokens without kind ids
+
+    def __init__(self, lexer, stages=(), batchsize=256):
+        self.lexer = lexer
+        self.stages = list(stages)
+        self.batchsize = batchsize
+        self.token = _no_token
+
+    def __getattr__(self, name):
+        if name == 'lexer':
+            raise AttributeError(name)
+        return getattr(self.lexer, name)
+
+    def input(self, s):
+        self.lexer.input(s)
+        self.start()
+
+    def restart(self, s, state='INITIAL', lineno=1):
+        self.lexer.restart(s, state, lineno)
+        self.start()
+
+    def lex_many(self, inputs):
+        return _lex_many(self, inputs)
+
+    # ------------------------------------------------------------
+    # start() - Start returning the tokens of the lexer's current input
+    # ------------------------------------------------------------
+    def start(self):
+        size = self.batchsize
+        batched = self.stages and isinstance(self.stages[0], TokenFilter)
+        if batched:
+            stream = _token_batches(iter(self.lexer.token, None), size)
+        else:
+            stream = iter(self.lexer.token, None)
+        for stage in self.stages:
+            if isinstance(stage, TokenFilter):
+                if not batched:
+                    stream = _token_batches(stream, size)
+                    batched = True
+                stage.reset(self.lexer)
+                stream = _filter_batches(stage, stream)
+            else:
+                if batched:
+                    stream = itertools.chain.from_iterable(stream)
+                    batched = False
+                stream = iter(stage(stream))
+        if batched:
+            stream = itertools.chain.from_iterable(stream)
+        self.token = functools.partial(next, stream, None)
+
+    def __call__(self):
+        return self.token()
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        t = self.token()
+        if t is None:
+            raise StopIteration
+        return t
+
+    __next__ = next
+
+def _no_token():
+    return None
+
+def _lex_many(lexer, inputs):
+    state = lexer.lexstate
+    lineno = lexer.lineno
+    for s in inputs:
+        try:
+            lexer.restart(s, state, lineno)
+            result = list(iter(lexer.token, None))
+        except Exception as e:
+            result = e
+        yield result
+
+def _token_batches(tokens, size):
+    return iter(lambda: list(itertools.islice(tokens, size)), [])
+
+def _filter_batches(stage, batches):
+    run = stage.filter
+    for batch in batches:
+        batch = run(batch)
+        if batch:
+            yield batch
+    batch = stage.finish()
+    if batch:
+        yield batch
+
+# -----------------------------------------------------------------------------
+#                           ==== Lex Builder ===
+#
+# The functions and classes below are used to collect lexing information
+# and build a Lexer object from it.
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# _get_regex(func)
+#
+# Returns the regular expression assigned to a function either as a doc string
+# or as a .regex attribute attached by the @TOKEN decorator.
+# -----------------------------------------------------------------------------
+def _get_regex(func):
+    return getattr(func, 'regex', func.__doc__)
+
+# -----------------------------------------------------------------------------
+# get_caller_module_dict()
+#
+# This function returns a dictionary containing all of the symbols defined within
+# a caller further down the call stack.  This is used to get the environment
+# associated with the yacc() call if none was provided.
+# -----------------------------------------------------------------------------
+def get_caller_module_dict(levels):
+    f = sys._getframe(levels)
+    ldict = f.f_globals.copy()
+    if f.f_globals != f.f_locals:
+        ldict.update(f.f_locals)
+    return ldict
+
+# -----------------------------------------------------------------------------
+# _read_chunks()
+#
+# Generator that reads a file-like object in chunks of the given size
+# -----------------------------------------------------------------------------
+def _read_chunks(f, size):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+# -----------------------------------------------------------------------------
+# _FeedQueue
+#
+# Input stream used by Lexer.input_feed().  Iterating over it produces the
+# chunks given to Lexer.feed() and stops after Lexer.feed_eof().  If it runs
+# out before that, NeedInput is raised instead.
+# -----------------------------------------------------------------------------
+class _FeedQueue(object):
+    def __init__(self):
+        self.chunks = collections.deque()
+        self.eof = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.chunks:
+            return self.chunks.popleft()
+        if self.eof:
+            raise StopIteration
+        raise NeedInput()
+
+    next = __next__
+
+# -----------------------------------------------------------------------------
+# _sync_points()
+#
+# Returns the offsets where the input is cut into chunks for parallel
+# tokenizing.  Each chunk after the first starts at the end of a match of the
+# sync pattern found at least chunksize characters after the previous cut.
+# -----------------------------------------------------------------------------
+def _sync_points(data, start, end, sync, chunksize):
+    bounds = [start]
+    pos = start + chunksize
+    while pos < end:
+        m = sync.search(data, pos, end)
+        if not m or m.end() >= end:
+            break
+        bounds.append(m.end())
+        pos = m.end() + chunksize
+    bounds.append(end)
+    return bounds
+
+# -----------------------------------------------------------------------------
+# _parallel_lex()
+#
+# Tokenizes one chunk of input in a worker process.  The lexer is rebuilt from
+# the text of its table module the first time a worker sees it and is then
+# cloned for each chunk.  Returns the token arrays, with positions made
+# absolute, and the number of lines the chunk advanced lineno by.  Lexing
+# errors are returned as (None, message, text).
+# -----------------------------------------------------------------------------
+_parallel_lexers = {}
+
+def _parallel_lex(task):
+    spec, data, base, last = task
+    key, tabtext, owner, optimize, tokenclass, intern, engine, lineindex = spec
+    template = _parallel_lexers.get((key, tabtext))
+    if template is None:
+        if owner is None:
+            fdict = {}
+        elif isinstance(owner, str):
+            if owner not in sys.modules:
+                __import__(owner)
+            fdict = sys.modules[owner].__dict__
+        else:
+            fdict = dict((k, getattr(owner, k)) for k in dir(owner))
+        lextab = _tab_module(tabtext)
+        template = Lexer()
+        template.lexoptimize = optimize
+        template.lextokenclass = tokenclass
+        template.lexintern = intern
+        template.lexengine = engine
+        if lineindex:
+            template.lexlineindex = LineIndex()
+        template.readtab(lextab, fdict)
+        _parallel_lexers[(key, tabtext)] = template
+
+    lexobj = template.clone()
+    if not last:
+        lexobj.lexstateeoff = {}
+        lexobj.lexeoff = None
+    try:
+        columns = lexobj.tokenize_all(data)
+    except LexError as e:
+        return (None, e.args[0], e.text)
+    if not last and (lexobj.lexstate != 'INITIAL' or lexobj.lexstatestack):
+        return (None, "Chunk ended in state '%s'. The sync pattern matched inside a token or state" % lexobj.lexstate, data[-20:])
+
+    nbase = len(lexobj.lexkindnames)
+    starts = columns.starts
+    ends = columns.ends
+    count = columns.segments[1] if len(columns.segments) > 1 else len(starts)
+    if base:
+        for n in range(count):
+            starts[n] += base
+            ends[n] += base
+    segments = list(zip(columns.segments[1:], columns.data[1:]))
+    return (columns.names[nbase:], columns.kinds, starts, ends, columns.linenos,
+            columns.overrides, segments, lexobj.lineno - 1)
+
+# -----------------------------------------------------------------------------
+# _tab_module()
+#
+# Creates a table module from the text written by Lexer._tabtext()
+# -----------------------------------------------------------------------------
+def _tab_module(text):
+    lextab = types.ModuleType('lextab')
+    exec(text, lextab.__dict__)
+    return lextab
+
+# -----------------------------------------------------------------------------
+# _lexcache_key()
+#
+# Returns the key of a lexer in the cache directory.  This is a hash of
+# everything the built lexer depends on: tokens, literals, states, the rules
+# of each state with their regular expressions, reflags, and token actions.
+# -----------------------------------------------------------------------------
+def _lexcache_key(linfo, reflags):
+    parts = [__version__, __tabversion__, repr(sorted(linfo.tokens)), repr(linfo.literals),
+             repr(sorted(linfo.stateinfo.items())), repr(reflags)]
+    for state in sorted(linfo.stateinfo):
+        parts.append(repr([(name, _get_regex(f), f.__code__.co_argcount) for name, f in linfo.funcsym[state]]))
+        parts.append(repr(linfo.strsym[state]))
+        parts.append(repr(linfo.ignore.get(state)))
+        for ef in (linfo.errorf.get(state), linfo.eoff.get(state)):
+            parts.append(ef.__name__ if ef else '')
+    parts.append(repr(sorted((name, _action_to_tab(action)) for name, action in linfo.actions.items())))
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+# -----------------------------------------------------------------------------
+# _write_cache()
+#
+# Writes a file in the cache directory (yacc also uses it for generated parser
+# code).  The text goes to a temporary file that is then renamed, so processes
+# reading the file never see it partly written and concurrent writers just
+# replace each other's copy.
+# -----------------------------------------------------------------------------
+def _write_cache(filename, text):
+    dirname = os.path.dirname(filename) or '.'
+    if not os.path.isdir(dirname):
+        try:
+            os.makedirs(dirname)
+        except OSError:
+            if not os.path.isdir(dirname):
+                raise
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.tmp-', suffix='.py')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        getattr(os, 'replace', os.rename)(tmpname, filename)
+    except:
+        os.remove(tmpname)
+        raise
+
+# -----------------------------------------------------------------------------
+# _scan_redefinitions()
+#
+# Scans the source of a module for rules that are defined more than once.
+# Each line is matched against the regular expressions in patterns, whose
+# first group is the rule name.  Returns the source file name and a list of
+# (line, name, previous line) tuples, or None if there's no source.
+#
+# Results are remembered by file name, modification time and size, in memory
+# and in cachedir if one is given, so unchanged modules are not read again.
+# -----------------------------------------------------------------------------
+_source_scans = {}
+
+def _scan_redefinitions(module, patterns, cachedir=None):
+    key = cachefile = None
+    try:
+        filename = inspect.getsourcefile(module)
+        st = os.stat(filename)
+    except (TypeError, OSError):
+        filename = None
+    else:
+        key = (tuple(p.pattern for p in patterns), os.path.abspath(filename), st.st_mtime, st.st_size)
+        if key in _source_scans:
+            return filename, _source_scans[key]
+        if cachedir:
+            name = hashlib.sha1(repr(key[:2]).encode('utf-8')).hexdigest()
+            cachefile = os.path.join(cachedir, 'scan-%s.txt' % name)
+            try:
+                with open(cachefile) as f:
+                    saved, redefined = ast.literal_eval(f.read())
+                if saved == key:
+                    _source_scans[key] = redefined
+                    return filename, redefined
+            except Exception:
+                pass
+
+    try:
+        lines, linen = inspect.getsourcelines(module)
+    except IOError:
+        return None
+
+    counthash = {}
+    redefined = []
+    for linen, line in enumerate(lines, linen + 1):
+        for pattern in patterns:
+            m = pattern.match(line)
+            if m:
+                name = m.group(1)
+                prev = counthash.get(name)
+                if not prev:
+                    counthash[name] = linen
+                else:
+                    redefined.append((linen, name, prev))
+                break
 
-# -----------------------------------------------------------------------------
-# get_caller_module_dict()
-#
-# This function returns a dictionary containing all of the symbols defined within
-# a caller further down the call stack.  This is used to get the environment
-# associated with the yacc() call if none was provided.
-# -----------------------------------------------------------------------------
-def get_caller_module_dict(levels):
-    f = sys._getframe(levels)
-    ldict = f.f_globals.copy()
-    if f.f_globals != f.f_locals:
-        ldict.update(f.f_locals)
-    return ldict
+    if key:
+        _source_scans[key] = redefined
+    if cachefile:
+        try:
+            _write_cache(cachefile, repr((key, redefined)))
+        except (IOError, OSError):
+            pass
+    return filename, redefined
 
 # -----------------------------------------------------------------------------
 # _funcs_to_names()
@@ -462,12 +2718,57 @@ def get_caller_module_dict(levels):
 def _funcs_to_names(funclist, namelist):
     result = []
     for f, name in zip(funclist, namelist):
-        if f and f[0]:
+        if f and isinstance(f[0], TokenAction):
+            result.append((_action_to_tab(f[0]), f[1]))
+        elif f and f[0]:
             result.append((name, f[1]))
         else:
             result.append(f)
     return result
 
+# -----------------------------------------------------------------------------
+# _plain_index()
+#
+# The table files hold the plain text of each master regex, which numbers its
+# groups differently from a factored regex (see _factor_literals()).  Given
+# the compiled regex and its plain text, this renumbers the function and name
+# lists to match the plain text.
+# -----------------------------------------------------------------------------
+def _plain_index(lexre, retext, funclist, namelist):
+    plain = re.compile(retext, lexre.flags)
+    pfuncs = [None] * (max(plain.groupindex.values()) + 1)
+    pnames = pfuncs[:]
+    for name, i in plain.groupindex.items():
+        j = lexre.groupindex[name]
+        pfuncs[i] = funclist[j]
+        pnames[i] = namelist[j]
+    return pfuncs, pnames
+
+# -----------------------------------------------------------------------------
+# _factored_index()
+#
+# The reverse of _plain_index().  Given a master regex compiled from the plain
+# text in a table file, this compiles the factored regex that lex() would
+# have built and renumbers the function and name lists to match it.  The
+# plain regex is kept if the text doesn't split into rules.
+# -----------------------------------------------------------------------------
+def _factored_index(lexre, retext, funclist, namelist):
+    rules = _split_master([(lexre, funclist)], [retext])
+    if not rules:
+        return lexre, funclist, namelist
+    relist = [r for name, r, entry, flags in rules]
+    try:
+        factored = re.compile('|'.join(_factor_literals(relist, lexre.flags)), lexre.flags)
+    except Exception:
+        return lexre, funclist, namelist
+    ffuncs = [None] * (max(factored.groupindex.values()) + 1)
+    fnames = ffuncs[:]
+    for name, i in lexre.groupindex.items():
+        j = factored.groupindex[name]
+        ffuncs[j] = funclist[i]
+        fnames[j] = namelist[i]
+    return factored, ffuncs, fnames
+
 # -----------------------------------------------------------------------------
 # _names_to_funcs()
 #
@@ -477,25 +2778,76 @@ def _funcs_to_names(funclist, namelist):
 def _names_to_funcs(namelist, fdict):
     result = []
     for n in namelist:
-        if n and n[0]:
+        if n and isinstance(n[0], tuple):
+            result.append((_tab_to_action(n[0], fdict), n[1]))
+        elif n and n[0]:
             result.append((fdict[n[0]], n[1]))
         else:
             result.append(n)
     return result
 
+# -----------------------------------------------------------------------------
+# _action_to_tab()
+#
+# Converts a TokenAction into a tuple that can be written to a table file.
+# Converter functions are stored by name.
+# -----------------------------------------------------------------------------
+def _action_to_tab(action):
+    convert = action.convert.__name__ if action.convert else None
+    return (convert, action.keywords, action.newlines, action.discard)
+
+# -----------------------------------------------------------------------------
+# _unsaved_converters()
+#
+# Returns the names of the rules whose converter _tab_to_action() wouldn't
+# find again by its name, such as a lambda or a function from another module.
+# -----------------------------------------------------------------------------
+def _unsaved_converters(actions, fdict):
+    result = []
+    for name, action in sorted(actions.items()):
+        convert = getattr(action, 'convert', None)
+        if convert is None:
+            continue
+        fname = getattr(convert, '__name__', None)
+        if not fname or fdict.get(fname, getattr(builtins, fname, None)) is not convert:
+            result.append(name)
+    return result
+
+# -----------------------------------------------------------------------------
+# _tab_to_action()
+#
+# Converts a tuple from a table file back into a TokenAction.  Converter names
+# are looked up in the specification and then in the builtins.
+# -----------------------------------------------------------------------------
+def _tab_to_action(t, fdict):
+    convert, keywords, newlines, discard = t
+    if convert:
+        name = convert
+        convert = fdict.get(name, getattr(builtins, name, None))
+        if not callable(convert):
+            raise ImportError("Can't find token value converter '%s'" % name)
+    return TokenAction(convert, keywords, newlines, discard)
+
 # -----------------------------------------------------------------------------
 # _form_master_re()
 #
 # This function takes a list of all of the regex components and attempts to
 # form the master regular expression.  Given limitations in the Python re
 # module, it may be necessary to break the master regex into separate expressions.
+#
+# If optimize is set, runs of rules that match fixed strings are combined
+# into a prefix tree (see _factor_literals()).  The regex text returned is
+# always the plain alternation of the components.
 # -----------------------------------------------------------------------------
-def _form_master_re(relist, reflags, ldict, toknames):
+def _form_master_re(relist, reflags, ldict, toknames, optimize=False):
     if not relist:
         return []
     regex = '|'.join(relist)
     try:
-        lexre = re.compile(regex, reflags)
+        if optimize:
+            lexre = re.compile('|'.join(_factor_literals(relist, reflags)), reflags)
+        else:
+            lexre = re.compile(regex, reflags)
 
         # Build the index to function map for the matching engine
         lexindexfunc = [None] * (max(lexre.groupindex.values()) + 1)
@@ -506,6 +2858,9 @@ def _form_master_re(relist, reflags, ldict, toknames):
             if type(handle) in (types.FunctionType, types.MethodType):
                 lexindexfunc[i] = (handle, toknames[f])
                 lexindexnames[i] = f
+            elif isinstance(handle, TokenAction):
+                lexindexfunc[i] = (handle, toknames[f])
+                lexindexnames[i] = f
             elif handle is not None:
                 lexindexnames[i] = f
                 if f.find('ignore_') > 0:
@@ -515,12 +2870,1206 @@ def _form_master_re(relist, reflags, ldict, toknames):
 
         return [(lexre, lexindexfunc)], [regex], [lexindexnames]
     except Exception:
-        m = int(len(relist)/2)
-        if m == 0:
-            m = 1
-        llist, lre, lnames = _form_master_re(relist[:m], reflags, ldict, toknames)
-        rlist, rre, rnames = _form_master_re(relist[m:], reflags, ldict, toknames)
-        return (llist+rlist), (lre+rre), (lnames+rnames)
+        # Split the list where the components can't go together.  If that
+        # doesn't help, split it in half.
+        parts = _pack_master(relist, reflags)
+        if len(parts) < 2:
+            m = int(len(relist)/2)
+            if m == 0:
+                m = 1
+            parts = [relist[:m], relist[m:]]
+        lexre, retext, renames = [], [], []
+        for part in parts:
+            plist, pre, pnames = _form_master_re(part, reflags, ldict, toknames, optimize)
+            lexre += plist
+            retext += pre
+            renames += pnames
+        return lexre, retext, renames
+
+# -----------------------------------------------------------------------------
+# _pack_master()
+#
+# Splits a list of regex components into as few consecutive groups as
+# possible, so that no group uses the same group name twice.  Python
+# versions before 3.5 also limit a regex to 100 groups.  Returns the list
+# unchanged if a component can't be compiled on its own.
+# -----------------------------------------------------------------------------
+
+_MAXGROUPS = 99 if sys.version_info < (3, 5) else None
+
+def _pack_master(relist, reflags):
+    parts = []
+    names = set()
+    ngroups = 0
+    for r in relist:
+        try:
+            cre = re.compile(r, reflags)
+        except Exception:
+            return [relist]
+        rnames = set(cre.groupindex)
+        if not parts or rnames & names or (_MAXGROUPS and ngroups + cre.groups > _MAXGROUPS):
+            parts.append([])
+            names = set()
+            ngroups = 0
+        parts[-1].append(r)
+        names |= rnames
+        ngroups += cre.groups
+    return parts
+
+# -----------------------------------------------------------------------------
+# _regex_info()
+#
+# Returns a tuple (text, context_free) for a regular expression.  text is the
+# string matched by a regex made only of literal characters and None for any
+# other regex.  context_free is True if whether the regex matches doesn't
+# depend on the text after the match (no anchors, lookarounds or
+# backreferences).  Results are remembered, since the same rules are looked
+# at for every dispatch table entry.
+# -----------------------------------------------------------------------------
+
+_regex_infos = {}
+
+def _regex_info(pattern, flags):
+    key = (pattern, flags)
+    info = _regex_infos.get(key)
+    if info is None:
+        try:
+            parsed = sre_parse.parse(pattern, flags)
+        except Exception:
+            info = (None, False)
+        else:
+            info = (_literal_items(parsed, flags), _context_free(parsed))
+        _regex_infos[key] = info
+    return info
+
+def _literal_items(parsed, flags):
+    state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+    if (flags | getattr(state, 'flags', 0)) & re.IGNORECASE:
+        return None
+    chars = []
+    for op, av in parsed:
+        if op is not sre_parse.LITERAL:
+            return None
+        chars.append(chr(av) if av < 128 else _unichr(av))
+    return ''.join(chars) or None
+
+_context_ops = tuple(getattr(sre_parse, name) for name in ('AT', 'ASSERT', 'ASSERT_NOT', 'GROUPREF',
+                                                           'GROUPREF_EXISTS', 'GROUPREF_IGNORE')
+                     if hasattr(sre_parse, name))
+
+def _context_free(av):
+    if isinstance(av, sre_parse.SubPattern):
+        for op, iav in av:
+            if op in _context_ops or not _context_free(iav):
+                return False
+    elif isinstance(av, (tuple, list)):
+        for item in av:
+            if not _context_free(item):
+                return False
+    return True
+
+# -----------------------------------------------------------------------------
+# _factor_literals()
+#
+# Takes a list of master regex components of the form (?P<name>regex) and
+# replaces each run of consecutive components that match fixed strings with
+# one prefix tree.  For example, the rules <<=, <<, <= and < become
+#
+#     <(?:<(?:=(?P<t_LSHIFTEQUAL>)|(?P<t_LSHIFT>))|=(?P<t_LE>)|(?P<t_LT>))
+#
+# The group of each rule is an empty group at the end of its string, so
+# m.lastindex still identifies the rule.  In a prefix tree the longest
+# string wins, which is what the alternation would pick unless a string is
+# preceded by one of its own prefixes.  Such a string can never match, so
+# it's left out of the tree and added after it unchanged.
+# -----------------------------------------------------------------------------
+
+# Shorter runs are left alone, the re module handles a few strings just as fast
+_TREE_MIN = 4
+
+def _factor_literals(relist, flags):
+    result = []
+    run = []
+    for r in relist + [None]:
+        text = None
+        if r is not None and r.startswith('(?P<') and r.endswith(')'):
+            name = r[4:r.find('>')]
+            text = _regex_info(r[len(name)+5:-1], flags)[0]
+        if text is not None:
+            run.append((r, name, text))
+            continue
+        if len(run) >= _TREE_MIN:
+            result.append(_literal_tree(run))
+        else:
+            result.extend(item[0] for item in run)
+        run = []
+        if r is not None:
+            result.append(r)
+    return result
+
+def _literal_tree(run):
+    tree = {}
+    seen = []
+    shadowed = []
+    for r, name, text in run:
+        if any(text.startswith(s) for s in seen):
+            shadowed.append(r)
+            continue
+        seen.append(text)
+        node = tree
+        for c in text:
+            node = node.setdefault(c, {})
+        node[None] = name
+    return '|'.join(['(?:%s)' % _tree_text(tree)] + shadowed)
+
+def _tree_text(node):
+    alts = [re.escape(c) + _tree_text(node[c]) for c in sorted(c for c in node if c is not None)]
+    if None in node:
+        alts.append('(?P<%s>)' % node[None])
+    if len(alts) == 1:
+        return alts[0]
+    return '(?:%s)' % '|'.join(alts)
+
+# -----------------------------------------------------------------------------
+# _shadowed_rules()
+#
+# Finds rules matching a fixed string that can never be used, because an
+# earlier rule always matches first.  rules is a list of (name, regex) pairs
+# in the order they are tried.  Returns a list of (name, earlier name, string)
+# triples.  Only earlier rules whose match doesn't depend on the text that
+# follows (no anchors, lookarounds or backreferences) are considered.
+# -----------------------------------------------------------------------------
+def _shadowed_rules(rules, flags):
+    result = []
+    earlier = []
+    for name, regex in rules:
+        text, context_free = _regex_info(regex, flags)
+        if text is not None:
+            for ename, cre in earlier:
+                if cre.match(text):
+                    result.append((name, ename, text))
+                    break
+        if context_free:
+            earlier.append((name, re.compile(regex, flags)))
+    return result
+
+# -----------------------------------------------------------------------------
+# _regex_first()
+#
+# Works out which characters a regular expression can start with.  Returns a
+# tuple (chars, other) where chars is a set of characters and other is True if
+# the regex might also start with characters outside of ASCII.  If the regex
+# could start with almost anything, chars is None.  The result only needs to
+# be a superset of the real answer, so anything unusual is treated as None.
+# -----------------------------------------------------------------------------
+
+_category_chars = {
+    sre_parse.CATEGORY_DIGIT: '0123456789',
+    sre_parse.CATEGORY_SPACE: ' \t\n\r\f\v\x1c\x1d\x1e\x1f',
+    sre_parse.CATEGORY_WORD: 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_',
+}
+
+def _regex_first(pattern, flags):
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+        state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+        flags |= getattr(state, 'flags', 0)
+        chars, other, nullable = _first_items(parsed, flags)
+    except Exception:
+        return None, True
+    if nullable:
+        return None, True
+    return chars, other
+
+def _first_items(items, flags):
+    chars = set()
+    other = False
+    for op, av in items:
+        ichars, iother, nullable = _first_item(op, av, flags)
+        if ichars is None:
+            return None, True, False
+        chars |= ichars
+        other = other or iother
+        if not nullable:
+            return chars, other, False
+    return chars, other, True
+
+def _first_item(op, av, flags):
+    if op is sre_parse.LITERAL:
+        c = chr(av) if av < 128 else _unichr(av)
+        if flags & re.IGNORECASE:
+            return set([c, c.lower(), c.upper()]), True, False
+        return set([c]), av >= 128, False
+
+    elif op is sre_parse.IN:
+        if av and av[0][0] is sre_parse.NEGATE:
+            return _first_negated(av[1:])
+        chars = set()
+        other = bool(flags & re.IGNORECASE)
+        for iop, iav in av:
+            if iop is sre_parse.LITERAL:
+                chars.add(chr(iav) if iav < 128 else _unichr(iav))
+                other = other or iav >= 128
+            elif iop is sre_parse.RANGE:
+                lo, hi = iav
+                if hi - lo > 256:
+                    return None, True, False
+                chars.update(chr(n) if n < 128 else _unichr(n) for n in range(lo, hi + 1))
+                other = other or hi >= 128
+            elif iop is sre_parse.CATEGORY and iav in _category_chars and not flags & re.LOCALE:
+                chars.update(_category_chars[iav])
+                other = True
+            else:
+                return None, True, False
+        if flags & re.IGNORECASE:
+            chars.update([c.lower() for c in chars] + [c.upper() for c in chars])
+        return chars, other, False
+
+    elif op is sre_parse.SUBPATTERN:
+        if len(av) == 4:
+            group, add_flags, del_flags, p = av
+            flags = (flags | add_flags) & ~del_flags
+        else:
+            group, p = av
+        return _first_items(p, flags)
+
+    elif op is sre_parse.BRANCH:
+        chars = set()
+        other = False
+        nullable = False
+        for p in av[1]:
+            pchars, pother, pnullable = _first_items(p, flags)
+            if pchars is None:
+                return None, True, False
+            chars |= pchars
+            other = other or pother
+            nullable = nullable or pnullable
+        return chars, other, nullable
+
+    elif op in _repeat_ops:
+        lo, hi, p = av
+        chars, other, nullable = _first_items(p, flags)
+        return chars, other, nullable or lo == 0
+
+    elif op in _zero_width_ops:
+        return set(), False, True
+
+    elif op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+        return _first_items(av, flags)
+
+    return None, True, False
+
+# A negated class can start with any ASCII character that isn't excluded.
+# Only literals and ranges are taken out, which is always safe.
+def _first_negated(items):
+    excluded = set()
+    for iop, iav in items:
+        if iop is sre_parse.LITERAL:
+            excluded.add(iav)
+        elif iop is sre_parse.RANGE:
+            excluded.update(range(iav[0], min(iav[1], 127) + 1))
+    return set(chr(n) for n in range(128) if n not in excluded), True, False
+
+_repeat_ops = tuple(getattr(sre_parse, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                    if hasattr(sre_parse, name))
+_zero_width_ops = (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+try:
+    _unichr = unichr
+except NameError:
+    _unichr = chr
+
+# -----------------------------------------------------------------------------
+# _Dispatch
+#
+# Dictionary mapping a character to the list of (re, findex) pairs to try.
+# Characters that aren't in the dictionary use the default list.
+# -----------------------------------------------------------------------------
+class _Dispatch(dict):
+    def __init__(self, default):
+        dict.__init__(self)
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+# -----------------------------------------------------------------------------
+# _split_master()
+#
+# Splits the master regex strings of a state back into (name, regex, entry)
+# triples for each rule, where entry is the (func, tokname) entry from the
+# index table.  Returns None if the text doesn't split cleanly.  The text is
+# the plain alternation of the rules, but the compiled regex may be factored
+# (see _factor_literals()), so the rules are put in the order of the text
+# rather than in group order.
+# -----------------------------------------------------------------------------
+def _split_master(lre, retext):
+    rules = []
+    seen = set()
+    for (cre, findex), text in zip(lre, retext):
+        names = dict((i, name) for name, i in cre.groupindex.items())
+        pieces = []
+        for i, entry in enumerate(findex):
+            if entry:
+                start = text.find('(?P<%s>' % names[i])
+                if start < 0:
+                    return None
+                pieces.append((start, names[i], entry))
+        pieces.sort(key=lambda piece: piece[0])
+        starts = [start for start, name, entry in pieces]
+        pieces = [(name, entry) for start, name, entry in pieces]
+        starts.append(len(text) + 1)
+        if starts[0] != 0:
+            return None
+        for (name, entry), start, end in zip(pieces, starts, starts[1:]):
+            if end <= len(text) and text[end-1] != '|':
+                return None
+            if name not in seen:
+                seen.add(name)
+                rules.append((name, text[start:end-1], entry, cre.flags))
+    return rules
+
+# -----------------------------------------------------------------------------
+# _rules_master_re()
+#
+# Forms the master regexs for a list of rules returned by _split_master()
+# -----------------------------------------------------------------------------
+def _rules_master_re(rules):
+    if not rules:
+        return []
+    ldict = {}
+    toknames = {}
+    for name, r, (func, tokname), flags in rules:
+        ldict[name] = func if func else r
+        toknames[name] = tokname
+    return _form_master_re([r for name, r, entry, flags in rules], rules[0][3], ldict, toknames, True)[0]
+
+# -----------------------------------------------------------------------------
+# _build_dispatch()
+#
+# Builds the dispatch table for one state from its list of (re, findex) pairs
+# -----------------------------------------------------------------------------
+def _build_dispatch(lre, retext, firsts=None):
+    rules = _split_master(lre, retext) if retext and len(retext) == len(lre) else None
+    if not rules:
+        return _Dispatch(lre)
+
+    if firsts is None or len(firsts) != len(rules):
+        firsts = [_regex_first(r, flags) for name, r, entry, flags in rules]
+
+    # Every ASCII character gets its own entry, along with any other
+    # characters that appear explicitly in a first set
+    chars = set(chr(n) for n in range(128))
+    for first, other in firsts:
+        if first:
+            chars.update(first)
+
+    def candidates(c):
+        return tuple(n for n, (first, other) in enumerate(firsts)
+                     if first is None or c in first or (other and ord(c) >= 128))
+
+    compiled = {}
+    def master(cand):
+        if cand not in compiled:
+            compiled[cand] = _rules_master_re([rules[n] for n in cand])
+        return compiled[cand]
+
+    dispatch = _Dispatch(master(tuple(n for n, (first, other) in enumerate(firsts)
+                                      if first is None or other)))
+    for c in chars:
+        dispatch[c] = master(candidates(c))
+    dispatch.firsts = firsts
+    return dispatch
+
+# -----------------------------------------------------------------------------
+# _build_skip()
+#
+# Builds the skip scanner for one state from its ignored characters and its
+# list of (re, findex) pairs.  Returns a tuple (first, skip) where first holds
+# the characters a skipped run can start with and skip is the compiled regex,
+# or None if nothing is ignored.
+# -----------------------------------------------------------------------------
+def _build_skip(ignore, lre, retext, firsts=None):
+    rules = _split_master(lre, retext) if retext and len(retext) == len(lre) else None
+    reflags = rules[0][3] if rules else 0
+
+    # With re.IGNORECASE, only skip the ignored characters, which are case sensitive
+    if ignore and reflags & re.IGNORECASE and ignore.lower() != ignore.upper():
+        rules = None
+        reflags = 0
+
+    parts = []
+    first = ''
+    if ignore:
+        parts.append('[%s]' % ''.join(re.escape(c) for c in ignore))
+        first = ignore
+
+    if rules:
+        if firsts is None or len(firsts) != len(rules):
+            firsts = [_regex_first(r, flags) for name, r, entry, flags in rules]
+        patterns = [r[len('(?P<%s>' % name):-1] for name, r, entry, flags in rules]
+        for n, rule in enumerate(rules):
+            chars, other = firsts[n]
+            if rule[2] != (None, None) or not chars or other:
+                continue
+            guard = ['(?:%s)' % patterns[i] for i in range(n)
+                     if firsts[i][0] is None or firsts[i][0] & chars]
+            if guard:
+                parts.append('(?!%s)(?:%s)' % ('|'.join(guard), patterns[n]))
+            else:
+                parts.append('(?:%s)' % patterns[n])
+            first += ''.join(sorted(chars - set(first)))
+
+    if not parts:
+        return '', None
+    try:
+        return first, re.compile('(?:%s)+' % '|'.join(parts), reflags)
+    except re.error:
+        # The rules can't be combined (for example, they use the same group
+        # names).  Only skip the ignored characters.
+        if not ignore:
+            return '', None
+        return ignore, re.compile(parts[0] + '+', reflags)
+
+# -----------------------------------------------------------------------------
+#                           === DFA scanning engine ===
+#
+# The following classes implement the optional engine selected with
+# lex(engine='dfa').  The rules of a state are compiled into a small NFA
+# program which is then turned into a DFA lazily, one state at a time, as the
+# input requires.  Each DFA state is an ordered list of NFA instructions, so
+# the highest priority thread wins exactly as it would in the re module (the
+# first rule that matches, and within a rule the match that backtracking would
+# find).  Scanning a token takes time proportional to its length.
+#
+# Rules that use features the engine doesn't handle (anchors, lookahead,
+# backreferences, case-insensitive letters, etc.) keep using the re module.
+# -----------------------------------------------------------------------------
+
+_CHAR, _SPLIT, _JMP, _MATCH = range(4)
+
+_MAXREPEAT = getattr(sre_parse, 'MAXREPEAT', 65535)
+
+# Largest NFA program built for one group of rules
+_DFA_MAXPROG = 20000
+
+# Number of DFA states kept before the cache is thrown away and rebuilt
+_DFA_MAXSTATES = 10000
+
+class _Unsupported(Exception):
+    pass
+
+# -----------------------------------------------------------------------------
+# _CharSet
+#
+# A set of characters, given as code points, used by the NFA program.  It is
+# made of ranges and category tests and may be negated.
+# -----------------------------------------------------------------------------
+class _CharSet(object):
+    __slots__ = ('ranges', 'tests', 'negate')
+
+    def __init__(self, ranges, tests=(), negate=False):
+        self.ranges = ranges
+        self.tests = tests
+        self.negate = negate
+
+    def __contains__(self, cp):
+        for lo, hi in self.ranges:
+            if lo <= cp <= hi:
+                return not self.negate
+        for test in self.tests:
+            if test(cp):
+                return not self.negate
+        return self.negate
+
+def _category_tests(unicode):
+    if unicode:
+        def digit(cp):
+            return _unichr(cp).isdecimal()
+        def space(cp):
+            return _unichr(cp).isspace()
+        def word(cp):
+            return cp == 95 or _unichr(cp).isalnum()
+    else:
+        def digit(cp):
+            return 48 <= cp <= 57
+        def space(cp):
+            return cp == 32 or 9 <= cp <= 13
+        def word(cp):
+            return cp == 95 or 48 <= cp <= 57 or 65 <= cp <= 90 or 97 <= cp <= 122
+    return {
+        sre_parse.CATEGORY_DIGIT: digit,
+        sre_parse.CATEGORY_SPACE: space,
+        sre_parse.CATEGORY_WORD: word,
+        sre_parse.CATEGORY_NOT_DIGIT: _negate_test(digit),
+        sre_parse.CATEGORY_NOT_SPACE: _negate_test(space),
+        sre_parse.CATEGORY_NOT_WORD: _negate_test(word),
+    }
+
+def _negate_test(test):
+    return lambda cp: not test(cp)
+
+def _is_cased(cp):
+    c = _unichr(cp)
+    return c.lower() != c or c.upper() != c
+
+# -----------------------------------------------------------------------------
+# _NFABuilder
+#
+# Translates parsed regular expressions into an NFA program.  The program is a
+# list of instructions:
+#
+#     (_CHAR, charset)      Consume one character in charset
+#     (_SPLIT, x, y)        Continue at x, or failing that at y
+#     (_JMP, x)             Continue at x
+#     (_MATCH, n)           Rule n has matched
+#
+# Raises _Unsupported for anything the DFA can't reproduce exactly.
+# -----------------------------------------------------------------------------
+class _NFABuilder(object):
+    def __init__(self, binary=False):
+        self.prog = []
+        self.binary = binary
+        self.tests = {}
+
+    def add_rules(self, rules):
+        prog = self.prog
+        splits = []
+        for n, (name, regex, entry, flags) in enumerate(rules):
+            if n < len(rules) - 1:
+                splits.append(len(prog))
+                prog.append(None)
+            self.add_regex(regex, flags)
+            prog.append((_MATCH, n + 1))
+            if n < len(rules) - 1:
+                prog[splits[-1]] = (_SPLIT, splits[-1] + 1, len(prog))
+        return prog
+
+    def add_regex(self, regex, flags):
+        try:
+            parsed = sre_parse.parse(regex, flags)
+        except Exception:
+            raise _Unsupported()
+        state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+        flags |= getattr(state, 'flags', 0)
+        if flags & re.LOCALE:
+            raise _Unsupported()
+        self.emit(parsed, flags)
+
+    def charset(self, ranges, tests=(), negate=False, flags=0):
+        if flags & re.IGNORECASE:
+            for lo, hi in ranges:
+                if hi - lo > 256 or any(_is_cased(cp) for cp in range(lo, hi + 1)):
+                    raise _Unsupported()
+        return (_CHAR, _CharSet(ranges, tests, negate))
+
+    def category(self, cat, flags):
+        unicode = bool(flags & re.UNICODE) and not flags & getattr(re, 'ASCII', 0) and not self.binary
+        if unicode not in self.tests:
+            self.tests[unicode] = _category_tests(unicode)
+        test = self.tests[unicode].get(cat)
+        if test is None:
+            raise _Unsupported()
+        return test
+
+    def emit(self, items, flags):
+        for op, av in items:
+            self.emit_item(op, av, flags)
+            if len(self.prog) > _DFA_MAXPROG:
+                raise _Unsupported()
+
+    def emit_item(self, op, av, flags):
+        prog = self.prog
+        if op is sre_parse.LITERAL:
+            prog.append(self.charset([(av, av)], flags=flags))
+
+        elif op is sre_parse.NOT_LITERAL:
+            prog.append(self.charset([(av, av)], negate=True, flags=flags))
+
+        elif op is sre_parse.ANY:
+            if flags & re.DOTALL:
+                prog.append(self.charset([], negate=True))
+            else:
+                prog.append(self.charset([(10, 10)], negate=True))
+
+        elif op is sre_parse.IN:
+            negate = False
+            ranges = []
+            tests = []
+            for iop, iav in av:
+                if iop is sre_parse.NEGATE:
+                    negate = True
+                elif iop is sre_parse.LITERAL:
+                    ranges.append((iav, iav))
+                elif iop is sre_parse.RANGE:
+                    ranges.append(iav)
+                elif iop is sre_parse.CATEGORY:
+                    tests.append(self.category(iav, flags))
+                else:
+                    raise _Unsupported()
+            prog.append(self.charset(ranges, tests, negate, flags))
+
+        elif op is sre_parse.SUBPATTERN:
+            if len(av) == 4:
+                group, add_flags, del_flags, p = av
+                flags = (flags | add_flags) & ~del_flags
+            else:
+                group, p = av
+            self.emit(p, flags)
+
+        elif op is sre_parse.BRANCH:
+            alts = av[1]
+            jumps = []
+            for n, p in enumerate(alts):
+                if n < len(alts) - 1:
+                    split = len(prog)
+                    prog.append(None)
+                    self.emit(p, flags)
+                    jumps.append(len(prog))
+                    prog.append(None)
+                    prog[split] = (_SPLIT, split + 1, len(prog))
+                else:
+                    self.emit(p, flags)
+            for pc in jumps:
+                prog[pc] = (_JMP, len(prog))
+
+        elif op is sre_parse.MAX_REPEAT or op is sre_parse.MIN_REPEAT:
+            lo, hi, p = av
+            greedy = op is sre_parse.MAX_REPEAT
+            if hi != lo and _nullable(p):
+                raise _Unsupported()
+            for n in range(lo):
+                self.emit(p, flags)
+            if hi == _MAXREPEAT:
+                loop = len(prog)
+                prog.append(None)
+                self.emit(p, flags)
+                prog.append((_JMP, loop))
+                prog[loop] = (_SPLIT, loop + 1, len(prog)) if greedy else (_SPLIT, len(prog), loop + 1)
+            else:
+                splits = []
+                for n in range(hi - lo):
+                    splits.append(len(prog))
+                    prog.append(None)
+                    self.emit(p, flags)
+                for pc in splits:
+                    prog[pc] = (_SPLIT, pc + 1, len(prog)) if greedy else (_SPLIT, len(prog), pc + 1)
+        else:
+            raise _Unsupported()
+
+def _nullable(items):
+    for op, av in items:
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+            return False
+        elif op is sre_parse.SUBPATTERN:
+            if not _nullable(av[-1]):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not any(_nullable(p) for p in av[1]):
+                return False
+        elif op is sre_parse.MAX_REPEAT or op is sre_parse.MIN_REPEAT:
+            if av[0] > 0 and not _nullable(av[2]):
+                return False
+    return True
+
+# -----------------------------------------------------------------------------
+# _DFAState
+#
+# A DFA state.  It is a dictionary mapping the next input character to the
+# next state (None if nothing can match).  Transitions are worked out the
+# first time a character is seen.
+# -----------------------------------------------------------------------------
+class _DFAState(dict):
+    def __init__(self, dfa, insts, accept):
+        dict.__init__(self)
+        self.dfa = dfa
+        self.insts = insts
+        self.accept = accept
+
+    def __missing__(self, c):
+        nxt = self.dfa.step(self.insts, c if isinstance(c, int) else ord(c))
+        self[c] = nxt
+        return nxt
+
+# -----------------------------------------------------------------------------
+# _DFA
+#
+# Scanner for a group of rules.  It has the same match() interface as the
+# compiled master regexs, so it can be used in their place in lexstatere style
+# lists.  m.lastindex is the position of the rule in the group, starting at 1.
+# -----------------------------------------------------------------------------
+class _DFA(object):
+    def __init__(self, rules, binary=False):
+        self.rules = rules
+        self.binary = binary
+        self.prog = _NFABuilder(binary).add_rules(rules)
+        self.pattern = '|'.join(r for name, r, entry, flags in rules)
+        self.flags = rules[0][3]
+        self.relist = None
+        self.reset()
+
+    def reset(self):
+        self.states = {}
+        insts = []
+        self.closure(0, insts, set())
+        self.start = self.state(tuple(insts))
+
+    def binary_version(self):
+        return _DFA(self.rules, binary=True)
+
+    # Adds the instructions reachable from pc to insts, in priority order.
+    # Returns True if a match was reached, in which case anything of lower
+    # priority is dropped.
+    def closure(self, pc, insts, seen):
+        prog = self.prog
+        stack = [pc]
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            inst = prog[pc]
+            if inst[0] == _SPLIT:
+                stack.append(inst[2])
+                stack.append(inst[1])
+            elif inst[0] == _JMP:
+                stack.append(inst[1])
+            else:
+                insts.append(pc)
+                if inst[0] == _MATCH:
+                    return True
+        return False
+
+    def step(self, insts, cp):
+        prog = self.prog
+        nxt = []
+        seen = set()
+        for pc in insts:
+            inst = prog[pc]
+            if inst[0] == _MATCH:
+                break
+            if cp in inst[1]:
+                if self.closure(pc + 1, nxt, seen):
+                    break
+        if not nxt:
+            return None
+        return self.state(tuple(nxt))
+
+    def state(self, insts):
+        st = self.states.get(insts)
+        if st is None:
+            if len(self.states) >= _DFA_MAXSTATES:
+                for old in self.states.values():
+                    old.clear()
+                self.states = {}
+            last = self.prog[insts[-1]] if insts else None
+            st = _DFAState(self, insts, last[1] if last and last[0] == _MATCH else 0)
+            self.states[insts] = st
+        return st
+
+    def match(self, data, pos=0):
+        start = pos
+        state = self.start
+        # Looping over short slices of the input is faster than indexing
+        while True:
+            window = data[pos:pos+32]
+            for c in window:
+                nxt = state[c]
+                if nxt is None:
+                    break
+                state = nxt
+                pos += 1
+            else:
+                if len(window) == 32:
+                    continue
+            break
+        if state.accept:
+            return _DFAMatch(self, data, start, pos, state.accept)
+        return self.last_match(data, start, pos)
+
+    # Returns True if scanning from pos reaches end in a state that more
+    # text could still lead to a match from
+    def open(self, data, pos, end):
+        state = self.start
+        while pos < end:
+            for c in data[pos:min(pos+32, end)]:
+                state = state[c]
+                if state is None:
+                    return False
+            pos += 32
+        prog = self.prog
+        return any(prog[pc][0] == _CHAR for pc in state.insts)
+
+    # The scan stopped in a state that doesn't accept.  Go over the text
+    # again to find the last position that did.
+    def last_match(self, data, start, pos):
+        state = self.start
+        rule = state.accept
+        end = start
+        for n in range(start, pos):
+            state = state[data[n]]
+            if state.accept:
+                rule = state.accept
+                end = n + 1
+        if not rule:
+            return None
+        return _DFAMatch(self, data, start, end, rule)
+
+    # Regular expression equivalent to the DFA, used to fill in the details of
+    # a match on demand
+    def regex(self):
+        if self.relist is None:
+            pattern, flags = self.pattern, self.flags
+            if self.binary:
+                pattern, flags = pattern.encode('latin-1'), flags & ~re.UNICODE
+            self.relist = re.compile(pattern, flags)
+        return self.relist
+
+# -----------------------------------------------------------------------------
+# _DFAMatch
+#
+# The result of _DFA.match().  Only the position and text of the whole match
+# are stored.  Anything else (groups within the rule, etc.) comes from the
+# equivalent regular expression match, which is made the first time it's
+# needed.
+# -----------------------------------------------------------------------------
+class _DFAMatch(object):
+    __slots__ = ('dfa', 'string', 'pos', 'endpos', 'lastindex', 'rematch')
+
+    def __init__(self, dfa, string, pos, endpos, lastindex):
+        self.dfa = dfa
+        self.string = string
+        self.pos = pos
+        self.endpos = endpos
+        self.lastindex = lastindex
+        self.rematch = None
+
+    def start(self, *args):
+        if not args:
+            return self.pos
+        return self.match().start(*args)
+
+    def end(self, *args):
+        if not args:
+            return self.endpos
+        return self.match().end(*args)
+
+    def group(self, *args):
+        if not args or args == (0,):
+            return self.string[self.pos:self.endpos]
+        return self.match().group(*args)
+
+    def match(self):
+        if self.rematch is None:
+            self.rematch = self.dfa.regex().match(self.string, self.pos)
+        return self.rematch
+
+    def __getattr__(self, name):
+        return getattr(self.match(), name)
+
+# -----------------------------------------------------------------------------
+# _build_dfa()
+#
+# Builds the list of scanners for one state with the DFA engine.  Consecutive
+# rules that the DFA can handle are grouped into a _DFA.  Runs of other rules
+# get normal master regexs.  The order of the rules is unchanged.
+# -----------------------------------------------------------------------------
+def _build_dfa(lre, retext):
+    rules = _split_master(lre, retext) if retext and len(retext) == len(lre) else None
+    if not rules:
+        return lre
+
+    groups = []
+    for rule in rules:
+        try:
+            _NFABuilder().add_rules([rule])
+            supported = True
+        except _Unsupported:
+            supported = False
+        if groups and groups[-1][0] == supported:
+            groups[-1][1].append(rule)
+        else:
+            groups.append((supported, [rule]))
+
+    scanners = []
+    for supported, grules in groups:
+        if supported:
+            scanners.append((_DFA(grules), [None] + [entry for name, r, entry, flags in grules]))
+        else:
+            scanners.extend(_rules_master_re(grules))
+    return scanners
+
+# -----------------------------------------------------------------------------
+#                          === NumPy scanning engine ===
+#
+# The following code implements the optional engine selected with
+# lex(engine='numpy').  It is only used by tokenize_all() and only for states
+# where every rule matches a run of characters from one class (such as
+# [0-9]+ or \s+), a single character, or a fixed string.  Everything else
+# (token(), other states, input with errors) uses the normal engine.
+#
+# With such rules, the rule tried first at each position only depends on the
+# characters there, so it is found for the whole input at once with table
+# lookups.  The places where a token must start are the non-ignored positions
+# following a character that no run and no longer fixed string can continue
+# over.  From each of those, the tokens up to the next one are found in
+# rounds, each round advancing all of them by one token.  For typical input
+# (numbers separated by spaces or commas, words and punctuation) this takes
+# one or two rounds.
+# -----------------------------------------------------------------------------
+
+# Characters of input scanned at a time
+_VECTOR_BLOCK = 1 << 22
+
+_vector_ops = (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.IN, sre_parse.ANY)
+
+# -----------------------------------------------------------------------------
+# _vector_rule()
+#
+# Classifies a rule for the NumPy engine.  Returns a tuple (kind, tail) where
+# kind is 'run' for a regex matching one character followed by any number of
+# characters from a class (such as [0-9]+ or [a-z][a-z0-9]*), 'char' for a
+# regex matching a single character, 'literal' for a fixed string, or None for
+# anything else.  For a run, tail is a regex for one character of the class.
+# -----------------------------------------------------------------------------
+def _vector_rule(pattern, flags):
+    try:
+        items = list(sre_parse.parse(pattern, flags))
+    except Exception:
+        return None, None
+    text = pattern.rstrip()
+    if len(items) == 1:
+        op, av = items[0]
+        if op in _vector_ops:
+            return 'char', None
+        if op is sre_parse.MAX_REPEAT and av[0] == 1 and av[1] == _MAXREPEAT and text.endswith('+'):
+            sub = list(av[2])
+            if len(sub) == 1 and sub[0][0] in _vector_ops and _parses_as(text[:-1], sub, flags):
+                return 'run', text[:-1]
+    elif len(items) == 2 and items[0][0] in _vector_ops and text.endswith('*'):
+        op, av = items[1]
+        if op is sre_parse.MAX_REPEAT and av[0] == 0 and av[1] == _MAXREPEAT:
+            sub = list(av[2])
+            if len(sub) == 1 and sub[0][0] in _vector_ops:
+                for n in range(1, len(text) - 1):
+                    if _parses_as(text[:n], items[:1], flags) and _parses_as(text[n:-1], sub, flags):
+                        return 'run', text[n:-1]
+    if _regex_info(pattern, flags)[0] is not None:
+        return 'literal', None
+    return None, None
+
+def _parses_as(pattern, items, flags):
+    try:
+        return list(sre_parse.parse(pattern, flags)) == items
+    except Exception:
+        return False
+
+# -----------------------------------------------------------------------------
+# _VectorPlan
+#
+# The rules of one state as used by the NumPy engine.  Each rule is a tuple
+# (kind, regex, tail, flags, text, toktype, newlines) where kind and tail are
+# as returned by _vector_rule(), text is the fixed string of a literal rule and
+# toktype is None if the tokens are discarded.  The literal characters are
+# added at the end as 'char' rules.
+#
+# tables() gives lookup tables indexed by character code for a list of code
+# points:
+#
+#     first[s]   Index of the first rule from s on that can match starting
+#                with the character, or len(rules) if there is none
+#     member[j]  The character can continue the j-th run rule
+#     ignore     The character is ignored
+#     brk        No run or longer fixed string can continue over the
+#                character, so a token can't continue past it
+# -----------------------------------------------------------------------------
+class _VectorPlan(object):
+    def __init__(self, rules, ignore):
+        self.rules = rules
+        self.ignore = ignore
+        self.runs = [n for n, rule in enumerate(rules) if rule[0] == 'run']
+        self.literals = [n for n, rule in enumerate(rules) if rule[0] == 'literal']
+        self.inner = set(c for rule in rules if rule[0] == 'literal' for c in rule[4][:-1])
+        self.lengths = [len(rule[4]) if rule[0] == 'literal' else 1 for rule in rules] + [0]
+        self.compiled = {}
+        self.rows = {}
+        self.bytetables = {}
+
+    def compile(self, regex, flags, binary):
+        if binary:
+            return re.compile(regex.encode('latin-1'), flags & ~re.UNICODE)
+        return re.compile(regex, flags)
+
+    def tables(self, alphabet, binary):
+        import numpy
+        if binary not in self.compiled:
+            heads = []
+            for kind, regex, tail, flags, text, toktype, newlines in self.rules:
+                heads.append(self.compile(regex, flags, binary) if kind != 'literal' and regex else None)
+            tails = [self.compile(self.rules[n][2], self.rules[n][3], binary) for n in self.runs]
+            self.compiled[binary] = (heads, tails)
+        heads, tails = self.compiled[binary]
+
+        rows = []
+        for cp in alphabet:
+            row = self.rows.get((binary, cp))
+            if row is None:
+                c = _unichr(cp)
+                ch = c.encode('latin-1') if binary else c
+                matches = []
+                for rule, cre in zip(self.rules, heads):
+                    if cre is not None:
+                        matches.append(cre.match(ch) is not None)
+                    else:
+                        matches.append(rule[4][0] == c)
+                first = [len(self.rules)] * (len(self.rules) + 1)
+                for n in range(len(self.rules) - 1, -1, -1):
+                    first[n] = n if matches[n] else first[n+1]
+                member = [cre.match(ch) is not None for cre in tails]
+                row = self.rows[(binary, cp)] = (first, member, c in self.ignore,
+                                                 not any(member) and c not in self.inner)
+            rows.append(row)
+
+        first = numpy.array([row[0] for row in rows], dtype=numpy.int16).T.copy()
+        member = numpy.array([row[1] for row in rows], dtype=bool).reshape(len(rows), len(self.runs)).T.copy()
+        ignore = numpy.array([row[2] for row in rows], dtype=bool)
+        brk = numpy.array([row[3] for row in rows], dtype=bool)
+        return first, member, ignore, brk
+
+    def bytetable(self, binary):
+        if binary not in self.bytetables:
+            self.bytetables[binary] = self.tables(range(256), binary)
+        return self.bytetables[binary]
+
+# -----------------------------------------------------------------------------
+# _build_vector()
+#
+# Builds the _VectorPlan for one state from its list of (re, findex) pairs.
+# Returns None if the state has rules the NumPy engine can't handle.  Rule
+# functions are only allowed if they are TokenActions that discard tokens or
+# count newlines.
+# -----------------------------------------------------------------------------
+def _build_vector(lre, retext, ignore, literals):
+    rules = _split_master(lre, retext) if retext and len(retext) == len(lre) else None
+    if rules is None:
+        return None
+    vrules = []
+    for name, r, (func, toktype), flags in rules:
+        regex = r[len(name)+5:-1]
+        kind, tail = _vector_rule(regex, flags)
+        if kind is None:
+            return None
+        newlines = False
+        if func:
+            if func.__class__ is not TokenAction or func.convert or func.keywords:
+                return None
+            if func.discard:
+                toktype = None
+            newlines = func.newlines
+        text = _regex_info(regex, flags)[0] if kind == 'literal' else None
+        vrules.append((kind, regex, tail, flags, text, toktype, newlines))
+    for c in literals:
+        vrules.append(('char', None, None, 0, c, c, False))
+    return _VectorPlan(vrules, ignore)
+
+# -----------------------------------------------------------------------------
+# _vector_block()
+#
+# Finds the tokens in the block lexdata[a:b] for the NumPy engine.  codes holds
+# the character codes of the whole input and tcodes the table indices of the
+# characters in the block.  a must be a position where the lexer would look
+# for the next token.  Returns arrays (starts, rules, ends) of the tokens
+# found and the position where scanning continues, or None if an error was
+# found.  A run that reaches the end of the block is left for the next block.
+# -----------------------------------------------------------------------------
+def _vector_block(np, plan, tables, codes, tcodes, a, b):
+    first, member, ignore, brk = tables
+    nrules = len(plan.rules)
+    final = b == len(codes)
+    size = b - a
+
+    ignored = ignore[tcodes]
+    nonignored = _next_true(np, ~ignored)
+    if nonignored(0) == size:
+        return [], b
+
+    # Rule tried first at each position.  Where a fixed string isn't
+    # there, the rules after it are tried.
+    chosen = first[0][tcodes]
+    for n in plan.literals:
+        text = plan.rules[n][4]
+        pos = np.flatnonzero(chosen == n)
+        ok = a + pos + len(text) <= len(codes)
+        for i, c in enumerate(text):
+            sel = np.flatnonzero(ok)
+            ok[sel] = codes[a + pos[sel] + i] == ord(c)
+        bad = pos[~ok]
+        chosen[bad] = first[n+1][tcodes[bad]]
+
+    # Positions where a token must start
+    start = np.empty(size + 1, dtype=bool)
+    start[0] = False
+    start[1:] = brk[tcodes]
+    start[:-1] &= ~ignored
+    start[size] = False
+    start[nonignored(0)] = True
+
+    runends = {}
+    lengths = np.array(plan.lengths, dtype=np.intp)
+
+    results = []
+    resume = None
+    maxend = 0
+    cur = np.flatnonzero(start)
+    while cur.size:
+        rules = chosen[cur]
+        if (rules == nrules).any():
+            return None
+        ends = cur + lengths[rules]
+        for j, n in enumerate(plan.runs):
+            sel = np.flatnonzero(rules == n)
+            if not sel.size:
+                continue
+            if n not in runends:
+                runends[n] = _next_true(np, ~member[j][tcodes])
+            ends[sel] = runends[n](cur[sel] + 1)
+            if not final:
+                # A run that may continue past the end of the block is
+                # scanned again, from its start, with the next block
+                partial = sel[ends[sel] == size]
+                if partial.size:
+                    resume = a + int(cur[partial].min())
+                    keep = np.ones(cur.size, dtype=bool)
+                    keep[partial] = False
+                    cur, rules, ends = cur[keep], rules[keep], ends[keep]
+        if ends.size:
+            maxend = max(maxend, int(ends.max()))
+        results.append((cur, rules, ends))
+
+        nxt = nonignored(np.minimum(ends, size))
+        nxt = nxt[nxt < size]
+        cur = nxt[~start[nxt]]
+
+    if resume is None:
+        resume = max(b, a + maxend)
+    return results, resume
+
+# Returns a function that gives, for an array of positions p, the first
+# position from p on where mask is true, or len(mask) if there is none
+def _next_true(np, mask):
+    size = mask.size
+    where = np.concatenate((np.flatnonzero(mask), [size]))
+    counts = np.zeros(size + 1, dtype=np.int32 if size < 1 << 31 else np.int64)
+    np.cumsum(mask, out=counts[1:])
+    return lambda p: where[counts[p]]
+
+# Appends the values in a NumPy array to an array.array
+def _extend_array(arr, values):
+    data = values.astype(arr.typecode).tobytes()
+    if hasattr(arr, 'frombytes'):
+        arr.frombytes(data)
+    else:
+        arr.fromstring(data)
 
 # -----------------------------------------------------------------------------
 # def _statetoken(s,names)
@@ -545,7 +4094,7 @@ def _statetoken(s, names):
     if 'ANY' in states:
         states = tuple(names)
 
-    tokenname = '_'.join(parts[i:])
+    tokenname = intern('_'.join(parts[i:]))
     return (states, tokenname)
 
 
@@ -556,7 +4105,7 @@ def _statetoken(s, names):
 # user's input file.
 # -----------------------------------------------------------------------------
 class LexerReflect(object):
-    def __init__(self, ldict, log=None, reflags=0):
+    def __init__(self, ldict, log=None, reflags=0, cachedir=None):
         self.ldict      = ldict
         self.error_func = None
         self.tokens     = []
@@ -565,6 +4114,8 @@ class LexerReflect(object):
         self.modules    = set()
         self.error      = False
         self.log        = PlyLogger(sys.stderr) if log is None else log
+        self.cachedir   = cachedir      # Directory for saving source scans
+        self.timings    = []            # (validation pass, seconds) from validate_all()
 
     # Get all of the basic information
     def get_all(self):
@@ -572,12 +4123,15 @@ class LexerReflect(object):
         self.get_literals()
         self.get_states()
         self.get_rules()
+        self.get_actions()
 
     # Validate all of the information
     def validate_all(self):
-        self.validate_tokens()
-        self.validate_literals()
-        self.validate_rules()
+        for check in (self.validate_tokens, self.validate_literals, self.validate_rules,
+                      self.validate_modules, self.validate_actions):
+            start = _clock()
+            check()
+            self.timings.append((check.__name__, _clock() - start))
         return self.error
 
     # Get the tokens map
@@ -685,7 +4239,11 @@ class LexerReflect(object):
             states, tokname = _statetoken(f, self.stateinfo)
             self.toknames[f] = tokname
 
-            if hasattr(t, '__call__'):
+            if hasattr(t, '__call__') and not hasattr(t, '__code__'):
+                # Rules are found by their source, so other callables can't be used
+                self.log.error('%s not defined as a function or string', f)
+                self.error = True
+            elif hasattr(t, '__call__'):
                 if tokname == 'error':
                     for s in states:
                         self.errorf[s] = t
@@ -725,6 +4283,43 @@ class LexerReflect(object):
         for s in self.strsym.values():
             s.sort(key=lambda x: len(x[1]), reverse=True)
 
+    # Get the built-in actions attached to string rules
+    def get_actions(self):
+        self.actions = self.ldict.get('token_actions', None)
+        if not self.actions:
+            self.actions = {}
+        elif not isinstance(self.actions, dict):
+            self.log.error('token_actions must be a dictionary')
+            self.actions = {}
+            self.error = True
+
+    # Validate the built-in actions
+    def validate_actions(self):
+        strnames = set()
+        for state in self.stateinfo:
+            strnames.update(name for name, r in self.strsym.get(state, []))
+
+        for name, action in sorted(self.actions.items(), key=lambda x: x[0]):
+            if not isinstance(action, TokenAction):
+                self.log.error("token_actions entry for '%s' must be a TokenAction", name)
+                self.error = True
+                continue
+            if name not in strnames:
+                self.log.error("token_actions entry for '%s', which is not a rule defined by a string", name)
+                self.error = True
+            if action.convert is not None and not callable(action.convert):
+                self.log.error("Converter for rule '%s' is not callable", name)
+                self.error = True
+            if action.keywords is not None:
+                if not isinstance(action.keywords, dict):
+                    self.log.error("Keywords for rule '%s' must be a dictionary", name)
+                    self.error = True
+                    continue
+                for value, tokname in sorted(action.keywords.items(), key=lambda x: repr(x[0])):
+                    if tokname not in self.tokens:
+                        self.log.error("Keyword %r for rule '%s' maps to an unspecified token %s", value, name, tokname)
+                        self.error = True
+
     # Validate all of the t_rules collected
     def validate_rules(self):
         for state in self.stateinfo:
@@ -776,7 +4371,9 @@ class LexerReflect(object):
                     self.error = True
                     continue
 
-                if tokname not in self.tokens and tokname.find('ignore_') < 0:
+                action = self.actions.get(name)
+                if tokname not in self.tokens and tokname.find('ignore_') < 0 and not \
+                   (isinstance(action, TokenAction) and action.discard):
                     self.log.error("Rule '%s' defined for an unspecified token %s", name, tokname)
                     self.error = True
                     continue
@@ -818,6 +4415,7 @@ class LexerReflect(object):
                     self.log.error("%s:%d: Rule '%s' requires an argument", file, line, f.__name__)
                     self.error = True
 
+    def validate_modules(self):
         for module in self.modules:
             self.validate_module(module)
 
@@ -830,38 +4428,31 @@ class LexerReflect(object):
     # -----------------------------------------------------------------------------
 
     def validate_module(self, module):
-        try:
-            lines, linen = inspect.getsourcelines(module)
-        except IOError:
-            return
-
         fre = re.compile(r'\s*def\s+(t_[a-zA-Z_0-9]*)\(')
         sre = re.compile(r'\s*(t_[a-zA-Z_0-9]*)\s*=')
 
-        counthash = {}
-        linen += 1
-        for line in lines:
-            m = fre.match(line)
-            if not m:
-                m = sre.match(line)
-            if m:
-                name = m.group(1)
-                prev = counthash.get(name)
-                if not prev:
-                    counthash[name] = linen
-                else:
-                    filename = inspect.getsourcefile(module)
-                    self.log.error('%s:%d: Rule %s redefined. Previously defined on line %d', filename, linen, name, prev)
-                    self.error = True
-            linen += 1
+        scan = _scan_redefinitions(module, (fre, sre), self.cachedir)
+        if scan is None:
+            return
+        filename, redefined = scan
+        for linen, name, prev in redefined:
+            self.log.error('%s:%d: Rule %s redefined. Previously defined on line %d', filename, linen, name, prev)
+            self.error = True
 
 # -----------------------------------------------------------------------------
 # lex(module)
 #
 # Build all of the regular expression rules from definitions in the supplied module
+#
+# If cachedir is given, a lexer built from the same specification is read
+# from the cache once the specification has been validated.  With debug set the cache isn't read, so that the
+# debugging output is the same as without a cache, but the cache entry is
+# still written.
 # -----------------------------------------------------------------------------
 def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
-        reflags=int(re.VERBOSE), nowarn=False, outputdir=None, debuglog=None, errorlog=None):
+        reflags=int(re.VERBOSE), nowarn=False, outputdir=None, debuglog=None, errorlog=None,
+        compact=False, tokenclass=None, engine='re', lineindex=False, cachedir=None,
+        timing=False, kinds=False):
 
     if lextab is None:
         lextab = 'lextab'
@@ -872,6 +4463,29 @@ def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
     stateinfo  = {'INITIAL': 'inclusive'}
     lexobj = Lexer()
     lexobj.lexoptimize = optimize
+    if engine not in ('re', 'dfa', 'numpy'):
+        raise ValueError("engine must be 're', 'dfa' or 'numpy'")
+    if engine == 'numpy':
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("lex(engine='numpy') requires NumPy")
+    lexobj.lexengine = engine
+    lexobj.lexkindmode = kinds
+    if lineindex:
+        lexobj.lexlineindex = LineIndex()
+    if compact:
+        lexobj.lextokenclass = CompactLexToken
+        lexobj.lexintern = True
+    if tokenclass:
+        lexobj.lextokenclass = tokenclass
+    if kinds:
+        # Kind ids are stored in tok.kind, so a token class with __slots__ needs one for it
+        try:
+            lexobj.lextokenclass().kind = 0
+        except AttributeError:
+            raise ValueError('lex(kinds=True) needs a token class with a kind attribute, '
+                             'but %s has no kind slot' % lexobj.lextokenclass.__name__)
     global token, input
 
     if errorlog is None:
@@ -903,12 +4517,43 @@ def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
             lextab = pkg + '.' + lextab
 
     # Collect parser information from the dictionary
-    linfo = LexerReflect(ldict, log=errorlog, reflags=reflags)
+    linfo = LexerReflect(ldict, log=errorlog, reflags=reflags, cachedir=cachedir)
     linfo.get_all()
+
     if not optimize:
-        if linfo.validate_all():
+        failed = linfo.validate_all()
+        if timing:
+            for name, seconds in linfo.timings:
+                errorlog.info('lex: %s took %.2f ms', name, seconds * 1000)
+        if failed:
             raise SyntaxError("Can't build lexer")
 
+    # Converters are saved by name, so a lexer with a converter that can't be
+    # found by its name is not read from or saved to the cache or a lextab
+    unsaved = _unsaved_converters(linfo.actions, ldict)
+    if unsaved and (cachedir or (optimize and lextab)):
+        errorlog.warning("Converter for rule %s can't be found by its name. The lexer won't be saved",
+                         ', '.join([repr(name) for name in unsaved]))
+        cachedir = lextab = None
+
+    # Look for a lexer built from the same specification in the cache.  The
+    # key is only made once the specification is known to be valid.
+    cachefile = None
+    if cachedir:
+        cachefile = os.path.join(cachedir, 'lex-%s.py' % _lexcache_key(linfo, reflags))
+    if cachefile and not debug:
+        try:
+            with open(cachefile) as f:
+                lexobj.readtab(_tab_module(f.read()), ldict)
+        except Exception:
+            # A missing or unreadable entry just means the lexer is built again
+            pass
+        else:
+            token = lexobj.token
+            input = lexobj.input
+            lexer = lexobj
+            return lexobj
+
     if optimize and lextab:
         try:
             lexobj.readtab(lextab, ldict)
@@ -938,38 +4583,61 @@ def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
         lexobj.lexliterals = linfo.literals
 
     lexobj.lextokens_all = lexobj.lextokens | set(lexobj.lexliterals)
+    lexobj.set_kinds()
 
     # Get the stateinfo dictionary
     stateinfo = linfo.stateinfo
 
     regexs = {}
+    rules = {}
     # Build the master regular expressions
     for state in stateinfo:
         regex_list = []
+        rule_list = []
 
         # Add rules defined by functions first
         for fname, f in linfo.funcsym[state]:
             line = f.__code__.co_firstlineno
             file = f.__code__.co_filename
             regex_list.append('(?P<%s>%s)' % (fname, _get_regex(f)))
+            rule_list.append((fname, _get_regex(f)))
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", fname, _get_regex(f), state)
 
         # Now add all of the simple rules
         for name, r in linfo.strsym[state]:
             regex_list.append('(?P<%s>%s)' % (name, r))
+            rule_list.append((name, r))
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", name, r, state)
 
         regexs[state] = regex_list
+        rules[state] = rule_list
+
+    # Warn about rules for fixed strings that an earlier rule always matches first
+    shadowed = set()
+    for state, stype in stateinfo.items():
+        rule_list = rules[state]
+        if state != 'INITIAL' and stype == 'inclusive':
+            rule_list = rule_list + rules['INITIAL']
+        for name, ename, text in _shadowed_rules(rule_list, reflags):
+            if (name, ename) not in shadowed:
+                shadowed.add((name, ename))
+                errorlog.warning("Rule '%s' is never matched. Rule '%s' matches %r first", name, ename, text)
 
     # Build the master regular expressions
 
     if debug:
         debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
 
+    # String rules with built-in actions are given their TokenAction in place of the string
+    rdict = ldict
+    if linfo.actions:
+        rdict = dict(ldict)
+        rdict.update(linfo.actions)
+
     for state in regexs:
-        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames)
+        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, rdict, linfo.toknames, True)
         lexobj.lexstatere[state] = lexre
         lexobj.lexstateretext[state] = re_text
         lexobj.lexstaterenames[state] = re_names
@@ -1016,6 +4684,9 @@ def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
             if s not in linfo.ignore:
                 linfo.ignore[s] = linfo.ignore.get('INITIAL', '')
 
+    lexobj.build_dispatch()
+    lexobj.set_binary(False)
+
     # Create global versions of the token() and input() functions
     token = lexobj.token
     input = lexobj.input
@@ -1044,6 +4715,12 @@ def lex(module=None, object=None, debug=False, optimize=False, lextab='lextab',
         except IOError as e:
             errorlog.warning("Couldn't write lextab module %r. %s" % (lextab, e))
 
+    if cachefile:
+        try:
+            _write_cache(cachefile, lexobj._tabtext(os.path.basename(cachefile)[:-3]))
+        except (IOError, OSError) as e:
+            errorlog.warning("Couldn't write lexer cache %r. %s" % (cachefile, e))
+
     return lexobj
 
 # -----------------------------------------------------------------------------
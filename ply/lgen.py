@@ -0,0 +1,69 @@
+# ply: lgen.py
+#
+# This is a support program that auto-generates the versions of the lexer's
+# scanning loop from the one in Lexer.profiletoken() in lex.py, the same way
+# ygen.py does for the parsing functions of yacc.py.
+#
+# Users should edit Lexer.profiletoken() in lex.py and then run this program.
+
+import os.path
+import re
+import shutil
+
+from ygen import get_source_range, filter_section, select_tables
+
+# The loop handles both plain input and streams (see input_stream()).  The
+# code that differs is written as an if/else chain enclosed in STREAM
+# markers, whose conditions are stream or not stream.  Code enclosed in
+# ANYSTREAM markers is only needed to choose between them, and is left out.
+stream_conditions = {'stream': 'stream', 'not stream': 'plain'}
+
+def select_input(lines, kind):
+    return select_tables(lines, kind, 'STREAM', 'ANYSTREAM', stream_conditions)
+
+# With plain input lexdata holds the whole input and lexbase is always 0, so
+# the version for plain input leaves lexbase out of the positions
+def remove_base(lines):
+    return [re.sub(r'lexbase \+ | - lexbase', '', line) for line in lines
+            if not re.match(r'\s*lexbase\s*=', line)]
+
+# Drops the blank lines left where sections were taken out
+def remove_blank_runs(lines):
+    result = []
+    for line in lines:
+        if not line.strip() and result and (not result[-1].strip() or result[-1].rstrip().endswith(':')):
+            continue
+        result.append(line)
+    return result
+
+def main():
+    dirname = os.path.dirname(__file__)
+    shutil.copy2(os.path.join(dirname, 'lex.py'), os.path.join(dirname, 'lex.py.bak'))
+    with open(os.path.join(dirname, 'lex.py'), 'r') as f:
+        lines = f.readlines()
+
+    # Get the original source
+    token_start, token_end = get_source_range(lines, 'profiletoken')
+    orig_lines = lines[token_start:token_end]
+
+    # Filter the PROFILE sections out
+    token_lines = filter_section(orig_lines, 'PROFILE')
+
+    sections = [
+        ('token', remove_blank_runs(remove_base(select_input(token_lines, 'plain')))),
+        ('streamtoken', remove_blank_runs(select_input(token_lines, 'stream'))),
+    ]
+
+    # Replace the sections with updated versions, from the end of the file
+    # back so that the earlier line numbers stay the same
+    ranges = [(get_source_range(lines, tag), section_lines) for tag, section_lines in sections]
+    for (start, end), section_lines in sorted(ranges, reverse=True):
+        lines[start:end] = [line.rstrip()+'\n' for line in section_lines]
+
+    with open(os.path.join(dirname, 'lex.py'), 'w') as f:
+        f.writelines(lines)
+
+    print('Updated lex.py')
+
+if __name__ == '__main__':
+    main()
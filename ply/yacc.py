@@ -66,6 +66,10 @@ import os.path
 import inspect
 import base64
 import warnings
+import ast
+import hashlib
+import time
+from array import array
 
 __version__    = '3.10'
 __tabversion__ = '3.10'
@@ -81,6 +85,7 @@ yaccdebug   = True             # Debugging mode.  If set, yacc generates a
 
 debug_file  = 'parser.out'     # Default name of the debugging file
 tab_module  = 'parsetab'       # Default name of the table module
+code_module = 'parsecode'      # Default name of the generated parser module
 default_lr  = 'LALR'           # Default LR table generation method
 
 error_count = 3                # Number of symbols that must be shifted to leave recovery mode
@@ -100,6 +105,9 @@ else:
 
 MAXINT = sys.maxsize
 
+# Timer used for reporting how long validation takes
+_clock = getattr(time, 'perf_counter', time.time)
+
 # This object is a stand-in for a logging object created by the
 # logging module.   PLY will use this by default to create things
 # such as the parser.out file.  If a user wants more detailed
@@ -229,6 +237,8 @@ class YaccSymbol:
 # a tuple of (startline,endline) representing the range of lines
 # for a symbol.  The lexspan() method returns a tuple (lexpos,endlexpos)
 # representing the range of positional information for a symbol.
+# If the lexer keeps a line index (lex(lineindex=True)), line numbers
+# are looked up from positions and column() gives the column of an item.
 
 class YaccProduction:
     def __init__(self, s, stack=None):
@@ -255,16 +265,26 @@ class YaccProduction:
         return len(self.slice)
 
     def lineno(self, n):
+        if getattr(self.lexer, 'lexlineindex', None) is not None and hasattr(self.slice[n], 'lexpos'):
+            return self.lexer.find_lineno(self.slice[n].lexpos)
         return getattr(self.slice[n], 'lineno', 0)
 
     def set_lineno(self, n, lineno):
         self.slice[n].lineno = lineno
 
     def linespan(self, n):
+        if getattr(self.lexer, 'lexlineindex', None) is not None and hasattr(self.slice[n], 'lexpos'):
+            startpos, endpos = self.lexspan(n)
+            return self.lexer.find_lineno(startpos), self.lexer.find_lineno(endpos)
         startline = getattr(self.slice[n], 'lineno', 0)
         endline = getattr(self.slice[n], 'endlineno', startline)
         return startline, endline
 
+    def column(self, n):
+        if getattr(self.lexer, 'lexlineindex', None) is not None and hasattr(self.slice[n], 'lexpos'):
+            return self.lexer.find_column(self.slice[n].lexpos)
+        return 0
+
     def lexpos(self, n):
         return getattr(self.slice[n], 'lexpos', 0)
 
@@ -276,6 +296,186 @@ class YaccProduction:
     def error(self):
         raise SyntaxError
 
+# -----------------------------------------------------------------------------
+# CompactTables
+#
+# The action and goto tables packed into arrays, for big grammars where the
+# dicts of dicts take up a lot of memory.  Terminals and nonterminals are
+# numbered ('$end' is 0 and 'error' is 1, as with lexer kind ids), states
+# with the same row of actions share one copy of it, and all of the rows are
+# overlapped in one vector (row displacement).  The action of state s on
+# terminal number a is
+#
+#     b = base[s]
+#     value[b+a] if check[b+a] == b else None
+#
+# Each distinct row has its own base, so check tells apart the entries of
+# rows that overlap.  Gotos are packed the same way, in gbase, gcheck and
+# gvalue.  The parser only looks up gotos that exist, so it doesn't need to
+# look at gcheck.
+# -----------------------------------------------------------------------------
+
+class CompactTables(object):
+    def __init__(self, action=None, goto=None, terminals=None):
+        if action is None:
+            return
+        if terminals is None:
+            names = set()
+            for row in action.values():
+                names.update(row)
+            names.difference_update(['$end', 'error'])
+            terminals = ['$end', 'error'] + sorted(names)
+        nonterminals = set()
+        for row in goto.values():
+            nonterminals.update(row)
+        self.set_names(terminals, sorted(nonterminals))
+
+        termid = self.termid
+        ntid = self.ntid
+        nstates = max(list(action) + list(goto)) + 1
+        arows = dict((s, [(termid[name], v) for name, v in row.items() if name in termid])
+                     for s, row in action.items())
+        grows = dict((s, [(ntid[name], v) for name, v in row.items()]) for s, row in goto.items())
+        self.base, self.check, self.value = _pack_rows(arows, nstates, self.unknown + 1)
+        self.gbase, self.gcheck, self.gvalue = _pack_rows(grows, nstates, len(self.nonterminals))
+
+    def set_names(self, terminals, nonterminals):
+        self.terminals = list(terminals)
+        self.nonterminals = list(nonterminals)
+        self.termid = dict((name, n) for n, name in enumerate(self.terminals))
+        self.ntid = dict((name, n) for n, name in enumerate(self.nonterminals))
+        self.unknown = len(self.terminals)
+
+    # Actions of the states that only have one (by state)
+    def single_actions(self):
+        check = self.check
+        width = self.unknown + 1
+        single = {}
+        for b in set(self.base):
+            row = check[b:b+width]
+            if row.count(b) == 1:
+                a = row.index(b)
+                single[b] = {self.terminals[a]: self.value[b+a]}
+        return [(s, single[b]) for s, b in enumerate(self.base) if b in single]
+
+    # Actions and gotos of a state as dicts
+    def actions(self, state):
+        return _unpack_row(self.terminals, self.base[state], self.check, self.value)
+
+    def gotos(self, state):
+        return _unpack_row(self.nonterminals, self.gbase[state], self.gcheck, self.gvalue)
+
+    # Unpacks the tables into the dicts used by LRParser
+    def expand(self):
+        action = {}
+        goto = {}
+        for s in range(len(self.base)):
+            action[s] = self.actions(s)
+            goto[s] = self.gotos(s)
+        return action, goto
+
+    def arrays(self):
+        return (self.base, self.check, self.value, self.gbase, self.gcheck, self.gvalue)
+
+    # Bytes used by the arrays
+    def nbytes(self):
+        return sum(len(a) * a.itemsize for a in self.arrays())
+
+    # The tables as a tuple of strings and lists that can be written to a file
+    def data(self):
+        arrays = [(a.typecode, base64.b64encode(_array_bytes(a)).decode('ascii')) for a in self.arrays()]
+        return (self.terminals, self.nonterminals, sys.byteorder, arrays)
+
+    @classmethod
+    def from_data(cls, data):
+        terminals, nonterminals, byteorder, arrays = data
+        self = cls()
+        self.set_names(terminals, nonterminals)
+        values = []
+        for typecode, text in arrays:
+            a = array(typecode)
+            _array_frombytes(a, base64.b64decode(text.encode('ascii')))
+            if byteorder != sys.byteorder:
+                a.byteswap()
+            values.append(a)
+        self.base, self.check, self.value, self.gbase, self.gcheck, self.gvalue = values
+        return self
+
+# -----------------------------------------------------------------------------
+# _pack_rows()
+#
+# Overlaps rows of (column, value) pairs in one vector.  Each row is placed at
+# the first offset that no other row uses where its entries only land on free
+# slots.  States with identical rows share one placement.  Returns arrays of
+# the offset of each state, the offset of the row owning each slot (-1 if
+# free) and the values.  Both vectors are long enough for any column below
+# width to be looked up from any offset.
+#
+# The free slots are kept in a bytearray (0 for free) and the offsets where a
+# row fits are found with a regex made from the gaps between its columns.
+# -----------------------------------------------------------------------------
+
+def _pack_rows(rows, nstates, width):
+    base = array('i', [0]) * nstates
+    check = array('i')
+    value = array('i')
+    taken = bytearray()
+    placed = {}
+    used = set()
+    for s in sorted(range(nstates), key=lambda s: (-len(rows.get(s, ())), s)):
+        row = tuple(sorted(rows.get(s, ())))
+        b = placed.get(row)
+        if b is None:
+            fit = _row_regex([a for a, v in row])
+            space = taken + bytearray(width)
+            b = fit.search(space).start()
+            while b in used:
+                b = fit.search(space, b + 1).start()
+            grow = b + width - len(check)
+            if grow > 0:
+                check.extend([-1] * grow)
+                value.extend([-1] * grow)
+                taken.extend(bytearray(grow))
+            for a, v in row:
+                check[b+a] = b
+                value[b+a] = v
+                taken[b+a] = 1
+            placed[row] = b
+            used.add(b)
+        base[s] = b
+    return _narrow(base), _narrow(check), _narrow(value)
+
+# Copies an array of ints to the smallest type that holds them
+def _narrow(a):
+    low, high = (min(a), max(a)) if a else (0, 0)
+    for typecode in 'bh':
+        bits = 8 * array(typecode).itemsize - 1
+        if -(1 << bits) <= low and high < (1 << bits):
+            return array(typecode, a)
+    return a
+
+def _row_regex(columns):
+    parts = []
+    last = -1
+    for a in columns:
+        parts.append('.{%d}\\x00' % (a - last - 1))
+        last = a
+    return re.compile(('(?=%s)' % ''.join(parts)).encode('ascii'), re.DOTALL)
+
+def _unpack_row(names, b, check, value):
+    return dict((name, value[b+n]) for n, name in enumerate(names) if check[b+n] == b)
+
+def _array_bytes(a):
+    if hasattr(a, 'tobytes'):
+        return a.tobytes()
+    return a.tostring()
+
+def _array_frombytes(a, data):
+    if hasattr(a, 'frombytes'):
+        a.frombytes(data)
+    else:
+        a.fromstring(data)
+
 # -----------------------------------------------------------------------------
 #                               == LRParser ==
 #
@@ -283,11 +483,19 @@ class YaccProduction:
 # -----------------------------------------------------------------------------
 
 class LRParser:
-    def __init__(self, lrtab, errorf):
+    def __init__(self, lrtab, errorf, compact=False):
         self.productions = lrtab.lr_productions
         self.action = lrtab.lr_action
         self.goto = lrtab.lr_goto
+        self.compact = None
+        if compact:
+            self.compact = lrtab.lr_compact or CompactTables(self.action, self.goto)
+            self.action = self.goto = None
+        elif self.action is None:
+            self.action, self.goto = lrtab.lr_compact.expand()
         self.errorfunc = errorf
+        self.kindnames = None
+        self.codegen = False           # Set by bind_parser_code()
         self.set_defaulted_states()
         self.errorok = True
 
@@ -312,7 +520,11 @@ class LRParser:
     # See:  http://www.gnu.org/software/bison/manual/html_node/Default-Reductions.html#Default-Reductions
     def set_defaulted_states(self):
         self.defaulted_states = {}
-        for state, actions in self.action.items():
+        if self.compact:
+            rows = self.compact.single_actions()
+        else:
+            rows = self.action.items()
+        for state, actions in rows:
             rules = list(actions.values())
             if len(rules) == 1 and rules[0] < 0:
                 self.defaulted_states[state] = rules[0]
@@ -320,15 +532,50 @@ class LRParser:
     def disable_defaulted_states(self):
         self.defaulted_states = {}
 
+    # Kind id support.
+    # A lexer built with lex(kinds=True) numbers its tokens with small integers
+    # ('$end' is 0 and 'error' is 1) and stores them in tok.kind.  This method
+    # builds a copy of the action table with one list per state, indexed by
+    # those numbers.  The last entry of each row is for unknown kinds.
+    def set_kinds(self, names):
+        if list(names[:2]) != ['$end', 'error']:
+            raise ValueError("Kind names must start with '$end' and 'error'")
+        if self.compact:
+            raise ValueError('Kind ids are not used with compact tables')
+        self.kindnames = list(names)
+        self.kindids = dict((name, n) for n, name in enumerate(names))
+        self.kindaction = {}
+        for state, row in self.action.items():
+            self.kindaction[state] = [row.get(name) for name in names] + [None]
+
+    # State entered after reducing to nonterminal name in state
+    def goto_state(self, state, name):
+        if self.compact:
+            return self.compact.gotos(state)[name]
+        return self.goto[state][name]
+
     def parse(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
         if debug or yaccdevel:
             if isinstance(debug, int):
                 debug = PlyLogger(sys.stderr)
             return self.parsedebug(input, lexer, debug, tracking, tokenfunc)
-        elif tracking:
-            return self.parseopt(input, lexer, debug, tracking, tokenfunc)
-        else:
+        elif self.codegen and not tracking:
             return self.parseopt_notrack(input, lexer, debug, tracking, tokenfunc)
+        else:
+            if not lexer:
+                from . import lex
+                lexer = lex.lexer
+            return self.parsefunc(lexer, tokenfunc, tracking)(self, input, lexer, debug, tracking, tokenfunc)
+
+    # Returns the version of parseopt() or parseopt_notrack() for the kind of
+    # action table used with lexer
+    def parsefunc(self, lexer, tokenfunc, tracking):
+        if self.compact:
+            return LRParser.parseopt_compact if tracking else LRParser.parseopt_notrack_compact
+        elif tokenfunc is None and getattr(lexer, 'lexkindmode', False):
+            return LRParser.parseopt_kinds if tracking else LRParser.parseopt_notrack_kinds
+        else:
+            return LRParser.parseopt if tracking else LRParser.parseopt_notrack
 
 
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
@@ -343,6 +590,11 @@ class LRParser:
     #      statements
     #      #--! DEBUG
     #
+    # It also makes a version of parseopt() and parseopt_notrack() for each kind
+    # of action table, keeping one clause of each if/elif/else chain enclosed
+    # in TABLES markers (see select_tables() in ygen.py), and the parsing loops
+    # of generated parser code, in which the REDUCE section is replaced.
+    #
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
     def parsedebug(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
@@ -356,6 +608,15 @@ class LRParser:
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
         errorcount = 0                           # Used during error recovery
 
+        # Packed action and goto tables, if used
+        compact = self.compact
+        #--! TABLES
+        if compact:
+            abase, acheck, avalue = compact.base, compact.check, compact.value
+            gbase, gvalue = compact.gbase, compact.gvalue
+            termid, ntid, unknown = compact.termid, compact.ntid, compact.unknown
+        #--! TABLES
+
         #--! DEBUG
         debug.info('PLY: PARSE DEBUG START')
         #--! DEBUG
@@ -379,6 +640,18 @@ class LRParser:
         else:
             get_token = tokenfunc
 
+        # If the lexer numbers its tokens, index the action table by kind id
+        #--! ANYTABLE
+        kindaction = tokenfunc is None and not compact and getattr(lexer, 'lexkindmode', False)
+        #--! ANYTABLE
+        #--! TABLES
+        if kindaction:
+            if self.kindnames != lexer.lexkindnames:
+                self.set_kinds(lexer.lexkindnames)
+            actions = self.kindaction
+            kindids = self.kindids
+        #--! TABLES
+
         # Set the parser() token method (sometimes used in error recovery)
         self.token = get_token
 
@@ -415,13 +688,28 @@ class LRParser:
                         lookahead = get_token()     # Get the next token
                     else:
                         lookahead = lookaheadstack.pop()
+                        #--! TABLES
+                        if kindaction:
+                            # Tokens put back may not come from the lexer
+                            if lookahead and not hasattr(lookahead, 'kind'):
+                                lookahead.kind = kindids.get(lookahead.type, -1)
+                        #--! TABLES
                     if not lookahead:
                         lookahead = YaccSymbol()
                         lookahead.type = '$end'
+                        lookahead.kind = 0
 
                 # Check the action table
-                ltype = lookahead.type
-                t = actions[state].get(ltype)
+                #--! TABLES
+                if kindaction:
+                    t = actions[state][lookahead.kind]
+                elif compact:
+                    b = abase[state]
+                    i = b + termid.get(lookahead.type, unknown)
+                    t = avalue[i] if acheck[i] == b else None
+                else:
+                    t = actions[state].get(lookahead.type)
+                #--! TABLES
             else:
                 t = defaulted_states[state]
                 #--! DEBUG
@@ -452,6 +740,7 @@ class LRParser:
                     continue
 
                 if t < 0:
+                    #--! REDUCE
                     # reduce a symbol on the stack, emit a production
                     p = prod[-t]
                     pname = p.name
@@ -466,10 +755,10 @@ class LRParser:
                     if plen:
                         debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
                                    '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']',
-                                   goto[statestack[-1-plen]][pname])
+                                   self.goto_state(statestack[-1-plen], pname))
                     else:
                         debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str, [],
-                                   goto[statestack[-1]][pname])
+                                   self.goto_state(statestack[-1], pname))
 
                     #--! DEBUG
 
@@ -504,7 +793,12 @@ class LRParser:
                             debug.info('Result : %s', format_result(pslice[0]))
                             #--! DEBUG
                             symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
+                            #--! TABLES
+                            if compact:
+                                state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            else:
+                                state = goto[statestack[-1]][pname]
+                            #--! TABLES
                             statestack.append(state)
                         except SyntaxError:
                             # If an error was set. Enter error recovery state
@@ -513,6 +807,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -546,7 +841,12 @@ class LRParser:
                             debug.info('Result : %s', format_result(pslice[0]))
                             #--! DEBUG
                             symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
+                            #--! TABLES
+                            if compact:
+                                state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            else:
+                                state = goto[statestack[-1]][pname]
+                            #--! TABLES
                             statestack.append(state)
                         except SyntaxError:
                             # If an error was set. Enter error recovery state
@@ -554,6 +854,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -561,6 +862,7 @@ class LRParser:
 
                         continue
                         # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
                 if t == 0:
                     n = symstack[-1]
@@ -604,6 +906,12 @@ class LRParser:
                             # mode recovery on their own.  The
                             # returned token is the next lookahead
                             lookahead = tok
+                            #--! TABLES
+                            if kindaction:
+                                # p_error() may return a token without a kind id
+                                if tok and not hasattr(tok, 'kind'):
+                                    tok.kind = kindids.get(tok.type, -1)
+                            #--! TABLES
                             errtoken = None
                             continue
                     else:
@@ -612,7 +920,10 @@ class LRParser:
                                 lineno = lookahead.lineno
                             else:
                                 lineno = 0
-                            if lineno:
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
                                 sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
                             else:
                                 sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
@@ -659,6 +970,7 @@ class LRParser:
                     # Create the error symbol for the first time and make it the new lookahead symbol
                     t = YaccSymbol()
                     t.type = 'error'
+                    t.kind = 1
 
                     if hasattr(lookahead, 'lineno'):
                         t.lineno = t.endlineno = lookahead.lineno
@@ -703,6 +1015,9 @@ class LRParser:
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
         errorcount = 0                           # Used during error recovery
 
+        # Packed action and goto tables, if used
+        compact = self.compact
+
 
         # If no lexer was given, we will try to use the lex module
         if not lexer:
@@ -723,6 +1038,8 @@ class LRParser:
         else:
             get_token = tokenfunc
 
+        # If the lexer numbers its tokens, index the action table by kind id
+
         # Set the parser() token method (sometimes used in error recovery)
         self.token = get_token
 
@@ -758,10 +1075,10 @@ class LRParser:
                     if not lookahead:
                         lookahead = YaccSymbol()
                         lookahead.type = '$end'
+                        lookahead.kind = 0
 
                 # Check the action table
-                ltype = lookahead.type
-                t = actions[state].get(ltype)
+                t = actions[state].get(lookahead.type)
             else:
                 t = defaulted_states[state]
 
@@ -782,6 +1099,7 @@ class LRParser:
                     continue
 
                 if t < 0:
+                    #--! REDUCE
                     # reduce a symbol on the stack, emit a production
                     p = prod[-t]
                     pname = p.name
@@ -830,6 +1148,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -868,6 +1187,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -875,6 +1195,7 @@ class LRParser:
 
                         continue
                         # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
                 if t == 0:
                     n = symstack[-1]
@@ -918,7 +1239,10 @@ class LRParser:
                                 lineno = lookahead.lineno
                             else:
                                 lineno = 0
-                            if lineno:
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
                                 sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
                             else:
                                 sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
@@ -965,6 +1289,7 @@ class LRParser:
                     # Create the error symbol for the first time and make it the new lookahead symbol
                     t = YaccSymbol()
                     t.type = 'error'
+                    t.kind = 1
 
                     if hasattr(lookahead, 'lineno'):
                         t.lineno = t.endlineno = lookahead.lineno
@@ -991,15 +1316,15 @@ class LRParser:
         #--! parseopt-end
 
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-    # parseopt_notrack().
+    # parseopt_kinds().
     #
-    # Optimized version of parseopt() with line number tracking removed.
-    # DO NOT EDIT THIS CODE DIRECTLY. This code is automatically generated
-    # by the ply/ygen.py script. Make changes to the parsedebug() method instead.
+    # parseopt() for lexers made with lex(kinds=True), with the action table
+    # indexed by kind id.  DO NOT EDIT THIS CODE DIRECTLY!  This code is
+    # automatically generated by the ply/ygen.py script.
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-    def parseopt_notrack(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
-        #--! parseopt-notrack-start
+    def parseopt_kinds(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parseopt-kinds-start
         lookahead = None                         # Current lookahead symbol
         lookaheadstack = []                      # Stack of lookahead symbols
         actions = self.action                    # Local reference to action table (to avoid lookup on self.)
@@ -1009,6 +1334,9 @@ class LRParser:
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
         errorcount = 0                           # Used during error recovery
 
+        # Packed action and goto tables, if used
+        compact = self.compact
+
 
         # If no lexer was given, we will try to use the lex module
         if not lexer:
@@ -1029,6 +1357,12 @@ class LRParser:
         else:
             get_token = tokenfunc
 
+        # If the lexer numbers its tokens, index the action table by kind id
+        if self.kindnames != lexer.lexkindnames:
+            self.set_kinds(lexer.lexkindnames)
+        actions = self.kindaction
+        kindids = self.kindids
+
         # Set the parser() token method (sometimes used in error recovery)
         self.token = get_token
 
@@ -1061,13 +1395,16 @@ class LRParser:
                         lookahead = get_token()     # Get the next token
                     else:
                         lookahead = lookaheadstack.pop()
+                        # Tokens put back may not come from the lexer
+                        if lookahead and not hasattr(lookahead, 'kind'):
+                            lookahead.kind = kindids.get(lookahead.type, -1)
                     if not lookahead:
                         lookahead = YaccSymbol()
                         lookahead.type = '$end'
+                        lookahead.kind = 0
 
                 # Check the action table
-                ltype = lookahead.type
-                t = actions[state].get(ltype)
+                t = actions[state][lookahead.kind]
             else:
                 t = defaulted_states[state]
 
@@ -1088,6 +1425,7 @@ class LRParser:
                     continue
 
                 if t < 0:
+                    #--! REDUCE
                     # reduce a symbol on the stack, emit a production
                     p = prod[-t]
                     pname = p.name
@@ -1103,6 +1441,15 @@ class LRParser:
                         targ = symstack[-plen-1:]
                         targ[0] = sym
 
+                        #--! TRACKING
+                        if tracking:
+                            t1 = targ[1]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = targ[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        #--! TRACKING
 
                         # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
                         # The code enclosed in this section is duplicated
@@ -1127,6 +1474,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -1137,6 +1485,11 @@ class LRParser:
 
                     else:
 
+                        #--! TRACKING
+                        if tracking:
+                            sym.lineno = lexer.lineno
+                            sym.lexpos = lexer.lexpos
+                        #--! TRACKING
 
                         targ = [sym]
 
@@ -1160,6 +1513,7 @@ class LRParser:
                             statestack.pop()                    # Pop back one state (before the reduce)
                             state = statestack[-1]
                             sym.type = 'error'
+                            sym.kind = 1
                             sym.value = 'error'
                             lookahead = sym
                             errorcount = error_count
@@ -1167,6 +1521,7 @@ class LRParser:
 
                         continue
                         # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
                 if t == 0:
                     n = symstack[-1]
@@ -1202,6 +1557,9 @@ class LRParser:
                             # mode recovery on their own.  The
                             # returned token is the next lookahead
                             lookahead = tok
+                            # p_error() may return a token without a kind id
+                            if tok and not hasattr(tok, 'kind'):
+                                tok.kind = kindids.get(tok.type, -1)
                             errtoken = None
                             continue
                     else:
@@ -1210,7 +1568,10 @@ class LRParser:
                                 lineno = lookahead.lineno
                             else:
                                 lineno = 0
-                            if lineno:
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
                                 sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
                             else:
                                 sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
@@ -1246,12 +1607,18 @@ class LRParser:
                     if sym.type == 'error':
                         # Hmmm. Error is on top of stack, we'll just nuke input
                         # symbol and continue
+                        #--! TRACKING
+                        if tracking:
+                            sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                            sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                        #--! TRACKING
                         lookahead = None
                         continue
 
                     # Create the error symbol for the first time and make it the new lookahead symbol
                     t = YaccSymbol()
                     t.type = 'error'
+                    t.kind = 1
 
                     if hasattr(lookahead, 'lineno'):
                         t.lineno = t.endlineno = lookahead.lineno
@@ -1262,6 +1629,11 @@ class LRParser:
                     lookahead = t
                 else:
                     sym = symstack.pop()
+                    #--! TRACKING
+                    if tracking:
+                        lookahead.lineno = sym.lineno
+                        lookahead.lexpos = sym.lexpos
+                    #--! TRACKING
                     statestack.pop()
                     state = statestack[-1]
 
@@ -1270,1396 +1642,3429 @@ class LRParser:
             # Call an error function here
             raise RuntimeError('yacc: internal parser error!!!\n')
 
-        #--! parseopt-notrack-end
-
-# -----------------------------------------------------------------------------
-#                          === Grammar Representation ===
-#
-# The following functions, classes, and variables are used to represent and
-# manipulate the rules that make up a grammar.
-# -----------------------------------------------------------------------------
+        #--! parseopt-kinds-end
 
-# regex matching identifiers
-_is_identifier = re.compile(r'^[a-zA-Z0-9_-]+$')
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parseopt_compact().
+    #
+    # parseopt() for packed tables (yacc(compact=True)).  DO NOT EDIT THIS CODE
+    # DIRECTLY!  This code is automatically generated by the ply/ygen.py script.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-# -----------------------------------------------------------------------------
-# class Production:
-#
-# This class stores the raw information about a single production or grammar rule.
-# A grammar rule refers to a specification such as this:
-#
-#       expr : expr PLUS term
-#
-# Here are the basic attributes defined on all productions
-#
-#       name     - Name of the production.  For example 'expr'
-#       prod     - A list of symbols on the right side ['expr','PLUS','term']
-#       prec     - Production precedence level
-#       number   - Production number.
-#       func     - Function that executes on reduce
-#       file     - File where production function is defined
-#       lineno   - Line number where production function is defined
-#
-# The following attributes are defined or optional.
-#
-#       len       - Length of the production (number of symbols on right hand side)
-#       usyms     - Set of unique symbols found in the production
-# -----------------------------------------------------------------------------
+    def parseopt_compact(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parseopt-compact-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
 
-class Production(object):
-    reduced = 0
-    def __init__(self, number, name, prod, precedence=('right', 0), func=None, file='', line=0):
-        self.name     = name
-        self.prod     = tuple(prod)
-        self.number   = number
-        self.func     = func
-        self.callable = None
-        self.file     = file
-        self.line     = line
-        self.prec     = precedence
+        # Packed action and goto tables, if used
+        compact = self.compact
+        abase, acheck, avalue = compact.base, compact.check, compact.value
+        gbase, gvalue = compact.gbase, compact.gvalue
+        termid, ntid, unknown = compact.termid, compact.ntid, compact.unknown
 
-        # Internal settings used during table construction
 
-        self.len  = len(self.prod)   # Length of the production
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
 
-        # Create a list of unique production symbols used in the production
-        self.usyms = []
-        for s in self.prod:
-            if s not in self.usyms:
-                self.usyms.append(s)
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
 
-        # List of all LR items for the production
-        self.lr_items = []
-        self.lr_next = None
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
 
-        # Create a string representation
-        if self.prod:
-            self.str = '%s -> %s' % (self.name, ' '.join(self.prod))
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
         else:
-            self.str = '%s -> <empty>' % self.name
+            get_token = tokenfunc
 
-    def __str__(self):
-        return self.str
+        # If the lexer numbers its tokens, index the action table by kind id
 
-    def __repr__(self):
-        return 'Production(' + str(self) + ')'
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
 
-    def __len__(self):
-        return len(self.prod)
+        # Set up the state and symbol stacks
 
-    def __nonzero__(self):
-        return 1
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
 
-    def __getitem__(self, index):
-        return self.prod[index]
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
 
-    # Return the nth lr_item from the production (or None if at the end)
-    def lr_item(self, n):
-        if n > len(self.prod):
-            return None
-        p = LRItem(self, n)
-        # Precompute the list of productions immediately following.
-        try:
-            p.lr_after = Prodnames[p.prod[n+1]]
-        except (IndexError, KeyError):
-            p.lr_after = []
-        try:
-            p.lr_before = p.prod[n-1]
-        except IndexError:
-            p.lr_before = None
-        return p
+        # The start state is assumed to be (0,$end)
 
-    # Bind the production function name to a callable
-    def bind(self, pdict):
-        if self.func:
-            self.callable = pdict[self.func]
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
 
-# This class serves as a minimal standin for Production objects when
-# reading table data from files.   It only contains information
-# actually used by the LR parsing engine, plus some additional
-# debugging information.
-class MiniProduction(object):
-    def __init__(self, str, name, len, func, file, line):
-        self.name     = name
-        self.len      = len
-        self.func     = func
-        self.callable = None
-        self.file     = file
-        self.line     = line
-        self.str      = str
 
-    def __str__(self):
-        return self.str
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
 
-    def __repr__(self):
-        return 'MiniProduction(%s)' % self.str
+                # Check the action table
+                b = abase[state]
+                i = b + termid.get(lookahead.type, unknown)
+                t = avalue[i] if acheck[i] == b else None
+            else:
+                t = defaulted_states[state]
 
-    # Bind the production function name to a callable
-    def bind(self, pdict):
-        if self.func:
-            self.callable = pdict[self.func]
 
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
 
-# -----------------------------------------------------------------------------
-# class LRItem
-#
-# This class represents a specific stage of parsing a production rule.  For
-# example:
-#
-#       expr : expr . PLUS term
-#
-# In the above, the "." represents the current location of the parse.  Here
-# basic attributes:
-#
-#       name       - Name of the production.  For example 'expr'
-#       prod       - A list of symbols on the right side ['expr','.', 'PLUS','term']
-#       number     - Production number.
-#
-#       lr_next      Next LR item. Example, if we are ' expr -> expr . PLUS term'
-#                    then lr_next refers to 'expr -> expr PLUS . term'
-#       lr_index   - LR item index (location of the ".") in the prod list.
-#       lookaheads - LALR lookahead symbols for this item
-#       len        - Length of the production (number of symbols on right hand side)
-#       lr_after    - List of all productions that immediately follow
-#       lr_before   - Grammar symbol immediately before
-# -----------------------------------------------------------------------------
 
-class LRItem(object):
-    def __init__(self, p, n):
-        self.name       = p.name
-        self.prod       = list(p.prod)
-        self.number     = p.number
-        self.lr_index   = n
-        self.lookaheads = {}
-        self.prod.insert(n, '.')
-        self.prod       = tuple(self.prod)
-        self.len        = len(self.prod)
-        self.usyms      = p.usyms
+                    symstack.append(lookahead)
+                    lookahead = None
 
-    def __str__(self):
-        if self.prod:
-            s = '%s -> %s' % (self.name, ' '.join(self.prod))
-        else:
-            s = '%s -> <empty>' % self.name
-        return s
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
 
-    def __repr__(self):
-        return 'LRItem(' + str(self) + ')'
+                if t < 0:
+                    #--! REDUCE
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
 
-# -----------------------------------------------------------------------------
-# rightmost_terminal()
-#
-# Return the rightmost terminal from a list of symbols.  Used in add_production()
-# -----------------------------------------------------------------------------
-def rightmost_terminal(symbols, terminals):
-    i = len(symbols) - 1
-    while i >= 0:
-        if symbols[i] in terminals:
-            return symbols[i]
-        i -= 1
-    return None
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
 
-# -----------------------------------------------------------------------------
-#                           === GRAMMAR CLASS ===
-#
-# The following class represents the contents of the specified grammar along
-# with various computed properties such as first sets, follow sets, LR items, etc.
-# This data is used for critical parts of the table generation process later.
-# -----------------------------------------------------------------------------
 
-class GrammarError(YaccError):
-    pass
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
 
-class Grammar(object):
-    def __init__(self, terminals):
-        self.Productions  = [None]  # A list of all of the productions.  The first
-                                    # entry is always reserved for the purpose of
-                                    # building an augmented grammar
+                        #--! TRACKING
+                        if tracking:
+                            t1 = targ[1]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = targ[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        #--! TRACKING
 
-        self.Prodnames    = {}      # A dictionary mapping the names of nonterminals to a list of all
-                                    # productions of that nonterminal.
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-        self.Prodmap      = {}      # A dictionary that is only used to detect duplicate
-                                    # productions.
+                        pslice.slice = targ
 
-        self.Terminals    = {}      # A dictionary mapping the names of terminal symbols to a
-                                    # list of the rules where they are used.
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            self.state = state
+                            p.callable(pslice)
+                            del statestack[-plen:]
+                            symstack.append(sym)
+                            state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-        for term in terminals:
-            self.Terminals[term] = []
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-        self.Terminals['error'] = []
+                    else:
 
-        self.Nonterminals = {}      # A dictionary mapping names of nonterminals to a list
-                                    # of rule numbers where they are used.
+                        #--! TRACKING
+                        if tracking:
+                            sym.lineno = lexer.lineno
+                            sym.lexpos = lexer.lexpos
+                        #--! TRACKING
 
-        self.First        = {}      # A dictionary of precomputed FIRST(x) symbols
+                        targ = [sym]
 
-        self.Follow       = {}      # A dictionary of precomputed FOLLOW(x) symbols
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-        self.Precedence   = {}      # Precedence rules for each terminal. Contains tuples of the
-                                    # form ('right',level) or ('nonassoc', level) or ('left',level)
+                        pslice.slice = targ
 
-        self.UsedPrecedence = set() # Precedence rules that were actually used by the grammer.
-                                    # This is only used to provide error checking and to generate
-                                    # a warning about unused precedence rules.
+                        try:
+                            # Call the grammar rule with our special slice object
+                            self.state = state
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-        self.Start = None           # Starting symbol for the grammar
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
 
-    def __len__(self):
-        return len(self.Productions)
+            if t is None:
 
-    def __getitem__(self, index):
-        return self.Productions[index]
 
-    # -----------------------------------------------------------------------------
-    # set_precedence()
-    #
-    # Sets the precedence for a given terminal. assoc is the associativity such as
-    # 'left','right', or 'nonassoc'.  level is a numeric level.
-    #
-    # -----------------------------------------------------------------------------
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        self.state = state
+                        tok = call_errorfunc(self.errorfunc, errtoken, self)
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
 
-    def set_precedence(self, term, assoc, level):
-        assert self.Productions == [None], 'Must call set_precedence() before add_production()'
-        if term in self.Precedence:
-            raise GrammarError('Precedence already specified for terminal %r' % term)
-        if assoc not in ['left', 'right', 'nonassoc']:
-            raise GrammarError("Associativity must be one of 'left','right', or 'nonassoc'")
-        self.Precedence[term] = (assoc, level)
+                else:
+                    errorcount = error_count
 
-    # -----------------------------------------------------------------------------
-    # add_production()
-    #
-    # Given an action function, this function assembles a production rule and
-    # computes its precedence level.
-    #
-    # The production rule is supplied as a list of symbols.   For example,
-    # a rule such as 'expr : expr PLUS term' has a production name of 'expr' and
-    # symbols ['expr','PLUS','term'].
-    #
-    # Precedence is determined by the precedence of the right-most non-terminal
-    # or the precedence of a terminal specified by %prec.
-    #
-    # A variety of error checks are performed to make sure production symbols
-    # are valid and that %prec is used correctly.
-    # -----------------------------------------------------------------------------
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
 
-    def add_production(self, prodname, syms, func=None, file='', line=0):
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
 
-        if prodname in self.Terminals:
-            raise GrammarError('%s:%d: Illegal rule name %r. Already defined as a token' % (file, line, prodname))
-        if prodname == 'error':
-            raise GrammarError('%s:%d: Illegal rule name %r. error is a reserved word' % (file, line, prodname))
-        if not _is_identifier.match(prodname):
-            raise GrammarError('%s:%d: Illegal rule name %r' % (file, line, prodname))
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
 
-        # Look for literal tokens
-        for n, s in enumerate(syms):
-            if s[0] in "'\"":
-                try:
-                    c = eval(s)
-                    if (len(c) > 1):
-                        raise GrammarError('%s:%d: Literal token %s in rule %r may only be a single character' %
-                                           (file, line, s, prodname))
-                    if c not in self.Terminals:
-                        self.Terminals[c] = []
-                    syms[n] = c
-                    continue
-                except SyntaxError:
-                    pass
-            if not _is_identifier.match(s) and s != '%prec':
-                raise GrammarError('%s:%d: Illegal name %r in rule %r' % (file, line, s, prodname))
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
 
-        # Determine the precedence level
-        if '%prec' in syms:
-            if syms[-1] == '%prec':
-                raise GrammarError('%s:%d: Syntax error. Nothing follows %%prec' % (file, line))
-            if syms[-2] != '%prec':
-                raise GrammarError('%s:%d: Syntax error. %%prec can only appear at the end of a grammar rule' %
-                                   (file, line))
-            precname = syms[-1]
-            prodprec = self.Precedence.get(precname)
-            if not prodprec:
-                raise GrammarError('%s:%d: Nothing known about the precedence of %r' % (file, line, precname))
-            else:
-                self.UsedPrecedence.add(precname)
-            del syms[-2:]     # Drop %prec from the rule
-        else:
-            # If no %prec, precedence is determined by the rightmost terminal symbol
-            precname = rightmost_terminal(syms, self.Terminals)
-            prodprec = self.Precedence.get(precname, ('right', 0))
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        #--! TRACKING
+                        if tracking:
+                            sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                            sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                        #--! TRACKING
+                        lookahead = None
+                        continue
 
-        # See if the rule is already in the rulemap
-        map = '%s -> %s' % (prodname, syms)
-        if map in self.Prodmap:
-            m = self.Prodmap[map]
-            raise GrammarError('%s:%d: Duplicate rule %s. ' % (file, line, m) +
-                               'Previous definition at %s:%d' % (m.file, m.line))
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
 
-        # From this point on, everything is valid.  Create a new Production instance
-        pnumber  = len(self.Productions)
-        if prodname not in self.Nonterminals:
-            self.Nonterminals[prodname] = []
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    #--! TRACKING
+                    if tracking:
+                        lookahead.lineno = sym.lineno
+                        lookahead.lexpos = sym.lexpos
+                    #--! TRACKING
+                    statestack.pop()
+                    state = statestack[-1]
 
-        # Add the production number to Terminals and Nonterminals
-        for t in syms:
-            if t in self.Terminals:
-                self.Terminals[t].append(pnumber)
-            else:
-                if t not in self.Nonterminals:
-                    self.Nonterminals[t] = []
-                self.Nonterminals[t].append(pnumber)
+                continue
 
-        # Create a production and add it to the list of productions
-        p = Production(pnumber, prodname, syms, prodprec, func, file, line)
-        self.Productions.append(p)
-        self.Prodmap[map] = p
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
 
-        # Add to the global productions list
-        try:
-            self.Prodnames[prodname].append(p)
-        except KeyError:
-            self.Prodnames[prodname] = [p]
+        #--! parseopt-compact-end
 
-    # -----------------------------------------------------------------------------
-    # set_start()
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parseopt_notrack().
     #
-    # Sets the starting symbol and creates the augmented grammar.  Production
-    # rule 0 is S' -> start where start is the start symbol.
-    # -----------------------------------------------------------------------------
+    # Optimized version of parseopt() with line number tracking removed.
+    # DO NOT EDIT THIS CODE DIRECTLY. This code is automatically generated
+    # by the ply/ygen.py script. Make changes to the parsedebug() method instead.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-    def set_start(self, start=None):
-        if not start:
-            start = self.Productions[1].name
-        if start not in self.Nonterminals:
-            raise GrammarError('start symbol %s undefined' % start)
-        self.Productions[0] = Production(0, "S'", [start])
-        self.Nonterminals[start].append(0)
-        self.Start = start
+    def parseopt_notrack(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parseopt-notrack-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
 
-    # -----------------------------------------------------------------------------
-    # find_unreachable()
-    #
-    # Find all of the nonterminal symbols that can't be reached from the starting
-    # symbol.  Returns a list of nonterminals that can't be reached.
-    # -----------------------------------------------------------------------------
+        # Packed action and goto tables, if used
+        compact = self.compact
 
-    def find_unreachable(self):
 
-        # Mark all symbols that are reachable from a symbol s
-        def mark_reachable_from(s):
-            if s in reachable:
-                return
-            reachable.add(s)
-            for p in self.Prodnames.get(s, []):
-                for r in p.prod:
-                    mark_reachable_from(r)
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
 
-        reachable = set()
-        mark_reachable_from(self.Productions[0].prod[0])
-        return [s for s in self.Nonterminals if s not in reachable]
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
 
-    # -----------------------------------------------------------------------------
-    # infinite_cycles()
-    #
-    # This function looks at the various parsing rules and tries to detect
-    # infinite recursion cycles (grammar rules where there is no possible way
-    # to derive a string of only terminals).
-    # -----------------------------------------------------------------------------
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
 
-    def infinite_cycles(self):
-        terminates = {}
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
+        else:
+            get_token = tokenfunc
 
-        # Terminals:
-        for t in self.Terminals:
-            terminates[t] = True
+        # If the lexer numbers its tokens, index the action table by kind id
 
-        terminates['$end'] = True
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
 
-        # Nonterminals:
+        # Set up the state and symbol stacks
 
-        # Initialize to false:
-        for n in self.Nonterminals:
-            terminates[n] = False
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
 
-        # Then propagate termination until no change:
-        while True:
-            some_change = False
-            for (n, pl) in self.Prodnames.items():
-                # Nonterminal n terminates iff any of its productions terminates.
-                for p in pl:
-                    # Production p terminates iff all of its rhs symbols terminate.
-                    for s in p.prod:
-                        if not terminates[s]:
-                            # The symbol s does not terminate,
-                            # so production p does not terminate.
-                            p_terminates = False
-                            break
-                    else:
-                        # didn't break from the loop,
-                        # so every symbol s terminates
-                        # so production p terminates.
-                        p_terminates = True
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
 
-                    if p_terminates:
-                        # symbol n terminates!
-                        if not terminates[n]:
-                            terminates[n] = True
-                            some_change = True
-                        # Don't need to consider any more productions for this n.
-                        break
+        # The start state is assumed to be (0,$end)
 
-            if not some_change:
-                break
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
 
-        infinite = []
-        for (s, term) in terminates.items():
-            if not term:
-                if s not in self.Prodnames and s not in self.Terminals and s != 'error':
-                    # s is used-but-not-defined, and we've already warned of that,
-                    # so it would be overkill to say that it's also non-terminating.
-                    pass
-                else:
-                    infinite.append(s)
 
-        return infinite
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
 
-    # -----------------------------------------------------------------------------
-    # undefined_symbols()
-    #
-    # Find all symbols that were used the grammar, but not defined as tokens or
-    # grammar rules.  Returns a list of tuples (sym, prod) where sym in the symbol
-    # and prod is the production where the symbol was used.
-    # -----------------------------------------------------------------------------
-    def undefined_symbols(self):
-        result = []
-        for p in self.Productions:
-            if not p:
-                continue
+                # Check the action table
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
 
-            for s in p.prod:
-                if s not in self.Prodnames and s not in self.Terminals and s != 'error':
-                    result.append((s, p))
-        return result
 
-    # -----------------------------------------------------------------------------
-    # unused_terminals()
-    #
-    # Find all terminals that were defined, but not used by the grammar.  Returns
-    # a list of all symbols.
-    # -----------------------------------------------------------------------------
-    def unused_terminals(self):
-        unused_tok = []
-        for s, v in self.Terminals.items():
-            if s != 'error' and not v:
-                unused_tok.append(s)
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
 
-        return unused_tok
 
-    # ------------------------------------------------------------------------------
-    # unused_rules()
-    #
-    # Find all grammar rules that were defined,  but not used (maybe not reachable)
-    # Returns a list of productions.
-    # ------------------------------------------------------------------------------
+                    symstack.append(lookahead)
+                    lookahead = None
 
-    def unused_rules(self):
-        unused_prod = []
-        for s, v in self.Nonterminals.items():
-            if not v:
-                p = self.Prodnames[s][0]
-                unused_prod.append(p)
-        return unused_prod
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
 
-    # -----------------------------------------------------------------------------
-    # unused_precedence()
-    #
-    # Returns a list of tuples (term,precedence) corresponding to precedence
-    # rules that were never used by the grammar.  term is the name of the terminal
-    # on which precedence was applied and precedence is a string such as 'left' or
-    # 'right' corresponding to the type of precedence.
-    # -----------------------------------------------------------------------------
+                if t < 0:
+                    #--! REDUCE
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
 
-    def unused_precedence(self):
-        unused = []
-        for termname in self.Precedence:
-            if not (termname in self.Terminals or termname in self.UsedPrecedence):
-                unused.append((termname, self.Precedence[termname][0]))
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
 
-        return unused
 
-    # -------------------------------------------------------------------------
-    # _first()
-    #
-    # Compute the value of FIRST1(beta) where beta is a tuple of symbols.
-    #
-    # During execution of compute_first1, the result may be incomplete.
-    # Afterward (e.g., when called from compute_follow()), it will be complete.
-    # -------------------------------------------------------------------------
-    def _first(self, beta):
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
 
-        # We are computing First(x1,x2,x3,...,xn)
-        result = []
-        for x in beta:
-            x_produces_empty = False
 
-            # Add all the non-<empty> symbols of First[x] to the result.
-            for f in self.First[x]:
-                if f == '<empty>':
-                    x_produces_empty = True
-                else:
-                    if f not in result:
-                        result.append(f)
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-            if x_produces_empty:
-                # We have to consider the next x in beta,
-                # i.e. stay in the loop.
-                pass
-            else:
-                # We don't have to consider any further symbols in beta.
-                break
-        else:
-            # There was no 'break' from the loop,
-            # so x_produces_empty was true for all x in beta,
-            # so beta produces empty as well.
-            result.append('<empty>')
+                        pslice.slice = targ
 
-        return result
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            self.state = state
+                            p.callable(pslice)
+                            del statestack[-plen:]
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-    # -------------------------------------------------------------------------
-    # compute_first()
-    #
-    # Compute the value of FIRST1(X) for all symbols
-    # -------------------------------------------------------------------------
-    def compute_first(self):
-        if self.First:
-            return self.First
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-        # Terminals:
-        for t in self.Terminals:
-            self.First[t] = [t]
+                    else:
 
-        self.First['$end'] = ['$end']
 
-        # Nonterminals:
+                        targ = [sym]
 
-        # Initialize to the empty set:
-        for n in self.Nonterminals:
-            self.First[n] = []
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-        # Then propagate symbols until no change:
-        while True:
-            some_change = False
-            for n in self.Nonterminals:
-                for p in self.Prodnames[n]:
-                    for f in self._first(p.prod):
-                        if f not in self.First[n]:
-                            self.First[n].append(f)
-                            some_change = True
-            if not some_change:
-                break
+                        pslice.slice = targ
 
-        return self.First
+                        try:
+                            # Call the grammar rule with our special slice object
+                            self.state = state
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-    # ---------------------------------------------------------------------
-    # compute_follow()
-    #
-    # Computes all of the follow sets for every non-terminal symbol.  The
-    # follow set is the set of all symbols that might follow a given
-    # non-terminal.  See the Dragon book, 2nd Ed. p. 189.
-    # ---------------------------------------------------------------------
-    def compute_follow(self, start=None):
-        # If already computed, return the result
-        if self.Follow:
-            return self.Follow
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
-        # If first sets not computed yet, do that first.
-        if not self.First:
-            self.compute_first()
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
 
-        # Add '$end' to the follow list of the start symbol
-        for k in self.Nonterminals:
-            self.Follow[k] = []
+            if t is None:
 
-        if not start:
-            start = self.Productions[1].name
 
-        self.Follow[start] = ['$end']
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        self.state = state
+                        tok = call_errorfunc(self.errorfunc, errtoken, self)
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
 
-        while True:
-            didadd = False
-            for p in self.Productions[1:]:
-                # Here is the production set
-                for i, B in enumerate(p.prod):
-                    if B in self.Nonterminals:
-                        # Okay. We got a non-terminal in a production
-                        fst = self._first(p.prod[i+1:])
-                        hasempty = False
-                        for f in fst:
-                            if f != '<empty>' and f not in self.Follow[B]:
-                                self.Follow[B].append(f)
-                                didadd = True
-                            if f == '<empty>':
-                                hasempty = True
-                        if hasempty or i == (len(p.prod)-1):
-                            # Add elements of follow(a) to follow(b)
-                            for f in self.Follow[p.name]:
-                                if f not in self.Follow[B]:
-                                    self.Follow[B].append(f)
-                                    didadd = True
-            if not didadd:
-                break
-        return self.Follow
-
-
-    # -----------------------------------------------------------------------------
-    # build_lritems()
-    #
-    # This function walks the list of productions and builds a complete set of the
-    # LR items.  The LR items are stored in two ways:  First, they are uniquely
-    # numbered and placed in the list _lritems.  Second, a linked list of LR items
-    # is built for each production.  For example:
-    #
-    #   E -> E PLUS E
-    #
-    # Creates the list
-    #
-    #  [E -> . E PLUS E, E -> E . PLUS E, E -> E PLUS . E, E -> E PLUS E . ]
-    # -----------------------------------------------------------------------------
-
-    def build_lritems(self):
-        for p in self.Productions:
-            lastlri = p
-            i = 0
-            lr_items = []
-            while True:
-                if i > len(p):
-                    lri = None
                 else:
-                    lri = LRItem(p, i)
-                    # Precompute the list of productions immediately following
-                    try:
-                        lri.lr_after = self.Prodnames[lri.prod[i+1]]
-                    except (IndexError, KeyError):
-                        lri.lr_after = []
-                    try:
-                        lri.lr_before = lri.prod[i-1]
-                    except IndexError:
-                        lri.lr_before = None
+                    errorcount = error_count
 
-                lastlri.lr_next = lri
-                if not lri:
-                    break
-                lr_items.append(lri)
-                lastlri = lri
-                i += 1
-            p.lr_items = lr_items
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
 
-# -----------------------------------------------------------------------------
-#                            == Class LRTable ==
-#
-# This basic class represents a basic table of LR parsing information.
-# Methods for generating the tables are not defined here.  They are defined
-# in the derived class LRGeneratedTable.
-# -----------------------------------------------------------------------------
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
 
-class VersionError(YaccError):
-    pass
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
 
-class LRTable(object):
-    def __init__(self):
-        self.lr_action = None
-        self.lr_goto = None
-        self.lr_productions = None
-        self.lr_method = None
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
 
-    def read_table(self, module):
-        if isinstance(module, types.ModuleType):
-            parsetab = module
-        else:
-            exec('import %s' % module)
-            parsetab = sys.modules[module]
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
 
-        if parsetab._tabversion != __tabversion__:
-            raise VersionError('yacc table file version is out of date')
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
 
-        self.lr_action = parsetab._lr_action
-        self.lr_goto = parsetab._lr_goto
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]
 
-        self.lr_productions = []
-        for p in parsetab._lr_productions:
-            self.lr_productions.append(MiniProduction(*p))
+                continue
 
-        self.lr_method = parsetab._lr_method
-        return parsetab._lr_signature
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
 
-    def read_pickle(self, filename):
-        try:
-            import cPickle as pickle
-        except ImportError:
-            import pickle
+        #--! parseopt-notrack-end
 
-        if not os.path.exists(filename):
-          raise ImportError
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parseopt_notrack_kinds().
+    #
+    # parseopt_notrack() for lexers made with lex(kinds=True), with the action
+    # table indexed by kind id.  DO NOT EDIT THIS CODE DIRECTLY!  This code is
+    # automatically generated by the ply/ygen.py script.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-        in_f = open(filename, 'rb')
+    def parseopt_notrack_kinds(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parseopt-notrack-kinds-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
 
-        tabversion = pickle.load(in_f)
-        if tabversion != __tabversion__:
-            raise VersionError('yacc table file version is out of date')
-        self.lr_method = pickle.load(in_f)
-        signature      = pickle.load(in_f)
-        self.lr_action = pickle.load(in_f)
-        self.lr_goto   = pickle.load(in_f)
-        productions    = pickle.load(in_f)
+        # Packed action and goto tables, if used
+        compact = self.compact
 
-        self.lr_productions = []
-        for p in productions:
-            self.lr_productions.append(MiniProduction(*p))
 
-        in_f.close()
-        return signature
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
 
-    # Bind all production function names to callable objects in pdict
-    def bind_callables(self, pdict):
-        for p in self.lr_productions:
-            p.bind(pdict)
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
 
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
 
-# -----------------------------------------------------------------------------
-#                           === LR Generator ===
-#
-# The following classes and functions are used to generate LR parsing tables on
-# a grammar.
-# -----------------------------------------------------------------------------
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
+        else:
+            get_token = tokenfunc
 
-# -----------------------------------------------------------------------------
-# digraph()
-# traverse()
-#
-# The following two functions are used to compute set valued functions
-# of the form:
-#
-#     F(x) = F'(x) U U{F(y) | x R y}
-#
-# This is used to compute the values of Read() sets as well as FOLLOW sets
-# in LALR(1) generation.
-#
-# Inputs:  X    - An input set
-#          R    - A relation
-#          FP   - Set-valued function
-# ------------------------------------------------------------------------------
+        # If the lexer numbers its tokens, index the action table by kind id
+        if self.kindnames != lexer.lexkindnames:
+            self.set_kinds(lexer.lexkindnames)
+        actions = self.kindaction
+        kindids = self.kindids
 
-def digraph(X, R, FP):
-    N = {}
-    for x in X:
-        N[x] = 0
-    stack = []
-    F = {}
-    for x in X:
-        if N[x] == 0:
-            traverse(x, N, stack, F, X, R, FP)
-    return F
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
 
-def traverse(x, N, stack, F, X, R, FP):
-    stack.append(x)
-    d = len(stack)
-    N[x] = d
-    F[x] = FP(x)             # F(X) <- F'(x)
+        # Set up the state and symbol stacks
 
-    rel = R(x)               # Get y's related to x
-    for y in rel:
-        if N[y] == 0:
-            traverse(y, N, stack, F, X, R, FP)
-        N[x] = min(N[x], N[y])
-        for a in F.get(y, []):
-            if a not in F[x]:
-                F[x].append(a)
-    if N[x] == d:
-        N[stack[-1]] = MAXINT
-        F[stack[-1]] = F[x]
-        element = stack.pop()
-        while element != x:
-            N[stack[-1]] = MAXINT
-            F[stack[-1]] = F[x]
-            element = stack.pop()
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
 
-class LALRError(YaccError):
-    pass
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
 
-# -----------------------------------------------------------------------------
-#                             == LRGeneratedTable ==
-#
-# This class implements the LR table generation algorithm.  There are no
-# public methods except for write()
-# -----------------------------------------------------------------------------
+        # The start state is assumed to be (0,$end)
 
-class LRGeneratedTable(LRTable):
-    def __init__(self, grammar, method='LALR', log=None):
-        if method not in ['SLR', 'LALR']:
-            raise LALRError('Unsupported method %s' % method)
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
 
-        self.grammar = grammar
-        self.lr_method = method
 
-        # Set up the logger
-        if not log:
-            log = NullLogger()
-        self.log = log
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                        # Tokens put back may not come from the lexer
+                        if lookahead and not hasattr(lookahead, 'kind'):
+                            lookahead.kind = kindids.get(lookahead.type, -1)
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
 
-        # Internal attributes
-        self.lr_action     = {}        # Action table
-        self.lr_goto       = {}        # Goto table
-        self.lr_productions  = grammar.Productions    # Copy of grammar Production array
-        self.lr_goto_cache = {}        # Cache of computed gotos
-        self.lr0_cidhash   = {}        # Cache of closures
+                # Check the action table
+                t = actions[state][lookahead.kind]
+            else:
+                t = defaulted_states[state]
 
-        self._add_count    = 0         # Internal counter used to detect cycles
 
-        # Diagonistic information filled in by the table generator
-        self.sr_conflict   = 0
-        self.rr_conflict   = 0
-        self.conflicts     = []        # List of conflicts
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
 
-        self.sr_conflicts  = []
-        self.rr_conflicts  = []
 
-        # Build the tables
-        self.grammar.build_lritems()
-        self.grammar.compute_first()
-        self.grammar.compute_follow()
-        self.lr_parse_table()
+                    symstack.append(lookahead)
+                    lookahead = None
 
-    # Compute the LR(0) closure operation on I, where I is a set of LR(0) items.
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
 
-    def lr0_closure(self, I):
-        self._add_count += 1
+                if t < 0:
+                    #--! REDUCE
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
 
-        # Add everything in I to J
-        J = I[:]
-        didadd = True
-        while didadd:
-            didadd = False
-            for j in J:
-                for x in j.lr_after:
-                    if getattr(x, 'lr0_added', 0) == self._add_count:
-                        continue
-                    # Add B --> .G to J
-                    J.append(x.lr_next)
-                    x.lr0_added = self._add_count
-                    didadd = True
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
 
-        return J
 
-    # Compute the LR(0) goto function goto(I,X) where I is a set
-    # of LR(0) items and X is a grammar symbol.   This function is written
-    # in a way that guarantees uniqueness of the generated goto sets
-    # (i.e. the same goto set will never be returned as two different Python
-    # objects).  With uniqueness, we can later do fast set comparisons using
-    # id(obj) instead of element-wise comparison.
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
 
-    def lr0_goto(self, I, x):
-        # First we look for a previously cached entry
-        g = self.lr_goto_cache.get((id(I), x))
-        if g:
-            return g
 
-        # Now we generate the goto set in a way that guarantees uniqueness
-        # of the result
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-        s = self.lr_goto_cache.get(x)
-        if not s:
-            s = {}
-            self.lr_goto_cache[x] = s
+                        pslice.slice = targ
 
-        gs = []
-        for p in I:
-            n = p.lr_next
-            if n and n.lr_before == x:
-                s1 = s.get(id(n))
-                if not s1:
-                    s1 = {}
-                    s[id(n)] = s1
-                gs.append(n)
-                s = s1
-        g = s.get('$end')
-        if not g:
-            if gs:
-                g = self.lr0_closure(gs)
-                s['$end'] = g
-            else:
-                s['$end'] = gs
-        self.lr_goto_cache[(id(I), x)] = g
-        return g
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            self.state = state
+                            p.callable(pslice)
+                            del statestack[-plen:]
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-    # Compute the LR(0) sets of item function
-    def lr0_items(self):
-        C = [self.lr0_closure([self.grammar.Productions[0].lr_next])]
-        i = 0
-        for I in C:
-            self.lr0_cidhash[id(I)] = i
-            i += 1
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-        # Loop over the items in C and each grammar symbols
-        i = 0
-        while i < len(C):
-            I = C[i]
-            i += 1
+                    else:
 
-            # Collect all of the symbols that could possibly be in the goto(I,X) sets
-            asyms = {}
-            for ii in I:
-                for s in ii.usyms:
-                    asyms[s] = None
 
-            for x in asyms:
-                g = self.lr0_goto(I, x)
-                if not g or id(g) in self.lr0_cidhash:
-                    continue
-                self.lr0_cidhash[id(g)] = len(C)
-                C.append(g)
+                        targ = [sym]
 
-        return C
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-    # -----------------------------------------------------------------------------
-    #                       ==== LALR(1) Parsing ====
-    #
-    # LALR(1) parsing is almost exactly the same as SLR except that instead of
-    # relying upon Follow() sets when performing reductions, a more selective
-    # lookahead set that incorporates the state of the LR(0) machine is utilized.
-    # Thus, we mainly just have to focus on calculating the lookahead sets.
-    #
-    # The method used here is due to DeRemer and Pennelo (1982).
-    #
-    # DeRemer, F. L., and T. J. Pennelo: "Efficient Computation of LALR(1)
-    #     Lookahead Sets", ACM Transactions on Programming Languages and Systems,
-    #     Vol. 4, No. 4, Oct. 1982, pp. 615-649
-    #
-    # Further details can also be found in:
-    #
-    #  J. Tremblay and P. Sorenson, "The Theory and Practice of Compiler Writing",
-    #      McGraw-Hill Book Company, (1985).
-    #
-    # -----------------------------------------------------------------------------
+                        pslice.slice = targ
 
-    # -----------------------------------------------------------------------------
-    # compute_nullable_nonterminals()
-    #
-    # Creates a dictionary containing all of the non-terminals that might produce
-    # an empty production.
-    # -----------------------------------------------------------------------------
+                        try:
+                            # Call the grammar rule with our special slice object
+                            self.state = state
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
 
-    def compute_nullable_nonterminals(self):
-        nullable = set()
-        num_nullable = 0
-        while True:
-            for p in self.grammar.Productions[1:]:
-                if p.len == 0:
-                    nullable.add(p.name)
-                    continue
-                for t in p.prod:
-                    if t not in nullable:
-                        break
-                else:
-                    nullable.add(p.name)
-            if len(nullable) == num_nullable:
-                break
-            num_nullable = len(nullable)
-        return nullable
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
 
-    # -----------------------------------------------------------------------------
-    # find_nonterminal_trans(C)
-    #
-    # Given a set of LR(0) items, this functions finds all of the non-terminal
-    # transitions.    These are transitions in which a dot appears immediately before
-    # a non-terminal.   Returns a list of tuples of the form (state,N) where state
-    # is the state number and N is the nonterminal symbol.
-    #
-    # The input C is the set of LR(0) items.
-    # -----------------------------------------------------------------------------
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
 
-    def find_nonterminal_transitions(self, C):
-        trans = []
-        for stateno, state in enumerate(C):
-            for p in state:
-                if p.lr_index < p.len - 1:
-                    t = (stateno, p.prod[p.lr_index+1])
-                    if t[1] in self.grammar.Nonterminals:
-                        if t not in trans:
-                            trans.append(t)
-        return trans
+            if t is None:
 
-    # -----------------------------------------------------------------------------
-    # dr_relation()
-    #
-    # Computes the DR(p,A) relationships for non-terminal transitions.  The input
-    # is a tuple (state,N) where state is a number and N is a nonterminal symbol.
-    #
-    # Returns a list of terminals.
-    # -----------------------------------------------------------------------------
 
-    def dr_relation(self, C, trans, nullable):
-        dr_set = {}
-        state, N = trans
-        terms = []
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        self.state = state
+                        tok = call_errorfunc(self.errorfunc, errtoken, self)
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            # p_error() may return a token without a kind id
+                            if tok and not hasattr(tok, 'kind'):
+                                tok.kind = kindids.get(tok.type, -1)
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
 
-        g = self.lr0_goto(C[state], N)
-        for p in g:
-            if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index+1]
-                if a in self.grammar.Terminals:
-                    if a not in terms:
-                        terms.append(a)
+                else:
+                    errorcount = error_count
 
-        # This extra bit is to handle the start state
-        if state == 0 and N == self.grammar.Productions[0].prod[0]:
-            terms.append('$end')
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
 
-        return terms
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
 
-    # -----------------------------------------------------------------------------
-    # reads_relation()
-    #
-    # Computes the READS() relation (p,A) READS (t,C).
-    # -----------------------------------------------------------------------------
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
 
-    def reads_relation(self, C, trans, empty):
-        # Look for empty transitions
-        rel = []
-        state, N = trans
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
 
-        g = self.lr0_goto(C[state], N)
-        j = self.lr0_cidhash.get(id(g), -1)
-        for p in g:
-            if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index + 1]
-                if a in empty:
-                    rel.append((j, a))
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
 
-        return rel
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
 
-    # -----------------------------------------------------------------------------
-    # compute_lookback_includes()
-    #
-    # Determines the lookback and includes relations
-    #
-    # LOOKBACK:
-    #
-    # This relation is determined by running the LR(0) state machine forward.
-    # For example, starting with a production "N : . A B C", we run it forward
-    # to obtain "N : A B C ."   We then build a relationship between this final
-    # state and the starting state.   These relationships are stored in a dictionary
-    # lookdict.
-    #
-    # INCLUDES:
-    #
-    # Computes the INCLUDE() relation (p,A) INCLUDES (p',B).
-    #
-    # This relation is used to determine non-terminal transitions that occur
-    # inside of other non-terminal transition states.   (p,A) INCLUDES (p', B)
-    # if the following holds:
-    #
-    #       B -> LAT, where T -> epsilon and p' -L-> p
-    #
-    # L is essentially a prefix (which may be empty), T is a suffix that must be
-    # able to derive an empty string.  State p' must lead to state p with the string L.
-    #
-    # -----------------------------------------------------------------------------
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]
 
-    def compute_lookback_includes(self, C, trans, nullable):
-        lookdict = {}          # Dictionary of lookback relations
-        includedict = {}       # Dictionary of include relations
+                continue
 
-        # Make a dictionary of non-terminal transitions
-        dtrans = {}
-        for t in trans:
-            dtrans[t] = 1
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
 
-        # Loop over all transitions and compute lookbacks and includes
-        for state, N in trans:
-            lookb = []
-            includes = []
-            for p in C[state]:
-                if p.name != N:
-                    continue
+        #--! parseopt-notrack-kinds-end
 
-                # Okay, we have a name match.  We now follow the production all the way
-                # through the state machine until we get the . on the right hand side
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parseopt_notrack_compact().
+    #
+    # parseopt_notrack() for packed tables (yacc(compact=True)).  DO NOT EDIT
+    # THIS CODE DIRECTLY!  This code is automatically generated by the
+    # ply/ygen.py script.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-                lr_index = p.lr_index
-                j = state
-                while lr_index < p.len - 1:
-                    lr_index = lr_index + 1
-                    t = p.prod[lr_index]
+    def parseopt_notrack_compact(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parseopt-notrack-compact-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
 
-                    # Check to see if this symbol and state are a non-terminal transition
-                    if (j, t) in dtrans:
-                        # Yes.  Okay, there is some chance that this is an includes relation
-                        # the only way to know for certain is whether the rest of the
-                        # production derives empty
+        # Packed action and goto tables, if used
+        compact = self.compact
+        abase, acheck, avalue = compact.base, compact.check, compact.value
+        gbase, gvalue = compact.gbase, compact.gvalue
+        termid, ntid, unknown = compact.termid, compact.ntid, compact.unknown
 
-                        li = lr_index + 1
-                        while li < p.len:
-                            if p.prod[li] in self.grammar.Terminals:
-                                break      # No forget it
-                            if p.prod[li] not in nullable:
-                                break
-                            li = li + 1
-                        else:
-                            # Appears to be a relation between (j,t) and (state,N)
-                            includes.append((j, t))
 
-                    g = self.lr0_goto(C[j], t)               # Go to next set
-                    j = self.lr0_cidhash.get(id(g), -1)      # Go to next state
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
 
-                # When we get here, j is the final state, now we have to locate the production
-                for r in C[j]:
-                    if r.name != p.name:
-                        continue
-                    if r.len != p.len:
-                        continue
-                    i = 0
-                    # This look is comparing a production ". A B C" with "A B C ."
-                    while i < r.lr_index:
-                        if r.prod[i] != p.prod[i+1]:
-                            break
-                        i = i + 1
-                    else:
-                        lookb.append((j, r))
-            for i in includes:
-                if i not in includedict:
-                    includedict[i] = []
-                includedict[i].append((state, N))
-            lookdict[(state, N)] = lookb
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
 
-        return lookdict, includedict
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
 
-    # -----------------------------------------------------------------------------
-    # compute_read_sets()
-    #
-    # Given a set of LR(0) items, this function computes the read sets.
-    #
-    # Inputs:  C        =  Set of LR(0) items
-    #          ntrans   = Set of nonterminal transitions
-    #          nullable = Set of empty transitions
-    #
-    # Returns a set containing the read sets
-    # -----------------------------------------------------------------------------
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
+        else:
+            get_token = tokenfunc
 
-    def compute_read_sets(self, C, ntrans, nullable):
-        FP = lambda x: self.dr_relation(C, x, nullable)
-        R =  lambda x: self.reads_relation(C, x, nullable)
-        F = digraph(ntrans, R, FP)
-        return F
+        # If the lexer numbers its tokens, index the action table by kind id
 
-    # -----------------------------------------------------------------------------
-    # compute_follow_sets()
-    #
-    # Given a set of LR(0) items, a set of non-terminal transitions, a readset,
-    # and an include set, this function computes the follow sets
-    #
-    # Follow(p,A) = Read(p,A) U U {Follow(p',B) | (p,A) INCLUDES (p',B)}
-    #
-    # Inputs:
-    #            ntrans     = Set of nonterminal transitions
-    #            readsets   = Readset (previously computed)
-    #            inclsets   = Include sets (previously computed)
-    #
-    # Returns a set containing the follow sets
-    # -----------------------------------------------------------------------------
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
 
-    def compute_follow_sets(self, ntrans, readsets, inclsets):
-        FP = lambda x: readsets[x]
-        R  = lambda x: inclsets.get(x, [])
-        F = digraph(ntrans, R, FP)
-        return F
+        # Set up the state and symbol stacks
 
-    # -----------------------------------------------------------------------------
-    # add_lookaheads()
-    #
-    # Attaches the lookahead symbols to grammar rules.
-    #
-    # Inputs:    lookbacks         -  Set of lookback relations
-    #            followset         -  Computed follow set
-    #
-    # This function directly attaches the lookaheads to productions contained
-    # in the lookbacks set
-    # -----------------------------------------------------------------------------
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
 
-    def add_lookaheads(self, lookbacks, followset):
-        for trans, lb in lookbacks.items():
-            # Loop over productions in lookback
-            for state, p in lb:
-                if state not in p.lookaheads:
-                    p.lookaheads[state] = []
-                f = followset.get(trans, [])
-                for a in f:
-                    if a not in p.lookaheads[state]:
-                        p.lookaheads[state].append(a)
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
 
-    # -----------------------------------------------------------------------------
-    # add_lalr_lookaheads()
-    #
-    # This function does all of the work of adding lookahead information for use
-    # with LALR parsing
-    # -----------------------------------------------------------------------------
+        # The start state is assumed to be (0,$end)
 
-    def add_lalr_lookaheads(self, C):
-        # Determine all of the nullable nonterminals
-        nullable = self.compute_nullable_nonterminals()
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
 
-        # Find all non-terminal transitions
-        trans = self.find_nonterminal_transitions(C)
 
-        # Compute read sets
-        readsets = self.compute_read_sets(C, trans, nullable)
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
 
-        # Compute lookback/includes relations
-        lookd, included = self.compute_lookback_includes(C, trans, nullable)
+                # Check the action table
+                b = abase[state]
+                i = b + termid.get(lookahead.type, unknown)
+                t = avalue[i] if acheck[i] == b else None
+            else:
+                t = defaulted_states[state]
 
-        # Compute LALR FOLLOW sets
-        followsets = self.compute_follow_sets(trans, readsets, included)
 
-        # Add all of the lookaheads
-        self.add_lookaheads(lookd, followsets)
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
 
-    # -----------------------------------------------------------------------------
-    # lr_parse_table()
-    #
-    # This function constructs the parse tables for SLR or LALR
-    # -----------------------------------------------------------------------------
-    def lr_parse_table(self):
-        Productions = self.grammar.Productions
-        Precedence  = self.grammar.Precedence
-        goto   = self.lr_goto         # Goto array
-        action = self.lr_action       # Action array
-        log    = self.log             # Logger for output
 
-        actionp = {}                  # Action production array (temporary)
+                    symstack.append(lookahead)
+                    lookahead = None
 
-        log.info('Parsing method: %s', self.lr_method)
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
 
-        # Step 1: Construct C = { I0, I1, ... IN}, collection of LR(0) items
-        # This determines the number of states
+                if t < 0:
+                    #--! REDUCE
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
 
-        C = self.lr0_items()
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
 
-        if self.lr_method == 'LALR':
-            self.add_lalr_lookaheads(C)
 
-        # Build the parser table, state by state
-        st = 0
-        for I in C:
-            # Loop over each production in I
-            actlist = []              # List of actions
-            st_action  = {}
-            st_actionp = {}
-            st_goto    = {}
-            log.info('')
-            log.info('state %d', st)
-            log.info('')
-            for p in I:
-                log.info('    (%d) %s', p.number, p)
-            log.info('')
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
 
-            for p in I:
-                    if p.len == p.lr_index + 1:
-                        if p.name == "S'":
-                            # Start symbol. Accept!
-                            st_action['$end'] = 0
-                            st_actionp['$end'] = p
-                        else:
-                            # We are at the end of a production.  Reduce!
-                            if self.lr_method == 'LALR':
-                                laheads = p.lookaheads[st]
-                            else:
-                                laheads = self.grammar.Follow[p.name]
-                            for a in laheads:
-                                actlist.append((a, p, 'reduce using rule %d (%s)' % (p.number, p)))
-                                r = st_action.get(a)
-                                if r is not None:
-                                    # Whoa. Have a shift/reduce or reduce/reduce conflict
-                                    if r > 0:
-                                        # Need to decide on shift or reduce here
-                                        # By default we favor shifting. Need to add
-                                        # some precedence rules here.
 
-                                        # Shift precedence comes from the token
-                                        sprec, slevel = Precedence.get(a, ('right', 0))
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
 
-                                        # Reduce precedence comes from rule being reduced (p)
-                                        rprec, rlevel = Productions[p.number].prec
+                        pslice.slice = targ
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            self.state = state
+                            p.callable(pslice)
+                            del statestack[-plen:]
+                            symstack.append(sym)
+                            state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
+
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-                                        if (slevel < rlevel) or ((slevel == rlevel) and (rprec == 'left')):
-                                            # We really need to reduce here.
-                                            st_action[a] = -p.number
-                                            st_actionp[a] = p
-                                            if not slevel and not rlevel:
-                                                log.info('  ! shift/reduce conflict for %s resolved as reduce', a)
-                                                self.sr_conflicts.append((st, a, 'reduce'))
-                                            Productions[p.number].reduced += 1
-                                        elif (slevel == rlevel) and (rprec == 'nonassoc'):
-                                            st_action[a] = None
-                                        else:
-                                            # Hmmm. Guess we'll keep the shift
-                                            if not rlevel:
-                                                log.info('  ! shift/reduce conflict for %s resolved as shift', a)
-                                                self.sr_conflicts.append((st, a, 'shift'))
-                                    elif r < 0:
-                                        # Reduce/reduce conflict.   In this case, we favor the rule
-                                        # that was defined first in the grammar file
-                                        oldp = Productions[-r]
-                                        pp = Productions[p.number]
-                                        if oldp.line > pp.line:
-                                            st_action[a] = -p.number
-                                            st_actionp[a] = p
-                                            chosenp, rejectp = pp, oldp
-                                            Productions[p.number].reduced += 1
-                                            Productions[oldp.number].reduced -= 1
-                                        else:
-                                            chosenp, rejectp = oldp, pp
-                                        self.rr_conflicts.append((st, chosenp, rejectp))
-                                        log.info('  ! reduce/reduce conflict for %s resolved using rule %d (%s)',
-                                                 a, st_actionp[a].number, st_actionp[a])
-                                    else:
-                                        raise LALRError('Unknown conflict in state %d' % st)
-                                else:
-                                    st_action[a] = -p.number
-                                    st_actionp[a] = p
-                                    Productions[p.number].reduced += 1
                     else:
-                        i = p.lr_index
-                        a = p.prod[i+1]       # Get symbol right after the "."
-                        if a in self.grammar.Terminals:
-                            g = self.lr0_goto(I, a)
-                            j = self.lr0_cidhash.get(id(g), -1)
-                            if j >= 0:
-                                # We are in a shift state
-                                actlist.append((a, p, 'shift and go to state %d' % j))
-                                r = st_action.get(a)
-                                if r is not None:
-                                    # Whoa have a shift/reduce or shift/shift conflict
-                                    if r > 0:
-                                        if r != j:
-                                            raise LALRError('Shift/shift conflict in state %d' % st)
-                                    elif r < 0:
-                                        # Do a precedence check.
-                                        #   -  if precedence of reduce rule is higher, we reduce.
-                                        #   -  if precedence of reduce is same and left assoc, we reduce.
-                                        #   -  otherwise we shift
 
-                                        # Shift precedence comes from the token
-                                        sprec, slevel = Precedence.get(a, ('right', 0))
 
-                                        # Reduce precedence comes from the rule that could have been reduced
-                                        rprec, rlevel = Productions[st_actionp[a].number].prec
+                        targ = [sym]
 
-                                        if (slevel > rlevel) or ((slevel == rlevel) and (rprec == 'right')):
-                                            # We decide to shift here... highest precedence to shift
-                                            Productions[st_actionp[a].number].reduced -= 1
-                                            st_action[a] = j
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
+
+                        pslice.slice = targ
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            self.state = state
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
+
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
+
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
+
+            if t is None:
+
+
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        self.state = state
+                        tok = call_errorfunc(self.errorfunc, errtoken, self)
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
+
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
+
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
+
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]
+
+                continue
+
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
+
+        #--! parseopt-notrack-compact-end
+
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parsepush().
+    #
+    # Generator version of parseopt() used by push_parser().  Instead of calling
+    # get_token() it waits at a yield for the next token to be sent to it, and it
+    # leaves the result in self.result.  DO NOT EDIT THIS CODE DIRECTLY!  This
+    # code is automatically generated by the ply/ygen.py script.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+    def parsepush(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parsepush-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
+
+        # Packed action and goto tables, if used
+        compact = self.compact
+        if compact:
+            abase, acheck, avalue = compact.base, compact.check, compact.value
+            gbase, gvalue = compact.gbase, compact.gvalue
+            termid, ntid, unknown = compact.termid, compact.ntid, compact.unknown
+
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
+
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
+
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
+        else:
+            get_token = tokenfunc
+
+        # If the lexer numbers its tokens, index the action table by kind id
+        kindaction = tokenfunc is None and not compact and getattr(lexer, 'lexkindmode', False)
+        if kindaction:
+            if self.kindnames != lexer.lexkindnames:
+                self.set_kinds(lexer.lexkindnames)
+            actions = self.kindaction
+            kindids = self.kindids
+
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
+
+        # Set up the state and symbol stacks
+
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
+
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
+
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
+
+
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = yield
+                    else:
+                        lookahead = lookaheadstack.pop()
+                        if kindaction:
+                            # Tokens put back may not come from the lexer
+                            if lookahead and not hasattr(lookahead, 'kind'):
+                                lookahead.kind = kindids.get(lookahead.type, -1)
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
+
+                # Check the action table
+                if kindaction:
+                    t = actions[state][lookahead.kind]
+                elif compact:
+                    b = abase[state]
+                    i = b + termid.get(lookahead.type, unknown)
+                    t = avalue[i] if acheck[i] == b else None
+                else:
+                    t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
+
+
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
+
+
+                    symstack.append(lookahead)
+                    lookahead = None
+
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
+
+                if t < 0:
+                    #--! REDUCE
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
+
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
+
+
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+
+                        #--! TRACKING
+                        if tracking:
+                            t1 = targ[1]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = targ[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        #--! TRACKING
+
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
+
+                        pslice.slice = targ
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            self.state = state
+                            p.callable(pslice)
+                            del statestack[-plen:]
+                            symstack.append(sym)
+                            if compact:
+                                state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            else:
+                                state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
+
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+                    else:
+
+                        #--! TRACKING
+                        if tracking:
+                            sym.lineno = lexer.lineno
+                            sym.lexpos = lexer.lexpos
+                        #--! TRACKING
+
+                        targ = [sym]
+
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
+
+                        pslice.slice = targ
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            self.state = state
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            if compact:
+                                state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                            else:
+                                state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.kind = 1
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = False
+
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    #--! REDUCE
+
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    self.result = result
+                    return
+
+            if t is None:
+
+
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        self.state = state
+                        tok = call_errorfunc(self.errorfunc, errtoken, self)
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            if kindaction:
+                                # p_error() may return a token without a kind id
+                                if tok and not hasattr(tok, 'kind'):
+                                    tok.kind = kindids.get(tok.type, -1)
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
+
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        #--! TRACKING
+                        if tracking:
+                            sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                            sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                        #--! TRACKING
+                        lookahead = None
+                        continue
+
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
+
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    #--! TRACKING
+                    if tracking:
+                        lookahead.lineno = sym.lineno
+                        lookahead.lexpos = sym.lexpos
+                    #--! TRACKING
+                    statestack.pop()
+                    state = statestack[-1]
+
+                continue
+
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
+
+        #--! parsepush-end
+
+    # ------------------------------------------------------------
+    # push_parser() - Make a parser that is given tokens by feed()
+    # ------------------------------------------------------------
+    def push_parser(self, lexer=None, tracking=False):
+        return PushParser(self, lexer, tracking)
+
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parsemany().
+    #
+    # Generator version of parseopt_notrack() used by parse_many().  input is an
+    # iterable of strings.  Each one is parsed on its own with the same stacks
+    # and YaccProduction object, and the result or the exception raised is
+    # yielded.  DO NOT EDIT THIS CODE DIRECTLY!  This code is automatically
+    # generated by the ply/ygen.py script.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+    def parsemany(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        #--! parsemany-start
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
+
+        # Packed action and goto tables, if used
+        compact = self.compact
+        if compact:
+            abase, acheck, avalue = compact.base, compact.check, compact.value
+            gbase, gvalue = compact.gbase, compact.gvalue
+            termid, ntid, unknown = compact.termid, compact.ntid, compact.unknown
+
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
+
+
+        if tokenfunc is None:
+            # Tokenize function
+            get_token = lexer.token
+        else:
+            get_token = tokenfunc
+
+        # If the lexer numbers its tokens, index the action table by kind id
+        kindaction = tokenfunc is None and not compact and getattr(lexer, 'lexkindmode', False)
+        if kindaction:
+            if self.kindnames != lexer.lexkindnames:
+                self.set_kinds(lexer.lexkindnames)
+            actions = self.kindaction
+            kindids = self.kindids
+
+        # Set the parser() token method (sometimes used in error recovery)
+        self.token = get_token
+
+        # Set up the state and symbol stacks
+
+        statestack = []                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = []                # Stack of grammar symbols
+        self.symstack = symstack
+
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
+
+        # Lexers from lex start each input in the same state and on the same line
+        restart = getattr(lexer, 'restart', None)
+        lexstate = getattr(lexer, 'lexstate', 'INITIAL')
+        lineno = getattr(lexer, 'lineno', 1)
+        endsym = YaccSymbol()
+        endsym.type = '$end'
+
+        for data in input:
+            try:
+                if restart:
+                    restart(data, lexstate, lineno)
+                else:
+                    lexer.input(data)
+                if tokenfunc is None:
+                    get_token = lexer.token
+                    self.token = get_token
+
+                # Start over with the state (0,$end)
+                del statestack[:]
+                statestack.append(0)
+                del symstack[:]
+                symstack.append(endsym)
+                del lookaheadstack[:]
+                lookahead = None
+                errtoken = None
+                errorcount = 0
+                self.errorok = True
+                state = 0
+                while True:
+                    # Get the next symbol on the input.  If a lookahead symbol
+                    # is already set, we just use that. Otherwise, we'll pull
+                    # the next token off of the lookaheadstack or from the lexer
+
+
+                    if state not in defaulted_states:
+                        if not lookahead:
+                            if not lookaheadstack:
+                                lookahead = get_token()     # Get the next token
+                            else:
+                                lookahead = lookaheadstack.pop()
+                                if kindaction:
+                                    # Tokens put back may not come from the lexer
+                                    if lookahead and not hasattr(lookahead, 'kind'):
+                                        lookahead.kind = kindids.get(lookahead.type, -1)
+                            if not lookahead:
+                                lookahead = YaccSymbol()
+                                lookahead.type = '$end'
+                                lookahead.kind = 0
+
+                        # Check the action table
+                        if kindaction:
+                            t = actions[state][lookahead.kind]
+                        elif compact:
+                            b = abase[state]
+                            i = b + termid.get(lookahead.type, unknown)
+                            t = avalue[i] if acheck[i] == b else None
+                        else:
+                            t = actions[state].get(lookahead.type)
+                    else:
+                        t = defaulted_states[state]
+
+
+                    if t is not None:
+                        if t > 0:
+                            # shift a symbol on the stack
+                            statestack.append(t)
+                            state = t
+
+
+                            symstack.append(lookahead)
+                            lookahead = None
+
+                            # Decrease error count on successful shift
+                            if errorcount:
+                                errorcount -= 1
+                            continue
+
+                        if t < 0:
+                            #--! REDUCE
+                            # reduce a symbol on the stack, emit a production
+                            p = prod[-t]
+                            pname = p.name
+                            plen  = p.len
+
+                            # Get production function
+                            sym = YaccSymbol()
+                            sym.type = pname       # Production name
+                            sym.value = None
+
+
+                            if plen:
+                                targ = symstack[-plen-1:]
+                                targ[0] = sym
+
+
+                                # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                                # The code enclosed in this section is duplicated
+                                # below as a performance optimization.  Make sure
+                                # changes get made in both locations.
+
+                                pslice.slice = targ
+
+                                try:
+                                    # Call the grammar rule with our special slice object
+                                    del symstack[-plen:]
+                                    self.state = state
+                                    p.callable(pslice)
+                                    del statestack[-plen:]
+                                    symstack.append(sym)
+                                    if compact:
+                                        state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                                    else:
+                                        state = goto[statestack[-1]][pname]
+                                    statestack.append(state)
+                                except SyntaxError:
+                                    # If an error was set. Enter error recovery state
+                                    lookaheadstack.append(lookahead)    # Save the current lookahead token
+                                    symstack.extend(targ[1:-1])         # Put the production slice back on the stack
+                                    statestack.pop()                    # Pop back one state (before the reduce)
+                                    state = statestack[-1]
+                                    sym.type = 'error'
+                                    sym.kind = 1
+                                    sym.value = 'error'
+                                    lookahead = sym
+                                    errorcount = error_count
+                                    self.errorok = False
+
+                                continue
+                                # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+                            else:
+
+
+                                targ = [sym]
+
+                                # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                                # The code enclosed in this section is duplicated
+                                # above as a performance optimization.  Make sure
+                                # changes get made in both locations.
+
+                                pslice.slice = targ
+
+                                try:
+                                    # Call the grammar rule with our special slice object
+                                    self.state = state
+                                    p.callable(pslice)
+                                    symstack.append(sym)
+                                    if compact:
+                                        state = gvalue[gbase[statestack[-1]] + ntid[pname]]
+                                    else:
+                                        state = goto[statestack[-1]][pname]
+                                    statestack.append(state)
+                                except SyntaxError:
+                                    # If an error was set. Enter error recovery state
+                                    lookaheadstack.append(lookahead)    # Save the current lookahead token
+                                    statestack.pop()                    # Pop back one state (before the reduce)
+                                    state = statestack[-1]
+                                    sym.type = 'error'
+                                    sym.kind = 1
+                                    sym.value = 'error'
+                                    lookahead = sym
+                                    errorcount = error_count
+                                    self.errorok = False
+
+                                continue
+                                # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                            #--! REDUCE
+
+                        if t == 0:
+                            n = symstack[-1]
+                            result = getattr(n, 'value', None)
+                            break
+
+                    if t is None:
+
+
+                        # We have some kind of parsing error here.  To handle
+                        # this, we are going to push the current token onto
+                        # the tokenstack and replace it with an 'error' token.
+                        # If there are any synchronization rules, they may
+                        # catch it.
+                        #
+                        # In addition to pushing the error token, we call call
+                        # the user defined p_error() function if this is the
+                        # first syntax error.  This function is only called if
+                        # errorcount == 0.
+                        if errorcount == 0 or self.errorok:
+                            errorcount = error_count
+                            self.errorok = False
+                            errtoken = lookahead
+                            if errtoken.type == '$end':
+                                errtoken = None               # End of file!
+                            if self.errorfunc:
+                                if errtoken and not hasattr(errtoken, 'lexer'):
+                                    errtoken.lexer = lexer
+                                self.state = state
+                                tok = call_errorfunc(self.errorfunc, errtoken, self)
+                                if self.errorok:
+                                    # User must have done some kind of panic
+                                    # mode recovery on their own.  The
+                                    # returned token is the next lookahead
+                                    lookahead = tok
+                                    if kindaction:
+                                        # p_error() may return a token without a kind id
+                                        if tok and not hasattr(tok, 'kind'):
+                                            tok.kind = kindids.get(tok.type, -1)
+                                    errtoken = None
+                                    continue
+                            else:
+                                if errtoken:
+                                    if hasattr(errtoken, 'lineno'):
+                                        lineno = lookahead.lineno
+                                    else:
+                                        lineno = 0
+                                    if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                        sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                            lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                                    elif lineno:
+                                        sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                                    else:
+                                        sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                                else:
+                                    sys.stderr.write('yacc: Parse error in input. EOF\n')
+                                    result = None
+                                    break
+
+                        else:
+                            errorcount = error_count
+
+                        # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                        # entire parse has been rolled back and we're completely hosed.   The token is
+                        # discarded and we just keep going.
+
+                        if len(statestack) <= 1 and lookahead.type != '$end':
+                            lookahead = None
+                            errtoken = None
+                            state = 0
+                            # Nuke the pushback stack
+                            del lookaheadstack[:]
+                            continue
+
+                        # case 2: the statestack has a couple of entries on it, but we're
+                        # at the end of the file. nuke the top entry and generate an error token
+
+                        # Start nuking entries on the stack
+                        if lookahead.type == '$end':
+                            # Whoa. We're really hosed here. Bail out
+                            result = None
+                            break
+
+                        if lookahead.type != 'error':
+                            sym = symstack[-1]
+                            if sym.type == 'error':
+                                # Hmmm. Error is on top of stack, we'll just nuke input
+                                # symbol and continue
+                                lookahead = None
+                                continue
+
+                            # Create the error symbol for the first time and make it the new lookahead symbol
+                            t = YaccSymbol()
+                            t.type = 'error'
+                            t.kind = 1
+
+                            if hasattr(lookahead, 'lineno'):
+                                t.lineno = t.endlineno = lookahead.lineno
+                            if hasattr(lookahead, 'lexpos'):
+                                t.lexpos = t.endlexpos = lookahead.lexpos
+                            t.value = lookahead
+                            lookaheadstack.append(lookahead)
+                            lookahead = t
+                        else:
+                            sym = symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+
+                        continue
+
+                    # Call an error function here
+                    raise RuntimeError('yacc: internal parser error!!!\n')
+
+            except Exception as e:
+                result = e
+            yield result
+        #--! parsemany-end
+
+    # ------------------------------------------------------------
+    # parse_many() - Parse many separate inputs
+    #
+    # Yields the result of parsing each string in inputs, or the exception
+    # raised while parsing it (from p_error() or a grammar rule, or a
+    # LexError, for instance).  Each string is parsed on its own, as by
+    # parse(), but the stacks and the objects given to grammar rules are
+    # made once and reused.  Error recovery starts over for each string.
+    # A lexer from lex starts each string in the state and on the line it
+    # was in when parse_many() was called (see Lexer.restart()).
+    # ------------------------------------------------------------
+    def parse_many(self, inputs, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        if debug or tracking or yaccdevel or self.codegen:
+            return self._parse_each(inputs, lexer, debug, tracking, tokenfunc)
+        return self.parsemany(inputs, lexer, tokenfunc=tokenfunc)
+
+    # parse_many() with parse() called for each input, for debugging, tracking
+    # and generated parser code
+    def _parse_each(self, inputs, lexer, debug, tracking, tokenfunc):
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+        restart = getattr(lexer, 'restart', None)
+        lexstate = getattr(lexer, 'lexstate', 'INITIAL')
+        lineno = getattr(lexer, 'lineno', 1)
+        for data in inputs:
+            try:
+                if restart:
+                    restart(data, lexstate, lineno)
+                else:
+                    lexer.input(data)
+                self.errorok = True
+                result = self.parse(None, lexer, debug, tracking, tokenfunc)
+            except Exception as e:
+                result = e
+            yield result
+
+# -----------------------------------------------------------------------------
+# PushParser
+#
+# Parses tokens handed to it one at a time, for input that arrives in pieces
+# (from an event loop, for instance) where parse() would have to wait for
+# tokens in another thread:
+#
+#     p = parser.push_parser(lexer)
+#     for tok in tokens:
+#         p.feed(tok)
+#     result = p.finish()
+#
+# feed() runs the parser as far as it can go without the token after tok,
+# calling grammar rules and p_error() as parse() would.  statestack, symstack
+# and lookahead are kept between calls, and error recovery works the same way,
+# except that p_error() can't read ahead with parser.token() since later
+# tokens haven't been fed yet.  Each push parser has its own stacks, so any
+# number of them can be used at once.  They share the tables of the parser
+# they were made from, and p_error() is passed the push parser.
+# -----------------------------------------------------------------------------
+
+class PushParser(LRParser):
+    def __init__(self, parser, lexer=None, tracking=False):
+        self.__dict__.update(parser.__dict__)
+        self.result = None
+        self.done = False
+        self.engine = self.parsepush(None, lexer, False, tracking, self._no_token)
+        self._send(None)
+
+    def _no_token(self):
+        raise RuntimeError('parser.token() is not available in a push parser')
+
+    def _send(self, tok):
+        try:
+            self.engine.send(tok)
+        except StopIteration:
+            self.done = True
+
+    # Parse the next token
+    def feed(self, tok):
+        if self.done:
+            raise RuntimeError('Parser has already finished')
+        self._send(tok)
+
+    # End the input and return the result
+    def finish(self):
+        while not self.done:
+            self._send(None)
+        return self.result
+
+# -----------------------------------------------------------------------------
+#                          === Grammar Representation ===
+#
+# The following functions, classes, and variables are used to represent and
+# manipulate the rules that make up a grammar.
+# -----------------------------------------------------------------------------
+
+# regex matching identifiers
+_is_identifier = re.compile(r'^[a-zA-Z0-9_-]+$')
+
+# -----------------------------------------------------------------------------
+# class Production:
+#
+# This class stores the raw information about a single production or grammar rule.
+# A grammar rule refers to a specification such as this:
+#
+#       expr : expr PLUS term
+#
+# Here are the basic attributes defined on all productions
+#
+#       name     - Name of the production.  For example 'expr'
+#       prod     - A list of symbols on the right side ['expr','PLUS','term']
+#       prec     - Production precedence level
+#       number   - Production number.
+#       func     - Function that executes on reduce
+#       file     - File where production function is defined
+#       lineno   - Line number where production function is defined
+#
+# The following attributes are defined or optional.
+#
+#       len       - Length of the production (number of symbols on right hand side)
+#       usyms     - Set of unique symbols found in the production
+#       positional - True if func is marked with @positional
+# -----------------------------------------------------------------------------
+
+class Production(object):
+    reduced = 0
+    def __init__(self, number, name, prod, precedence=('right', 0), func=None, file='', line=0):
+        self.name     = name
+        self.prod     = tuple(prod)
+        self.number   = number
+        self.func     = func
+        self.callable = None
+        self.positional = False
+        self.file     = file
+        self.line     = line
+        self.prec     = precedence
+
+        # Internal settings used during table construction
+
+        self.len  = len(self.prod)   # Length of the production
+
+        # Create a list of unique production symbols used in the production
+        self.usyms = []
+        for s in self.prod:
+            if s not in self.usyms:
+                self.usyms.append(s)
+
+        # List of all LR items for the production
+        self.lr_items = []
+        self.lr_next = None
+
+        # Create a string representation
+        if self.prod:
+            self.str = '%s -> %s' % (self.name, ' '.join(self.prod))
+        else:
+            self.str = '%s -> <empty>' % self.name
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'Production(' + str(self) + ')'
+
+    def __len__(self):
+        return len(self.prod)
+
+    def __nonzero__(self):
+        return 1
+
+    def __getitem__(self, index):
+        return self.prod[index]
+
+    # Return the nth lr_item from the production (or None if at the end)
+    def lr_item(self, n):
+        if n > len(self.prod):
+            return None
+        p = LRItem(self, n)
+        # Precompute the list of productions immediately following.
+        try:
+            p.lr_after = Prodnames[p.prod[n+1]]
+        except (IndexError, KeyError):
+            p.lr_after = []
+        try:
+            p.lr_before = p.prod[n-1]
+        except IndexError:
+            p.lr_before = None
+        return p
+
+    # Bind the production function name to a callable
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+            self.positional = getattr(self.callable, 'positional', False)
+            if self.positional:
+                self.callable = _positional_call(self.callable, self.len)
+
+# This class serves as a minimal standin for Production objects when
+# reading table data from files.   It only contains information
+# actually used by the LR parsing engine, plus some additional
+# debugging information.
+class MiniProduction(object):
+    def __init__(self, str, name, len, func, file, line):
+        self.name     = name
+        self.len      = len
+        self.func     = func
+        self.callable = None
+        self.positional = False
+        self.file     = file
+        self.line     = line
+        self.str      = str
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'MiniProduction(%s)' % self.str
+
+    # Bind the production function name to a callable
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+            self.positional = getattr(self.callable, 'positional', False)
+            if self.positional:
+                self.callable = _positional_call(self.callable, self.len)
+
+
+# -----------------------------------------------------------------------------
+# class LRItem
+#
+# This class represents a specific stage of parsing a production rule.  For
+# example:
+#
+#       expr : expr . PLUS term
+#
+# In the above, the "." represents the current location of the parse.  Here
+# basic attributes:
+#
+#       name       - Name of the production.  For example 'expr'
+#       prod       - A list of symbols on the right side ['expr','.', 'PLUS','term']
+#       number     - Production number.
+#
+#       lr_next      Next LR item. Example, if we are ' expr -> expr . PLUS term'
+#                    then lr_next refers to 'expr -> expr PLUS . term'
+#       lr_index   - LR item index (location of the ".") in the prod list.
+#       lookaheads - LALR lookahead symbols for this item
+#       len        - Length of the production (number of symbols on right hand side)
+#       lr_after    - List of all productions that immediately follow
+#       lr_before   - Grammar symbol immediately before
+# -----------------------------------------------------------------------------
+
+class LRItem(object):
+    def __init__(self, p, n):
+        self.name       = p.name
+        self.prod       = list(p.prod)
+        self.number     = p.number
+        self.lr_index   = n
+        self.lookaheads = {}
+        self.prod.insert(n, '.')
+        self.prod       = tuple(self.prod)
+        self.len        = len(self.prod)
+        self.usyms      = p.usyms
+
+    def __str__(self):
+        if self.prod:
+            s = '%s -> %s' % (self.name, ' '.join(self.prod))
+        else:
+            s = '%s -> <empty>' % self.name
+        return s
+
+    def __repr__(self):
+        return 'LRItem(' + str(self) + ')'
+
+# -----------------------------------------------------------------------------
+# rightmost_terminal()
+#
+# Return the rightmost terminal from a list of symbols.  Used in add_production()
+# -----------------------------------------------------------------------------
+def rightmost_terminal(symbols, terminals):
+    i = len(symbols) - 1
+    while i >= 0:
+        if symbols[i] in terminals:
+            return symbols[i]
+        i -= 1
+    return None
+
+# -----------------------------------------------------------------------------
+#                           === GRAMMAR CLASS ===
+#
+# The following class represents the contents of the specified grammar along
+# with various computed properties such as first sets, follow sets, LR items, etc.
+# This data is used for critical parts of the table generation process later.
+# -----------------------------------------------------------------------------
+
+class GrammarError(YaccError):
+    pass
+
+class Grammar(object):
+    def __init__(self, terminals):
+        self.Productions  = [None]  # A list of all of the productions.  The first
+                                    # entry is always reserved for the purpose of
+                                    # building an augmented grammar
+
+        self.Prodnames    = {}      # A dictionary mapping the names of nonterminals to a list of all
+                                    # productions of that nonterminal.
+
+        self.Prodmap      = {}      # A dictionary that is only used to detect duplicate
+                                    # productions.
+
+        self.Terminals    = {}      # A dictionary mapping the names of terminal symbols to a
+                                    # list of the rules where they are used.
+
+        for term in terminals:
+            self.Terminals[term] = []
+
+        self.Terminals['error'] = []
+
+        self.Nonterminals = {}      # A dictionary mapping names of nonterminals to a list
+                                    # of rule numbers where they are used.
+
+        self.First        = {}      # A dictionary of precomputed FIRST(x) symbols
+
+        self.Follow       = {}      # A dictionary of precomputed FOLLOW(x) symbols
+
+        self.Precedence   = {}      # Precedence rules for each terminal. Contains tuples of the
+                                    # form ('right',level) or ('nonassoc', level) or ('left',level)
+
+        self.UsedPrecedence = set() # Precedence rules that were actually used by the grammer.
+                                    # This is only used to provide error checking and to generate
+                                    # a warning about unused precedence rules.
+
+        self.Start = None           # Starting symbol for the grammar
+
+
+    def __len__(self):
+        return len(self.Productions)
+
+    def __getitem__(self, index):
+        return self.Productions[index]
+
+    # -----------------------------------------------------------------------------
+    # set_precedence()
+    #
+    # Sets the precedence for a given terminal. assoc is the associativity such as
+    # 'left','right', or 'nonassoc'.  level is a numeric level.
+    #
+    # -----------------------------------------------------------------------------
+
+    def set_precedence(self, term, assoc, level):
+        assert self.Productions == [None], 'Must call set_precedence() before add_production()'
+        if term in self.Precedence:
+            raise GrammarError('Precedence already specified for terminal %r' % term)
+        if assoc not in ['left', 'right', 'nonassoc']:
+            raise GrammarError("Associativity must be one of 'left','right', or 'nonassoc'")
+        self.Precedence[term] = (assoc, level)
+
+    # -----------------------------------------------------------------------------
+    # add_production()
+    #
+    # Given an action function, this function assembles a production rule and
+    # computes its precedence level.
+    #
+    # The production rule is supplied as a list of symbols.   For example,
+    # a rule such as 'expr : expr PLUS term' has a production name of 'expr' and
+    # symbols ['expr','PLUS','term'].
+    #
+    # Precedence is determined by the precedence of the right-most non-terminal
+    # or the precedence of a terminal specified by %prec.
+    #
+    # A variety of error checks are performed to make sure production symbols
+    # are valid and that %prec is used correctly.
+    # -----------------------------------------------------------------------------
+
+    def add_production(self, prodname, syms, func=None, file='', line=0):
+
+        if prodname in self.Terminals:
+            raise GrammarError('%s:%d: Illegal rule name %r. Already defined as a token' % (file, line, prodname))
+        if prodname == 'error':
+            raise GrammarError('%s:%d: Illegal rule name %r. error is a reserved word' % (file, line, prodname))
+        if not _is_identifier.match(prodname):
+            raise GrammarError('%s:%d: Illegal rule name %r' % (file, line, prodname))
+
+        # Look for literal tokens
+        for n, s in enumerate(syms):
+            if s[0] in "'\"":
+                try:
+                    c = eval(s)
+                    if (len(c) > 1):
+                        raise GrammarError('%s:%d: Literal token %s in rule %r may only be a single character' %
+                                           (file, line, s, prodname))
+                    if c not in self.Terminals:
+                        self.Terminals[c] = []
+                    syms[n] = c
+                    continue
+                except SyntaxError:
+                    pass
+            if not _is_identifier.match(s) and s != '%prec':
+                raise GrammarError('%s:%d: Illegal name %r in rule %r' % (file, line, s, prodname))
+
+        # Determine the precedence level
+        if '%prec' in syms:
+            if syms[-1] == '%prec':
+                raise GrammarError('%s:%d: Syntax error. Nothing follows %%prec' % (file, line))
+            if syms[-2] != '%prec':
+                raise GrammarError('%s:%d: Syntax error. %%prec can only appear at the end of a grammar rule' %
+                                   (file, line))
+            precname = syms[-1]
+            prodprec = self.Precedence.get(precname)
+            if not prodprec:
+                raise GrammarError('%s:%d: Nothing known about the precedence of %r' % (file, line, precname))
+            else:
+                self.UsedPrecedence.add(precname)
+            del syms[-2:]     # Drop %prec from the rule
+        else:
+            # If no %prec, precedence is determined by the rightmost terminal symbol
+            precname = rightmost_terminal(syms, self.Terminals)
+            prodprec = self.Precedence.get(precname, ('right', 0))
+
+        # See if the rule is already in the rulemap
+        map = '%s -> %s' % (prodname, syms)
+        if map in self.Prodmap:
+            m = self.Prodmap[map]
+            raise GrammarError('%s:%d: Duplicate rule %s. ' % (file, line, m) +
+                               'Previous definition at %s:%d' % (m.file, m.line))
+
+        # From this point on, everything is valid.  Create a new Production instance
+        pnumber  = len(self.Productions)
+        if prodname not in self.Nonterminals:
+            self.Nonterminals[prodname] = []
+
+        # Add the production number to Terminals and Nonterminals
+        for t in syms:
+            if t in self.Terminals:
+                self.Terminals[t].append(pnumber)
+            else:
+                if t not in self.Nonterminals:
+                    self.Nonterminals[t] = []
+                self.Nonterminals[t].append(pnumber)
+
+        # Create a production and add it to the list of productions
+        p = Production(pnumber, prodname, syms, prodprec, func, file, line)
+        self.Productions.append(p)
+        self.Prodmap[map] = p
+
+        # Add to the global productions list
+        try:
+            self.Prodnames[prodname].append(p)
+        except KeyError:
+            self.Prodnames[prodname] = [p]
+
+    # -----------------------------------------------------------------------------
+    # set_start()
+    #
+    # Sets the starting symbol and creates the augmented grammar.  Production
+    # rule 0 is S' -> start where start is the start symbol.
+    # -----------------------------------------------------------------------------
+
+    def set_start(self, start=None):
+        if not start:
+            start = self.Productions[1].name
+        if start not in self.Nonterminals:
+            raise GrammarError('start symbol %s undefined' % start)
+        self.Productions[0] = Production(0, "S'", [start])
+        self.Nonterminals[start].append(0)
+        self.Start = start
+
+    # -----------------------------------------------------------------------------
+    # find_unreachable()
+    #
+    # Find all of the nonterminal symbols that can't be reached from the starting
+    # symbol.  Returns a list of nonterminals that can't be reached.
+    # -----------------------------------------------------------------------------
+
+    def find_unreachable(self):
+
+        # Mark all symbols that are reachable from a symbol s
+        def mark_reachable_from(s):
+            if s in reachable:
+                return
+            reachable.add(s)
+            for p in self.Prodnames.get(s, []):
+                for r in p.prod:
+                    mark_reachable_from(r)
+
+        reachable = set()
+        mark_reachable_from(self.Productions[0].prod[0])
+        return [s for s in self.Nonterminals if s not in reachable]
+
+    # -----------------------------------------------------------------------------
+    # infinite_cycles()
+    #
+    # This function looks at the various parsing rules and tries to detect
+    # infinite recursion cycles (grammar rules where there is no possible way
+    # to derive a string of only terminals).
+    # -----------------------------------------------------------------------------
+
+    def infinite_cycles(self):
+        terminates = {}
+
+        # Terminals:
+        for t in self.Terminals:
+            terminates[t] = True
+
+        terminates['$end'] = True
+
+        # Nonterminals:
+
+        # Initialize to false:
+        for n in self.Nonterminals:
+            terminates[n] = False
+
+        # Then propagate termination until no change:
+        while True:
+            some_change = False
+            for (n, pl) in self.Prodnames.items():
+                # Nonterminal n terminates iff any of its productions terminates.
+                for p in pl:
+                    # Production p terminates iff all of its rhs symbols terminate.
+                    for s in p.prod:
+                        if not terminates[s]:
+                            # The symbol s does not terminate,
+                            # so production p does not terminate.
+                            p_terminates = False
+                            break
+                    else:
+                        # didn't break from the loop,
+                        # so every symbol s terminates
+                        # so production p terminates.
+                        p_terminates = True
+
+                    if p_terminates:
+                        # symbol n terminates!
+                        if not terminates[n]:
+                            terminates[n] = True
+                            some_change = True
+                        # Don't need to consider any more productions for this n.
+                        break
+
+            if not some_change:
+                break
+
+        infinite = []
+        for (s, term) in terminates.items():
+            if not term:
+                if s not in self.Prodnames and s not in self.Terminals and s != 'error':
+                    # s is used-but-not-defined, and we've already warned of that,
+                    # so it would be overkill to say that it's also non-terminating.
+                    pass
+                else:
+                    infinite.append(s)
+
+        return infinite
+
+    # -----------------------------------------------------------------------------
+    # undefined_symbols()
+    #
+    # Find all symbols that were used the grammar, but not defined as tokens or
+    # grammar rules.  Returns a list of tuples (sym, prod) where sym in the symbol
+    # and prod is the production where the symbol was used.
+    # -----------------------------------------------------------------------------
+    def undefined_symbols(self):
+        result = []
+        for p in self.Productions:
+            if not p:
+                continue
+
+            for s in p.prod:
+                if s not in self.Prodnames and s not in self.Terminals and s != 'error':
+                    result.append((s, p))
+        return result
+
+    # -----------------------------------------------------------------------------
+    # unused_terminals()
+    #
+    # Find all terminals that were defined, but not used by the grammar.  Returns
+    # a list of all symbols.
+    # -----------------------------------------------------------------------------
+    def unused_terminals(self):
+        unused_tok = []
+        for s, v in self.Terminals.items():
+            if s != 'error' and not v:
+                unused_tok.append(s)
+
+        return unused_tok
+
+    # ------------------------------------------------------------------------------
+    # unused_rules()
+    #
+    # Find all grammar rules that were defined,  but not used (maybe not reachable)
+    # Returns a list of productions.
+    # ------------------------------------------------------------------------------
+
+    def unused_rules(self):
+        unused_prod = []
+        for s, v in self.Nonterminals.items():
+            if not v:
+                p = self.Prodnames[s][0]
+                unused_prod.append(p)
+        return unused_prod
+
+    # -----------------------------------------------------------------------------
+    # unused_precedence()
+    #
+    # Returns a list of tuples (term,precedence) corresponding to precedence
+    # rules that were never used by the grammar.  term is the name of the terminal
+    # on which precedence was applied and precedence is a string such as 'left' or
+    # 'right' corresponding to the type of precedence.
+    # -----------------------------------------------------------------------------
+
+    def unused_precedence(self):
+        unused = []
+        for termname in self.Precedence:
+            if not (termname in self.Terminals or termname in self.UsedPrecedence):
+                unused.append((termname, self.Precedence[termname][0]))
+
+        return unused
+
+    # -------------------------------------------------------------------------
+    # _first()
+    #
+    # Compute the value of FIRST1(beta) where beta is a tuple of symbols.
+    #
+    # During execution of compute_first1, the result may be incomplete.
+    # Afterward (e.g., when called from compute_follow()), it will be complete.
+    # -------------------------------------------------------------------------
+    def _first(self, beta):
+
+        # We are computing First(x1,x2,x3,...,xn)
+        result = []
+        for x in beta:
+            x_produces_empty = False
+
+            # Add all the non-<empty> symbols of First[x] to the result.
+            for f in self.First[x]:
+                if f == '<empty>':
+                    x_produces_empty = True
+                else:
+                    if f not in result:
+                        result.append(f)
+
+            if x_produces_empty:
+                # We have to consider the next x in beta,
+                # i.e. stay in the loop.
+                pass
+            else:
+                # We don't have to consider any further symbols in beta.
+                break
+        else:
+            # There was no 'break' from the loop,
+            # so x_produces_empty was true for all x in beta,
+            # so beta produces empty as well.
+            result.append('<empty>')
+
+        return result
+
+    # -------------------------------------------------------------------------
+    # compute_first()
+    #
+    # Compute the value of FIRST1(X) for all symbols
+    # -------------------------------------------------------------------------
+    def compute_first(self):
+        if self.First:
+            return self.First
+
+        # Terminals:
+        for t in self.Terminals:
+            self.First[t] = [t]
+
+        self.First['$end'] = ['$end']
+
+        # Nonterminals:
+
+        # Initialize to the empty set:
+        for n in self.Nonterminals:
+            self.First[n] = []
+
+        # Then propagate symbols until no change:
+        while True:
+            some_change = False
+            for n in self.Nonterminals:
+                for p in self.Prodnames[n]:
+                    for f in self._first(p.prod):
+                        if f not in self.First[n]:
+                            self.First[n].append(f)
+                            some_change = True
+            if not some_change:
+                break
+
+        return self.First
+
+    # ---------------------------------------------------------------------
+    # compute_follow()
+    #
+    # Computes all of the follow sets for every non-terminal symbol.  The
+    # follow set is the set of all symbols that might follow a given
+    # non-terminal.  See the Dragon book, 2nd Ed. p. 189.
+    # ---------------------------------------------------------------------
+    def compute_follow(self, start=None):
+        # If already computed, return the result
+        if self.Follow:
+            return self.Follow
+
+        # If first sets not computed yet, do that first.
+        if not self.First:
+            self.compute_first()
+
+        # Add '$end' to the follow list of the start symbol
+        for k in self.Nonterminals:
+            self.Follow[k] = []
+
+        if not start:
+            start = self.Productions[1].name
+
+        self.Follow[start] = ['$end']
+
+        while True:
+            didadd = False
+            for p in self.Productions[1:]:
+                # Here is the production set
+                for i, B in enumerate(p.prod):
+                    if B in self.Nonterminals:
+                        # Okay. We got a non-terminal in a production
+                        fst = self._first(p.prod[i+1:])
+                        hasempty = False
+                        for f in fst:
+                            if f != '<empty>' and f not in self.Follow[B]:
+                                self.Follow[B].append(f)
+                                didadd = True
+                            if f == '<empty>':
+                                hasempty = True
+                        if hasempty or i == (len(p.prod)-1):
+                            # Add elements of follow(a) to follow(b)
+                            for f in self.Follow[p.name]:
+                                if f not in self.Follow[B]:
+                                    self.Follow[B].append(f)
+                                    didadd = True
+            if not didadd:
+                break
+        return self.Follow
+
+
+    # -----------------------------------------------------------------------------
+    # build_lritems()
+    #
+    # This function walks the list of productions and builds a complete set of the
+    # LR items.  The LR items are stored in two ways:  First, they are uniquely
+    # numbered and placed in the list _lritems.  Second, a linked list of LR items
+    # is built for each production.  For example:
+    #
+    #   E -> E PLUS E
+    #
+    # Creates the list
+    #
+    #  [E -> . E PLUS E, E -> E . PLUS E, E -> E PLUS . E, E -> E PLUS E . ]
+    # -----------------------------------------------------------------------------
+
+    def build_lritems(self):
+        for p in self.Productions:
+            lastlri = p
+            i = 0
+            lr_items = []
+            while True:
+                if i > len(p):
+                    lri = None
+                else:
+                    lri = LRItem(p, i)
+                    # Precompute the list of productions immediately following
+                    try:
+                        lri.lr_after = self.Prodnames[lri.prod[i+1]]
+                    except (IndexError, KeyError):
+                        lri.lr_after = []
+                    try:
+                        lri.lr_before = lri.prod[i-1]
+                    except IndexError:
+                        lri.lr_before = None
+
+                lastlri.lr_next = lri
+                if not lri:
+                    break
+                lr_items.append(lri)
+                lastlri = lri
+                i += 1
+            p.lr_items = lr_items
+
+# -----------------------------------------------------------------------------
+#                            == Class LRTable ==
+#
+# This basic class represents a basic table of LR parsing information.
+# Methods for generating the tables are not defined here.  They are defined
+# in the derived class LRGeneratedTable.
+# -----------------------------------------------------------------------------
+
+class VersionError(YaccError):
+    pass
+
+class LRTable(object):
+    def __init__(self):
+        self.lr_action = None
+        self.lr_goto = None
+        self.lr_compact = None
+        self.lr_productions = None
+        self.lr_method = None
+
+    def read_table(self, module):
+        if isinstance(module, types.ModuleType):
+            parsetab = module
+        else:
+            exec('import %s' % module)
+            parsetab = sys.modules[module]
+
+        if parsetab._tabversion != __tabversion__:
+            raise VersionError('yacc table file version is out of date')
+
+        if hasattr(parsetab, '_lr_compact'):
+            self.lr_compact = CompactTables.from_data(parsetab._lr_compact)
+        else:
+            self.lr_action = parsetab._lr_action
+            self.lr_goto = parsetab._lr_goto
+
+        self.lr_productions = []
+        for p in parsetab._lr_productions:
+            self.lr_productions.append(MiniProduction(*p))
+
+        self.lr_method = parsetab._lr_method
+        return parsetab._lr_signature
+
+    def read_pickle(self, filename):
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+
+        if not os.path.exists(filename):
+          raise ImportError
+
+        in_f = open(filename, 'rb')
+
+        tabversion = pickle.load(in_f)
+        if tabversion != __tabversion__:
+            raise VersionError('yacc table file version is out of date')
+        self.lr_method = pickle.load(in_f)
+        signature      = pickle.load(in_f)
+        self.lr_action = pickle.load(in_f)
+        self.lr_goto   = pickle.load(in_f)
+        productions    = pickle.load(in_f)
+
+        self.lr_productions = []
+        for p in productions:
+            self.lr_productions.append(MiniProduction(*p))
+
+        in_f.close()
+        return signature
+
+    # Bind all production function names to callable objects in pdict
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+
+# -----------------------------------------------------------------------------
+#                           === LR Generator ===
+#
+# The following classes and functions are used to generate LR parsing tables on
+# a grammar.
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# digraph()
+# traverse()
+#
+# The following two functions are used to compute set valued functions
+# of the form:
+#
+#     F(x) = F'(x) U U{F(y) | x R y}
+#
+# This is used to compute the values of Read() sets as well as FOLLOW sets
+# in LALR(1) generation.
+#
+# Inputs:  X    - An input set
+#          R    - A relation
+#          FP   - Set-valued function
+# ------------------------------------------------------------------------------
+
+def digraph(X, R, FP):
+    N = {}
+    for x in X:
+        N[x] = 0
+    stack = []
+    F = {}
+    for x in X:
+        if N[x] == 0:
+            traverse(x, N, stack, F, X, R, FP)
+    return F
+
+def traverse(x, N, stack, F, X, R, FP):
+    stack.append(x)
+    d = len(stack)
+    N[x] = d
+    F[x] = FP(x)             # F(X) <- F'(x)
+
+    rel = R(x)               # Get y's related to x
+    for y in rel:
+        if N[y] == 0:
+            traverse(y, N, stack, F, X, R, FP)
+        N[x] = min(N[x], N[y])
+        for a in F.get(y, []):
+            if a not in F[x]:
+                F[x].append(a)
+    if N[x] == d:
+        N[stack[-1]] = MAXINT
+        F[stack[-1]] = F[x]
+        element = stack.pop()
+        while element != x:
+            N[stack[-1]] = MAXINT
+            F[stack[-1]] = F[x]
+            element = stack.pop()
+
+class LALRError(YaccError):
+    pass
+
+# -----------------------------------------------------------------------------
+#                             == LRGeneratedTable ==
+#
+# This class implements the LR table generation algorithm.  There are no
+# public methods except for write()
+# -----------------------------------------------------------------------------
+
+class LRGeneratedTable(LRTable):
+    def __init__(self, grammar, method='LALR', log=None):
+        if method not in ['SLR', 'LALR']:
+            raise LALRError('Unsupported method %s' % method)
+
+        self.grammar = grammar
+        self.lr_method = method
+
+        # Set up the logger
+        if not log:
+            log = NullLogger()
+        self.log = log
+
+        # Internal attributes
+        self.lr_action     = {}        # Action table
+        self.lr_goto       = {}        # Goto table
+        self.lr_compact    = None      # Packed tables, made by write_table(compact=True)
+        self.lr_productions  = grammar.Productions    # Copy of grammar Production array
+        self.lr_goto_cache = {}        # Cache of computed gotos
+        self.lr0_cidhash   = {}        # Cache of closures
+
+        self._add_count    = 0         # Internal counter used to detect cycles
+
+        # Diagonistic information filled in by the table generator
+        self.sr_conflict   = 0
+        self.rr_conflict   = 0
+        self.conflicts     = []        # List of conflicts
+
+        self.sr_conflicts  = []
+        self.rr_conflicts  = []
+
+        # Build the tables
+        self.grammar.build_lritems()
+        self.grammar.compute_first()
+        self.grammar.compute_follow()
+        self.lr_parse_table()
+
+    # Compute the LR(0) closure operation on I, where I is a set of LR(0) items.
+
+    def lr0_closure(self, I):
+        self._add_count += 1
+
+        # Add everything in I to J
+        J = I[:]
+        didadd = True
+        while didadd:
+            didadd = False
+            for j in J:
+                for x in j.lr_after:
+                    if getattr(x, 'lr0_added', 0) == self._add_count:
+                        continue
+                    # Add B --> .G to J
+                    J.append(x.lr_next)
+                    x.lr0_added = self._add_count
+                    didadd = True
+
+        return J
+
+    # Compute the LR(0) goto function goto(I,X) where I is a set
+    # of LR(0) items and X is a grammar symbol.   This function is written
+    # in a way that guarantees uniqueness of the generated goto sets
+    # (i.e. the same goto set will never be returned as two different Python
+    # objects).  With uniqueness, we can later do fast set comparisons using
+    # id(obj) instead of element-wise comparison.
+
+    def lr0_goto(self, I, x):
+        # First we look for a previously cached entry
+        g = self.lr_goto_cache.get((id(I), x))
+        if g:
+            return g
+
+        # Now we generate the goto set in a way that guarantees uniqueness
+        # of the result
+
+        s = self.lr_goto_cache.get(x)
+        if not s:
+            s = {}
+            self.lr_goto_cache[x] = s
+
+        gs = []
+        for p in I:
+            n = p.lr_next
+            if n and n.lr_before == x:
+                s1 = s.get(id(n))
+                if not s1:
+                    s1 = {}
+                    s[id(n)] = s1
+                gs.append(n)
+                s = s1
+        g = s.get('$end')
+        if not g:
+            if gs:
+                g = self.lr0_closure(gs)
+                s['$end'] = g
+            else:
+                s['$end'] = gs
+        self.lr_goto_cache[(id(I), x)] = g
+        return g
+
+    # Compute the LR(0) sets of item function
+    def lr0_items(self):
+        C = [self.lr0_closure([self.grammar.Productions[0].lr_next])]
+        i = 0
+        for I in C:
+            self.lr0_cidhash[id(I)] = i
+            i += 1
+
+        # Loop over the items in C and each grammar symbols
+        i = 0
+        while i < len(C):
+            I = C[i]
+            i += 1
+
+            # Collect all of the symbols that could possibly be in the goto(I,X) sets
+            asyms = {}
+            for ii in I:
+                for s in ii.usyms:
+                    asyms[s] = None
+
+            for x in asyms:
+                g = self.lr0_goto(I, x)
+                if not g or id(g) in self.lr0_cidhash:
+                    continue
+                self.lr0_cidhash[id(g)] = len(C)
+                C.append(g)
+
+        return C
+
+    # -----------------------------------------------------------------------------
+    #                       ==== LALR(1) Parsing ====
+    #
+    # LALR(1) parsing is almost exactly the same as SLR except that instead of
+    # relying upon Follow() sets when performing reductions, a more selective
+    # lookahead set that incorporates the state of the LR(0) machine is utilized.
+    # Thus, we mainly just have to focus on calculating the lookahead sets.
+    #
+    # The method used here is due to DeRemer and Pennelo (1982).
+    #
+    # DeRemer, F. L., and T. J. Pennelo: "Efficient Computation of LALR(1)
+    #     Lookahead Sets", ACM Transactions on Programming Languages and Systems,
+    #     Vol. 4, No. 4, Oct. 1982, pp. 615-649
+    #
+    # Further details can also be found in:
+    #
+    #  J. Tremblay and P. Sorenson, "The Theory and Practice of Compiler Writing",
+    #      McGraw-Hill Book Company, (1985).
+    #
+    # -----------------------------------------------------------------------------
+
+    # -----------------------------------------------------------------------------
+    # compute_nullable_nonterminals()
+    #
+    # Creates a dictionary containing all of the non-terminals that might produce
+    # an empty production.
+    # -----------------------------------------------------------------------------
+
+    def compute_nullable_nonterminals(self):
+        nullable = set()
+        num_nullable = 0
+        while True:
+            for p in self.grammar.Productions[1:]:
+                if p.len == 0:
+                    nullable.add(p.name)
+                    continue
+                for t in p.prod:
+                    if t not in nullable:
+                        break
+                else:
+                    nullable.add(p.name)
+            if len(nullable) == num_nullable:
+                break
+            num_nullable = len(nullable)
+        return nullable
+
+    # -----------------------------------------------------------------------------
+    # find_nonterminal_trans(C)
+    #
+    # Given a set of LR(0) items, this functions finds all of the non-terminal
+    # transitions.    These are transitions in which a dot appears immediately before
+    # a non-terminal.   Returns a list of tuples of the form (state,N) where state
+    # is the state number and N is the nonterminal symbol.
+    #
+    # The input C is the set of LR(0) items.
+    # -----------------------------------------------------------------------------
+
+    def find_nonterminal_transitions(self, C):
+        trans = []
+        for stateno, state in enumerate(C):
+            for p in state:
+                if p.lr_index < p.len - 1:
+                    t = (stateno, p.prod[p.lr_index+1])
+                    if t[1] in self.grammar.Nonterminals:
+                        if t not in trans:
+                            trans.append(t)
+        return trans
+
+    # -----------------------------------------------------------------------------
+    # dr_relation()
+    #
+    # Computes the DR(p,A) relationships for non-terminal transitions.  The input
+    # is a tuple (state,N) where state is a number and N is a nonterminal symbol.
+    #
+    # Returns a list of terminals.
+    # -----------------------------------------------------------------------------
+
+    def dr_relation(self, C, trans, nullable):
+        dr_set = {}
+        state, N = trans
+        terms = []
+
+        g = self.lr0_goto(C[state], N)
+        for p in g:
+            if p.lr_index < p.len - 1:
+                a = p.prod[p.lr_index+1]
+                if a in self.grammar.Terminals:
+                    if a not in terms:
+                        terms.append(a)
+
+        # This extra bit is to handle the start state
+        if state == 0 and N == self.grammar.Productions[0].prod[0]:
+            terms.append('$end')
+
+        return terms
+
+    # -----------------------------------------------------------------------------
+    # reads_relation()
+    #
+    # Computes the READS() relation (p,A) READS (t,C).
+    # -----------------------------------------------------------------------------
+
+    def reads_relation(self, C, trans, empty):
+        # Look for empty transitions
+        rel = []
+        state, N = trans
+
+        g = self.lr0_goto(C[state], N)
+        j = self.lr0_cidhash.get(id(g), -1)
+        for p in g:
+            if p.lr_index < p.len - 1:
+                a = p.prod[p.lr_index + 1]
+                if a in empty:
+                    rel.append((j, a))
+
+        return rel
+
+    # -----------------------------------------------------------------------------
+    # compute_lookback_includes()
+    #
+    # Determines the lookback and includes relations
+    #
+    # LOOKBACK:
+    #
+    # This relation is determined by running the LR(0) state machine forward.
+    # For example, starting with a production "N : . A B C", we run it forward
+    # to obtain "N : A B C ."   We then build a relationship between this final
+    # state and the starting state.   These relationships are stored in a dictionary
+    # lookdict.
+    #
+    # INCLUDES:
+    #
+    # Computes the INCLUDE() relation (p,A) INCLUDES (p',B).
+    #
+    # This relation is used to determine non-terminal transitions that occur
+    # inside of other non-terminal transition states.   (p,A) INCLUDES (p', B)
+    # if the following holds:
+    #
+    #       B -> LAT, where T -> epsilon and p' -L-> p
+    #
+    # L is essentially a prefix (which may be empty), T is a suffix that must be
+    # able to derive an empty string.  State p' must lead to state p with the string L.
+    #
+    # -----------------------------------------------------------------------------
+
+    def compute_lookback_includes(self, C, trans, nullable):
+        lookdict = {}          # Dictionary of lookback relations
+        includedict = {}       # Dictionary of include relations
+
+        # Make a dictionary of non-terminal transitions
+        dtrans = {}
+        for t in trans:
+            dtrans[t] = 1
+
+        # Loop over all transitions and compute lookbacks and includes
+        for state, N in trans:
+            lookb = []
+            includes = []
+            for p in C[state]:
+                if p.name != N:
+                    continue
+
+                # Okay, we have a name match.  We now follow the production all the way
+                # through the state machine until we get the . on the right hand side
+
+                lr_index = p.lr_index
+                j = state
+                while lr_index < p.len - 1:
+                    lr_index = lr_index + 1
+                    t = p.prod[lr_index]
+
+                    # Check to see if this symbol and state are a non-terminal transition
+                    if (j, t) in dtrans:
+                        # Yes.  Okay, there is some chance that this is an includes relation
+                        # the only way to know for certain is whether the rest of the
+                        # production derives empty
+
+                        li = lr_index + 1
+                        while li < p.len:
+                            if p.prod[li] in self.grammar.Terminals:
+                                break      # No forget it
+                            if p.prod[li] not in nullable:
+                                break
+                            li = li + 1
+                        else:
+                            # Appears to be a relation between (j,t) and (state,N)
+                            includes.append((j, t))
+
+                    g = self.lr0_goto(C[j], t)               # Go to next set
+                    j = self.lr0_cidhash.get(id(g), -1)      # Go to next state
+
+                # When we get here, j is the final state, now we have to locate the production
+                for r in C[j]:
+                    if r.name != p.name:
+                        continue
+                    if r.len != p.len:
+                        continue
+                    i = 0
+                    # This look is comparing a production ". A B C" with "A B C ."
+                    while i < r.lr_index:
+                        if r.prod[i] != p.prod[i+1]:
+                            break
+                        i = i + 1
+                    else:
+                        lookb.append((j, r))
+            for i in includes:
+                if i not in includedict:
+                    includedict[i] = []
+                includedict[i].append((state, N))
+            lookdict[(state, N)] = lookb
+
+        return lookdict, includedict
+
+    # -----------------------------------------------------------------------------
+    # compute_read_sets()
+    #
+    # Given a set of LR(0) items, this function computes the read sets.
+    #
+    # Inputs:  C        =  Set of LR(0) items
+    #          ntrans   = Set of nonterminal transitions
+    #          nullable = Set of empty transitions
+    #
+    # Returns a set containing the read sets
+    # -----------------------------------------------------------------------------
+
+    def compute_read_sets(self, C, ntrans, nullable):
+        FP = lambda x: self.dr_relation(C, x, nullable)
+        R =  lambda x: self.reads_relation(C, x, nullable)
+        F = digraph(ntrans, R, FP)
+        return F
+
+    # -----------------------------------------------------------------------------
+    # compute_follow_sets()
+    #
+    # Given a set of LR(0) items, a set of non-terminal transitions, a readset,
+    # and an include set, this function computes the follow sets
+    #
+    # Follow(p,A) = Read(p,A) U U {Follow(p',B) | (p,A) INCLUDES (p',B)}
+    #
+    # Inputs:
+    #            ntrans     = Set of nonterminal transitions
+    #            readsets   = Readset (previously computed)
+    #            inclsets   = Include sets (previously computed)
+    #
+    # Returns a set containing the follow sets
+    # -----------------------------------------------------------------------------
+
+    def compute_follow_sets(self, ntrans, readsets, inclsets):
+        FP = lambda x: readsets[x]
+        R  = lambda x: inclsets.get(x, [])
+        F = digraph(ntrans, R, FP)
+        return F
+
+    # -----------------------------------------------------------------------------
+    # add_lookaheads()
+    #
+    # Attaches the lookahead symbols to grammar rules.
+    #
+    # Inputs:    lookbacks         -  Set of lookback relations
+    #            followset         -  Computed follow set
+    #
+    # This function directly attaches the lookaheads to productions contained
+    # in the lookbacks set
+    # -----------------------------------------------------------------------------
+
+    def add_lookaheads(self, lookbacks, followset):
+        for trans, lb in lookbacks.items():
+            # Loop over productions in lookback
+            for state, p in lb:
+                if state not in p.lookaheads:
+                    p.lookaheads[state] = []
+                f = followset.get(trans, [])
+                for a in f:
+                    if a not in p.lookaheads[state]:
+                        p.lookaheads[state].append(a)
+
+    # -----------------------------------------------------------------------------
+    # add_lalr_lookaheads()
+    #
+    # This function does all of the work of adding lookahead information for use
+    # with LALR parsing
+    # -----------------------------------------------------------------------------
+
+    def add_lalr_lookaheads(self, C):
+        # Determine all of the nullable nonterminals
+        nullable = self.compute_nullable_nonterminals()
+
+        # Find all non-terminal transitions
+        trans = self.find_nonterminal_transitions(C)
+
+        # Compute read sets
+        readsets = self.compute_read_sets(C, trans, nullable)
+
+        # Compute lookback/includes relations
+        lookd, included = self.compute_lookback_includes(C, trans, nullable)
+
+        # Compute LALR FOLLOW sets
+        followsets = self.compute_follow_sets(trans, readsets, included)
+
+        # Add all of the lookaheads
+        self.add_lookaheads(lookd, followsets)
+
+    # -----------------------------------------------------------------------------
+    # lr_parse_table()
+    #
+    # This function constructs the parse tables for SLR or LALR
+    # -----------------------------------------------------------------------------
+    def lr_parse_table(self):
+        Productions = self.grammar.Productions
+        Precedence  = self.grammar.Precedence
+        goto   = self.lr_goto         # Goto array
+        action = self.lr_action       # Action array
+        log    = self.log             # Logger for output
+
+        actionp = {}                  # Action production array (temporary)
+
+        log.info('Parsing method: %s', self.lr_method)
+
+        # Step 1: Construct C = { I0, I1, ... IN}, collection of LR(0) items
+        # This determines the number of states
+
+        C = self.lr0_items()
+
+        if self.lr_method == 'LALR':
+            self.add_lalr_lookaheads(C)
+
+        # Build the parser table, state by state
+        st = 0
+        for I in C:
+            # Loop over each production in I
+            actlist = []              # List of actions
+            st_action  = {}
+            st_actionp = {}
+            st_goto    = {}
+            log.info('')
+            log.info('state %d', st)
+            log.info('')
+            for p in I:
+                log.info('    (%d) %s', p.number, p)
+            log.info('')
+
+            for p in I:
+                    if p.len == p.lr_index + 1:
+                        if p.name == "S'":
+                            # Start symbol. Accept!
+                            st_action['$end'] = 0
+                            st_actionp['$end'] = p
+                        else:
+                            # We are at the end of a production.  Reduce!
+                            if self.lr_method == 'LALR':
+                                laheads = p.lookaheads[st]
+                            else:
+                                laheads = self.grammar.Follow[p.name]
+                            for a in laheads:
+                                actlist.append((a, p, 'reduce using rule %d (%s)' % (p.number, p)))
+                                r = st_action.get(a)
+                                if r is not None:
+                                    # Whoa. Have a shift/reduce or reduce/reduce conflict
+                                    if r > 0:
+                                        # Need to decide on shift or reduce here
+                                        # By default we favor shifting. Need to add
+                                        # some precedence rules here.
+
+                                        # Shift precedence comes from the token
+                                        sprec, slevel = Precedence.get(a, ('right', 0))
+
+                                        # Reduce precedence comes from rule being reduced (p)
+                                        rprec, rlevel = Productions[p.number].prec
+
+                                        if (slevel < rlevel) or ((slevel == rlevel) and (rprec == 'left')):
+                                            # We really need to reduce here.
+                                            st_action[a] = -p.number
+                                            st_actionp[a] = p
+                                            if not slevel and not rlevel:
+                                                log.info('  ! shift/reduce conflict for %s resolved as reduce', a)
+                                                self.sr_conflicts.append((st, a, 'reduce'))
+                                            Productions[p.number].reduced += 1
+                                        elif (slevel == rlevel) and (rprec == 'nonassoc'):
+                                            st_action[a] = None
+                                        else:
+                                            # Hmmm. Guess we'll keep the shift
+                                            if not rlevel:
+                                                log.info('  ! shift/reduce conflict for %s resolved as shift', a)
+                                                self.sr_conflicts.append((st, a, 'shift'))
+                                    elif r < 0:
+                                        # Reduce/reduce conflict.   In this case, we favor the rule
+                                        # that was defined first in the grammar file
+                                        oldp = Productions[-r]
+                                        pp = Productions[p.number]
+                                        if oldp.line > pp.line:
+                                            st_action[a] = -p.number
+                                            st_actionp[a] = p
+                                            chosenp, rejectp = pp, oldp
+                                            Productions[p.number].reduced += 1
+                                            Productions[oldp.number].reduced -= 1
+                                        else:
+                                            chosenp, rejectp = oldp, pp
+                                        self.rr_conflicts.append((st, chosenp, rejectp))
+                                        log.info('  ! reduce/reduce conflict for %s resolved using rule %d (%s)',
+                                                 a, st_actionp[a].number, st_actionp[a])
+                                    else:
+                                        raise LALRError('Unknown conflict in state %d' % st)
+                                else:
+                                    st_action[a] = -p.number
+                                    st_actionp[a] = p
+                                    Productions[p.number].reduced += 1
+                    else:
+                        i = p.lr_index
+                        a = p.prod[i+1]       # Get symbol right after the "."
+                        if a in self.grammar.Terminals:
+                            g = self.lr0_goto(I, a)
+                            j = self.lr0_cidhash.get(id(g), -1)
+                            if j >= 0:
+                                # We are in a shift state
+                                actlist.append((a, p, 'shift and go to state %d' % j))
+                                r = st_action.get(a)
+                                if r is not None:
+                                    # Whoa have a shift/reduce or shift/shift conflict
+                                    if r > 0:
+                                        if r != j:
+                                            raise LALRError('Shift/shift conflict in state %d' % st)
+                                    elif r < 0:
+                                        # Do a precedence check.
+                                        #   -  if precedence of reduce rule is higher, we reduce.
+                                        #   -  if precedence of reduce is same and left assoc, we reduce.
+                                        #   -  otherwise we shift
+
+                                        # Shift precedence comes from the token
+                                        sprec, slevel = Precedence.get(a, ('right', 0))
+
+                                        # Reduce precedence comes from the rule that could have been reduced
+                                        rprec, rlevel = Productions[st_actionp[a].number].prec
+
+                                        if (slevel > rlevel) or ((slevel == rlevel) and (rprec == 'right')):
+                                            # We decide to shift here... highest precedence to shift
+                                            Productions[st_actionp[a].number].reduced -= 1
+                                            st_action[a] = j
                                             st_actionp[a] = p
                                             if not rlevel:
                                                 log.info('  ! shift/reduce conflict for %s resolved as shift', a)
@@ -2672,198 +5077,785 @@ class LRGeneratedTable(LRTable):
                                                 log.info('  ! shift/reduce conflict for %s resolved as reduce', a)
                                                 self.sr_conflicts.append((st, a, 'reduce'))
 
-                                    else:
-                                        raise LALRError('Unknown conflict in state %d' % st)
-                                else:
-                                    st_action[a] = j
-                                    st_actionp[a] = p
+                                    else:
+                                        raise LALRError('Unknown conflict in state %d' % st)
+                                else:
+                                    st_action[a] = j
+                                    st_actionp[a] = p
+
+            # Print the actions associated with each terminal
+            _actprint = {}
+            for a, p, m in actlist:
+                if a in st_action:
+                    if p is st_actionp[a]:
+                        log.info('    %-15s %s', a, m)
+                        _actprint[(a, m)] = 1
+            log.info('')
+            # Print the actions that were not used. (debugging)
+            not_used = 0
+            for a, p, m in actlist:
+                if a in st_action:
+                    if p is not st_actionp[a]:
+                        if not (a, m) in _actprint:
+                            log.debug('  ! %-15s [ %s ]', a, m)
+                            not_used = 1
+                            _actprint[(a, m)] = 1
+            if not_used:
+                log.debug('')
+
+            # Construct the goto table for this state
+
+            nkeys = {}
+            for ii in I:
+                for s in ii.usyms:
+                    if s in self.grammar.Nonterminals:
+                        nkeys[s] = None
+            for n in nkeys:
+                g = self.lr0_goto(I, n)
+                j = self.lr0_cidhash.get(id(g), -1)
+                if j >= 0:
+                    st_goto[n] = j
+                    log.info('    %-30s shift and go to state %d', n, j)
+
+            action[st] = st_action
+            actionp[st] = st_actionp
+            goto[st] = st_goto
+            st += 1
+
+    # -----------------------------------------------------------------------------
+    # write()
+    #
+    # This function writes the LR parsing tables to a file
+    # -----------------------------------------------------------------------------
+
+    def write_table(self, tabmodule, outputdir='', signature='', compact=False):
+        if isinstance(tabmodule, types.ModuleType):
+            raise IOError("Won't overwrite existing tabmodule")
+
+        basemodulename = tabmodule.split('.')[-1]
+        filename = os.path.join(outputdir, basemodulename) + '.py'
+        try:
+            f = open(filename, 'w')
+
+            f.write('''
+# %s
+# This file is automatically generated. Do not edit.
+_tabversion = %r
+
+_lr_method = %r
+
+_lr_signature = %r
+    ''' % (os.path.basename(filename), __tabversion__, self.lr_method, signature))
+
+            # Change smaller to 0 to go back to original tables
+            smaller = 1
+
+            # Packed tables replace the action and goto dicts
+            if compact:
+                if self.lr_compact is None:
+                    self.lr_compact = CompactTables(self.lr_action, self.lr_goto)
+                f.write('\n_lr_compact = %r\n' % (self.lr_compact.data(),))
+
+            # Factor out names to try and make smaller
+            elif smaller:
+                items = {}
+
+                for s, nd in self.lr_action.items():
+                    for name, v in nd.items():
+                        i = items.get(name)
+                        if not i:
+                            i = ([], [])
+                            items[name] = i
+                        i[0].append(s)
+                        i[1].append(v)
+
+                f.write('\n_lr_action_items = {')
+                for k, v in items.items():
+                    f.write('%r:([' % k)
+                    for i in v[0]:
+                        f.write('%r,' % i)
+                    f.write('],[')
+                    for i in v[1]:
+                        f.write('%r,' % i)
+
+                    f.write(']),')
+                f.write('}\n')
+
+                f.write('''
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+''')
+
+            else:
+                f.write('\n_lr_action = { ')
+                for k, v in self.lr_action.items():
+                    f.write('(%r,%r):%r,' % (k[0], k[1], v))
+                f.write('}\n')
+
+            if compact:
+                pass                # Packed with the actions above
+            elif smaller:
+                # Factor out names to try and make smaller
+                items = {}
+
+                for s, nd in self.lr_goto.items():
+                    for name, v in nd.items():
+                        i = items.get(name)
+                        if not i:
+                            i = ([], [])
+                            items[name] = i
+                        i[0].append(s)
+                        i[1].append(v)
+
+                f.write('\n_lr_goto_items = {')
+                for k, v in items.items():
+                    f.write('%r:([' % k)
+                    for i in v[0]:
+                        f.write('%r,' % i)
+                    f.write('],[')
+                    for i in v[1]:
+                        f.write('%r,' % i)
+
+                    f.write(']),')
+                f.write('}\n')
+
+                f.write('''
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+''')
+            else:
+                f.write('\n_lr_goto = { ')
+                for k, v in self.lr_goto.items():
+                    f.write('(%r,%r):%r,' % (k[0], k[1], v))
+                f.write('}\n')
+
+            # Write production table
+            f.write('_lr_productions = [\n')
+            for p in self.lr_productions:
+                if p.func:
+                    f.write('  (%r,%r,%d,%r,%r,%d),\n' % (p.str, p.name, p.len,
+                                                          p.func, os.path.basename(p.file), p.line))
+                else:
+                    f.write('  (%r,%r,%d,None,None,None),\n' % (str(p), p.name, p.len))
+            f.write(']\n')
+            f.close()
+
+        except IOError as e:
+            raise
+
+
+    # -----------------------------------------------------------------------------
+    # pickle_table()
+    #
+    # This function pickles the LR parsing tables to a supplied file object
+    # -----------------------------------------------------------------------------
+
+    def pickle_table(self, filename, signature=''):
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        with open(filename, 'wb') as outf:
+            pickle.dump(__tabversion__, outf, pickle_protocol)
+            pickle.dump(self.lr_method, outf, pickle_protocol)
+            pickle.dump(signature, outf, pickle_protocol)
+            pickle.dump(self.lr_action, outf, pickle_protocol)
+            pickle.dump(self.lr_goto, outf, pickle_protocol)
 
-            # Print the actions associated with each terminal
-            _actprint = {}
-            for a, p, m in actlist:
-                if a in st_action:
-                    if p is st_actionp[a]:
-                        log.info('    %-15s %s', a, m)
-                        _actprint[(a, m)] = 1
-            log.info('')
-            # Print the actions that were not used. (debugging)
-            not_used = 0
-            for a, p, m in actlist:
-                if a in st_action:
-                    if p is not st_actionp[a]:
-                        if not (a, m) in _actprint:
-                            log.debug('  ! %-15s [ %s ]', a, m)
-                            not_used = 1
-                            _actprint[(a, m)] = 1
-            if not_used:
-                log.debug('')
+            outp = []
+            for p in self.lr_productions:
+                if p.func:
+                    outp.append((p.str, p.name, p.len, p.func, os.path.basename(p.file), p.line))
+                else:
+                    outp.append((str(p), p.name, p.len, None, None, None))
+            pickle.dump(outp, outf, pickle_protocol)
 
-            # Construct the goto table for this state
+# -----------------------------------------------------------------------------
+#                        === Generated parser code ===
+#
+# yacc(codegen=True) writes the parser for one grammar as a Python module
+# (parsecode.py by default) and parses with it in place of
+# parseopt_notrack().  There is one function for each rule, which takes the
+# right number of symbols off the stacks, calls the rule's p_ function and
+# looks up the goto state in a dict for the rule's nonterminal.  The action
+# dicts are the parser's, and a reduce by rule n calls rules[n].  For lexers
+# made with lex(kinds=True), the dicts are turned into lists indexed by kind
+# id and parse_kinds() is used in place of parse_types().  Debugging and
+# tracking still use the generic engine.
+#
+# The parsing loops are made from parsedebug() by ply/ygen.py, with the
+# REDUCE section replaced by the call to the rule's function.
+# -----------------------------------------------------------------------------
 
-            nkeys = {}
-            for ii in I:
-                for s in ii.usyms:
-                    if s in self.grammar.Nonterminals:
-                        nkeys[s] = None
-            for n in nkeys:
-                g = self.lr0_goto(I, n)
-                j = self.lr0_cidhash.get(id(g), -1)
-                if j >= 0:
-                    st_goto[n] = j
-                    log.info('    %-30s shift and go to state %d', n, j)
+_code_header = '''
+# %s
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = %r
 
-            action[st] = st_action
-            actionp[st] = st_actionp
-            goto[st] = st_goto
-            st += 1
+_lr_signature = %r
+
+import sys
+
+def make_parser(parser, pdict, yacc):
+    YaccSymbol = yacc.YaccSymbol
+    YaccProduction = yacc.YaccProduction
+    call_errorfunc = yacc.call_errorfunc
+    error_count = yacc.error_count
+
+'''
+
+_code_parse = '''
+    # Action lists indexed by kind id and the kind ids, for each list of kind names
+    kindrows = {}
+
+    def parse(input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        if not lexer:
+            # The lexer module is the one next to yacc
+            lexer = sys.modules[yacc.__name__[:-4] + 'lex'].lexer
+
+        if input is not None:
+            lexer.input(input)
+
+        if tokenfunc is not None:
+            return parse_types(lexer, tokenfunc, actions)
+
+        # If the lexer numbers its tokens, index the actions by kind id
+        if getattr(lexer, 'lexkindmode', False):
+            names = tuple(lexer.lexkindnames)
+            rows = kindrows.get(names)
+            if rows is None:
+                if names[:2] != ('$end', 'error'):
+                    raise ValueError("Kind names must start with '$end' and 'error'")
+                rows = kindrows[names] = ([[row.get(name) for name in names] + [None] for row in actions],
+                                          dict((name, n) for n, name in enumerate(names)))
+            return parse_kinds(lexer, lexer.token, rows[0], rows[1])
+        return parse_types(lexer, lexer.token, actions)
+
+'''
+
+# The parsing loops parse_types() and parse_kinds(), made from parsedebug()
+# by ply/ygen.py.  DO NOT EDIT THIS CODE DIRECTLY!
+
+#--! parsecode-start
+_code_loop = r'''
+    def parse_types(lexer, get_token, actions):
+        lookahead = None
+        lookaheadstack = []
+        defaulted_states = parser.defaulted_states
+        pslice = YaccProduction(None)
+        errorcount = 0
+
+        pslice.lexer = lexer
+        pslice.parser = parser
+        parser.token = get_token
+
+        statestack = [0]
+        parser.statestack = statestack
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack = [sym]
+        parser.symstack = symstack
+        pslice.stack = symstack
+        errtoken = None
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
+
+
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
+
+                # Check the action table
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
+
+
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
+
+
+                    symstack.append(lookahead)
+                    lookahead = None
+
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
+
+                if t < 0:
+                    # Reduce by the function for the rule, which returns the new state
+                    try:
+                        state = rules[-t](state, symstack, statestack, pslice)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)
+                        sym = pslice.slice[0]
+                        symstack.extend(pslice.slice[1:-1])
+                        statestack.pop()
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        sym.kind = 1
+                        sym.value = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        parser.errorok = False
+                    continue
+
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
+
+            if t is None:
+
+
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or parser.errorok:
+                    errorcount = error_count
+                    parser.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if parser.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        parser.state = state
+                        tok = call_errorfunc(parser.errorfunc, errtoken, parser)
+                        if parser.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
+
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
+
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
+
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]
+
+                continue
+
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
+
+
+    def parse_kinds(lexer, get_token, actions, kindids):
+        lookahead = None
+        lookaheadstack = []
+        defaulted_states = parser.defaulted_states
+        pslice = YaccProduction(None)
+        errorcount = 0
+
+        pslice.lexer = lexer
+        pslice.parser = parser
+        parser.token = get_token
+
+        statestack = [0]
+        parser.statestack = statestack
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack = [sym]
+        parser.symstack = symstack
+        pslice.stack = symstack
+        errtoken = None
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
+
+
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                        # Tokens put back may not come from the lexer
+                        if lookahead and not hasattr(lookahead, 'kind'):
+                            lookahead.kind = kindids.get(lookahead.type, -1)
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                        lookahead.kind = 0
+
+                # Check the action table
+                t = actions[state][lookahead.kind]
+            else:
+                t = defaulted_states[state]
+
+
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
 
-    # -----------------------------------------------------------------------------
-    # write()
-    #
-    # This function writes the LR parsing tables to a file
-    # -----------------------------------------------------------------------------
 
-    def write_table(self, tabmodule, outputdir='', signature=''):
-        if isinstance(tabmodule, types.ModuleType):
-            raise IOError("Won't overwrite existing tabmodule")
+                    symstack.append(lookahead)
+                    lookahead = None
 
-        basemodulename = tabmodule.split('.')[-1]
-        filename = os.path.join(outputdir, basemodulename) + '.py'
-        try:
-            f = open(filename, 'w')
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
 
-            f.write('''
-# %s
-# This file is automatically generated. Do not edit.
-_tabversion = %r
+                if t < 0:
+                    # Reduce by the function for the rule, which returns the new state
+                    try:
+                        state = rules[-t](state, symstack, statestack, pslice)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)
+                        sym = pslice.slice[0]
+                        symstack.extend(pslice.slice[1:-1])
+                        statestack.pop()
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        sym.kind = 1
+                        sym.value = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        parser.errorok = False
+                    continue
 
-_lr_method = %r
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+                    return result
 
-_lr_signature = %r
-    ''' % (os.path.basename(filename), __tabversion__, self.lr_method, signature))
+            if t is None:
 
-            # Change smaller to 0 to go back to original tables
-            smaller = 1
 
-            # Factor out names to try and make smaller
-            if smaller:
-                items = {}
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or parser.errorok:
+                    errorcount = error_count
+                    parser.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if parser.errorfunc:
+                        if errtoken and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        parser.state = state
+                        tok = call_errorfunc(parser.errorfunc, errtoken, parser)
+                        if parser.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            # p_error() may return a token without a kind id
+                            if tok and not hasattr(tok, 'kind'):
+                                tok.kind = kindids.get(tok.type, -1)
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if getattr(lexer, 'lexlineindex', None) is not None and hasattr(errtoken, 'lexpos'):
+                                sys.stderr.write('yacc: Syntax error at line %d, column %d, token=%s\n' % (
+                                    lexer.find_lineno(errtoken.lexpos), lexer.find_column(errtoken.lexpos), errtoken.type))
+                            elif lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
 
-                for s, nd in self.lr_action.items():
-                    for name, v in nd.items():
-                        i = items.get(name)
-                        if not i:
-                            i = ([], [])
-                            items[name] = i
-                        i[0].append(s)
-                        i[1].append(v)
+                else:
+                    errorcount = error_count
 
-                f.write('\n_lr_action_items = {')
-                for k, v in items.items():
-                    f.write('%r:([' % k)
-                    for i in v[0]:
-                        f.write('%r,' % i)
-                    f.write('],[')
-                    for i in v[1]:
-                        f.write('%r,' % i)
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
 
-                    f.write(']),')
-                f.write('}\n')
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
 
-                f.write('''
-_lr_action = {}
-for _k, _v in _lr_action_items.items():
-   for _x,_y in zip(_v[0],_v[1]):
-      if not _x in _lr_action:  _lr_action[_x] = {}
-      _lr_action[_x][_k] = _y
-del _lr_action_items
-''')
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
 
-            else:
-                f.write('\n_lr_action = { ')
-                for k, v in self.lr_action.items():
-                    f.write('(%r,%r):%r,' % (k[0], k[1], v))
-                f.write('}\n')
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
 
-            if smaller:
-                # Factor out names to try and make smaller
-                items = {}
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
 
-                for s, nd in self.lr_goto.items():
-                    for name, v in nd.items():
-                        i = items.get(name)
-                        if not i:
-                            i = ([], [])
-                            items[name] = i
-                        i[0].append(s)
-                        i[1].append(v)
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    t.kind = 1
 
-                f.write('\n_lr_goto_items = {')
-                for k, v in items.items():
-                    f.write('%r:([' % k)
-                    for i in v[0]:
-                        f.write('%r,' % i)
-                    f.write('],[')
-                    for i in v[1]:
-                        f.write('%r,' % i)
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    sym = symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]
 
-                    f.write(']),')
-                f.write('}\n')
+                continue
 
-                f.write('''
-_lr_goto = {}
-for _k, _v in _lr_goto_items.items():
-   for _x, _y in zip(_v[0], _v[1]):
-       if not _x in _lr_goto: _lr_goto[_x] = {}
-       _lr_goto[_x][_k] = _y
-del _lr_goto_items
-''')
-            else:
-                f.write('\n_lr_goto = { ')
-                for k, v in self.lr_goto.items():
-                    f.write('(%r,%r):%r,' % (k[0], k[1], v))
-                f.write('}\n')
+            # Call an error function here
+            raise RuntimeError('yacc: internal parser error!!!\n')
 
-            # Write production table
-            f.write('_lr_productions = [\n')
-            for p in self.lr_productions:
-                if p.func:
-                    f.write('  (%r,%r,%d,%r,%r,%d),\n' % (p.str, p.name, p.len,
-                                                          p.func, os.path.basename(p.file), p.line))
-                else:
-                    f.write('  (%r,%r,%d,None,None,None),\n' % (str(p), p.name, p.len))
-            f.write(']\n')
-            f.close()
+'''
+#--! parsecode-end
+
+# Code of the function that reduces by rule n, production p
+def _reduce_code(n, p, gotoname, positional):
+    plen = p.len
+    lines = ['def reduce_%d(state, symstack, statestack, pslice):' % n,
+             '    sym = YaccSymbol()',
+             '    sym.type = %r' % p.name,
+             '    sym.value = None']
+    if plen == 0:
+        lines.append('    pslice.slice = [sym]')
+    elif plen == 1:
+        lines.append('    targ = [sym, symstack.pop()]')
+        lines.append('    pslice.slice = targ')
+    else:
+        lines.append('    targ = symstack[%d:]' % (-plen-1))
+        lines.append('    targ[0] = sym')
+        lines.append('    pslice.slice = targ')
+        lines.append('    del symstack[%d:]' % -plen)
+    lines.append('    parser.state = state')
+    if positional:
+        args = ', '.join(['targ[%d].value' % i for i in range(1, plen+1)])
+        lines.append('    sym.value = %s(%s)' % (p.func, args))
+    else:
+        lines.append('    %s(pslice)' % p.func)
+    lines.append('    symstack.append(sym)')
+    if plen == 0:
+        lines.append('    state = %s[state]' % gotoname)
+        lines.append('    statestack.append(state)')
+    elif plen == 1:
+        lines.append('    state = %s[statestack[-2]]' % gotoname)
+        lines.append('    statestack[-1] = state')
+    else:
+        lines.insert(-1, '    del statestack[%d:]' % -plen)
+        lines.append('    state = %s[statestack[-1]]' % gotoname)
+        lines.append('    statestack.append(state)')
+    lines.append('    return state')
+    return ''.join(['        %s\n' % line for line in lines])
 
-        except IOError as e:
-            raise
+# -----------------------------------------------------------------------------
+# parser_code()
+#
+# Returns the source of a generated parser module for the tables of an
+# LRParser.  The module's make_parser(parser, pdict, yacc) returns a function
+# that is used like parser.parseopt_notrack().  pdict holds the p_ functions
+# and yacc is this module.
+# -----------------------------------------------------------------------------
 
+def parser_code(parser, filename='', signature=''):
+    if parser.compact:
+        action, goto = parser.compact.expand()
+    else:
+        action, goto = parser.action, parser.goto
+
+    out = [_code_header % (os.path.basename(filename), __tabversion__, signature)]
+
+    # Bind the rule functions by name
+    funcs = set(p.func for p in parser.productions if p.func)
+    for func in sorted(funcs):
+        out.append('    %s = pdict[%r]\n' % (func, func))
+
+    # One goto dict per nonterminal
+    gotos = {}
+    for state, row in goto.items():
+        for name, target in row.items():
+            gotos.setdefault(name, {})[state] = target
+    gotonames = {}
+    for n, name in enumerate(sorted(gotos)):
+        gotonames[name] = 'goto_%d' % n
+        out.append('    goto_%d = %r    # %s\n' % (n, gotos[name], name))
+
+    # One function per rule, in two versions for rules with and without @positional
+    for n, p in enumerate(parser.productions):
+        if not p.func:
+            continue
+        out.append('\n    # %s\n' % p.str)
+        out.append('    if getattr(%s, \'positional\', False):\n' % p.func)
+        out.append(_reduce_code(n, p, gotonames[p.name], True))
+        out.append('    else:\n')
+        out.append(_reduce_code(n, p, gotonames[p.name], False))
+
+    # The functions by rule number, and the action dicts, one per state
+    out.append('\n    rules = [\n')
+    for n, p in enumerate(parser.productions):
+        out.append('        %s,\n' % ('reduce_%d' % n if p.func else None))
+    out.append('    ]\n')
+    out.append('\n    actions = [\n')
+    for state in range(len(action)):
+        items = ['%r: %d' % (name, t) for name, t in sorted(action[state].items())]
+        out.append('        {%s},\n' % ', '.join(items))
+    out.append('    ]\n')
+    out.append(_code_parse)
+    out.append(_code_loop)
+    out.append('\n    return parse\n')
+    return ''.join(out)
 
-    # -----------------------------------------------------------------------------
-    # pickle_table()
-    #
-    # This function pickles the LR parsing tables to a supplied file object
-    # -----------------------------------------------------------------------------
+# -----------------------------------------------------------------------------
+# bind_parser_code()
+#
+# Makes a parser use generated code.  codemodule is the name of the generated
+# module or a module object.  The module is imported if it exists and was made
+# for the same grammar (any grammar if signature is None).  Otherwise new code
+# is made and, if outputdir is given, written there.  Sets parser.codegen and
+# returns the module.
+# -----------------------------------------------------------------------------
 
-    def pickle_table(self, filename, signature=''):
+def bind_parser_code(parser, codemodule, pdict, signature=None, outputdir=None):
+    code = None
+    if isinstance(codemodule, types.ModuleType):
+        code = codemodule
+    else:
         try:
-            import cPickle as pickle
+            exec('import %s' % codemodule)
+            code = sys.modules[codemodule]
+            if code._tabversion != __tabversion__:
+                code = None
+            elif signature is not None and code._lr_signature != signature:
+                code = None
         except ImportError:
-            import pickle
-        with open(filename, 'wb') as outf:
-            pickle.dump(__tabversion__, outf, pickle_protocol)
-            pickle.dump(self.lr_method, outf, pickle_protocol)
-            pickle.dump(signature, outf, pickle_protocol)
-            pickle.dump(self.lr_action, outf, pickle_protocol)
-            pickle.dump(self.lr_goto, outf, pickle_protocol)
+            pass
 
-            outp = []
-            for p in self.lr_productions:
-                if p.func:
-                    outp.append((p.str, p.name, p.len, p.func, os.path.basename(p.file), p.line))
-                else:
-                    outp.append((str(p), p.name, p.len, None, None, None))
-            pickle.dump(outp, outf, pickle_protocol)
+    if code is None:
+        filename = os.path.join(outputdir or '', codemodule.split('.')[-1]) + '.py'
+        source = parser_code(parser, filename, signature or '')
+        code = types.ModuleType(codemodule)
+        code.__file__ = filename
+        exec(compile(source, filename, 'exec'), code.__dict__)
+        parser.parseopt_notrack = code.make_parser(parser, pdict, sys.modules[__name__])
+        if outputdir is not None:
+            from .lex import _write_cache
+            _write_cache(filename, source)
+    else:
+        parser.parseopt_notrack = code.make_parser(parser, pdict, sys.modules[__name__])
+    parser.codegen = True
+    return code
 
 # -----------------------------------------------------------------------------
 #                            === INTROSPECTION ===
@@ -2926,6 +5918,70 @@ def parse_grammar(doc, file, line):
 
     return grammar
 
+# -----------------------------------------------------------------------------
+# _scan_redefinitions()
+#
+# Scans the source of a module for lines matching the regular expression
+# pattern, whose first group is a function name, and returns the source file
+# name and a list of (line, name, previous line) tuples for the names defined
+# more than once.  Returns None if there's no source.
+#
+# Results are remembered by file name, modification time and size, in memory
+# and in cachedir if one is given, so unchanged modules are not read again.
+# -----------------------------------------------------------------------------
+_source_scans = {}
+
+def _scan_redefinitions(module, pattern, cachedir=None):
+    key = cachefile = None
+    try:
+        filename = inspect.getsourcefile(module)
+        st = os.stat(filename)
+    except (TypeError, OSError):
+        filename = None
+    else:
+        key = (pattern.pattern, os.path.abspath(filename), st.st_mtime, st.st_size)
+        if key in _source_scans:
+            return filename, _source_scans[key]
+        if cachedir:
+            name = hashlib.sha1(repr(key[:2]).encode('utf-8')).hexdigest()
+            cachefile = os.path.join(cachedir, 'scan-%s.txt' % name)
+            try:
+                with open(cachefile) as f:
+                    saved, redefined = ast.literal_eval(f.read())
+                if saved == key:
+                    _source_scans[key] = redefined
+                    return filename, redefined
+            except Exception:
+                pass
+
+    try:
+        lines, linen = inspect.getsourcelines(module)
+    except IOError:
+        return None
+
+    counthash = {}
+    redefined = []
+    for linen, line in enumerate(lines):
+        linen += 1
+        m = pattern.match(line)
+        if m:
+            name = m.group(1)
+            prev = counthash.get(name)
+            if not prev:
+                counthash[name] = linen
+            else:
+                redefined.append((linen, name, prev))
+
+    if key:
+        _source_scans[key] = redefined
+    if cachefile:
+        from .lex import _write_cache
+        try:
+            _write_cache(cachefile, repr((key, redefined)))
+        except (IOError, OSError):
+            pass
+    return filename, redefined
+
 # -----------------------------------------------------------------------------
 # ParserReflect()
 #
@@ -2934,7 +5990,7 @@ def parse_grammar(doc, file, line):
 # etc.
 # -----------------------------------------------------------------------------
 class ParserReflect(object):
-    def __init__(self, pdict, log=None):
+    def __init__(self, pdict, log=None, cachedir=None):
         self.pdict      = pdict
         self.start      = None
         self.error_func = None
@@ -2942,6 +5998,8 @@ class ParserReflect(object):
         self.modules    = set()
         self.grammar    = []
         self.error      = False
+        self.cachedir   = cachedir      # Directory for saving source scans
+        self.timings    = []            # (validation pass, seconds) from validate_all()
 
         if log is None:
             self.log = PlyLogger(sys.stderr)
@@ -2958,12 +6016,11 @@ class ParserReflect(object):
 
     # Validate all of the information
     def validate_all(self):
-        self.validate_start()
-        self.validate_error_func()
-        self.validate_tokens()
-        self.validate_precedence()
-        self.validate_pfunctions()
-        self.validate_modules()
+        for check in (self.validate_start, self.validate_error_func, self.validate_tokens,
+                      self.validate_precedence, self.validate_pfunctions, self.validate_modules):
+            start = _clock()
+            check()
+            self.timings.append((check.__name__, _clock() - start))
         return self.error
 
     # Compute a signature over the grammar
@@ -2999,24 +6056,13 @@ class ParserReflect(object):
         fre = re.compile(r'\s*def\s+(p_[a-zA-Z_0-9]*)\(')
 
         for module in self.modules:
-            try:
-                lines, linen = inspect.getsourcelines(module)
-            except IOError:
+            scan = _scan_redefinitions(module, fre, self.cachedir)
+            if scan is None:
                 continue
-
-            counthash = {}
-            for linen, line in enumerate(lines):
-                linen += 1
-                m = fre.match(line)
-                if m:
-                    name = m.group(1)
-                    prev = counthash.get(name)
-                    if not prev:
-                        counthash[name] = linen
-                    else:
-                        filename = inspect.getsourcefile(module)
-                        self.log.warning('%s:%d: Function %s redefined. Previously defined on line %d',
-                                         filename, linen, name, prev)
+            filename, redefined = scan
+            for linen, name, prev in redefined:
+                self.log.warning('%s:%d: Function %s redefined. Previously defined on line %d',
+                                 filename, linen, name, prev)
 
     # Get the start symbol
     def get_start(self):
@@ -3153,17 +6199,22 @@ class ParserReflect(object):
             self.error = True
             return
 
+        files = {}
         for line, module, name, doc in self.pfuncs:
-            file = inspect.getsourcefile(module)
+            file = files.get(module)
+            if file is None:
+                file = files[module] = inspect.getsourcefile(module)
             func = self.pdict[name]
             if isinstance(func, types.MethodType):
                 reqargs = 2
             else:
                 reqargs = 1
-            if func.__code__.co_argcount > reqargs:
+            # Rules marked with @positional are checked against each production below
+            positional = getattr(func, 'positional', False)
+            if not positional and func.__code__.co_argcount > reqargs:
                 self.log.error('%s:%d: Rule %r has too many arguments', file, line, func.__name__)
                 self.error = True
-            elif func.__code__.co_argcount < reqargs:
+            elif not positional and func.__code__.co_argcount < reqargs:
                 self.log.error('%s:%d: Rule %r requires an argument', file, line, func.__name__)
                 self.error = True
             elif not func.__doc__:
@@ -3173,6 +6224,12 @@ class ParserReflect(object):
                 try:
                     parsed_g = parse_grammar(doc, file, line)
                     for g in parsed_g:
+                        syms = g[3]
+                        nvalues = syms.index('%prec') if '%prec' in syms else len(syms)
+                        if positional and not _takes_values(func, nvalues):
+                            self.log.error('%s:%d: Rule %r does not take %d values', file, g[1],
+                                           func.__name__, nvalues)
+                            self.error = True
                         grammar.append((name, g))
                 except SyntaxError as e:
                     self.log.error(str(e))
@@ -3205,6 +6262,61 @@ class ParserReflect(object):
 
         self.grammar = grammar
 
+# -----------------------------------------------------------------------------
+# @positional
+#
+# This decorator marks a grammar rule whose function is called with the values
+# of the symbols on the right hand side as arguments, and returns the value of
+# the left hand side, instead of getting a YaccProduction.  For example:
+#
+#     @positional
+#     def p_expr_plus(left, op, right):
+#         'expr : expr PLUS term'
+#         return left + right
+#
+# The function must take as many values as each of its productions has.  It
+# can't use the line number and position methods of YaccProduction.  Raising
+# SyntaxError works as it does in other rules.
+# -----------------------------------------------------------------------------
+
+def positional(f):
+    f.positional = True
+    return f
+
+# Returns a function called with the YaccProduction, like other rules, that
+# calls a function marked with @positional with the n values of the slice
+def _positional_call(func, n):
+    if n == 0:
+        def call(p):
+            p.slice[0].value = func()
+    elif n == 1:
+        def call(p):
+            targ = p.slice
+            targ[0].value = func(targ[1].value)
+    elif n == 2:
+        def call(p):
+            targ = p.slice
+            targ[0].value = func(targ[1].value, targ[2].value)
+    elif n == 3:
+        def call(p):
+            targ = p.slice
+            targ[0].value = func(targ[1].value, targ[2].value, targ[3].value)
+    else:
+        def call(p):
+            targ = p.slice
+            targ[0].value = func(*[s.value for s in targ[1:]])
+    return call
+
+# Returns True if a function marked with @positional can be called with n values
+def _takes_values(func, n):
+    code = func.__code__
+    nargs = code.co_argcount
+    if isinstance(func, types.MethodType):
+        nargs -= 1
+    if n < nargs - len(func.__defaults__ or ()):
+        return False
+    return n <= nargs or bool(code.co_flags & inspect.CO_VARARGS)
+
 # -----------------------------------------------------------------------------
 # yacc(module)
 #
@@ -3213,7 +6325,8 @@ class ParserReflect(object):
 
 def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, start=None,
          check_recursion=True, optimize=False, write_tables=True, debugfile=debug_file,
-         outputdir=None, debuglog=None, errorlog=None, picklefile=None):
+         outputdir=None, debuglog=None, errorlog=None, picklefile=None, cachedir=None, timing=False,
+         compact=False, codegen=False):
 
     if tabmodule is None:
         tabmodule = tab_module
@@ -3262,6 +6375,13 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
         if '.' not in tabmodule:
             tabmodule = pkg + '.' + tabmodule
 
+    # Name of the generated parser module, if any
+    if codegen is True:
+        codegen = code_module
+    if pkg and isinstance(codegen, str):
+        if '.' not in codegen:
+            codegen = pkg + '.' + codegen
+
 
 
     # Set start symbol if it's specified directly using an argument
@@ -3269,7 +6389,7 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
         pdict['start'] = start
 
     # Collect parser information from the dictionary
-    pinfo = ParserReflect(pdict, log=errorlog)
+    pinfo = ParserReflect(pdict, log=errorlog, cachedir=cachedir)
     pinfo.get_all()
 
     if pinfo.error:
@@ -3288,7 +6408,13 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
         if optimize or (read_signature == signature):
             try:
                 lr.bind_callables(pinfo.pdict)
-                parser = LRParser(lr, pinfo.error_func)
+                parser = LRParser(lr, pinfo.error_func, compact)
+                if codegen:
+                    try:
+                        bind_parser_code(parser, codegen, pinfo.pdict, None if optimize else signature,
+                                         outputdir if write_tables else None)
+                    except IOError as e:
+                        errorlog.warning("Couldn't create %r. %s" % (codegen, e))
                 parse = parser.parse
                 return parser
             except Exception as e:
@@ -3313,7 +6439,11 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
     errors = False
 
     # Validate the parser information
-    if pinfo.validate_all():
+    failed = pinfo.validate_all()
+    if timing:
+        for name, seconds in pinfo.timings:
+            errorlog.info('yacc: %s took %.2f ms', name, seconds * 1000)
+    if failed:
         raise YaccError('Unable to build parser')
 
     if not pinfo.error_func:
@@ -3475,7 +6605,7 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
     # Write the table file if requested
     if write_tables:
         try:
-            lr.write_table(tabmodule, outputdir, signature)
+            lr.write_table(tabmodule, outputdir, signature, compact)
         except IOError as e:
             errorlog.warning("Couldn't create %r. %s" % (tabmodule, e))
 
@@ -3488,7 +6618,14 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
 
     # Build the parser
     lr.bind_callables(pinfo.pdict)
-    parser = LRParser(lr, pinfo.error_func)
+    parser = LRParser(lr, pinfo.error_func, compact)
+
+    # Use generated parser code if requested
+    if codegen:
+        try:
+            bind_parser_code(parser, codegen, pinfo.pdict, signature, outputdir if write_tables else None)
+        except IOError as e:
+            errorlog.warning("Couldn't create %r. %s" % (codegen, e))
 
     parse = parser.parse
     return parser
@@ -8,6 +8,7 @@
 # yacc.py for further details.
 
 import os.path
+import re
 import shutil
 
 def get_source_range(lines, tag):
@@ -36,17 +37,220 @@ def filter_section(lines, tag):
             filtered_lines.append(line)
     return filtered_lines
 
+# The parsing functions come in one version for each kind of action table:
+# dicts keyed by token type, lists indexed by kind id (lex(kinds=True)) and
+# packed arrays (yacc(compact=True)).  In parsedebug() the code that differs
+# is written as an if/elif/else chain enclosed in TABLES markers, whose
+# conditions name the table they are for.  select_tables() keeps the body of
+# the clause for one table, or of the else clause.  Code enclosed in ANYTABLE
+# markers is only needed to choose between the tables, and is left out.
+# lgen.py uses the same functions with other markers and conditions.
+table_conditions = {'kindaction': 'kinds', 'compact': 'compact'}
+
+def select_tables(lines, table, tag='TABLES', anytag='ANYTABLE', conditions=table_conditions):
+    selected_lines = []
+    section = None
+    for line in filter_section(lines, anytag):
+        if line.strip().startswith('#--! %s' % tag):
+            if section is None:
+                section = []
+            else:
+                selected_lines.extend(select_clause(section, table, conditions))
+                section = None
+        elif section is not None:
+            section.append(line)
+        else:
+            selected_lines.append(line)
+    return selected_lines
+
+def select_clause(lines, table, conditions=table_conditions):
+    indent = lines[0][:len(lines[0]) - len(lines[0].lstrip())]
+    clauses = []
+    for line in lines:
+        code = line.strip()
+        if code and line[len(indent)] != ' ':
+            if code == 'else:':
+                clauses.append((None, []))
+            else:
+                condition = code.split(None, 1)[1].rstrip(':')
+                clauses.append((conditions[condition], []))
+        else:
+            clauses[-1][1].append(line[4:] if code else line)
+    for condition, body in clauses:
+        if condition == table:
+            return body
+    for condition, body in clauses:
+        if condition is None:
+            return body
+    return []
+
+# Removes the TABLES and ANYTABLE markers, leaving the code that works with any table
+def remove_markers(lines):
+    return [line for line in lines if not line.strip().startswith(('#--! TABLES', '#--! ANYTABLE'))]
+
+# Makes the push parser version of the parsing function.  The next token is
+# sent to it at a yield and the result is left in self.result.
+def make_push(lines):
+    push_lines = []
+    for line in lines:
+        code = line.strip()
+        indent = line[:len(line) - len(line.lstrip())]
+        if code.startswith('lookahead = get_token()'):
+            line = indent + 'lookahead = yield\n'
+        elif code == 'return result':
+            push_lines.append(indent + 'self.result = result\n')
+            line = indent + 'return\n'
+        push_lines.append(line)
+    return push_lines
+
+# Makes the version of the parsing function used by parse_many().  It is a
+# generator that parses each string of the iterable given as input on its own,
+# reusing the stacks and other objects, and yields the result or the exception
+# raised.
+many_start = """\
+        # Lexers from lex start each input in the same state and on the same line
+        restart = getattr(lexer, 'restart', None)
+        lexstate = getattr(lexer, 'lexstate', 'INITIAL')
+        lineno = getattr(lexer, 'lineno', 1)
+        endsym = YaccSymbol()
+        endsym.type = '$end'
+
+        for data in input:
+            try:
+                if restart:
+                    restart(data, lexstate, lineno)
+                else:
+                    lexer.input(data)
+                if tokenfunc is None:
+                    get_token = lexer.token
+                    self.token = get_token
+
+                # Start over with the state (0,$end)
+                del statestack[:]
+                statestack.append(0)
+                del symstack[:]
+                symstack.append(endsym)
+                del lookaheadstack[:]
+                lookahead = None
+                errtoken = None
+                errorcount = 0
+                self.errorok = True
+                state = 0
+
+"""
+
+many_end = """\
+            except Exception as e:
+                result = e
+            yield result
+"""
+
+def make_many(lines):
+    many_lines = []
+    for n, line in enumerate(lines):
+        code = line.strip()
+        if code == '# If input was supplied, pass to lexer':
+            continue
+        if code == 'if input is not None:' and lines[n+1].strip() == 'lexer.input(input)':
+            continue
+        if code == 'lexer.input(input)':
+            continue
+        if code == '# The start state is assumed to be (0,$end)':
+            break
+        many_lines.append(line)
+    many_lines.append(many_start)
+
+    for line in lines[n:]:
+        if line.strip() == 'while True:':
+            break
+        n += 1
+    for line in lines[n:]:
+        code = line.strip()
+        indent = line[:len(line) - len(line.lstrip())]
+        if code == 'return result':
+            line = indent + 'break\n'
+        elif code == 'return':
+            many_lines.append('        ' + indent + 'result = None\n')
+            line = indent + 'break\n'
+        many_lines.append(('        ' + line) if code else line)
+    many_lines.append(many_end)
+    return many_lines
+
+# Makes the parsing loops of the modules written by yacc(codegen=True).  They
+# are kept in yacc.py as the string _code_loop, which parser_code() copies into
+# each module.  The loop is the one from parseopt_notrack(), except that the
+# REDUCE section calls the function the module has for the rule.
+code_start = """\
+    def %s(lexer, get_token, actions%s):
+        lookahead = None
+        lookaheadstack = []
+        defaulted_states = parser.defaulted_states
+        pslice = YaccProduction(None)
+        errorcount = 0
+
+        pslice.lexer = lexer
+        pslice.parser = parser
+        parser.token = get_token
+
+        statestack = [0]
+        parser.statestack = statestack
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack = [sym]
+        parser.symstack = symstack
+        pslice.stack = symstack
+        errtoken = None
+        state = 0
+
+"""
+
+code_reduce = """\
+# Reduce by the function for the rule, which returns the new state
+try:
+    state = rules[-t](state, symstack, statestack, pslice)
+except SyntaxError:
+    # If an error was set. Enter error recovery state
+    lookaheadstack.append(lookahead)
+    sym = pslice.slice[0]
+    symstack.extend(pslice.slice[1:-1])
+    statestack.pop()
+    state = statestack[-1]
+    sym.type = 'error'
+    sym.kind = 1
+    sym.value = 'error'
+    lookahead = sym
+    errorcount = error_count
+    self.errorok = False
+continue
+"""
+
+def make_code(lines, name, params=''):
+    code_lines = [code_start % (name, params)]
+    for n, line in enumerate(lines):
+        if line.strip() == 'while True:':
+            break
+    reduce_section = False
+    for line in lines[n:]:
+        code = line.strip()
+        indent = line[:len(line) - len(line.lstrip())]
+        if code.startswith('#--! REDUCE'):
+            reduce_section = not reduce_section
+            if reduce_section:
+                code_lines.extend(indent + reduce_line if reduce_line.strip() else reduce_line
+                                  for reduce_line in code_reduce.splitlines(True))
+            continue
+        if not reduce_section:
+            code_lines.append(line)
+    return [re.sub(r'\bself\b', 'parser', line) for line in code_lines]
+
 def main():
     dirname = os.path.dirname(__file__)
     shutil.copy2(os.path.join(dirname, 'yacc.py'), os.path.join(dirname, 'yacc.py.bak'))
     with open(os.path.join(dirname, 'yacc.py'), 'r') as f:
         lines = f.readlines()
 
-    parse_start, parse_end = get_source_range(lines, 'parsedebug')
-    parseopt_start, parseopt_end = get_source_range(lines, 'parseopt')
-    parseopt_notrack_start, parseopt_notrack_end = get_source_range(lines, 'parseopt-notrack')
-
     # Get the original source
+    parse_start, parse_end = get_source_range(lines, 'parsedebug')
     orig_lines = lines[parse_start:parse_end]
 
     # Filter the DEBUG sections out
@@ -55,9 +259,31 @@ def main():
     # Filter the TRACKING sections out
     parseopt_notrack_lines = filter_section(parseopt_lines, 'TRACKING')
 
-    # Replace the parser source sections with updated versions
-    lines[parseopt_notrack_start:parseopt_notrack_end] = parseopt_notrack_lines
-    lines[parseopt_start:parseopt_end] = parseopt_lines
+    sections = [
+        ('parseopt', select_tables(parseopt_lines, 'dicts')),
+        ('parseopt-kinds', select_tables(parseopt_lines, 'kinds')),
+        ('parseopt-compact', select_tables(parseopt_lines, 'compact')),
+        ('parseopt-notrack', select_tables(parseopt_notrack_lines, 'dicts')),
+        ('parseopt-notrack-kinds', select_tables(parseopt_notrack_lines, 'kinds')),
+        ('parseopt-notrack-compact', select_tables(parseopt_notrack_lines, 'compact')),
+
+        # Turn parseopt into a generator for push parsers
+        ('parsepush', make_push(remove_markers(parseopt_lines))),
+
+        # Turn parseopt_notrack into a generator for parse_many()
+        ('parsemany', make_many(remove_markers(parseopt_notrack_lines))),
+
+        # The parsing loops of generated parser code
+        ('parsecode', ["_code_loop = r'''\n"] +
+                      make_code(select_tables(parseopt_notrack_lines, 'dicts'), 'parse_types') + ['\n'] +
+                      make_code(select_tables(parseopt_notrack_lines, 'kinds'), 'parse_kinds', ', kindids') + ["'''\n"]),
+    ]
+
+    # Replace the parser source sections with updated versions, from the
+    # end of the file back so that the earlier line numbers stay the same
+    ranges = [(get_source_range(lines, tag), section_lines) for tag, section_lines in sections]
+    for (start, end), section_lines in sorted(ranges, reverse=True):
+        lines[start:end] = section_lines
 
     lines = [line.rstrip()+'\n' for line in lines]
     with open(os.path.join(dirname, 'yacc.py'), 'w') as f:
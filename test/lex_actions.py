@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# lex_actions.py
+#
+# Built-in token actions: value conversion, reserved words, newline counting,
+# and discarded rules.  Tokens must be the same from token(), tokenize_all(),
+# the DFA engine, and a lexer read back from a lextab file.
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+reserved = {'if': 'IF', 'then': 'THEN', 'print': 'PRINT'}
+
+tokens = ['ID', 'NUMBER', 'FLOAT', 'STRING'] + list(reserved.values())
+
+literals = '=<'
+
+t_ignore  = ' \t'
+t_ID      = r'[a-z_][a-z0-9_]*'
+t_FLOAT   = r'\d+\.\d*'
+t_NUMBER  = r'\d+'
+t_STRING  = r'"[^"]*"'
+t_newline = r'\n+'
+
+def unquote(s):
+    return s[1:-1]
+
+token_actions = {
+    't_ID'      : lex.TokenAction(keywords=reserved),
+    't_FLOAT'   : lex.TokenAction(convert=float),
+    't_NUMBER'  : lex.TokenAction(convert=int),
+    't_STRING'  : lex.TokenAction(convert=unquote, newlines=True),
+    't_newline' : lex.TokenAction(newlines=True, discard=True),
+}
+
+def t_error(t):
+    t.lexer.skip(1)
+
+data = 'if x < 10 then\n  print "a\nb" 2.5\n\nprint x'
+
+lexer = lex.lex()
+lexer.input(data)
+result = [str(tok) for tok in lexer]
+for tok in result:
+    print(tok)
+
+lexer.lineno = 1
+print(result == [str(tok) for tok in lexer.tokenize_all(data)])
+
+dfalexer = lex.lex(engine='dfa')
+dfalexer.input(data)
+print(result == [str(tok) for tok in dfalexer])
+
+lex.lex(optimize=1, lextab='actiontab')
+tablexer = lex.lex(optimize=1, lextab='actiontab')
+tablexer.input(data)
+print(result == [str(tok) for tok in tablexer])
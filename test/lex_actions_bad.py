@@ -0,0 +1,31 @@
+# lex_actions_bad.py
+#
+# Bad token_actions entries
+
+import sys
+if ".." not in sys.path: sys.path.insert(0,"..")
+
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    ]
+
+t_ID = r'[a-z]+'
+t_SPACE = r'\s+'
+
+def t_NUMBER(t):
+    r'\d+'
+    return t
+
+token_actions = {
+    't_ID'     : lex.TokenAction(keywords={'if': 'IF'}),
+    't_NUMBER' : lex.TokenAction(convert=int),
+    't_SPACE'  : lex.TokenAction(newlines=True),
+}
+
+def t_error(t):
+    pass
+
+lex.lex()
@@ -0,0 +1,63 @@
+# -----------------------------------------------------------------------------
+# lex_aio.py
+#
+# Many input streams lexed at once with ply.aio.AsyncLexer
+# -----------------------------------------------------------------------------
+import sys
+import asyncio
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.aio
+
+tokens = (
+    'NAME','NUMBER','DIVIDE','COMMENT',
+    )
+
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_DIVIDE = r'/'
+t_ignore = ' \n'
+
+def t_COMMENT(t):
+    r'/\*(.|\n)*?\*/'
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+def message(n):
+    return ''.join('x%s %d / 2 /* c%d */\n' % ('y' * (i % 3), i, n) for i in range(n % 7 + 3))
+
+# Hands out data a few characters at a time, like a slow connection
+class Reader(object):
+    def __init__(self, data, step):
+        self.data = data
+        self.step = step
+
+    async def read(self, n):
+        await asyncio.sleep(0)
+        data, self.data = self.data[:self.step], self.data[self.step:]
+        return data
+
+async def lex_stream(n):
+    alexer = ply.aio.AsyncLexer(lexer.clone(), high_water=8)
+    feeder = asyncio.ensure_future(alexer.pump(Reader(message(n), n % 5 + 1)))
+    result = [(tok.type, tok.value) async for tok in alexer]
+    await feeder
+    return result
+
+async def main():
+    return await asyncio.gather(*[lex_stream(n) for n in range(200)])
+
+results = asyncio.run(main())
+
+bad = 0
+for n, result in enumerate(results):
+    lexer.input(message(n))
+    if result != [(tok.type, tok.value) for tok in lexer]:
+        bad += 1
+print(len(results), bad)
+print(results[7][:5])
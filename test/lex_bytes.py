@@ -0,0 +1,82 @@
+# -----------------------------------------------------------------------------
+# lex_bytes.py
+#
+# Lexing bytes, bytearray, and mmap input
+# -----------------------------------------------------------------------------
+import sys
+import os
+import mmap
+import tempfile
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','STRING',
+    )
+
+states = (('str', 'exclusive'),)
+
+literals = '=;'
+
+t_NAME   = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_ignore = " \t"
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_begin_str(t):
+    r'"'
+    t.lexer.begin('str')
+
+def t_str_STRING(t):
+    r'[^"]+'
+    return t
+
+def t_str_end(t):
+    r'"'
+    t.lexer.begin('INITIAL')
+
+def t_error(t):
+    print("Illegal character %r" % t.value[:1])
+    t.lexer.skip(1)
+
+t_str_error = t_error
+t_str_ignore = ''
+
+data = b'name = "data \x01 file";\nsize = 42 ?;'
+
+def show(lexer, source):
+    lexer.lineno = 1
+    lexer.input(source)
+    for tok in lexer:
+        print(tok)
+
+lexer = lex.lex()
+show(lexer, data)
+show(lexer, bytearray(b'x=1;'))
+show(lexer, 'y=2;')
+
+fd, filename = tempfile.mkstemp()
+try:
+    os.write(fd, data)
+    os.close(fd)
+    with open(filename, 'rb') as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        lexer.lineno = 1
+        lexer.input(m)
+        print(len(list(lexer)))
+        m.close()
+finally:
+    os.remove(filename)
+
+# Tables read back from a lextab file must also work with bytes
+lex.lex(optimize=1, lextab="bytestab")
+lexer = lex.lex(optimize=1, lextab="bytestab")
+show(lexer, b'z=3;')
@@ -0,0 +1,126 @@
+# -----------------------------------------------------------------------------
+# lex_cache.py
+#
+# Lexers saved in and restored from a cache directory
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import os
+import re
+import shutil
+import tempfile
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','PLUS','EQUALS','IF',
+    )
+
+literals = ';'
+
+t_PLUS = r'\+'
+t_EQUALS = r'='
+t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_ignore = " \t"
+
+token_actions = {
+    't_NAME' : lex.TokenAction(keywords={'if' : 'IF'}),
+}
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+# Count the times the specification is validated
+validated = []
+validate_all = lex.LexerReflect.validate_all
+def counting_validate_all(self):
+    validated.append(True)
+    return validate_all(self)
+lex.LexerReflect.validate_all = counting_validate_all
+
+def entries():
+    return len([name for name in os.listdir(cachedir) if name.startswith('lex-')])
+
+class ListLogger(object):
+    def __init__(self):
+        self.lines = []
+    def info(self, msg, *args, **kwargs):
+        self.lines.append(msg % args)
+    debug = warning = error = critical = info
+
+def run(lexer):
+    lexer.input("if x = 3 + y4;")
+    return [str(t) for t in lexer]
+
+cachedir = os.path.join(tempfile.mkdtemp(), 'cache')
+try:
+    first = run(lex.lex(cachedir=cachedir))
+    print(len(validated), entries())
+
+    lexer = lex.lex(cachedir=cachedir)
+    print(len(validated), run(lexer) == first, lexer.lexoptimize)
+
+    # A different specification gets its own entry
+    lex.lex(cachedir=cachedir, reflags=int(re.VERBOSE) | re.IGNORECASE)
+    print(len(validated), entries())
+
+    # A damaged entry is built again
+    for name in os.listdir(cachedir):
+        with open(os.path.join(cachedir, name), 'w') as f:
+            f.write('_tabversion = (')
+    print(run(lex.lex(cachedir=cachedir)) == first, len(validated))
+    print(run(lex.lex(cachedir=cachedir, engine='dfa')) == first, len(validated))
+
+    # With debug, the lexer is built again to list the rules and master regexs
+    log = ListLogger()
+    print(run(lex.lex(cachedir=cachedir, debug=True, debuglog=log)) == first, len(validated))
+    print(any('MASTER REGEXS' in line for line in log.lines))
+
+    # Errors in the specification are reported before the cache is looked at
+    class BadAction(object):
+        tokens = ('WORD',)
+        t_WORD = r'[a-z]+'
+        token_actions = {'t_WORD' : int}
+
+    class Converter(object):
+        def __call__(self, t):
+            return t
+
+    class BadRule(object):
+        tokens = ('ID',)
+        t_ID = Converter()
+
+    for spec in (BadAction(), BadRule()):
+        log = ListLogger()
+        try:
+            lex.lex(object=spec, cachedir=cachedir, errorlog=log)
+        except SyntaxError as e:
+            print(e, entries())
+            for line in log.lines:
+                print(line)
+
+    # A converter that can't be found by its name isn't saved
+    class Lambda(object):
+        tokens = ('NUM',)
+        t_NUM = r'\d+'
+        token_actions = {'t_NUM' : lex.TokenAction(convert=lambda value: int(value) * 2)}
+
+    for n in range(2):
+        log = ListLogger()
+        lexer = lex.lex(object=Lambda(), cachedir=cachedir, errorlog=log)
+        lexer.input('21')
+        print([t.value for t in lexer], entries())
+        for line in log.lines:
+            print(line)
+    outputdir = os.path.dirname(cachedir)
+    lex.lex(object=Lambda(), optimize=True, lextab='lambdatab', outputdir=outputdir, errorlog=lex.NullLogger())
+    print(os.path.exists(os.path.join(outputdir, 'lambdatab.py')))
+finally:
+    lex.LexerReflect.validate_all = validate_all
+    shutil.rmtree(os.path.dirname(cachedir))
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# lex_columns.py
+#
+# Bulk tokenization into columnar arrays with states, literals, ignored
+# characters, and rule functions.
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','PLUS','COMMENT',
+    )
+
+states = (('comment', 'exclusive'),)
+
+literals = '()'
+
+t_PLUS = r'\+'
+t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_ignore = " \t"
+t_ignore_hash = r'\#.*'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_begin_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_COMMENT(t):
+    r'(.|\n)*?\*/'
+    t.lexer.lineno += t.value.count('\n')
+    t.lexer.begin('INITIAL')
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+t_comment_error = t_error
+t_comment_ignore = ''
+
+lexer = lex.lex()
+data = "x + (12 + y) # ignored\n/* a\nb */ z $ 7"
+cols = lexer.tokenize_all(data)
+print(len(cols))
+for n in range(len(cols)):
+    print("%s %r %d %d %d" % (cols.type(n), cols.value(n), cols.starts[n], cols.ends[n], cols.linenos[n]))
+print(list(cols.kinds) == [lexer.lexkinds[cols.type(n)] for n in range(len(cols))])
+
+lexer.lineno = 1
+lexer.input(data)
+print([str(t) for t in lexer] == [str(t) for t in cols])
@@ -0,0 +1,62 @@
+# -----------------------------------------------------------------------------
+# lex_compact.py
+#
+# Compact tokens with interned values and a subclass that adds an attribute.
+# Only the values of string rules are interned.
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','STRING',
+    'PLUS','EQUALS',
+    )
+
+t_PLUS    = r'\+'
+t_EQUALS  = r'='
+t_NAME    = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_STRING(t):
+    r'"[^"]*"'
+    return t
+
+t_ignore = " \t"
+
+def t_error(t):
+    t.lexer.skip(1)
+
+class SpanToken(lex.CompactLexToken):
+    __slots__ = ('endlexpos',)
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+data = "x = 3 + xy\nxy + x"
+
+lexer = lex.lex(compact=True)
+lexer.input(data)
+toks = list(lexer)
+for tok in toks:
+    print(tok)
+print(hasattr(toks[0], '__dict__'))
+print(toks[4].value is toks[5].value)
+print(toks[3].value is toks[6].value)
+
+lexer.input('"ab" "ab"')
+toks = list(lexer)
+print(toks[0].value == toks[1].value, toks[0].value is toks[1].value)
+
+lexer = lex.lex(compact=True, tokenclass=SpanToken)
+lexer.input(data)
+for tok in lexer:
+    tok.endlexpos = tok.lexpos + len(str(tok.value))
+    print("%s %d %d" % (tok.type, tok.lexpos, tok.endlexpos))
@@ -0,0 +1,109 @@
+# -----------------------------------------------------------------------------
+# lex_dfa.py
+#
+# The DFA engine must produce the same tokens as the re module, including
+# rule priority, alternation order, lazy repeats, and rules that fall back
+# to the re module.
+# -----------------------------------------------------------------------------
+import sys
+import re
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'KEY','PAIR','NAME','NUMBER','HEX','SHORT','COMMENT','SIGNED','WORD',
+    )
+
+literals = '=;'
+
+t_ignore = " \t\n"
+
+def t_PAIR(t):
+    r'(?P<left>[a-z]+):(?P<right>[a-z]+)'
+    t.value = (t.lexer.lexmatch.group('left'), t.lexer.lexmatch.group('right'))
+    return t
+
+def t_SIGNED(t):
+    r'-?\d+(?=!)'
+    return t
+
+def t_KEY(t):
+    r'a|ab'
+    return t
+
+def t_SHORT(t):
+    r'x{2,3}?'
+    return t
+
+t_COMMENT = r'/\*(.|\n)*?\*/'
+t_HEX     = r'0x[0-9a-fA-F]{1,4}'
+t_NUMBER  = r'\d+'
+t_NAME    = r'[a-zA-Z_]\w*'
+t_WORD    = r'[^\x00-\x7f]+'
+
+def t_error(t):
+    t.lexer.skip(1)
+
+data = u'ab abc = 0x1f2a7; xxxxx /* one */ /* two */ key:val 12! 3 End \u00e9\u00e9t $'
+
+# Prints a token as str() does, without the u prefix of Python 2 strings
+def show(tok):
+    value = tok.value
+    if isinstance(value, tuple):
+        value = tuple(str(v) for v in value)
+    elif not isinstance(value, int):
+        value = str(value)
+    return 'LexToken(%s,%r,%d,%d)' % (tok.type, value, tok.lineno, tok.lexpos)
+
+relexer = lex.lex(engine='re')
+dfalexer = lex.lex(engine='dfa')
+print([isinstance(sc, lex._DFA) for sc, findex in dfalexer.lexstatedispatch['INITIAL'].default])
+
+relexer.input(data)
+result = [str(tok) for tok in relexer]
+dfalexer.input(data)
+for tok in dfalexer:
+    if tok.type == 'WORD':
+        tok.value = len(tok.value)
+    print(show(tok))
+
+dfalexer.input(data)
+print(result == [str(tok) for tok in dfalexer])
+
+if sys.version_info[0] >= 3:
+    bdata = data.replace(u'\u00e9', u'').encode('latin-1')
+    relexer.input(bdata)
+    dfalexer.input(bdata)
+    print([str(tok) for tok in relexer] == [str(tok) for tok in dfalexer])
+else:
+    print(True)
+
+# Case-insensitive rules, from reflags and from a scoped flag.  Scoped flags
+# need Python 3.6 or later.
+def case_tokens(keyword, reflags):
+    class Spec(object):
+        tokens = ('UPPER', 'IDENT')
+
+        def t_space(self, t):
+            r'\s+'
+
+        @lex.TOKEN(keyword)
+        def t_UPPER(self, t):
+            return t
+
+        t_IDENT = r'[a-zA-Z]+'
+
+    result = []
+    for engine in ('re', 'dfa'):
+        lexer = lex.lex(object=Spec(), reflags=reflags, engine=engine, errorlog=lex.NullLogger())
+        lexer.input('End endless eNd')
+        result.append([(tok.type, tok.value) for tok in lexer])
+    return result[0], result[0] == result[1], isinstance(lexer.lexstatedispatch['INITIAL'].default[0][0], lex._DFA)
+
+flagged = case_tokens('end', int(re.VERBOSE) | re.IGNORECASE)
+print(flagged)
+if sys.version_info >= (3, 6):
+    print(case_tokens('(?i:end)', int(re.VERBOSE)) == flagged)
+else:
+    print(True)
@@ -0,0 +1,112 @@
+# -----------------------------------------------------------------------------
+# lex_dispatch.py
+#
+# Rules whose first characters overlap, optional prefixes, case-insensitive
+# rules, lookaheads, and non-ASCII input.  The lexer should produce the same
+# tokens with and without first character dispatch.
+# -----------------------------------------------------------------------------
+import sys
+import re
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NUMBER','FLOAT','NAME','SIGNED','ARROW','MINUS','WORD','STRING',
+    )
+
+states = (('quote', 'exclusive'),)
+
+literals = '+=;'
+
+t_ignore = " \t\n"
+
+def t_FLOAT(t):
+    r'\d*\.\d+'
+    return t
+
+def t_SIGNED(t):
+    r'-?\d+(?=!)'
+    return t
+
+t_NUMBER = r'\d+'
+t_ARROW  = r'->'
+t_MINUS  = r'-'
+t_NAME   = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+def t_WORD(t):
+    r'[^\x00-\x7f]+'
+    t.value = len(t.value)
+    return t
+
+def t_begin_quote(t):
+    r'"'
+    t.lexer.begin('quote')
+
+def t_quote_STRING(t):
+    r'[^"]+'
+    return t
+
+def t_quote_end(t):
+    r'"'
+    t.lexer.begin('INITIAL')
+
+t_quote_ignore = ''
+
+def t_error(t):
+    print("Illegal character %r" % str(t.value[0]))
+    t.lexer.skip(1)
+
+t_quote_error = t_error
+
+# Prints a token as str() does, without the u prefix of Python 2 strings
+def show(tok):
+    value = tok.value
+    if not isinstance(value, int):
+        value = str(value)
+    return 'LexToken(%s,%r,%d,%d)' % (tok.type, value, tok.lineno, tok.lexpos)
+
+lexer = lex.lex()
+data = u'x = .5 + 3.25 - 12 -4! 7!; SeLeCt selection "a -> b" ->\u00e9t\u00e9\u00e9 $ 1'
+
+lexer.input(data)
+result = [show(tok) for tok in lexer]
+for tok in result:
+    print(tok)
+
+# Try every master regex at every position instead
+for state, lre in lexer.lexstatere.items():
+    lexer.lexstatedispatch[state] = lex._Dispatch(lre)
+lexer.begin('INITIAL')
+lexer.input(data)
+print(result == [show(tok) for tok in lexer])
+
+# Case-insensitive rules, from reflags and from a scoped flag.  Scoped flags
+# need Python 3.6 or later.
+def case_tokens(keyword, reflags):
+    class Spec(object):
+        tokens = ('KEYWORD', 'IDENT')
+
+        def t_space(self, t):
+            r'\s+'
+
+        @lex.TOKEN(keyword)
+        def t_KEYWORD(self, t):
+            return t
+
+        t_IDENT = r'[a-zA-Z]+'
+
+    lexer = lex.lex(object=Spec(), reflags=reflags, errorlog=lex.NullLogger())
+    lexer.input('SeLeCt selection')
+    result = [(tok.type, tok.value) for tok in lexer]
+    for state, lre in lexer.lexstatere.items():
+        lexer.lexstatedispatch[state] = lex._Dispatch(lre)
+    lexer.input('SeLeCt selection')
+    return result, result == [(tok.type, tok.value) for tok in lexer]
+
+flagged = case_tokens('select', int(re.VERBOSE) | re.IGNORECASE)
+print(flagged)
+if sys.version_info >= (3, 6):
+    print(case_tokens('(?i:select)', int(re.VERBOSE)) == flagged)
+else:
+    print(True)
@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# lex_feed.py
+#
+# Input pushed to the lexer with feed()
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','DIVIDE','COMMENT','DOTS','DOT',
+    )
+
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_DIVIDE = r'/'
+t_DOTS = r'\.\.\.'
+t_DOT = r'\.'
+t_ignore = ' '
+
+def t_COMMENT(t):
+    r'/\*(.|\n)*?\*/'
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+# Ask for more input once, at the first end of input
+eofs = []
+def t_eof(t):
+    eofs.append(t.lexpos)
+    if len(eofs) == 1:
+        raise lex.NeedInput()
+    return None
+
+lexer = lex.lex()
+lexer.input_feed()
+
+def pull(data):
+    if data is None:
+        lexer.feed_eof()
+    else:
+        lexer.feed(data)
+    result = []
+    while True:
+        try:
+            tok = lexer.token()
+        except lex.NeedInput:
+            return result
+        if tok is None:
+            result.append(None)
+            return result
+        result.append((tok.type, tok.value, tok.lexpos, tok.lineno))
+
+# A token is returned once the text after it shows where it ends.  "/"
+# and "." could still start a comment or "...".
+for data in ["ab", "c 12", "3 /", "* x */", " 4", "/5\n", "..", ". .", "6", None, " x", None]:
+    print(repr(data), pull(data))
+print(eofs)
@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# lex_incremental.py
+#
+# Relexing a document after edits.  After each edit the tokens must be the
+# same as lexing the whole document again.
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','EQUALS','COMMENT',
+    )
+
+states = (('comment', 'exclusive'),)
+
+literals = ';'
+
+t_EQUALS = r'='
+t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_ignore = " \t"
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_begin_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_COMMENT(t):
+    r'(.|\n)*?\*/'
+    t.lexer.lineno += t.value.count('\n')
+    t.lexer.begin('INITIAL')
+    return t
+
+def t_comment_error(t):
+    t.lexer.skip(1)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+t_comment_ignore = ''
+
+lexer = lex.lex()
+doc = lex.IncrementalLexer(lexer, "".join("x%d = %d;\n" % (n, n) for n in range(100)), interval=40)
+
+def check(offset, deleted, inserted):
+    start, end, new = doc.edit(offset, deleted, inserted)
+    full = lexer.clone()
+    full.input(doc.data)
+    print("%d %d %d %s" % (start, end, len(new),
+                           [str(t) for t in doc.tokens] == [str(t) for t in full]))
+
+check(0, 0, "y")                                 # Extend the first name
+check(doc.data.index("x50"), 3, "longer_name")   # Replace a name
+check(doc.data.index("x60"), 0, "\n\n")          # Add lines
+check(doc.data.index("x70"), 0, "/* ")           # Open a comment
+check(doc.data.index("x80"), 0, "*/")            # Close it again
+check(doc.data.index("/* "), 3, "")              # Remove the opening
+check(len(doc.data), 0, "z = 1;")                # Append
+check(0, len(doc.data), "")                      # Delete everything
+print(len(doc.tokens))
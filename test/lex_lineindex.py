@@ -0,0 +1,48 @@
+# -----------------------------------------------------------------------------
+# lex_lineindex.py
+#
+# Line numbers and columns from the lexer's line index.  There is no
+# t_newline rule.
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import io
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = ('NAME', 'NUMBER', 'STRING')
+
+literals = '=;'
+
+t_ignore = ' \t\n'
+t_NAME   = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_STRING = r'"[^"]*"'
+
+def t_error(t):
+    print("Illegal character '%s' at line %d, column %d" % (
+          t.value[0], t.lexer.find_lineno(t.lexpos), t.lexer.find_column(t.lexpos)))
+    t.lexer.skip(1)
+
+data = 'x = 1;\n  y = "a\nb";\n\n   z ? 42;\n'
+
+lexer = lex.lex(lineindex=True)
+lexer.input(data)
+result = []
+for tok in lexer:
+    print("%s %d %d" % (tok, tok.lineno, tok.column))
+    result.append((tok.type, tok.lineno, tok.column))
+print(lexer.lineno)
+
+lexer.lineno = 1
+cols = lexer.tokenize_all(data)
+print(list(cols.linenos) == [line for t, line, col in result])
+
+lexer.lineno = 1
+lexer.input_stream(io.StringIO(u'' + data), chunksize=4)
+print([(tok.type, tok.lineno, tok.column) for tok in lexer] == result)
+
+plain = lex.lex()
+plain.input(data)
+print(plain.find_lineno(26) == lexer.find_lineno(26), plain.find_column(26) == lexer.find_column(26))
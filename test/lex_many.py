@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# lex_many.py
+#
+# Tokenizing many separate inputs with lex_many()
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NUMBER','PLUS','END',
+    )
+
+states = (
+    ('comment', 'exclusive'),
+    )
+
+t_NUMBER = r'\d+'
+t_PLUS = r'\+'
+t_ignore = ' '
+t_comment_ignore = ' '
+
+def t_begin_comment(t):
+    r'/\*'
+    t.lexer.push_state('comment')
+
+def t_comment_end(t):
+    r'\*/'
+    t.lexer.pop_state()
+
+def t_comment_text(t):
+    r'[^*\n]+|\*'
+
+def t_ANY_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_comment_error(t):
+    t.lexer.skip(1)
+
+def t_error(t):
+    print("Illegal character %r" % t.value[0])
+
+def show(result):
+    if isinstance(result, Exception):
+        return type(result).__name__
+    return ' '.join(["%s:%s:%d" % (tok.type, tok.value, tok.lineno) for tok in result])
+
+lexer = lex.lex()
+data = ["1 + 2", "3\n+ /* open\ncomment", "4 + 5", "6 $ 7", "\n8"]
+for result in lexer.lex_many(data):
+    print(show(result))
+print(lexer.current_state(), lexer.lexstatestack)
+
+# A pipeline starts its stages over for each input
+def ends(toks):
+    for tok in toks:
+        yield tok
+    tok = lex.LexToken()
+    tok.type = 'END'
+    tok.value = None
+    tok.lineno = 0
+    yield tok
+
+lexer.lineno = 1
+pipeline = lex.TokenPipeline(lexer, [ends])
+for result in pipeline.lex_many(data):
+    print(show(result))
@@ -0,0 +1,61 @@
+# -----------------------------------------------------------------------------
+# lex_numpy.py
+#
+# tokenize_all() with the NumPy engine
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NUMBER','NAME','ARROW','NEWLINE','WORD',
+    )
+
+states = (('text', 'exclusive'),)
+
+literals = ',-'
+
+t_NUMBER = r'[0-9.]+'
+t_NAME = r'[a-z][a-z0-9]*'
+t_ARROW = r'->'
+t_NEWLINE = r'\n'
+t_ignore = ' \t'
+
+token_actions = {
+    't_NEWLINE' : lex.TokenAction(newlines=True, discard=True),
+}
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def t_text_WORD(t):
+    r'[^ ]+'
+    return t
+
+t_text_ignore = ' '
+t_text_error = t_error
+
+lexer = lex.lex(engine='numpy')
+print(sorted((state, plan is not None) for state, plan in lexer.lexstatevector.items()))
+
+data = "1.5, x1 -> 2\n3 - 4.25,\n\nab12 ->-5"
+cols = lexer.tokenize_all(data)
+for n in range(len(cols)):
+    print("%s %r %d %d %d" % (cols.type(n), cols.value(n), cols.starts[n], cols.ends[n], cols.linenos[n]))
+print(lexer.lineno)
+
+def columns(lexer, data):
+    lexer.lineno = 1
+    cols = lexer.tokenize_all(data)
+    return [(cols.type(n), cols.value(n), cols.starts[n], cols.ends[n], cols.linenos[n]) for n in range(len(cols))]
+
+# Same results as the normal engine, for text, binary input, input with
+# errors, and states the NumPy engine can't scan
+relexer = lex.lex(engine='re')
+print(columns(lexer, data) == columns(relexer, data))
+print(columns(lexer, data.encode('ascii')) == columns(relexer, data.encode('ascii')))
+print(columns(lexer, "1 $ 2") == columns(relexer, "1 $ 2"))
+lexer.begin('text')
+relexer.begin('text')
+print(columns(lexer, "a b") == columns(relexer, "a b"))
@@ -0,0 +1,78 @@
+# -----------------------------------------------------------------------------
+# lex_parallel.py
+#
+# Tokenizing newline separated records in a pool of processes.  The result
+# must be the same as tokenize_all() gives.  The pool is made in main(), not
+# at import, since worker results can't be read while the import lock is held
+# on Python 2.
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','EQUALS','COMMENT','RESERVED'
+    )
+
+states = (('comment', 'exclusive'),)
+
+literals = ';'
+
+t_EQUALS = r'='
+t_NUMBER = r'\d+'
+t_ignore = " \t"
+
+token_actions = {
+    't_NUMBER' : lex.TokenAction(convert=int),
+}
+
+def t_NAME(t):
+    r'[a-zA-Z_][a-zA-Z0-9_]*'
+    if t.value == 'let':
+        t.type = 'RESERVED'
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_begin_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_COMMENT(t):
+    r'(.|\n)*?\*/'
+    t.lexer.lineno += t.value.count('\n')
+    t.lexer.begin('INITIAL')
+    return t
+
+def t_error(t):
+    t.value = t.value[0]
+    t.lexer.skip(1)
+    return t
+
+t_comment_error = t_error
+t_comment_ignore = ''
+
+lexer = lex.lex()
+data = "".join("let x%d = %d; $\n\n" % (n, n * 7) for n in range(200))
+
+def main():
+    serial = lexer.clone().tokenize_all(data)
+    cols = lexer.tokenize_parallel(data, r'\n', chunksize=300, processes=2)
+    print(len(cols) == len(serial))
+    print([str(t) for t in cols] == [str(t) for t in serial])
+    print(list(cols.kinds) == list(serial.kinds))
+    print(cols.token(-1))
+    print(lexer.lineno)
+
+    # A chunk boundary inside a comment is detected
+    try:
+        lexer.lineno = 1
+        lexer.tokenize_parallel("/* a\nb\nc */ x\n" * 50, r'\n', chunksize=2, processes=2)
+    except lex.LexError as e:
+        print(e)
+
+if __name__ == '__main__':
+    main()
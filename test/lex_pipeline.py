@@ -0,0 +1,94 @@
+# -----------------------------------------------------------------------------
+# lex_pipeline.py
+#
+# Tokens run through a pipeline of per-token and batch stages
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','MINUS','COMMENT','END',
+    )
+
+t_NAME = r'[a-z]+'
+t_NUMBER = r'\d+'
+t_MINUS = r'-'
+t_COMMENT = r'\#[^\n]*'
+t_ignore = ' '
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+# Joins a MINUS and the NUMBER after it.  A MINUS at the end of a batch is
+# held back until the next one.
+class Negate(lex.TokenFilter):
+    def reset(self, lexer):
+        self.held = None
+        self.batches = []
+
+    def filter(self, tokens):
+        self.batches.append(len(tokens))
+        if self.held:
+            tokens.insert(0, self.held)
+            self.held = None
+        result = []
+        for tok in tokens:
+            if result and result[-1].type == 'MINUS' and tok.type == 'NUMBER':
+                tok.value = '-' + tok.value
+                tok.lexpos -= 1
+                result[-1] = tok
+            else:
+                result.append(tok)
+        if result and result[-1].type == 'MINUS':
+            self.held = result.pop()
+        return result
+
+    def finish(self):
+        return [self.held] if self.held else []
+
+def drop_comments(tokens):
+    for tok in tokens:
+        if tok.type != 'COMMENT':
+            yield tok
+
+# Adds an END token after the last token
+class End(lex.TokenFilter):
+    def reset(self, lexer):
+        self.lexer = lexer
+
+    def finish(self):
+        tok = lex.LexToken()
+        tok.type = 'END'
+        tok.value = None
+        tok.lineno = self.lexer.lineno
+        tok.lexpos = self.lexer.lexpos
+        return [tok]
+
+lexer = lex.lex()
+negate = Negate()
+pipeline = lex.TokenPipeline(lexer, [negate, drop_comments, End()], batchsize=2)
+
+pipeline.input("a - 1 -2 # one\nb-\n-3 c -")
+for tok in pipeline:
+    print("%s %r %d %d" % (tok.type, tok.value, tok.lineno, tok.lexpos))
+print(negate.batches)
+print(pipeline.lineno, pipeline.lexpos)
+
+# Called as a token function, and started again on new input
+lexer.lineno = 1
+pipeline.input("x -4")
+print([(tok.type, tok.value) for tok in iter(pipeline, None)])
+print(pipeline(), pipeline())
+
+# No tokens before input(), and the tokens of the lexer with no stages
+print(list(lex.TokenPipeline(lexer)))
+plain = lex.TokenPipeline(lexer)
+plain.input("y 5")
+print([tok.type for tok in plain])
@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# lex_profile.py
+#
+# Rule statistics collected while profiling a lexer
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import re
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','ARROW','STRING',
+    )
+
+states = (('string', 'exclusive'),)
+
+literals = '-;'
+
+t_ARROW = r'->'
+t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_ignore = " \t\n"
+t_string_STRING = r'[^"]+'
+t_string_ignore = ''
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_quote(t):
+    r'"'
+    t.lexer.push_state('string')
+
+def t_string_quote(t):
+    r'"'
+    t.lexer.pop_state()
+
+def t_error(t):
+    t.lexer.skip(1)
+
+t_string_error = t_error
+
+lexer = lex.lex()
+stats = lexer.profile()
+lexer.input('a -> 1; b - 2; "x y" ? c -> "z";')
+print(len([t for t in lexer]))
+
+for state in sorted(stats.matches):
+    print(state, sorted(stats.matches[state].items()))
+print(sorted(stats.times['INITIAL']))
+print(stats.literals, stats.errors)
+print(stats.failures)
+print(re.sub(r'\d+\.\d+', 'T', stats.report()))
+
+# Turning profiling off goes back to token()
+print(lexer.profile(False) is stats, lexer.lexstats, 'token' in lexer.__dict__)
+lexer.input("d")
+print([t.type for t in lexer], stats.matches['INITIAL']['t_NAME'])
+
+# Streaming input is profiled too, with the same counts
+streamer = lex.lex()
+streamstats = streamer.profile()
+streamer.input_stream(['a -> 1; b - 2', '; "x y" ? c', ' -> "z";'], chunksize=4)
+print(len([t for t in streamer]), streamer.token == streamer.profiletoken)
+print(streamstats.matches == stats.matches, streamstats.literals == stats.literals, streamstats.errors)
+streamer.profile(False)
+print(streamer.token == streamer.streamtoken)
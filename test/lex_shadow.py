@@ -0,0 +1,62 @@
+# lex_shadow.py
+#
+# Rules for fixed strings that an earlier rule always matches first
+
+import sys
+if ".." not in sys.path: sys.path.insert(0,"..")
+
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "IF",
+    "SHL",
+    "SHLEQ",
+    "LE",
+    "LT",
+    "NE",
+    "EQ",
+    "EQEQ",
+    ]
+
+def t_ID(t):
+    r'[a-z]+'
+    return t
+
+t_IF = r'if'
+t_SHLEQ = r'<<='
+t_SHL = r'<<'
+t_LE = r'<='
+t_NE = r'<>'
+t_LT = r'<'
+t_EQ = r'\='
+t_EQEQ = r'=='
+t_ignore = " "
+
+def t_error(t):
+    pass
+
+lexer = lex.lex()
+lexer.input("a <<= b << c <= d <> e < f == if")
+print([t.type for t in lexer])
+
+# The master regex is factored, but the table text is the plain alternation.
+# Rules in the prefix tree leave an empty group at the end of their string.
+rules = lex._split_master(lexer.lexre, lexer.lexretext)
+pattern = lexer.lexre[0][0].pattern
+print([name for name, r, entry, flags in rules])
+print(sorted(lexer.lexre[0][0].groupindex) == sorted(name for name, r, entry, flags in rules))
+print([name for name, r, entry, flags in rules if '(?P<%s>)' % name in pattern])
+print(lexer.lexretext[0] == '|'.join(r for name, r, entry, flags in rules))
+
+import types
+tab = types.ModuleType('lex_shadowtab')
+exec(lexer._tabtext('lex_shadowtab'), tab.__dict__)
+tablexer = lex.Lexer()
+tablexer.readtab(tab, globals())
+tablexer.input("a <<= b << c <= d <> e < f == if")
+print([t.type for t in tablexer])
+
+# Lexers read from a table use the same factored regex
+print(tablexer.lexre[0][0].pattern == pattern, tablexer.lexretext == lexer.lexretext)
+print(tablexer._tabtext('lex_shadowtab') == lexer._tabtext('lex_shadowtab'))
@@ -0,0 +1,52 @@
+# -----------------------------------------------------------------------------
+# lex_skip.py
+#
+# Runs of ignored characters and t_ignore_* rules skipped by one regex
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+tokens = (
+    'NAME','NUMBER','PRAGMA','DIVIDE',
+    )
+
+states = (('text', 'inclusive'),)
+
+t_ignore = " \t\n"
+t_ignore_COMMENT = r'\#.*'
+t_ignore_BLOCK = r'/\*(.|\n)*?\*/'
+t_DIVIDE = r'/'
+t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_text_ignore = " "
+
+def t_PRAGMA(t):
+    r'\#pragma.*'
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_text_end(t):
+    r'\$'
+    t.lexer.begin('INITIAL')
+
+def t_error(t):
+    print("Illegal character %r" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+print(sorted(lexer.lexstateskip['INITIAL'][0]))
+print(sorted(lexer.lexstateskip['text'][0]))
+
+data = "a   /* one\n two */ 1 / 2   # comment\n    #pragma x\n\t\tb # end"
+lexer.input(data)
+print([(t.type, t.value) for t in lexer])
+print([(t.type, t.value) for t in lexer.clone().tokenize_all(data)])
+
+lexer.begin('text')
+lexer.input("a  # x\n b $\n c")
+print([(t.type, t.value) for t in lexer])
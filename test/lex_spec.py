@@ -0,0 +1,94 @@
+# -----------------------------------------------------------------------------
+# lex_spec.py
+#
+# Lexers made from a shared LexerSpec and handed out by a LexerPool.
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import threading
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+class Lexer(object):
+    tokens = ('NAME','NUMBER','COMMENT')
+    states = (('comment', 'exclusive'),)
+    literals = '+;'
+
+    t_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+    t_ignore = " \t\n"
+    t_comment_ignore = ""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def t_NUMBER(self, t):
+        r'\d+'
+        t.value = int(t.value) * self.scale
+        return t
+
+    def t_begin_comment(self, t):
+        r'/\*'
+        t.lexer.begin('comment')
+
+    def t_comment_COMMENT(self, t):
+        r'(.|\n)*?\*/'
+        t.lexer.begin('INITIAL')
+        return t
+
+    def t_error(self, t):
+        t.lexer.skip(1)
+
+    t_comment_error = t_error
+
+spec = lex.LexerSpec(lex.lex(object=Lexer(1)))
+print(sorted(spec.tokens))
+print(sorted(spec.states))
+try:
+    spec.tokens = ()
+except AttributeError as e:
+    print(e)
+
+a = spec.lexer()
+b = spec.lexer()
+print(a is not b and a.lexstatere is b.lexstatere and a.lexstatestack is not b.lexstatestack)
+a.input("x /* y")
+print(a.token(), a.token(), a.current_state(), b.current_state(), b.lexdata)
+
+# Lexers from a spec don't share the statistics of a lexer being profiled
+profiled = lex.lex(object=Lexer(1))
+stats = profiled.profile()
+profspec = lex.LexerSpec(profiled)
+c = profspec.lexer()
+c.input("x y")
+print([t.value for t in c], c.lexstats, stats.matches)
+c.profile()
+profspec.reset(c)
+print(c.lexstats, profspec.lexer().lexstats, profiled.lexstats is stats)
+
+tens = spec.bind(Lexer(10)).lexer()
+tens.input("3 + 4")
+print([t.value for t in tens])
+
+pool = lex.LexerPool(spec, size=2)
+with pool.lexer() as first:
+    first.input("1; /* comment */ 2")
+    print([(t.type, t.value) for t in first])
+with pool.lexer() as second:
+    print(second is first, second.lexdata, second.lineno, second.lexpos)
+
+data = "x1 + 22; /* a */ y3 + 4;\n" * 200
+expected = [str(t) for t in spec.lexer().tokenize_all(data)]
+results = []
+def work():
+    for i in range(20):
+        with pool.lexer() as lexer:
+            lexer.input(data)
+            results.append([str(t) for t in lexer] == expected)
+
+threads = [threading.Thread(target=work) for i in range(4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(len(results), all(results), len(pool.free))
@@ -0,0 +1,63 @@
+# -----------------------------------------------------------------------------
+# lex_stream.py
+#
+# Lexing input that is read in small chunks from a stream
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+tokens = (
+    'NAME','NUMBER','STRING','EQ','ASSIGN',
+    )
+
+literals = ';'
+
+t_EQ     = r'=='
+t_ASSIGN = r'='
+t_NAME   = r'[a-zA-Z_][a-zA-Z0-9_]*'
+t_STRING = r'"[^"]*"'
+t_ignore = " \t"
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+errors = []
+
+def t_error(t):
+    errors.append((t.value[0], t.lexpos))
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+data = 'alpha = "a long string value";\nbeta == 12345 ? gamma;\nx = "two\nlines" ;'
+
+lexer.input(data)
+expected = [str(tok) for tok in lexer]
+
+print(errors)
+
+for size in (2, 3, 7, 64):
+    del errors[:]
+    lexer.lineno = 1
+    lexer.input_stream(StringIO(data), chunksize=size)
+    result = [str(tok) for tok in lexer]
+    print("%d %s %s" % (size, result == expected, errors == [('?', 45)]))
+
+lexer.lineno = 1
+lexer.input_stream(iter(['al', 'pha', '', ' =', '= 4', '2;']), chunksize=2)
+for tok in lexer:
+    print(tok)
+print(lexer.lexbase <= lexer.lexpos)
@@ -0,0 +1,39 @@
+# -----------------------------------------------------------------------------
+# lex_timing.py
+#
+# Timing the validation passes, with a rule defined twice
+# -----------------------------------------------------------------------------
+import sys
+import re
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+tokens = [
+    "PLUS",
+    "MINUS",
+    "NUMBER",
+    ]
+
+t_PLUS = r'\+'
+t_MINUS = r'-'
+t_NUMBER = r'\d+'
+t_NUMBER = r'[0-9]+'
+
+def t_error(t):
+    pass
+
+for i in range(2):
+    log = StringIO()
+    try:
+        lex.lex(timing=True, errorlog=lex.PlyLogger(log))
+    except SyntaxError:
+        pass
+    for line in log.getvalue().splitlines():
+        line = re.sub(r'took [0-9.]+ ms', 'took <n> ms', line)
+        print(re.sub(r'\S*lex_timing', 'lex_timing', line))
@@ -16,6 +16,11 @@ sys.tracebacklimit = 0
 
 import ply.lex
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 try:
     from importlib.util import cache_from_source
 except ImportError:
@@ -130,6 +135,24 @@ class LexErrorWarningTests(unittest.TestCase):
         self.assert_(check_expected(result,
                                     "No t_error rule is defined\n"))
 
+    @unittest.skipUnless(sys.version_info >= (3, 6), "string rules of the same length are only in definition order from Python 3.6")
+    def test_lex_shadow(self):
+        run_import("lex_shadow")
+        result = sys.stderr.getvalue()
+        self.assert_(check_expected(result,
+                                    "Rule 't_IF' is never matched. Rule 't_ID' matches 'if' first\n"
+                                    "Rule 't_EQEQ' is never matched. Rule 't_EQ' matches '==' first\n"))
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "['ID', 'SHLEQ', 'ID', 'SHL', 'ID', 'LE', 'ID', 'NE', 'ID', 'LT', 'ID', 'EQ', 'EQ', 'ID']\n"
+                                    "['t_ID', 't_SHLEQ', 't_IF', 't_SHL', 't_LE', 't_NE', 't_EQ', 't_EQEQ', 't_LT']\n"
+                                    "True\n"
+                                    "['t_SHLEQ', 't_IF', 't_SHL', 't_LE', 't_NE', 't_EQ', 't_LT']\n"
+                                    "True\n"
+                                    "['ID', 'SHLEQ', 'ID', 'SHL', 'ID', 'LE', 'ID', 'NE', 'ID', 'LT', 'ID', 'EQ', 'EQ', 'ID']\n"
+                                    "True True\n"
+                                    "True\n"))
+
     def test_lex_error2(self):
         self.assertRaises(SyntaxError,run_import,"lex_error2")
         result = sys.stderr.getvalue()
@@ -270,6 +293,14 @@ class LexErrorWarningTests(unittest.TestCase):
                                     "Rule 't_MINUS' defined for an unspecified token MINUS\n"
 ))
 
+    def test_lex_actions_bad(self):
+        self.assertRaises(SyntaxError,run_import,"lex_actions_bad")
+        result = sys.stderr.getvalue()
+        self.assert_(check_expected(result,
+                                    "Rule 't_SPACE' defined for an unspecified token SPACE\n"
+                                    "Keyword 'if' for rule 't_ID' maps to an unspecified token IF\n"
+                                    "token_actions entry for 't_NUMBER', which is not a rule defined by a string\n"))
+
     def test_lex_token2(self):
         self.assertRaises(SyntaxError,run_import,"lex_token2")
         result = sys.stderr.getvalue()
@@ -655,6 +686,444 @@ class LexRunTests(unittest.TestCase):
                                     "(NUMBER,'10',1,32)\n"
                                     ))    
 
+    def test_lex_compact(self):
+        run_import("lex_compact")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "LexToken(NAME,'x',1,0)\n"
+                                    "LexToken(EQUALS,'=',1,2)\n"
+                                    "LexToken(NUMBER,3,1,4)\n"
+                                    "LexToken(PLUS,'+',1,6)\n"
+                                    "LexToken(NAME,'xy',1,8)\n"
+                                    "LexToken(NAME,'xy',2,11)\n"
+                                    "LexToken(PLUS,'+',2,14)\n"
+                                    "LexToken(NAME,'x',2,16)\n"
+                                    "False\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True False\n"
+                                    "NAME 0 1\n"
+                                    "EQUALS 2 3\n"
+                                    "NUMBER 4 5\n"
+                                    "PLUS 6 7\n"
+                                    "NAME 8 10\n"
+                                    "NAME 11 13\n"
+                                    "PLUS 14 15\n"
+                                    "NAME 16 17\n"
+                                    ))
+
+
+
+    def test_lex_columns(self):
+        run_import("lex_columns")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "10\n"
+                                    "NAME 'x' 0 1 1\n"
+                                    "PLUS '+' 2 3 1\n"
+                                    "( '(' 4 5 1\n"
+                                    "NUMBER 12 5 7 1\n"
+                                    "PLUS '+' 8 9 1\n"
+                                    "NAME 'y' 10 11 1\n"
+                                    ") ')' 11 12 1\n"
+                                    "COMMENT ' a\\nb */' 25 32 2\n"
+                                    "NAME 'z' 33 34 3\n"
+                                    "NUMBER 7 37 38 3\n"
+                                    "True\n"
+                                    "True\n"
+                                    ))
+
+    @unittest.skipUnless(numpy, "NumPy is not installed")
+    def test_lex_numpy(self):
+        run_import("lex_numpy")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "[('INITIAL', True), ('text', False)]\n"
+                                    "NUMBER '1.5' 0 3 1\n"
+                                    ", ',' 3 4 1\n"
+                                    "NAME 'x1' 5 7 1\n"
+                                    "ARROW '->' 8 10 1\n"
+                                    "NUMBER '2' 11 12 1\n"
+                                    "NUMBER '3' 13 14 2\n"
+                                    "- '-' 15 16 2\n"
+                                    "NUMBER '4.25' 17 21 2\n"
+                                    ", ',' 21 22 2\n"
+                                    "NAME 'ab12' 24 28 4\n"
+                                    "ARROW '->' 29 31 4\n"
+                                    "- '-' 31 32 4\n"
+                                    "NUMBER '5' 32 33 4\n"
+                                    "4\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_stream(self):
+        run_import("lex_stream")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "[('?', 45)]\n"
+                                    "2 True True\n"
+                                    "3 True True\n"
+                                    "7 True True\n"
+                                    "64 True True\n"
+                                    "LexToken(NAME,'alpha',1,0)\n"
+                                    "LexToken(EQ,'==',1,6)\n"
+                                    "LexToken(NUMBER,42,1,9)\n"
+                                    "LexToken(;,';',1,11)\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_feed(self):
+        run_import("lex_feed")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "'ab' []\n"
+                                    "'c 12' [('NAME', 'abc', 0, 1)]\n"
+                                    "'3 /' [('NUMBER', '123', 4, 1)]\n"
+                                    "'* x */' []\n"
+                                    "' 4' [('COMMENT', '/* x */', 8, 1)]\n"
+                                    "'/5\\n' [('NUMBER', '4', 16, 1), ('DIVIDE', '/', 17, 1), ('NUMBER', '5', 18, 1)]\n"
+                                    "'..' []\n"
+                                    "'. .' [('DOTS', '...', 20, 2)]\n"
+                                    "'6' [('DOT', '.', 24, 2)]\n"
+                                    "None [('NUMBER', '6', 25, 2)]\n"
+                                    "' x' []\n"
+                                    "None [('NAME', 'x', 27, 2), None]\n"
+                                    "[26, 28]\n"))
+
+    def test_lex_pipeline(self):
+        run_import("lex_pipeline")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "NAME 'a' 1 0\n"
+                                    "NUMBER '-1' 1 3\n"
+                                    "NUMBER '-2' 1 6\n"
+                                    "NAME 'b' 2 15\n"
+                                    "MINUS '-' 2 16\n"
+                                    "NUMBER '-3' 3 18\n"
+                                    "NAME 'c' 3 21\n"
+                                    "MINUS '-' 3 23\n"
+                                    "END None 3 25\n"
+                                    "[2, 2, 2, 2, 2, 2]\n"
+                                    "3 25\n"
+                                    "[('NAME', 'x'), ('NUMBER', '-4'), ('END', None)]\n"
+                                    "None None\n"
+                                    "[]\n"
+                                    "['NAME', 'NUMBER']\n"))
+
+    def test_lex_many(self):
+        run_import("lex_many")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "NUMBER:1:1 PLUS:+:1 NUMBER:2:1\n"
+                                    "NUMBER:3:1 PLUS:+:2\n"
+                                    "NUMBER:4:1 PLUS:+:1 NUMBER:5:1\n"
+                                    "Illegal character '$'\n"
+                                    "LexError\n"
+                                    "NUMBER:8:2\n"
+                                    "INITIAL []\n"
+                                    "NUMBER:1:1 PLUS:+:1 NUMBER:2:1 END:None:0\n"
+                                    "NUMBER:3:1 PLUS:+:2 END:None:0\n"
+                                    "NUMBER:4:1 PLUS:+:1 NUMBER:5:1 END:None:0\n"
+                                    "Illegal character '$'\n"
+                                    "LexError\n"
+                                    "NUMBER:8:2 END:None:0\n"))
+
+    @unittest.skipUnless(sys.version_info >= (3, 7), "asyncio.run() needs Python 3.7")
+    def test_lex_aio(self):
+        run_import("lex_aio")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "200 0\n"
+                                    "[('NAME', 'x'), ('NUMBER', '0'), ('DIVIDE', '/'), ('NUMBER', '2'), ('COMMENT', '/* c7 */')]\n"))
+
+    def test_lex_bytes(self):
+        if sys.version_info[0] < 3:
+            return
+        try:
+            run_import("lex_bytes")
+        finally:
+            try:
+                os.remove("bytestab.py")
+            except OSError:
+                pass
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "LexToken(NAME,b'name',1,0)\n"
+                                    "LexToken(=,b'=',1,5)\n"
+                                    "LexToken(STRING,b'data \\x01 file',1,8)\n"
+                                    "LexToken(;,b';',1,20)\n"
+                                    "LexToken(NAME,b'size',2,22)\n"
+                                    "LexToken(=,b'=',2,27)\n"
+                                    "LexToken(NUMBER,42,2,29)\n"
+                                    "Illegal character b'?'\n"
+                                    "LexToken(;,b';',2,33)\n"
+                                    "LexToken(NAME,b'x',1,0)\n"
+                                    "LexToken(=,b'=',1,1)\n"
+                                    "LexToken(NUMBER,1,1,2)\n"
+                                    "LexToken(;,b';',1,3)\n"
+                                    "LexToken(NAME,'y',1,0)\n"
+                                    "LexToken(=,'=',1,1)\n"
+                                    "LexToken(NUMBER,2,1,2)\n"
+                                    "LexToken(;,';',1,3)\n"
+                                    "Illegal character b'?'\n"
+                                    "8\n"
+                                    "LexToken(NAME,b'z',1,0)\n"
+                                    "LexToken(=,b'=',1,1)\n"
+                                    "LexToken(NUMBER,3,1,2)\n"
+                                    "LexToken(;,b';',1,3)\n"
+                                    ))
 
+    def test_lex_dispatch(self):
+        run_import("lex_dispatch")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "Illegal character '!'\n"
+                                    "Illegal character '!'\n"
+                                    "Illegal character '$'\n"
+                                    "LexToken(NAME,'x',1,0)\n"
+                                    "LexToken(=,'=',1,2)\n"
+                                    "LexToken(FLOAT,'.5',1,4)\n"
+                                    "LexToken(+,'+',1,7)\n"
+                                    "LexToken(FLOAT,'3.25',1,9)\n"
+                                    "LexToken(MINUS,'-',1,14)\n"
+                                    "LexToken(NUMBER,'12',1,16)\n"
+                                    "LexToken(SIGNED,'-4',1,19)\n"
+                                    "LexToken(SIGNED,'7',1,23)\n"
+                                    "LexToken(;,';',1,25)\n"
+                                    "LexToken(NAME,'SeLeCt',1,27)\n"
+                                    "LexToken(NAME,'selection',1,34)\n"
+                                    "LexToken(STRING,'a -> b',1,45)\n"
+                                    "LexToken(ARROW,'->',1,53)\n"
+                                    "LexToken(WORD,1,1,55)\n"
+                                    "LexToken(NAME,'t',1,56)\n"
+                                    "LexToken(WORD,2,1,57)\n"
+                                    "LexToken(NUMBER,'1',1,62)\n"
+                                    "Illegal character '!'\n"
+                                    "Illegal character '!'\n"
+                                    "Illegal character '$'\n"
+                                    "True\n"
+                                    "([('KEYWORD', 'SeLeCt'), ('KEYWORD', 'select'), ('IDENT', 'ion')], True)\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_dfa(self):
+        run_import("lex_dfa")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "[True, False, True]\n"
+                                    "LexToken(KEY,'a',1,0)\n"
+                                    "LexToken(NAME,'b',1,1)\n"
+                                    "LexToken(KEY,'a',1,3)\n"
+                                    "LexToken(NAME,'bc',1,4)\n"
+                                    "LexToken(=,'=',1,7)\n"
+                                    "LexToken(HEX,'0x1f2a',1,9)\n"
+                                    "LexToken(NUMBER,'7',1,15)\n"
+                                    "LexToken(;,';',1,16)\n"
+                                    "LexToken(SHORT,'xx',1,18)\n"
+                                    "LexToken(SHORT,'xx',1,20)\n"
+                                    "LexToken(NAME,'x',1,22)\n"
+                                    "LexToken(COMMENT,'/* one */',1,24)\n"
+                                    "LexToken(COMMENT,'/* two */',1,34)\n"
+                                    "LexToken(PAIR,('key', 'val'),1,44)\n"
+                                    "LexToken(SIGNED,'12',1,52)\n"
+                                    "LexToken(NUMBER,'3',1,56)\n"
+                                    "LexToken(NAME,'End',1,58)\n"
+                                    "LexToken(WORD,2,1,62)\n"
+                                    "LexToken(NAME,'t',1,64)\n"
+                                    "True\n"
+                                    "True\n"
+                                    "([('UPPER', 'End'), ('UPPER', 'end'), ('IDENT', 'less'), ('UPPER', 'eNd')], True, True)\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_actions(self):
+        try:
+            run_import("lex_actions")
+        finally:
+            for name in ("actiontab.py", "actiontab.pyc", "actiontab.pyo"):
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "LexToken(IF,'if',1,0)\n"
+                                    "LexToken(ID,'x',1,3)\n"
+                                    "LexToken(<,'<',1,5)\n"
+                                    "LexToken(NUMBER,10,1,7)\n"
+                                    "LexToken(THEN,'then',1,10)\n"
+                                    "LexToken(PRINT,'print',2,17)\n"
+                                    "LexToken(STRING,'a\\nb',2,23)\n"
+                                    "LexToken(FLOAT,2.5,3,29)\n"
+                                    "LexToken(PRINT,'print',5,34)\n"
+                                    "LexToken(ID,'x',5,40)\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_lineindex(self):
+        run_import("lex_lineindex")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "LexToken(NAME,'x',1,0) 1 1\n"
+                                    "LexToken(=,'=',1,2) 1 3\n"
+                                    "LexToken(NUMBER,'1',1,4) 1 5\n"
+                                    "LexToken(;,';',1,5) 1 6\n"
+                                    "LexToken(NAME,'y',2,9) 2 3\n"
+                                    "LexToken(=,'=',2,11) 2 5\n"
+                                    "LexToken(STRING,'\"a\\nb\"',2,13) 2 7\n"
+                                    "LexToken(;,';',3,18) 3 3\n"
+                                    "LexToken(NAME,'z',5,24) 5 4\n"
+                                    "Illegal character '?' at line 5, column 6\n"
+                                    "LexToken(NUMBER,'42',5,28) 5 8\n"
+                                    "LexToken(;,';',5,30) 5 10\n"
+                                    "5\n"
+                                    "Illegal character '?' at line 5, column 6\n"
+                                    "True\n"
+                                    "Illegal character '?' at line 5, column 6\n"
+                                    "True\n"
+                                    "True True\n"
+                                    ))
+
+    def test_lex_parallel(self):
+        # The pool is made outside the import, which Python 2 needs
+        import lex_parallel
+        try:
+            lex_parallel.main()
+        finally:
+            del sys.modules["lex_parallel"]
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "LexToken(error,'$',399,3727)\n"
+                                    "401\n"
+                                    "Chunk ended in state 'comment'. The sync pattern matched inside a token or state (in the chunk at index 0)\n"
+                                    ))
+
+    def test_lex_incremental(self):
+        run_import("lex_incremental")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "0 21 21 True\n"
+                                    "185 201 16 True\n"
+                                    "233 249 16 True\n"
+                                    "265 400 45 True\n"
+                                    "265 310 96 True\n"
+                                    "265 298 72 True\n"
+                                    "313 400 91 True\n"
+                                    "0 404 0 True\n"
+                                    "0\n"
+                                    ))
+
+    def test_lex_spec(self):
+        run_import("lex_spec")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "['COMMENT', 'NAME', 'NUMBER']\n"
+                                    "['INITIAL', 'comment']\n"
+                                    "LexerSpec objects are immutable\n"
+                                    "True\n"
+                                    "LexToken(NAME,'x',1,0) None comment INITIAL None\n"
+                                    "['x', 'y'] None {}\n"
+                                    "None None True\n"
+                                    "[30, '+', 40]\n"
+                                    "[('NUMBER', 1), (';', ';'), ('COMMENT', ' comment */'), ('NUMBER', 2)]\n"
+                                    "True None 1 0\n"
+                                    "80 True 2\n"
+                                    ))
+
+    def test_lex_cache(self):
+        run_import("lex_cache")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "1 1\n"
+                                    "2 True False\n"
+                                    "3 2\n"
+                                    "True 4\n"
+                                    "True 5\n"
+                                    "True 6\n"
+                                    "True\n"
+                                    "Can't build lexer 2\n"
+                                    "token_actions entry for 't_WORD' must be a TokenAction\n"
+                                    "Can't build lexer 2\n"
+                                    "t_ID not defined as a function or string\n"
+                                    "No rules defined for state 'INITIAL'\n"
+                                    "[42] 2\n"
+                                    "Converter for rule 't_NUM' can't be found by its name. The lexer won't be saved\n"
+                                    "No t_error rule is defined\n"
+                                    "[42] 2\n"
+                                    "Converter for rule 't_NUM' can't be found by its name. The lexer won't be saved\n"
+                                    "No t_error rule is defined\n"
+                                    "False\n"
+                                    ))
+
+    def test_lex_timing(self):
+        run_import("lex_timing")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "ERROR: lex_timing.py:26: Rule t_NUMBER redefined. Previously defined on line 25\n"
+                                    "lex: validate_tokens took <n> ms\n"
+                                    "lex: validate_literals took <n> ms\n"
+                                    "lex: validate_rules took <n> ms\n"
+                                    "lex: validate_modules took <n> ms\n"
+                                    "lex: validate_actions took <n> ms\n"
+                                    "ERROR: lex_timing.py:26: Rule t_NUMBER redefined. Previously defined on line 25\n"
+                                    "lex: validate_tokens took <n> ms\n"
+                                    "lex: validate_literals took <n> ms\n"
+                                    "lex: validate_rules took <n> ms\n"
+                                    "lex: validate_modules took <n> ms\n"
+                                    "lex: validate_actions took <n> ms\n"
+                                    ))
+
+    def test_lex_skip(self):
+        run_import("lex_skip")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "['\\t', '\\n', ' ', '#', '/']\n"
+                                    "[' ', '#', '/']\n"
+                                    "[('NAME', 'a'), ('NUMBER', 1), ('DIVIDE', '/'), ('NUMBER', 2), ('PRAGMA', '#pragma x'), ('NAME', 'b')]\n"
+                                    "[('NAME', 'a'), ('NUMBER', 1), ('DIVIDE', '/'), ('NUMBER', 2), ('PRAGMA', '#pragma x'), ('NAME', 'b')]\n"
+                                    "Illegal character '\\n'\n"
+                                    "[('NAME', 'a'), ('NAME', 'b'), ('NAME', 'c')]\n"
+                                    ))
+
+    def test_lex_profile(self):
+        run_import("lex_profile")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "13\n"
+                                    "INITIAL [('t_ARROW', 2), ('t_NAME', 3), ('t_NUMBER', 2), ('t_quote', 2)]\n"
+                                    "string [('t_string_STRING', 2), ('t_string_quote', 2)]\n"
+                                    "['t_NUMBER', 't_quote']\n"
+                                    "{'INITIAL': {';': 3, '-': 1}} {'INITIAL': 1}\n"
+                                    "{'INITIAL': {('t_ARROW',): 1}}\n"
+                                    "State 'INITIAL'\n"
+                                    "    Rule                                Matches    Time (ms)\n"
+                                    "    t_NAME                                    3\n"
+                                    "    t_ARROW                                   2\n"
+                                    "    t_NUMBER                                  2        T\n"
+                                    "    t_quote                                   2        T\n"
+                                    "    literal ';'                               3\n"
+                                    "    literal '-'                               1\n"
+                                    "    t_error                                   1\n"
+                                    "    Failed master regex                Attempts\n"
+                                    "    t_ARROW                                   1\n"
+                                    "State 'string'\n"
+                                    "    Rule                                Matches    Time (ms)\n"
+                                    "    t_string_STRING                           2\n"
+                                    "    t_string_quote                            2        T\n"
+                                    "\n"
+                                    "True None False\n"
+                                    "['NAME'] 3\n"
+                                    "13 True\n"
+                                    "True True {'INITIAL': 1}\n"
+                                    "True\n"
+                                    ))
 
 unittest.main()
@@ -160,6 +160,20 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "There is 1 unused token\n"
                                     "Generating LALR tables\n"
 
+                                    ))
+    def test_yacc_validate(self):
+        run_import("yacc_validate")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "yacc_validate.py:28: Function p_statement redefined. Previously defined on line 25\n"
+                                    "yacc: validate_start took <n> ms\n"
+                                    "yacc: validate_error_func took <n> ms\n"
+                                    "yacc: validate_tokens took <n> ms\n"
+                                    "yacc: validate_precedence took <n> ms\n"
+                                    "yacc: validate_pfunctions took <n> ms\n"
+                                    "yacc: validate_modules took <n> ms\n"
+                                    "1 1\n"
+                                    "1\n"
                                     ))
     def test_yacc_error1(self):
         try:
@@ -401,6 +415,161 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "Precedence rule 'left' defined for unknown symbol '/'\n"
                                     ))
 
+    def test_yacc_lineindex(self):
+        run_import("yacc_lineindex")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "a at line 1, column 1, value on lines (1, 1)\n"
+                                    "b at line 2, column 3, value on lines (2, 3)\n"
+                                    "c at line 4, column 1, value on lines (4, 4)\n"
+                                    ))
+        result = sys.stderr.getvalue()
+        self.assert_("yacc: Syntax error at line 2, column 3, token=PLUS\n" in result)
+
+    def test_yacc_pipeline(self):
+        run_import("yacc_pipeline")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "a = -1 at line 1\n"
+                                    "b = -3 at line 2\n"
+                                    "c = 9 at line 1\n"
+                                    "Syntax error at '-', line 2\n"
+                                    ))
+
+    def test_yacc_push(self):
+        run_import("yacc_push")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "[('a', 7), ('b', 6)]\n"
+                                    "True\n"
+                                    "Syntax error at 'b'\n"
+                                    "Syntax error at 3\n"
+                                    "Syntax error at 'b'\n"
+                                    "Syntax error at 3\n"
+                                    "[('a', 'error at 1'), ('b', 2), ('c', 'error at 3'), ('d', 4)]\n"
+                                    "True\n"
+                                    "Syntax error at end of input\n"
+                                    "Syntax error at end of input\n"
+                                    "None\n"
+                                    "True\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at '='\n"
+                                    "[('b', 2)]\n"
+                                    "True\n"
+                                    "[[('x0', 1)], [('x1', 2)], [('x2', 5)], [('x3', 10)]]\n"
+                                    "[2, 2, 2, 2]\n"
+                                    "['$end', 'NAME', 'EQUALS', 'expression', 'PLUS']\n"
+                                    "[('a', 3)]\n"
+                                    "Parser has already finished\n"
+                                    ))
+
+    @unittest.skipUnless(sys.version_info >= (3, 7), "asyncio.run() needs Python 3.7")
+    def test_yacc_aio(self):
+        run_import("yacc_aio")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "True\n"
+                                    "[1, 3, 6, 10, 15]\n"
+                                    ))
+
+    def test_yacc_compact(self):
+        try:
+            os.remove("compacttab.py")
+        except OSError:
+            pass
+        run_import("yacc_compact")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result.count("[('c', None), ('d', 1)]\n"), 6)
+        self.assert_(check_expected(result,
+                                    "True True\n"
+                                    "True True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True True\n"
+                                    "Syntax error at 'a'\n"
+                                    "Syntax error at ')'\n"
+                                    "[('c', None), ('d', 1)]\n"
+                                    ))
+
+    def test_yacc_codegen(self):
+        for name in ("calccode.py", "calccodetab.py"):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+        run_import("yacc_codegen")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result.count("[('c', None), ('d', None), ('e', 2)]\n"), 6)
+        self.assert_(check_expected(result,
+                                    "False True\n"
+                                    "True False\n"
+                                    "True True\n"
+                                    "Syntax error at 'a'\n"
+                                    "Division by zero at line 3\n"
+                                    "Syntax error at ')'\n"
+                                    "[('c', None), ('d', None), ('e', 2)]\n"
+                                    ))
+
+    def test_yacc_positional(self):
+        run_import("yacc_positional")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result.count("[('c', None), ('d', None), ('e', 2)]\n"), 6)
+        self.assert_(check_expected(result,
+                                    "Syntax error at 'a'\n"
+                                    "Division by zero\n"
+                                    "Syntax error at ')'\n"
+                                    "[('c', None), ('d', None), ('e', 2)]\n"
+                                    ))
+
+    def test_yacc_badpositional(self):
+        self.assertRaises(ply.yacc.YaccError,run_import,"yacc_badpositional")
+        result = sys.stderr.getvalue()
+        self.assert_(check_expected(result,
+                                    "yacc_badpositional.py:14: Rule 'p_statement_assign' does not take 3 values\n"
+                                    "yacc_badpositional.py:20: Rule 'p_expression' does not take 1 values\n"
+                                    ))
+
+    def test_yacc_many(self):
+        run_import("yacc_many")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "Syntax error at '='\n"
+                                    "[('a', 3), ('b', None)]\n"
+                                    "Syntax error at None\n"
+                                    "None\n"
+                                    "Division by zero at line 1\n"
+                                    "[('d', None), ('e', 1)]\n"
+                                    "RuntimeError: stopped at line 1\n"
+                                    "ValueError: no value for 'fail'\n"
+                                    "[('h', 3)]\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "True\n"
+                                    "False True\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "True\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "True\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "True\n"
+                                    "13\n"
+                                    "Syntax error at '='\n"
+                                    "Syntax error at None\n"
+                                    "Division by zero at line 1\n"
+                                    "True\n"
+                                    "13\n"
+                                    ))
+
     def test_pkg_test1(self):
         from pkg_test1 import parser
         self.assertTrue(os.path.exists('pkg_test1/parsing/parsetab.py'))
@@ -449,4 +618,24 @@ class YaccErrorWarningTests(unittest.TestCase):
         r = parser.parse('3+4+5')
         self.assertEqual(r, 12)
 
+    def test_yacc_kinds(self):
+        run_import("yacc_kinds")
+        result = sys.stdout.getvalue()
+        self.assert_(check_expected(result,
+                                    "[('NAME', 6, 'NAME'), ('EQUALS', 3, 'EQUALS'), ('NUMBER', 7, 'NUMBER')]\n"
+                                    "[('a', 7), ('b', -1), ('c', 'error'), ('d', 7)]\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True\n"
+                                    "True True True True\n"
+                                    "True True True\n"
+                                    "Kind names must start with '$end' and 'error'\n"
+                                    "True True True\n"
+                                    "[('a', 5), ('b', 7)]\n"
+                                    "True True True True\n"
+                                    "lex(kinds=True) needs a token class with a kind attribute, but SlotToken has no kind slot\n"
+                                    ))
+
 unittest.main()
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# yacc_aio.py
+#
+# Streams parsed as their input arrives with ply.aio.parse()
+# -----------------------------------------------------------------------------
+import sys
+import asyncio
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.yacc as yacc
+import ply.aio
+
+import calclex
+from calclex import tokens
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    if len(p) == 3:
+        p[0] = p[1] + p[2]
+    else:
+        p[0] = p[1]
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = p[3]
+
+def p_expression_binop(p):
+    'expression : expression PLUS NUMBER'
+    p[0] = p[1] + p[3]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    print("Syntax error at %r" % (p.value if p else None))
+
+parser = yacc.yacc(debug=False, write_tables=False)
+
+async def parse_stream(n):
+    alexer = ply.aio.AsyncLexer(calclex.lexer.clone())
+    data = ''.join('x = %d + 1\n' % i for i in range(n))
+    async def send():
+        for i in range(0, len(data), 3):
+            await alexer.feed(data[i:i+3])
+            await asyncio.sleep(0)
+        alexer.feed_eof()
+    feeder = asyncio.ensure_future(send())
+    result = await ply.aio.parse(parser, alexer)
+    await feeder
+    return result
+
+async def main():
+    return await asyncio.gather(*[parse_stream(n) for n in range(1, 101)])
+
+results = asyncio.run(main())
+print(results == [n * (n + 1) // 2 for n in range(1, 101)])
+print(results[:5])
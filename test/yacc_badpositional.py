@@ -0,0 +1,28 @@
+# -----------------------------------------------------------------------------
+# yacc_badpositional.py
+#
+# Rules marked with @positional that can't take the values of a production
+# -----------------------------------------------------------------------------
+import sys
+sys.tracebacklimit = 0
+sys.path.insert(0,"..")
+import ply.yacc as yacc
+
+from calclex import tokens
+
+@yacc.positional
+def p_statement_assign(name, value):
+    'statement : NAME EQUALS expression'
+    return (name, value)
+
+@yacc.positional
+def p_expression(left, op, right=None):
+    '''expression : expression PLUS expression
+                  | NUMBER
+                  | LPAREN expression RPAREN'''
+    return left
+
+def p_error(p):
+    pass
+
+yacc.yacc(debug=False, write_tables=False)
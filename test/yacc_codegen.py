@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# yacc_codegen.py
+#
+# Parsing with generated parser code
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import os
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | empty'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = []
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], None)
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if p[2] == '+'  : p[0] = p[1] + p[3]
+    elif p[2] == '-': p[0] = p[1] - p[3]
+    elif p[2] == '*': p[0] = p[1] * p[3]
+    elif p[2] == '/':
+        if p[3] == 0:
+            print("Division by zero at line %d" % p.lineno(2))
+            raise SyntaxError
+        p[0] = p[1] // p[3]
+
+def p_expression_uminus(p):
+    'expression : MINUS expression %prec UMINUS'
+    p[0] = -p[2]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_empty(p):
+    'empty :'
+
+def p_error(p):
+    print("Syntax error at %r" % (p.value if p else None))
+
+parser = yacc.yacc(debug=False, write_tables=False)
+generated = yacc.yacc(debug=False, write_tables=False, codegen='calccode')
+print(os.path.exists('calccode.py'), 'parseopt_notrack' in generated.__dict__)
+
+# Written to calccode.py, then imported from there
+written = yacc.yacc(debug=False, tabmodule='calccodetab', codegen='calccode')
+print(os.path.exists('calccode.py'), 'calccode' in sys.modules)
+imported = yacc.yacc(debug=False, tabmodule='calccodetab', codegen='calccode')
+print(os.path.exists('calccode.py'), 'calccode' in sys.modules)
+
+data = "a = 2 * (3 + 4)\nb = -a + 1 +\nc = 8 / 0\nd = 1 )\ne = (10 - 4) / 3"
+for p in (parser, generated, written, imported):
+    print(p.parse(data, lexer=calclex.lexer.clone()))
+
+# Debugging and tracking use the generic engine
+print(generated.parse(data, lexer=calclex.lexer.clone(), tracking=True))
+print(generated.parse(data, lexer=calclex.lexer.clone(), debug=yacc.NullLogger()))
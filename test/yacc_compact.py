@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# yacc_compact.py
+#
+# Parsing with the action and goto tables packed into arrays
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = [p[1]]
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], None)
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if p[2] == '+'  : p[0] = p[1] + p[3]
+    elif p[2] == '-': p[0] = p[1] - p[3]
+    elif p[2] == '*': p[0] = p[1] * p[3]
+    elif p[2] == '/': p[0] = p[1] // p[3]
+
+def p_expression_uminus(p):
+    'expression : MINUS expression %prec UMINUS'
+    p[0] = -p[2]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    print("Syntax error at %r" % (p.value if p else None))
+
+parser = yacc.yacc(debug=False, write_tables=False)
+compact = yacc.yacc(debug=False, tabmodule='compacttab', compact=True)
+print(parser.compact is None, compact.action is None)
+
+# The packed tables hold the same actions and gotos
+action, goto = compact.compact.expand()
+print(action == parser.action, goto == parser.goto)
+print(compact.defaulted_states == parser.defaulted_states)
+
+# Read back from the table file, with and without compact=True
+reread = yacc.yacc(debug=False, tabmodule='compacttab', compact=True)
+expanded = yacc.yacc(debug=False, tabmodule='compacttab')
+print(reread.compact.expand() == (parser.action, parser.goto))
+print(expanded.action == parser.action, expanded.goto == parser.goto)
+
+data = "a = 2 * (3 + 4)\nb = -a + 1 +\nc = 8 / 2 - 1 )\nd = 1"
+for p in (parser, compact, reread, expanded):
+    print(p.parse(data, lexer=calclex.lexer.clone()))
+print(compact.parse(data, lexer=calclex.lexer.clone(), tracking=True))
+print(compact.parse(data, lexer=calclex.lexer.clone(), debug=yacc.NullLogger()))
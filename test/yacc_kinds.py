@@ -0,0 +1,131 @@
+# -----------------------------------------------------------------------------
+# yacc_kinds.py
+#
+# Parsing with integer token kinds.  The results must be the same as parsing
+# with token type names.
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = [p[1]]
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], 'error')
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if p[2] == '+'  : p[0] = p[1] + p[3]
+    elif p[2] == '-': p[0] = p[1] - p[3]
+    elif p[2] == '*': p[0] = p[1] * p[3]
+    elif p[2] == '/': p[0] = p[1] // p[3]
+
+def p_expression_uminus(p):
+    'expression : MINUS expression %prec UMINUS'
+    p[0] = -p[2]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+# When set, p_error() puts a PLUS token in place of a stray EQUALS
+replace = False
+
+def p_error(p):
+    if replace and p and p.type == 'EQUALS':
+        tok = lex.LexToken()
+        tok.type = 'PLUS'
+        tok.value = '+'
+        tok.lineno = p.lineno
+        tok.lexpos = p.lexpos
+        yacc.errok()
+        return tok
+
+data = "a = 1 + 2 * 3\nb = -(4 - 1) / 3\nc = 2 + * 3\nd = 7"
+
+plain = lex.lex(module=calclex)
+kinds = lex.lex(module=calclex, kinds=True)
+kinds.input("x = 3")
+print([(t.type, t.kind, kinds.lexkindnames[t.kind]) for t in kinds])
+
+parser = yacc.yacc(debug=False, write_tables=False)
+expected = parser.parse(data, lexer=plain)
+print(expected)
+print(parser.parse(data, lexer=kinds) == expected)
+print(parser.parse(data, lexer=kinds, tracking=True) == expected)
+print(parser.parse(data, lexer=kinds, debug=yacc.NullLogger()) == expected)
+print(parser.parse(data, lexer=plain) == expected)
+print(parser.kindnames == kinds.lexkindnames)
+
+# The version of the parsing loop is picked once for each parse
+LRParser = yacc.LRParser
+print(parser.parsefunc(kinds, None, False) == LRParser.parseopt_notrack_kinds,
+      parser.parsefunc(kinds, None, True) == LRParser.parseopt_kinds,
+      parser.parsefunc(kinds, kinds.token, False) == LRParser.parseopt_notrack,
+      parser.parsefunc(plain, None, True) == LRParser.parseopt)
+
+packed = yacc.yacc(debug=False, write_tables=False, compact=True)
+print(packed.parse(data, lexer=kinds) == expected, packed.parse(data, lexer=kinds, tracking=True) == expected,
+      packed.parsefunc(kinds, None, False) == LRParser.parseopt_notrack_compact)
+
+try:
+    parser.set_kinds(['NAME', 'NUMBER'])
+except ValueError as e:
+    print(e)
+
+# Compact tokens have a slot for the kind id
+compact = lex.lex(module=calclex, kinds=True, compact=True)
+print(parser.parse(data, lexer=compact) == expected)
+
+# Generated parser code indexes its actions by kind id too
+generated = yacc.yacc(debug=False, write_tables=False)
+yacc.bind_parser_code(generated, 'yacc_kindscode', globals())
+print(generated.parse(data, lexer=kinds) == expected, generated.parse(data, lexer=plain) == expected,
+      generated.parse(data, lexer=compact) == expected)
+
+# Tokens returned by p_error() get a kind id from the parser
+replace = True
+data = "a = 2 = 3\nb = 7"
+expected = parser.parse(data, lexer=plain)
+print(expected)
+print(parser.parse(data, lexer=kinds) == expected, parser.parse(data, lexer=kinds, tracking=True) == expected,
+      parser.parse(data, lexer=compact) == expected, generated.parse(data, lexer=kinds) == expected)
+replace = False
+
+class SlotToken(object):
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+try:
+    lex.lex(module=calclex, kinds=True, tokenclass=SlotToken)
+except ValueError as e:
+    print(e)
@@ -0,0 +1,34 @@
+# -----------------------------------------------------------------------------
+# yacc_lineindex.py
+#
+# Line numbers and columns in grammar rules and syntax error messages when the
+# lexer keeps a line index
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    print("%s at line %d, column %d, value on lines %r" % (p[1], p.lineno(1), p.column(1), p.linespan(3)))
+
+def p_expression_binop(p):
+    'expression : expression PLUS expression'
+
+def p_expression_number(p):
+    'expression : NUMBER'
+
+lexer = lex.lex(module=calclex, lineindex=True)
+parser = yacc.yacc(debug=False, write_tables=False)
+parser.parse("a = 1\n  b = 2 +\n 3\nc = 4", lexer=lexer, tracking=True)
+lexer.lineno = 1
+parser.parse("a = 1 +\n  + 2", lexer=lexer)
@@ -0,0 +1,116 @@
+# -----------------------------------------------------------------------------
+# yacc_many.py
+#
+# Parsing many separate inputs with parse_many()
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = [p[1]]
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], None)
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if p[2] == '+'  : p[0] = p[1] + p[3]
+    elif p[2] == '-': p[0] = p[1] - p[3]
+    elif p[2] == '*': p[0] = p[1] * p[3]
+    elif p[2] == '/':
+        if p[3] == 0:
+            print("Division by zero at line %d" % p.lineno(2))
+            raise SyntaxError
+        p[0] = p[1] // p[3]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_expression_name(p):
+    'expression : NAME'
+    if p[1] == 'fail':
+        raise ValueError("no value for 'fail'")
+    p[0] = len(p[1])
+
+def p_error(p):
+    if p and p.value == 99:
+        raise RuntimeError("stopped at line %d" % p.lineno)
+    print("Syntax error at %r" % (p.value if p else None))
+
+def show(result):
+    if isinstance(result, Exception):
+        return '%s: %s' % (type(result).__name__, result)
+    return repr(result)
+
+data = [
+    "a = 1 + 2\n\nb = 2 * (3 = 4",
+    "c = 2 * (",
+    "d = 8 / 0\ne = 1",
+    "f = 3 99",
+    "g = fail",
+    "h = 10 / 3",
+]
+
+parser = yacc.yacc(debug=False, write_tables=False)
+lexer = calclex.lexer.clone()
+lexer.lineno = 1
+for result in parser.parse_many(data, lexer=lexer):
+    print(show(result))
+
+# The same as parse() in a loop
+results = []
+for item in data:
+    lexer.lineno = 1
+    try:
+        results.append(parser.parse(item, lexer=lexer))
+    except Exception as e:
+        results.append(e)
+print([show(r) for r in results] == [show(r) for r in parser.parse_many(data, lexer=lexer)])
+
+# Tracking and generated parser code call parse() for each input
+generated = yacc.yacc(debug=False, write_tables=False, codegen='manycode')
+print(parser.codegen, generated.codegen)
+print([show(r) for r in results] == [show(r) for r in parser.parse_many(data, lexer=lexer, tracking=True)])
+print([show(r) for r in results] == [show(r) for r in generated.parse_many(data, lexer=lexer)])
+
+# A tokenfunc given to parse_many() is used for every input
+seen = []
+def tokenfunc():
+    tok = lexer.token()
+    if tok:
+        seen.append(tok.type)
+    return tok
+print([show(r) for r in results] == [show(r) for r in parser.parse_many(data, lexer=lexer, tokenfunc=tokenfunc)])
+print(seen.count('NUMBER'))
+del seen[:]
+print([show(r) for r in results] == [show(r) for r in parser.parse_many(data, lexer=lexer, tracking=True, tokenfunc=tokenfunc)])
+print(seen.count('NUMBER'))
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# yacc_pipeline.py
+#
+# A token pipeline given to the parser as the lexer and as the token function
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    print("%s = %r at line %d" % (p[1], p[3], p.lineno(1)))
+
+def p_expression_binop(p):
+    'expression : expression PLUS expression'
+    p[0] = p[1] + p[3]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    print("Syntax error at %r, line %d" % (p.value, p.lineno))
+
+# Turns each MINUS NUMBER into a negative NUMBER
+def negate(tokens):
+    minus = None
+    for tok in tokens:
+        if minus:
+            if tok.type == 'NUMBER':
+                tok.value = -tok.value
+            else:
+                yield minus
+            minus = None
+        elif tok.type == 'MINUS':
+            minus = tok
+            continue
+        yield tok
+    if minus:
+        yield minus
+
+lexer = calclex.lexer
+lexer.lineno = 1
+pipeline = lex.TokenPipeline(lexer, [negate])
+parser = yacc.yacc(debug=False, write_tables=False)
+parser.parse("a = 1 + -2\nb = -3", lexer=pipeline, tracking=True)
+lexer.lineno = 1
+pipeline.input("c = 4 + 5\nd = 6 -")
+parser.parse(tokenfunc=pipeline)
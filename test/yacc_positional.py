@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# yacc_positional.py
+#
+# Grammar rules marked with @positional, which take the values of the right
+# hand side as arguments and return the value of the left hand side
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.yacc as yacc
+from ply.yacc import positional
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+@positional
+def p_statements(statements, statement=None):
+    '''statements : statements statement
+                  | empty'''
+    if statement is None:
+        return []
+    return statements + [statement]
+
+@positional
+def p_statement_assign(name, equals, value):
+    'statement : NAME EQUALS expression'
+    return (name, value)
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], None)
+
+@positional
+def p_expression_binop(left, op, right):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if op == '+'  : return left + right
+    elif op == '-': return left - right
+    elif op == '*': return left * right
+    elif op == '/':
+        if right == 0:
+            print("Division by zero")
+            raise SyntaxError
+        return left // right
+
+@positional
+def p_expression_uminus(minus, value):
+    'expression : MINUS expression %prec UMINUS'
+    return -value
+
+@positional
+def p_expression_group(*args):
+    'expression : LPAREN expression RPAREN'
+    return args[1]
+
+@positional
+def p_expression_number(value):
+    'expression : NUMBER'
+    return value
+
+@positional
+def p_empty():
+    'empty :'
+
+def p_error(p):
+    print("Syntax error at %r" % (p.value if p else None))
+
+parser = yacc.yacc(debug=False, write_tables=False)
+compact = yacc.yacc(debug=False, write_tables=False, compact=True)
+generated = yacc.yacc(debug=False, write_tables=False, codegen='positionalcode')
+
+data = "a = 2 * (3 + 4)\nb = -a + 1 +\nc = 8 / 0\nd = 1 )\ne = (10 - 4) / 3"
+print(parser.parse(data, lexer=calclex.lexer.clone()))
+print(parser.parse(data, lexer=calclex.lexer.clone(), tracking=True))
+print(parser.parse(data, lexer=calclex.lexer.clone(), debug=yacc.NullLogger()))
+print(compact.parse(data, lexer=calclex.lexer.clone()))
+print(generated.parse(data, lexer=calclex.lexer.clone()))
+
+lexer = calclex.lexer.clone()
+lexer.input(data)
+p = parser.push_parser(lexer)
+for tok in lexer:
+    p.feed(tok)
+print(p.finish())
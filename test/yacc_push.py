@@ -0,0 +1,105 @@
+# -----------------------------------------------------------------------------
+# yacc_push.py
+#
+# Tokens fed to push parsers one at a time, with the same results and error
+# recovery as parse()
+# -----------------------------------------------------------------------------
+import sys
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calclex
+from calclex import tokens
+
+precedence = (
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    if len(p) == 3:
+        p[0] = p[1] + [p[2]]
+    else:
+        p[0] = [p[1]]
+
+def p_statement_assign(p):
+    'statement : NAME EQUALS expression'
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : NAME EQUALS error'
+    p[0] = (p[1], 'error at %d' % p.lineno(3))
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression'''
+    if p[2] == '+'  : p[0] = p[1] + p[3]
+    elif p[2] == '-': p[0] = p[1] - p[3]
+    elif p[2] == '*': p[0] = p[1] * p[3]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    if p:
+        print("Syntax error at %r" % p.value)
+    else:
+        print("Syntax error at end of input")
+
+lexer = calclex.lexer
+parser = yacc.yacc(debug=False, write_tables=False)
+
+def tokenize(data):
+    lexer.lineno = 1
+    lexer.input(data)
+    return list(iter(lexer.token, None))
+
+inputs = [
+    "a = 1 + 2 * 3\nb = (4 - 1) * 2",
+    "a = 1 + \nb = 2\nc = 3 3\nd = 4",
+    "a = (1 + 2",
+    "= 1\nb = 2",
+]
+
+for data in inputs:
+    toks = tokenize(data)
+    p = parser.push_parser(lexer, tracking=True)
+    for tok in toks:
+        p.feed(tok)
+    pushed = p.finish()
+    lexer.lineno = 1
+    pulled = parser.parse(data, lexer=lexer, tracking=True)
+    print(pushed)
+    print(pushed == pulled)
+
+# Several push parsers at once, fed in turn
+streams = [tokenize("x%d = %d * %d + 1" % (n, n, n)) for n in range(4)]
+parsers = [parser.push_parser(lexer) for n in range(4)]
+for k in range(max(len(s) for s in streams)):
+    for s, p in zip(streams, parsers):
+        if k < len(s):
+            p.feed(s[k])
+print([p.finish() for p in parsers])
+print([len(p.statestack) for p in parsers])
+
+# The stacks are kept between calls
+p = parser.push_parser(lexer)
+for tok in tokenize("a = 1 +"):
+    p.feed(tok)
+print([sym.type for sym in p.symstack])
+p.feed(tokenize("2")[0])
+print(p.finish())
+try:
+    p.feed(tokenize("b")[0])
+except RuntimeError as e:
+    print(e)
@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# yacc_validate.py
+#
+# Source scans for redefined rules are saved in a cache directory, and
+# validation passes can be timed.
+# -----------------------------------------------------------------------------
+from __future__ import print_function
+import sys
+import os
+import re
+import shutil
+import tempfile
+import inspect
+
+if ".." not in sys.path: sys.path.insert(0,"..")
+import ply.yacc as yacc
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from calclex import tokens
+
+def p_statement(t):
+    'statement : NAME EQUALS expression'
+
+def p_statement(t):
+    'statement : expression'
+
+def p_expression_number(t):
+    '''expression : NUMBER
+                  | NAME'''
+
+def p_error(t):
+    pass
+
+# Count the times source is read
+sources = []
+getsourcelines = inspect.getsourcelines
+def counting_getsourcelines(object):
+    sources.append(object)
+    return getsourcelines(object)
+inspect.getsourcelines = counting_getsourcelines
+
+def build():
+    log = StringIO()
+    yacc.yacc(debug=0, write_tables=0, cachedir=cachedir, timing=True, errorlog=yacc.PlyLogger(log))
+    for line in log.getvalue().splitlines():
+        if 'redefined' in line or ' took ' in line:
+            line = re.sub(r'took [0-9.]+ ms', 'took <n> ms', line)
+            print(re.sub(r'\S*yacc_validate', 'yacc_validate', line))
+
+cachedir = tempfile.mkdtemp()
+try:
+    build()
+    print(len(sources), len(os.listdir(cachedir)))
+
+    # Another process would start without the scans in memory
+    yacc._source_scans.clear()
+    build()
+    print(len(sources))
+finally:
+    inspect.getsourcelines = getsourcelines
+    shutil.rmtree(cachedir)